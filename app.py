@@ -153,6 +153,8 @@ except Exception as e:
 
 
 # --- 5. Initialize Master Control Program (MCP) ---
+from utils import store_snapshot
+
 try:
     from app_core.transformer_mcp import TransformerMCP
 
@@ -192,7 +194,8 @@ try:
                 calculated_currents = mcp_instance.calculate_nominal_currents(transformer_data)
                 log.info(f"Correntes calculadas na inicialização: {calculated_currents}")
 
-                # Atualizar os dados com as correntes calculadas
+                # Atualizar os dados com as correntes calculadas (cópia editável do snapshot)
+                transformer_data = store_snapshot.mutable(transformer_data)
                 transformer_data.update(
                     {
                         "corrente_nominal_at": calculated_currents.get("corrente_nominal_at"),
@@ -267,6 +270,44 @@ except Exception as e:
     log.critical(f"FALHA CRÍTICA ao instanciar TransformerMCP: {e}", exc_info=True)
     setattr(app, 'mcp', None)
 
+# MCP por sessão: cada navegador recebe o próprio MCP; o MCP acima passa a ser o padrão
+if getattr(app, 'mcp', None) is not None:
+    try:
+        from app_core.mcp_sessions import install_session_registry
+
+        session_backend = None
+        if config.MCP_SESSION_DB:
+            from utils.mcp_session_store import SQLiteSessionStore
+
+            session_backend = SQLiteSessionStore(config.MCP_SESSION_DB)
+            session_backend.purge_idle(config.MCP_SESSION_RETENTION_S)
+        install_session_registry(
+            app,
+            max_sessions=config.MCP_MAX_SESSIONS,
+            idle_timeout_s=config.MCP_SESSION_IDLE_TIMEOUT_S,
+            backend=session_backend,
+        )
+    except Exception as e:
+        log.error(f"Erro ao ativar MCP por sessão; usando MCP global: {e}", exc_info=True)
+
+
+# Contadores de cópia dos snapshots do MCP por requisição (ver utils/store_snapshot.py)
+@server.before_request
+def _begin_store_copy_stats():
+    store_snapshot.begin_request()
+
+
+@server.after_request
+def _log_store_copy_stats(response):
+    stats = store_snapshot.end_request()
+    if stats["reads"] or stats["writes"]:
+        log.debug(
+            f"MCP: {stats['reads']} leituras, {stats['writes']} escritas, "
+            f"{stats['bytes_copied']} bytes copiados "
+            f"(antes: {stats['bytes_copied_legacy']})"
+        )
+    return response
+
 # --- 6. Perform Usage Limit Check (modificado) ---
 # Determina se deve incrementar o contador com base no modo de execução
 deve_incrementar = not config.DEBUG_MODE or os.environ.get("WERKZEUG_RUN_MAIN") != "true"
@@ -438,7 +479,13 @@ if __name__ == "__main__":
                 if mcp_instance_exit is not None:
                     log.info("Saving MCP state to disk before exit...")
                     try:
-                        mcp_instance_exit.save_to_disk(force=True)
+                        # Com MCP por sessão, `app.mcp` fora de requisições é o MCP padrão
+                        # (estado da inicialização): grava as sessões, nunca o padrão
+                        registry = getattr(mcp_instance_exit, "registry", None)
+                        if registry is not None:
+                            registry.save_to_disk()
+                        else:
+                            mcp_instance_exit.save_to_disk(force=True, wait=True)
                         log.info("MCP state saved successfully on exit")
                     except Exception as e:
                         log.error(f"Error saving MCP state on exit: {e}", exc_info=True)
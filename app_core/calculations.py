@@ -6,15 +6,32 @@ Utiliza constantes definidas em utils.constants.
 import logging
 import math
 import re
+import time
 import warnings
 
 import numpy as np
 import pandas as pd  # Needed for buscar_valores_tabela
-from scipy.fftpack import fft, fftfreq, ifft
-from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.optimize import OptimizeWarning
 
 # Importar constantes definidas centralmente
 from utils import constants
+from utils.analysis_cache import QuantizedLRUCache, memoize_quantized
+from utils.material_tables import GridTable2D
+
+from app_core import impulse_kernel
+from app_core.impulse_kernel import (  # noqa: F401 - reexportados para compatibilidade
+    _waveform_times_batch,
+    build_adaptive_time_grid,
+    fit_double_exp_base_batch,
+    calculate_k_factor_transform,
+    double_exp_func,
+    double_exp_waveform_times,
+    is_uniform_time_grid,
+    rlc_solution,
+    rlc_solution_batch,
+    simulate_hybrid_impulse_batch,
+    simulate_impulse_circuit_batch,
+)
 
 # Assumindo que config.py está acessível, para cores por exemplo (embora cálculos não devam usar cores)
 # import config # Geralmente não necessário aqui
@@ -27,6 +44,26 @@ warnings.filterwarnings("ignore", category=RuntimeWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+# --- Cache de Simulação/Análise de Impulso ---
+# Compartilhado pela simulação híbrida, pelas funções analyze_* e pelas funções do
+# callback de simulação (callbacks/impulse.py, via `impulse_memoize`): callbacks que
+# re-renderizam com os mesmos parâmetros de circuito reutilizam o resultado.
+_IMPULSE_CACHE = QuantizedLRUCache(maxsize=constants.IMPULSE_ANALYSIS_CACHE_SIZE)
+impulse_memoize = memoize_quantized(
+    _IMPULSE_CACHE, significant_digits=constants.IMPULSE_CACHE_SIGNIFICANT_DIGITS
+)
+
+
+def get_impulse_cache_info() -> dict:
+    """Retorna acertos, faltas, descartes e ocupação do cache de impulso."""
+    return _IMPULSE_CACHE.info()
+
+
+def clear_impulse_cache() -> None:
+    """Esvazia o cache de impulso e zera seus contadores."""
+    _IMPULSE_CACHE.clear()
+
+
 # --- Funções Movidas e Refatoradas ---
 
 # === Funções de Análise de Expressão (de impulse.py) ===
@@ -154,7 +191,15 @@ def parse_resistor_expression(expression: str) -> tuple:
 
             try:
                 # Avalia a parte no ambiente seguro
-                part_value = eval(part, {"__builtins__": {}}, safe_dict)
+                if "__parallel__" in part and not re.search(r"__parallel__\s*\(", part):
+                    # Forma infixa "a || b || c": avalia cada operando e combina em paralelo
+                    operands = [
+                        eval(op, {"__builtins__": {}}, safe_dict)
+                        for op in part.split("__parallel__")
+                    ]
+                    part_value = calculate_parallel(*operands)
+                else:
+                    part_value = eval(part, {"__builtins__": {}}, safe_dict)
                 if (
                     not isinstance(part_value, (int, float))
                     or part_value < 0
@@ -502,920 +547,785 @@ def calculate_rlc_equivalent_params(
         return None
 
 
-# === Funções de Simulação da Forma de Onda (de impulse.py) ===
+def _impulse_time_targets(impulse_type: str) -> dict:
+    """Tempos nominais e tolerâncias (µs) da forma de onda alvo de cada tipo de impulso."""
+    if impulse_type == "switching":
+        return {
+            "front_nom": constants.SWITCHING_IMPULSE_PEAK_TIME_NOM,
+            "front_tol": constants.SWITCHING_PEAK_TIME_TOLERANCE,
+            "tail_nom": constants.SWITCHING_IMPULSE_TAIL_TIME_NOM,
+            "tail_tol": constants.SWITCHING_TAIL_TOLERANCE,
+            "overshoot_max": None,
+        }
+    # Impulso cortado: a frente e a onda plena subjacente seguem o LI 1.2/50
+    return {
+        "front_nom": constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM,
+        "front_tol": constants.LIGHTNING_FRONT_TOLERANCE,
+        "tail_nom": constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM,
+        "tail_tol": constants.LIGHTNING_TAIL_TOLERANCE,
+        "overshoot_max": constants.LIGHTNING_OVERSHOOT_MAX,
+    }
 
 
-def rlc_solution(
-    t_sec: np.ndarray, v0: float, r_total: float, l_total: float, c_eq: float
-) -> np.ndarray:
-    """Calcula a solução da EDO para o circuito RLC série (resposta ao degrau)."""
-    v_out = np.zeros_like(t_sec)
-    # Verifica parâmetros básicos
-    if l_total <= 1e-12 or c_eq <= 1e-15:
-        log.warning(f"Parâmetros L ou Ceq inválidos para solução RLC: L={l_total}, Ceq={c_eq}")
-        return v_out  # Retorna zeros
-    if r_total < 0:  # Resistência não pode ser negativa
-        log.warning(f"Resistência total negativa ({r_total}) inválida para solução RLC.")
-        return v_out
+def _within_tolerance(value, nominal: float, tol: float, margin: float = 1.0) -> np.ndarray:
+    """Máscara |valor/nominal - 1| <= tol·margin (NaN resulta em False)."""
+    with np.errstate(invalid="ignore"):
+        return np.abs(np.asarray(value) / nominal - 1.0) <= tol * margin
 
-    try:
-        omega0_sq = 1.0 / (l_total * c_eq)
-        alpha_damp = r_total / (2.0 * l_total) if l_total > 1e-12 else float("inf")
 
-        if alpha_damp < 0:  # Amortecimento não pode ser negativo
-            log.warning(f"Fator de amortecimento alpha_damp ({alpha_damp}) negativo inválido.")
-            return v_out
+def _rc_impulse_peak(rf, rt, c_gen, c_load) -> np.ndarray:
+    """
+    Pico (por unidade de V0) do circuito de impulso sem indutância, em forma fechada.
 
-        delta = alpha_damp**2 - omega0_sq
-        t_valid = t_sec[t_sec >= 0]  # Calcula apenas para t >= 0
+    v(t) = V0 / (Rf·Cl·(s1 - s2)) · (e^(-s2·t) - e^(-s1·t)), com s1, s2 raízes de
+    s² - s·(1/(Rf·Cl) + 1/(Rf·Cg) + 1/(Rt·Cg)) + 1/(Rf·Rt·Cg·Cl) = 0.
+    """
+    rf, rt, c_gen, c_load = (np.asarray(p, dtype=float) for p in (rf, rt, c_gen, c_load))
+    b = 1.0 / (rf * c_load) + 1.0 / (rf * c_gen) + 1.0 / (rt * c_gen)
+    c = 1.0 / (rf * rt * c_gen * c_load)
+    disc = np.sqrt(np.maximum(b**2 - 4.0 * c, 0.0))
+    s1, s2 = (b + disc) / 2.0, (b - disc) / 2.0
+    t_peak = np.log(s1 / s2) / (s1 - s2)
+    return (np.exp(-s2 * t_peak) - np.exp(-s1 * t_peak)) / (rf * c_load * (s1 - s2))
 
-        if abs(delta / omega0_sq) < 1e-6:  # Criticamente Amortecido (delta ≈ 0)
-            if alpha_damp < 1e-9:  # Praticamente não amortecido
-                omega_n = math.sqrt(omega0_sq)
-                v_out[t_sec >= 0] = v0 * np.cos(omega_n * t_valid)
-            else:
-                a = alpha_damp
-                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-            log.debug("RLC: Caso Criticamente Amortecido")
-
-        elif delta < 0:  # Subamortecido (Oscilatório)
-            omega_d = np.sqrt(-delta)
-            a = alpha_damp
-            if omega_d < 1e-6 * a:  # Próximo ao crítico
-                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-                log.debug("RLC: Caso Subamortecido (próximo ao crítico)")
-            elif a < 1e-9:  # R=0 (oscilador puro)
-                omega_n = math.sqrt(omega0_sq)
-                v_out[t_sec >= 0] = v0 * np.cos(omega_n * t_valid)
-                log.debug("RLC: Caso Subamortecido (R=0, Oscilador Puro)")
-            else:
-                cos_term = np.cos(omega_d * t_valid)
-                sin_term = (a / omega_d) * np.sin(omega_d * t_valid)
-                exp_term = np.exp(-a * t_valid)
-                v_out[t_sec >= 0] = v0 * exp_term * (cos_term + sin_term)
-                log.debug("RLC: Caso Subamortecido (Oscilatório)")
-
-        else:  # Sobreamortecido (delta > 0)
-            sqrt_delta = np.sqrt(delta)
-            s1 = -alpha_damp + sqrt_delta
-            s2 = -alpha_damp - sqrt_delta
-
-            if s1 > 1e-9 or s2 > 1e-9:
-                log.warning(
-                    f"Raízes instáveis ou zeradas na solução RLC sobreamortecida: s1={s1:.2e}, s2={s2:.2e}."
-                )
-                return np.zeros_like(t_sec)
-
-            if abs(s1 - s2) < 1e-9 * abs(s1 + s2):  # Quase criticamente amortecido
-                a = alpha_damp
-                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-                log.debug("RLC: Caso Sobreamortecido (próximo ao crítico)")
-            else:
-                exp_s1 = np.exp(s1 * t_valid)
-                exp_s2 = np.exp(s2 * t_valid)
-                v_out[t_sec >= 0] = v0 / (s1 - s2) * (s1 * exp_s2 - s2 * exp_s1)
-                log.debug("RLC: Caso Sobreamortecido")
 
-        # Limit output based on v0 (Allowing for some overshoot/undershoot)
-        v_out[v_out > v0 * 1.1] = v0 * 1.1  # Limit overshoot to 10%
-        v_out[v_out < -v0 * 0.3] = -v0 * 0.3  # Limit undershoot to 30% (adjust as needed)
+def _evaluate_impulse_batch(
+    t_sec: np.ndarray,
+    rf: np.ndarray,
+    rt: np.ndarray,
+    l_total: np.ndarray,
+    c_gen: np.ndarray,
+    c_load: np.ndarray,
+    impulse_type: str,
+    model: str = "circuit",
+) -> dict[str, np.ndarray]:
+    """
+    Simula N circuitos com tensão de carga unitária e extrai os parâmetros normativos.
+
+    model="circuit" usa a solução exata do circuito equivalente (overshoot medido contra
+    o mesmo circuito sem indutância); model="hybrid" avalia a mesma onda pelo método
+    RLC+K: T1/T2 na curva base (dupla exponencial ajustada à onda do circuito) e
+    overshoot = excesso do pico registrado sobre o pico da curva base.
+
+    Returns:
+        Dicionário com arrays front_us (T1, ou Tp para SI), tail_us (T2), overshoot
+        (fração) e efficiency (pico/V0).
+    """
+    n_rows = np.broadcast(rf, rt, l_total, c_gen, c_load).shape[0]
+    if model not in ("circuit", "hybrid"):
+        raise ValueError(f"Modelo de simulação desconhecido: {model}")
+    v_sim = simulate_impulse_circuit_batch(t_sec, 1.0, rf, rt, l_total, c_gen, c_load)
+    if model == "hybrid":
+        # A simulate_hybrid_impulse_batch ajusta a dupla exponencial à onda RLC sem Rt,
+        # cujos tempos não são comparáveis aos limites normativos
+        v_base = fit_double_exp_base_batch(t_sec, v_sim)
+        sim = _waveform_times_batch(t_sec, v_base)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            overshoot = np.maximum(np.max(v_sim, axis=1) / sim["peak"] - 1.0, 0.0)
+    else:
+        sim = _waveform_times_batch(t_sec, v_sim)
+        if impulse_type == "switching":
+            overshoot = np.zeros(n_rows)
+        else:
+            # Overshoot relativo à resposta do mesmo circuito sem indutância
+            with np.errstate(divide="ignore", invalid="ignore"):
+                v_ref_peak = _rc_impulse_peak(rf, rt, c_gen, c_load)
+                overshoot = np.maximum(sim["peak"] / v_ref_peak - 1.0, 0.0)
 
-        return v_out
-    except (ValueError, OverflowError, ZeroDivisionError) as e:
-        log.error(f"Erro na solução RLC: {e}")
-        return np.zeros_like(t_sec)
+    if impulse_type == "switching":
+        front_us, tail_us = sim["t_peak"] * 1e6, sim["t_50"] * 1e6
+    else:
+        front_us, tail_us = sim["t_front"] * 1e6, sim["t_tail"] * 1e6
+    return {
+        "front_us": front_us,
+        "tail_us": tail_us,
+        "overshoot": overshoot,
+        "efficiency": sim["peak"],
+    }
 
 
-def double_exp_func(t_sec: np.ndarray, V0_norm: float, alpha: float, beta: float) -> np.ndarray:
+def _resistor_combinations(
+    values: list[float], allow_pairs: bool = True
+) -> tuple[np.ndarray, list[str]]:
     """
-    Função de dupla exponencial normalizada V(t) = K * [exp(-alpha*t) - exp(-beta*t)],
-    onde K é ajustado para que o pico da função seja V0_norm.
-    Requer beta > alpha.
+    Valores de resistência alcançáveis com o catálogo: cada resistor isolado e, se
+    `allow_pairs`, todos os pares em série ("a + b") e em paralelo ("a || b").
+    As expressões são compatíveis com `parse_resistor_expression`.
     """
-    v_out = np.zeros_like(t_sec)
-    if alpha <= 0 or beta <= 0:
-        log.warning(
-            f"Alpha ({alpha}) ou Beta ({beta}) inválido (não positivo) para dupla exponencial."
+    values = sorted(float(v) for v in values)
+    resistances = list(values)
+    expressions = [f"{v:g}" for v in values]
+    if allow_pairs:
+        for i, r1 in enumerate(values):
+            for r2 in values[i:]:
+                resistances.append(r1 + r2)
+                expressions.append(f"{r1:g} + {r2:g}")
+                resistances.append(r1 * r2 / (r1 + r2))
+                expressions.append(f"{r1:g} || {r2:g}")
+    return np.asarray(resistances), expressions
+
+
+def _pareto_front_mask(*objectives: np.ndarray) -> np.ndarray:
+    """Máscara dos pontos não dominados (todos os objetivos são maximizados)."""
+    points = np.column_stack(objectives)
+    n_points = points.shape[0]
+    dominated = np.zeros(n_points, dtype=bool)
+    for i in range(n_points):
+        if dominated[i]:
+            continue
+        better_eq = np.all(points >= points[i], axis=1)
+        strictly = np.any(points > points[i], axis=1)
+        if np.any(better_eq & strictly):
+            dominated[i] = True
+    return ~dominated
+
+
+def optimize_impulse_circuit(
+    c_dut_pf: float,
+    test_voltage_kv: float,
+    impulse_type: str = "lightning",
+    c_stray_pf: float = 0.0,
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+    max_results: int = 10,
+    max_simulations: int = 400,
+    prune_margin: float = 1.5,
+    n_points: int = 4000,
+    allow_resistor_pairs: bool = True,
+) -> list[dict]:
+    """
+    Busca automática (projeto inverso) de configuração do gerador, Rf, Rt e indutor
+    para atingir a forma de onda normalizada do tipo de impulso.
+
+    1. Monta a grade completa (GENERATOR_CONFIGURATIONS x resistores x INDUCTORS_OPTIONS),
+       incluindo pares série/paralelo do catálogo de resistores.
+    2. Poda com as formas fechadas de `calculate_rlc_equivalent_params` (α, β, ζ): tempos
+       T1/T2 (ou Tp/T2 para SI) dentro de `prune_margin` vezes a tolerância, overshoot
+       estimado pelo amortecimento, tensão de carga e energia dentro da capacidade.
+    3. Simula apenas os sobreviventes (no máximo `max_simulations`, mais próximos dos
+       tempos nominais) com `simulate_impulse_circuit_batch` e verifica as tolerâncias
+       normativas na forma de onda resultante.
+    4. Retorna a frente de Pareto dos viáveis por eficiência e margem de energia.
+
+    Args:
+        c_dut_pf: Capacitância do objeto sob ensaio em pF.
+        test_voltage_kv: Tensão de ensaio (pico) em kV.
+        impulse_type: "lightning", "switching" ou "chopped" (a onda plena segue o LI).
+        c_stray_pf: Capacitância parasita em pF.
+        l_extra_h, l_transformer_h: Indutâncias adicionais em série (H).
+        max_results: Número máximo de configurações retornadas.
+        max_simulations: Limite de candidatos simulados após a poda.
+        prune_margin: Fator de alargamento das tolerâncias na etapa de poda.
+        n_points: Pontos do vetor de tempo da simulação.
+        allow_resistor_pairs: Se False, usa apenas resistores isolados do catálogo.
+
+    Returns:
+        Lista de dicionários ordenada por eficiência decrescente, cada um com
+        config_value, rf_expression, rt_expression (por coluna), rf_per_column,
+        rt_per_column, inductor_h, t_front_us, t_tail_us,
+        overshoot_percent, efficiency, charging_voltage_kv, energy_required_kj,
+        energy_margin_percent e voltage_margin_percent. Lista vazia se nada for viável.
+    """
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        log.error(f"Tipo de impulso inválido para otimização: {impulse_type}")
+        return []
+    if c_dut_pf is None or test_voltage_kv is None or test_voltage_kv <= 0:
+        log.error("Capacitância do objeto e tensão de ensaio são obrigatórias para otimização.")
+        return []
+
+    target = _impulse_time_targets(impulse_type)
+    is_si = impulse_type == "switching"
+    rf_values, rf_exprs = _resistor_combinations(
+        [
+            item["value"]
+            for item in (
+                constants.RESISTORS_SI_FRONT_AVAILABLE
+                if is_si
+                else constants.RESISTORS_LI_FRONT_AVAILABLE
+            )
+        ],
+        allow_resistor_pairs,
+    )
+    rt_values, rt_exprs = _resistor_combinations(
+        [
+            item["value"]
+            for item in (
+                constants.RESISTORS_SI_TAIL_AVAILABLE
+                if is_si
+                else constants.RESISTORS_LI_TAIL_AVAILABLE
+            )
+        ],
+        allow_resistor_pairs,
+    )
+    inductors = (
+        [0.0]
+        if impulse_type == "switching"
+        else [float(item["value"]) for item in constants.INDUCTORS_OPTIONS]
+    )
+    grids = []
+    for l_ind in inductors:
+        grid = build_impulse_parameter_grid(
+            c_dut_pf,
+            c_stray_pf,
+            impulse_type,
+            l_extra_h,
+            l_transformer_h,
+            l_ind,
+            rf_values=rf_values,
+            rt_values=rt_values,
         )
-        return v_out
-    if beta <= alpha + 1e-9 * alpha:  # Adiciona tolerância relativa
-        log.warning(
-            f"Beta ({beta:.3e}) deve ser maior que Alpha ({alpha:.3e}) para dupla exponencial."
+        grid["inductor_h"] = np.full(grid["rf_total"].shape, l_ind)
+        # Índices dos resistores na ordem do meshgrid (config, Rf, Rt)
+        n_rf, n_rt = len(rf_values), len(rt_values)
+        flat = np.arange(grid["rf_total"].size)
+        grid["rf_index"] = (flat // n_rt) % n_rf
+        grid["rt_index"] = flat % n_rt
+        grids.append(grid)
+    grid = {key: np.concatenate([g[key] for g in grids]) for key in grids[0]}
+    n_total = grid["rf_total"].size
+
+    # --- Etapa 1: poda por formas fechadas ---
+    c_gen, c_load = grid["c_gen"], grid["c_load"]
+    c_eq = c_gen * c_load / (c_gen + c_load)
+    alpha = 1.0 / (grid["rt_total"] * (c_gen + c_load))
+    beta = 1.0 / (grid["rf_total"] * c_eq)
+    times = double_exp_waveform_times(alpha, beta)
+    if impulse_type == "switching":
+        front_us, tail_us = times["t_peak"] * 1e6, times["t_50"] * 1e6
+    else:
+        front_us, tail_us = times["t_front"] * 1e6, times["t_tail"] * 1e6
+
+    keep = _within_tolerance(front_us, target["front_nom"], target["front_tol"], prune_margin)
+    keep &= _within_tolerance(tail_us, target["tail_nom"], target["tail_tol"], prune_margin)
+
+    omega0 = 1.0 / np.sqrt(grid["l_total"] * c_eq)
+    zeta = (grid["rf_total"] + constants.R_PARASITIC_OHM) / (2.0 * grid["l_total"] * omega0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        overshoot_est = np.where(
+            zeta < 1.0, np.exp(-np.pi * zeta / np.sqrt(np.maximum(1 - zeta**2, 1e-12))), 0.0
         )
-        return v_out
-    # Allow negative V0_norm, as it might represent negative polarity pulses
-    # if V0_norm < 0:
-    #      log.warning(f"V0_norm ({V0_norm}) negativo não usual para dupla exponencial padrão.")
+    if target["overshoot_max"] is not None:
+        keep &= overshoot_est <= target["overshoot_max"] * prune_margin
+
+    shape_eff = 0.95 if impulse_type in ["lightning", "chopped"] else 0.85
+    eff_est = c_gen / (c_gen + c_load) * shape_eff
+    v0_est_kv = test_voltage_kv / eff_est
+    keep &= v0_est_kv <= grid["max_voltage_kv"] * prune_margin
+    keep &= 0.5 * c_gen * (v0_est_kv * 1e3) ** 2 / 1e3 <= grid["energy_kj"] * prune_margin
+
+    candidates = np.flatnonzero(keep)
+    log.info(
+        f"Otimização de impulso ({impulse_type}): {n_total} combinações, "
+        f"{candidates.size} após poda por formas fechadas."
+    )
+    if candidates.size == 0:
+        return []
+    if candidates.size > max_simulations:
+        distance = np.abs(np.log(front_us / target["front_nom"])) + np.abs(
+            np.log(tail_us / target["tail_nom"])
+        )
+        candidates = candidates[np.argsort(distance[candidates])[:max_simulations]]
+
+    # --- Etapa 2: simulação dos candidatos ---
+    t_end_s = target["tail_nom"] * (1 + target["tail_tol"]) * 3e-6
+    t_sec = np.linspace(0.0, t_end_s, n_points)
+    sel = {key: val[candidates] for key, val in grid.items()}
+    sim = _evaluate_impulse_batch(
+        t_sec,
+        sel["rf_total"],
+        sel["rt_total"],
+        sel["l_total"],
+        sel["c_gen"],
+        sel["c_load"],
+        impulse_type,
+    )
+    efficiency = sim["efficiency"]
+    front_sim, tail_sim, overshoot_sim = sim["front_us"], sim["tail_us"], sim["overshoot"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v0_kv = test_voltage_kv / efficiency
+        energy_req_kj = 0.5 * sel["c_gen"] * (v0_kv * 1e3) ** 2 / 1e3
+        energy_margin = (sel["energy_kj"] - energy_req_kj) / sel["energy_kj"]
+        voltage_margin = (sel["max_voltage_kv"] - v0_kv) / sel["max_voltage_kv"]
+
+    feasible = _within_tolerance(front_sim, target["front_nom"], target["front_tol"], 1.0)
+    feasible &= _within_tolerance(tail_sim, target["tail_nom"], target["tail_tol"], 1.0)
+    feasible &= (efficiency > 0) & (energy_margin >= 0) & (voltage_margin >= 0)
+    if target["overshoot_max"] is not None:
+        feasible &= overshoot_sim <= target["overshoot_max"]
+    feasible &= np.isfinite(front_sim) & np.isfinite(tail_sim)
+
+    idx = np.flatnonzero(feasible)
+    log.info(f"Otimização de impulso: {candidates.size} simulados, {idx.size} viáveis.")
+    if idx.size == 0:
+        return []
+
+    front_mask = _pareto_front_mask(efficiency[idx], energy_margin[idx])
+    best = idx[front_mask]
+    best = best[np.argsort(-efficiency[best])][:max_results]
+
+    return [
+        {
+            "config_value": str(sel["config_value"][i]),
+            "rf_expression": rf_exprs[sel["rf_index"][i]],
+            "rt_expression": rt_exprs[sel["rt_index"][i]],
+            "rf_per_column": float(sel["rf_per_column"][i]),
+            "rt_per_column": float(sel["rt_per_column"][i]),
+            "inductor_h": float(sel["inductor_h"][i]),
+            "t_front_us": float(front_sim[i]),
+            "t_tail_us": float(tail_sim[i]),
+            "overshoot_percent": float(overshoot_sim[i] * 100.0),
+            "efficiency": float(efficiency[i]),
+            "charging_voltage_kv": float(v0_kv[i]),
+            "energy_required_kj": float(energy_req_kj[i]),
+            "energy_margin_percent": float(energy_margin[i] * 100.0),
+            "voltage_margin_percent": float(voltage_margin[i] * 100.0),
+        }
+        for i in best
+    ]
 
-    try:
-        t_peak = math.log(beta / alpha) / (beta - alpha)
-        val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
 
-        if abs(val_at_peak) < 1e-12:
-            log.warning(
-                "Valor no pico da dupla exponencial próximo de zero. Não é possível normalizar."
-            )
-            return v_out
+def _monte_carlo_chunk(
+    t_sec: np.ndarray, samples: dict, c_fixed: float, impulse_type: str, model: str
+) -> dict[str, np.ndarray]:
+    """
+    Avalia um bloco de amostras de Monte Carlo (capacitâncias em F); `c_fixed` é a
+    parte da carga sem tolerância (divisor e gap de corte).
+    """
+    return _evaluate_impulse_batch(
+        t_sec,
+        samples["rf"],
+        samples["rt"],
+        samples["l_total"],
+        samples["c_gen"],
+        samples["c_dut"] + samples["c_stray"] + c_fixed,
+        impulse_type,
+        model,
+    )
 
-        k_norm = V0_norm / val_at_peak
-        t_valid = np.maximum(t_sec, 0)
-        exp_alpha = np.exp(-alpha * t_valid)
-        exp_beta = np.exp(-beta * t_valid)
-        v_out = k_norm * (exp_alpha - exp_beta)
-        return v_out
 
-    except (ValueError, OverflowError, ZeroDivisionError) as e:
-        log.error(f"Erro na função dupla exponencial: {e}")
-        return np.zeros_like(t_sec)
+def _rank_correlation(x: np.ndarray, y: np.ndarray) -> float:
+    """Correlação de Spearman (Pearson dos postos) entre dois vetores; 0 se degenerado."""
+    rx = np.argsort(np.argsort(x)).astype(float)
+    ry = np.argsort(np.argsort(y, kind="stable")).astype(float)
+    if np.std(rx) < 1e-12 or np.std(ry) < 1e-12:
+        return 0.0
+    return float(np.corrcoef(rx, ry)[0, 1])
 
 
-def calculate_k_factor_transform(
-    v_kv: np.ndarray, t_us: np.ndarray, return_params: bool = False
-) -> tuple:
+def monte_carlo_impulse_tolerance(
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_dut_pf: float,
+    c_stray_pf: float = 0.0,
+    impulse_type: str = "lightning",
+    config_value: str | None = None,
+    c_divider_f: float | None = None,
+    n_samples: int = 5000,
+    tolerances: dict | None = None,
+    distribution: str = "uniform",
+    model: str = "circuit",
+    seed: int | None = None,
+    chunk_size: int = 1000,
+) -> dict:
     """
-    Aplica a transformação K-factor (IEC 61083-2) a uma forma de onda de impulso.
+    Análise de Monte Carlo da conformidade do ensaio de impulso frente às tolerâncias
+    dos componentes.
+
+    Sorteia `n_samples` circuitos perturbados em torno dos valores nominais, simula-os em
+    lote (`_evaluate_impulse_batch`) e verifica T1/T2 (Tp/T2 para SI) e overshoot contra
+    os limites de utils.constants. A avaliação é vetorizada em blocos de `chunk_size`
+    amostras (20 000 amostras LI levam ~2,5 s em um núcleo).
 
     Args:
-        v_kv: Array de tensão em kV.
-        t_us: Array de tempo em µs.
-        return_params: Se True, retorna também os parâmetros alpha e beta ajustados.
+        rf, rt: Resistências totais de frente e cauda (Ohm).
+        l_total: Indutância total do circuito (H).
+        c_gen: Capacitância do gerador (F).
+        c_dut_pf, c_stray_pf: Capacitâncias do objeto sob ensaio e parasita em pF, como
+            em `optimize_impulse_circuit`.
+        impulse_type: "lightning", "switching" ou "chopped" (avalia a onda plena LI).
+        config_value: Configuração do gerador (ex.: "6S-2P"); define a capacitância do
+            divisor pela tensão máxima, como em `build_impulse_parameter_grid`.
+        c_divider_f: Capacitância do divisor em F; substitui a obtida de `config_value`.
+            A carga soma ainda C_CHOPPING_GAP_F no impulso cortado, como na otimização.
+        n_samples: Número de circuitos sorteados.
+        tolerances: Meia-largura relativa por parâmetro (rf, rt, l_total, c_gen, c_dut,
+            c_stray); ausentes usam constants.IMPULSE_COMPONENT_TOLERANCES.
+        distribution: "uniform" (±tol) ou "normal" (tol = 3σ, truncada em ±tol).
+        model: "circuit" (circuito equivalente exato) ou "hybrid" (mesmo circuito avaliado
+            pelo método RLC+K: tempos e overshoot sobre a curva base ajustada).
+        seed: Semente do gerador aleatório.
+        chunk_size: Amostras por bloco de avaliação (limita a memória).
 
     Returns:
-        Uma tupla contendo:
-        - v_test_kv (np.ndarray): Onda de ensaio filtrada.
-        - v_base_kv (np.ndarray): Curva base (dupla exponencial ajustada).
-        - v_residual_filtered (np.ndarray): Resíduo filtrado.
-        - overshoot_rel (float): Overshoot relativo em %.
-        - (alpha_fit, beta_fit) (tuple | None): Parâmetros ajustados, se return_params=True.
+        Dicionário com pass_probability e seu intervalo de 95% (Wilson), taxa de
+        aprovação por critério, estatísticas de T1/T2/overshoot/eficiência, resultado
+        nominal e sensibilidade (correlação de Spearman) de cada parâmetro com cada
+        métrica e com a aprovação. Em caso de erro, {"error": mensagem}.
     """
-    log.debug("Aplicando transformação K-Factor...")
-    v_test = np.copy(v_kv)
-    v_base = np.copy(v_kv)
-    v_residual_filtered = np.zeros_like(v_kv)
-    overshoot_rel = 0.0
-    alpha_fit, beta_fit = None, None
-    fit_success = False
-
-    # --- Validações Iniciais ---
-    if (
-        not isinstance(v_kv, np.ndarray)
-        or not isinstance(t_us, np.ndarray)
-        or v_kv.ndim != 1
-        or t_us.ndim != 1
-        or len(v_kv) != len(t_us)
-        or len(v_kv) < 10
-    ):
-        log.warning("Dados de entrada inválidos para K-factor (tamanho/tipo).")
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
-    if np.std(v_kv) < 1e-9 * np.mean(np.abs(v_kv)):
-        log.warning("Variação muito baixa na tensão para aplicar K-factor.")
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
-    if t_us[-1] <= t_us[0]:
-        log.warning("Vetor de tempo inválido (não crescente) para K-factor.")
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
-
-    peak_value_orig = np.max(v_kv)
-    if abs(peak_value_orig) < 1e-3:  # Check absolute value for negative pulses
-        log.warning(
-            f"Amplitude de pico ({peak_value_orig:.2e} kV) muito baixa para K-factor significativo."
-        )
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
+    start = time.perf_counter()
+    if c_dut_pf is None or c_stray_pf is None:
+        log.error("Capacitâncias do objeto e parasita são obrigatórias para Monte Carlo.")
+        return {"error": "Parâmetros nominais inválidos."}
+    c_dut, c_stray = c_dut_pf * 1e-12, c_stray_pf * 1e-12
+    if c_divider_f is None:
+        if config_value is None:
+            log.error("Informe config_value ou c_divider_f para o Monte Carlo de impulso.")
+            return {"error": "Configuração do gerador ou capacitância do divisor ausente."}
+        c_divider_f = get_divider_capacitance(get_generator_params(config_value)[2])
+    # Divisor e gap de corte entram na carga sem tolerância, como na grade de otimização
+    c_fixed = float(c_divider_f) + (
+        constants.C_CHOPPING_GAP_F if impulse_type == "chopped" else 0.0
+    )
+    # Chaves iguais às de constants.IMPULSE_COMPONENT_TOLERANCES (capacitâncias em F)
+    nominal = {
+        "rf": rf,
+        "rt": rt,
+        "l_total": l_total,
+        "c_gen": c_gen,
+        "c_dut": c_dut,
+        "c_stray": c_stray,
+    }
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        log.error(f"Tipo de impulso inválido para Monte Carlo: {impulse_type}")
+        return {"error": f"Tipo de impulso inválido: {impulse_type}"}
+    if any(v is None or v < 0 for v in nominal.values()) or min(rf, rt, l_total, c_gen) <= 0:
+        log.error(f"Parâmetros nominais inválidos para Monte Carlo: {nominal}")
+        return {"error": "Parâmetros nominais inválidos."}
+    if distribution not in ["uniform", "normal"] or model not in ["circuit", "hybrid"]:
+        log.error(f"Distribuição/modelo inválidos: {distribution}/{model}")
+        return {"error": f"Distribuição/modelo inválidos: {distribution}/{model}"}
+    n_samples = max(int(n_samples), 1)
+
+    tol = dict(constants.IMPULSE_COMPONENT_TOLERANCES)
+    tol.update(tolerances or {})
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for name, value in nominal.items():
+        half_width = float(tol.get(name, 0.0))
+        if distribution == "uniform":
+            delta = rng.uniform(-half_width, half_width, n_samples)
+        else:
+            delta = np.clip(rng.normal(0.0, half_width / 3.0, n_samples), -half_width, half_width)
+        samples[name] = value * (1.0 + delta)
+
+    # Grade adaptativa em torno do pico nominal, compartilhada por todas as amostras
+    target = _impulse_time_targets(impulse_type)
+    c_load_nom = c_dut + c_stray + c_fixed
+    c_eq_nom = c_gen * c_load_nom / (c_gen + c_load_nom) if c_load_nom > 0 else c_gen
+    t_peak_nom = double_exp_waveform_times(
+        1.0 / (rt * (c_gen + c_load_nom)), 1.0 / (rf * c_eq_nom)
+    )
+    t_end_s = target["tail_nom"] * (1 + target["tail_tol"]) * 3e-6
+    # Grade reduzida: T1/T2 são interpolados, então ~800 pontos bastam
+    t_sec = build_adaptive_time_grid(
+        t_end_s, float(t_peak_nom["t_peak"]), n_dense=500, n_tail=300
+    )
 
-    # --- 1. Ajuste da Curva Base (Dupla Exponencial) ---
-    try:
-        t_sec = t_us * 1e-6
-        peak_idx = np.argmax(v_kv)
-        t_peak_sec = t_sec[peak_idx]
-
-        # Find t_half (time to 50% on the tail) - more robustly
-        v_half_target = 0.5 * peak_value_orig
-        indices_after_peak = np.where(t_sec >= t_peak_sec)[0]
-        if len(indices_after_peak) < 2:  # Need at least two points for interpolation
-            raise ValueError("Not enough data points after peak to find t_half.")
-
-        v_after_peak = v_kv[indices_after_peak]
-        t_after_peak = t_sec[indices_after_peak]
-
-        # Find where voltage drops below 50% target
-        # Handle cases where voltage might oscillate around 50%
-        crossed_indices = np.where(np.diff(np.sign(v_after_peak - v_half_target)))[0]
-        t_half_sec = t_sec[-1]  # Default to last time if it never drops below 50%
-        if len(crossed_indices) > 0:
-            # Find the first crossing index after the peak
-            first_cross_idx = crossed_indices[0]
-            idx1 = first_cross_idx
-            idx2 = first_cross_idx + 1
-            if idx1 < len(t_after_peak) and idx2 < len(t_after_peak):
-                t1_tail, v1_tail = t_after_peak[idx1], v_after_peak[idx1]
-                t2_tail, v2_tail = t_after_peak[idx2], v_after_peak[idx2]
-                if abs(v2_tail - v1_tail) > 1e-9:  # Avoid division by zero
-                    t_half_sec = t1_tail + (v_half_target - v1_tail) * (t2_tail - t1_tail) / (
-                        v2_tail - v1_tail
-                    )
-                elif v1_tail >= v_half_target:  # If already at or above the point
-                    t_half_sec = t1_tail
-                else:  # If v2_tail is the point or below
-                    t_half_sec = t2_tail
-            else:
-                log.warning("Indices for t_half interpolation out of bounds.")
-        elif np.all(v_after_peak > v_half_target):
-            log.warning("Voltage never dropped below 50% on tail.")
-            t_half_sec = t_sec[-1]  # Use last time point
-
-        # Estimate initial parameters
-        T2_approx_sec = max(1.4 * t_half_sec, 5e-6)
-        T1_approx_sec = max(t_peak_sec, 0.5e-6) if t_peak_sec > 0 else 1e-6
-        alpha_est = 1.0 / T2_approx_sec
-        beta_est = 2.0 / T1_approx_sec
-        if beta_est <= alpha_est:
-            beta_est = alpha_est * 5
-        A_est = peak_value_orig
-
-        def _double_exp_fit_func(t, A_norm, alpha, beta):
-            try:
-                if alpha <= 0 or beta <= 0 or beta <= alpha + 1e-9 * alpha:
-                    return np.full_like(t, 1e12)
-                t_peak = math.log(beta / alpha) / (beta - alpha)
-                val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
-                if abs(val_at_peak) < 1e-12:
-                    return np.zeros_like(t)
-                k_norm = A_norm / val_at_peak
-                t_safe = np.maximum(t, 0)
-                res = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-                return res
-            except (ValueError, OverflowError, ZeroDivisionError):
-                return np.full_like(t, 1e12)
-
-        # Adjust bounds based on sign of A_est
-        if A_est > 0:
-            lower_bounds = [A_est * 0.5, alpha_est * 0.1, beta_est * 0.1]
-            upper_bounds = [A_est * 1.5, alpha_est * 10, beta_est * 10]
-        else:  # Negative pulse
-            lower_bounds = [A_est * 1.5, alpha_est * 0.1, beta_est * 0.1]  # A_est is negative
-            upper_bounds = [A_est * 0.5, alpha_est * 10, beta_est * 10]  # A_est is negative
-
-        p0 = [A_est, alpha_est, beta_est]
-
-        popt, pcov = curve_fit(
-            _double_exp_fit_func,
+    chunk_size = max(int(chunk_size), 1)
+    results = [
+        _monte_carlo_chunk(
             t_sec,
-            v_kv,
-            p0=p0,
-            bounds=(lower_bounds, upper_bounds),
-            maxfev=5000,
-            method="trf",
-        )
-
-        A_fit, alpha_fit, beta_fit = popt
-        log.debug(
-            f"Ajuste Curva Base K-Factor: A={A_fit:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
+            {k: v[i : i + chunk_size] for k, v in samples.items()},
+            c_fixed,
+            impulse_type,
+            model,
         )
-        v_base = _double_exp_fit_func(t_sec, A_fit, alpha_fit, beta_fit)
-        fit_success = True
+        for i in range(0, n_samples, chunk_size)
+    ]
+    sim = {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+    sim_nominal = _monte_carlo_chunk(
+        t_sec, {k: np.array([v]) for k, v in nominal.items()}, c_fixed, impulse_type, model
+    )
 
-    except (RuntimeError, ValueError, OptimizeWarning, Exception) as e:
-        log.warning(
-            f"Ajuste da curva base para K-Factor falhou: {e}. Usando onda original como base."
-        )
-        v_base = np.copy(v_kv)  # Use original as base if fit fails
-        alpha_fit, beta_fit = None, None
-        fit_success = False
-
-    # --- 2. Cálculo do Resíduo ---
-    v_residual = v_kv - v_base  # This is kV
-
-    # --- 3. Filtragem do Resíduo (Filtro K) ---
-    if fit_success and len(t_us) > 1:
-        dt_us = np.mean(np.diff(t_us))
-        if dt_us > 1e-9:
-            dt_sec = dt_us * 1e-6
-            try:
-                frequencies = fftfreq(len(t_us), dt_sec)
-                v_residual_fft = fft(v_residual)
-
-                # IEC 61083-2 filter K(f) = 1 / (1 + (f / fc)^2)^n
-                # Parameters: fc = 0.2 MHz, n = 1.1
-                fc_mhz = 0.2
-                n_filter = 1.1
-                f_mhz = np.abs(frequencies) * 1e-6
-
-                # Calculate |K(f)|^2 = 1 / (1 + (f/fc)^2)^(2n)
-                filter_power = np.ones_like(frequencies, dtype=float)
-                non_zero_freq_mask = f_mhz > 1e-12
-                denominator = 1.0 + (f_mhz[non_zero_freq_mask] / fc_mhz) ** 2
-                # Add small epsilon to avoid issues with denominator near 1 if needed
-                filter_power[non_zero_freq_mask] = 1.0 / (denominator ** (2 * n_filter) + 1e-18)
-
-                # Apply the amplitude filter K(f) = sqrt(|K(f)|^2)
-                k_filter_amplitude = np.sqrt(filter_power + 0j)
-                v_residual_filtered_fft = v_residual_fft * k_filter_amplitude
-                v_residual_filtered = np.real(ifft(v_residual_filtered_fft))
-
-            except Exception as e_fft:
-                log.error(
-                    f"Erro durante FFT/Filtragem/IFFT no K-factor: {e_fft}. Resíduo filtrado será zero."
-                )
-                v_residual_filtered = np.zeros_like(v_residual)
-        else:
-            log.warning(
-                "Passo de tempo inválido ou ajuste base falhou. Resíduo filtrado K-factor será zero."
-            )
-            v_residual_filtered = np.zeros_like(v_residual)
-    else:  # If fit failed
-        v_residual_filtered = np.zeros_like(v_residual)
-
-    # --- 4. Cálculo da Onda de Ensaio Vt(t) ---
-    v_test = v_base + v_residual_filtered
-    # Keep negative values if the pulse is negative polarity
-    # v_test = np.maximum(v_test, 0) # Remove this line
-
-    # --- 5. Cálculo do Overshoot ---
-    peak_value_base = np.max(np.abs(v_base)) if len(v_base) > 0 else 0
-    # Overshoot = max(v_residual) / |peak_base| * 100%
-    if peak_value_base > 1e-9:
-        max_residual = np.max(v_residual)  # Use the actual residual, not filtered
-        overshoot_rel = max(0.0, (max_residual / peak_value_base)) * 100.0
-        log.debug(
-            f"Overshoot K-Factor: Vp_orig={peak_value_orig:.2f}, Vp_base={np.max(v_base):.2f}, MaxRes={max_residual:.2f} => Overshoot={overshoot_rel:.1f}%"
+    def _checks(res: dict) -> dict[str, np.ndarray]:
+        checks = {
+            "front": _within_tolerance(res["front_us"], target["front_nom"], target["front_tol"]),
+            "tail": _within_tolerance(res["tail_us"], target["tail_nom"], target["tail_tol"]),
+        }
+        if target["overshoot_max"] is not None:
+            checks["overshoot"] = res["overshoot"] <= target["overshoot_max"]
+        return checks
+
+    checks = _checks(sim)
+    passes = np.logical_and.reduce(list(checks.values()))
+    valid = np.isfinite(sim["front_us"]) & np.isfinite(sim["tail_us"])
+    n_valid = int(np.count_nonzero(valid))
+
+    # Intervalo de Wilson (95%) para a probabilidade de aprovação
+    z = 1.96
+    p_hat = float(np.mean(passes))
+    denom = 1.0 + z**2 / n_samples
+    center = (p_hat + z**2 / (2 * n_samples)) / denom
+    half = z * math.sqrt(p_hat * (1 - p_hat) / n_samples + z**2 / (4 * n_samples**2)) / denom
+
+    metrics = {
+        "t_front_us": sim["front_us"],
+        "t_tail_us": sim["tail_us"],
+        "overshoot_percent": sim["overshoot"] * 100.0,
+        "efficiency": sim["efficiency"],
+    }
+    stats = {}
+    for name, values in metrics.items():
+        finite = values[np.isfinite(values)]
+        stats[name] = (
+            {
+                "mean": float(np.mean(finite)),
+                "std": float(np.std(finite)),
+                "p05": float(np.percentile(finite, 5)),
+                "p95": float(np.percentile(finite, 95)),
+            }
+            if finite.size
+            else {"mean": None, "std": None, "p05": None, "p95": None}
         )
-    else:
-        overshoot_rel = 0.0
 
-    if return_params:
-        return v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit)
-    else:
-        return v_test, v_base, v_residual_filtered, overshoot_rel
-
-
-# --- Funções de Análise de Forma de Onda (de impulse.py) ---
-
-
-def analyze_lightning_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
-    """Analisa parâmetros de Impulso Atmosférico (LI) usando K-Factor."""
-    log.info("Analisando Impulso Atmosférico (LI)...")
-    results = {
-        "waveform_type": "LI",
-        "peak_value_measured": None,
-        "peak_value_base": None,
-        "peak_value_test": None,
-        "peak_time_test_us": None,
-        "t_30_us": None,
-        "t_90_us": None,
-        "t_0_virtual_us": None,
-        "t_front_us": None,
-        "t_50_us": None,
-        "t_tail_us": None,
-        "overshoot_percent": 0.0,
-        "params_base_alpha": None,
-        "params_base_beta": None,
-        "conforme_frente": False,
-        "conforme_cauda": False,
-        "conforme_overshoot": True,
-        "conforme_pico": False,  # Pico check needs target
-        "status_geral": "Indeterminado",
-        "error": None,
+    sensitivity = {}
+    for name, draws in samples.items():
+        if tol.get(name, 0.0) <= 0 or (name == "c_stray" and c_stray <= 0):
+            continue
+        entry = {
+            key: _rank_correlation(draws[valid], values[valid])
+            for key, values in metrics.items()
+            if key != "efficiency"
+        }
+        entry["pass"] = _rank_correlation(draws, passes.astype(float))
+        sensitivity[name] = entry
+
+    nominal_checks = _checks(sim_nominal)
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Monte Carlo de impulso ({impulse_type}, {model}): {n_samples} amostras, "
+        f"P(aprovação)={p_hat:.3f}, {elapsed:.2f} s."
+    )
+    return {
+        "impulse_type": impulse_type,
+        "model": model,
+        "distribution": distribution,
+        "n_samples": n_samples,
+        "n_valid": n_valid,
+        "pass_probability": p_hat,
+        "pass_probability_ci95": (max(0.0, center - half), min(1.0, center + half)),
+        "criteria_pass_rate": {key: float(np.mean(val)) for key, val in checks.items()},
+        "metrics": stats,
+        "nominal": {
+            "t_front_us": float(sim_nominal["front_us"][0]),
+            "t_tail_us": float(sim_nominal["tail_us"][0]),
+            "overshoot_percent": float(sim_nominal["overshoot"][0] * 100.0),
+            "efficiency": float(sim_nominal["efficiency"][0]),
+            "passes": bool(np.logical_and.reduce([v[0] for v in nominal_checks.values()])),
+        },
+        "sensitivity": sensitivity,
+        "tolerances": {name: float(tol.get(name, 0.0)) for name in nominal},
+        "c_load_fixed_pf": c_fixed * 1e12,
+        "elapsed_s": elapsed,
     }
 
-    try:
-        if (
-            v_kv is None
-            or t_us is None
-            or len(v_kv) < 10
-            or len(t_us) != len(v_kv)
-            or np.std(v_kv) < 1e-9
-        ):
-            results["error"] = "Dados de entrada inválidos ou insuficientes para análise LI."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-
-        results["peak_value_measured"] = np.max(v_kv)
-
-        # 1. Aplica K-Factor
-        v_test_kv, v_base_kv, _, overshoot_rel, params_base = calculate_k_factor_transform(
-            v_kv, t_us, return_params=True
-        )
-        results["overshoot_percent"] = overshoot_rel
-        results["peak_value_base"] = (
-            np.max(v_base_kv) if v_base_kv is not None and len(v_base_kv) > 0 else 0.0
-        )
-        if params_base:
-            results["params_base_alpha"], results["params_base_beta"] = params_base
-
-        if (
-            v_test_kv is None
-            or len(v_test_kv) < 5
-            or np.std(v_test_kv) < 1e-6 * np.mean(np.abs(v_test_kv))
-        ):
-            results["error"] = "Onda de ensaio (Vt) inválida após K-factor. Usando original."
-            log.warning(results["error"])
-            v_test_kv = v_kv
-            results["overshoot_percent"] = 0.0  # Assume zero overshoot if K-factor failed
-
-        # 2. Encontra Pico de Vt
-        test_peak_idx = np.argmax(v_test_kv)
-        results["peak_time_test_us"] = t_us[test_peak_idx]
-        results["peak_value_test"] = v_test_kv[test_peak_idx]
-
-        # 3. Análise da Frente (T1 e O1) baseada em Vt
-        t_0_virtual_us = 0.0
-        if results["peak_value_test"] > 1e-6:
-            v_30_target = 0.3 * results["peak_value_test"]
-            v_90_target = 0.9 * results["peak_value_test"]
-            mask_before_peak = t_us <= results["peak_time_test_us"]
-            t_before_us = t_us[mask_before_peak]
-            v_before_kv = v_test_kv[mask_before_peak]
-
-            if len(v_before_kv) > 1:
-                v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
-                if v_max_b >= v_90_target and v_min_b <= v_30_target:
-                    try:
-                        t_30 = np.interp(
-                            v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                        )
-                        t_90 = np.interp(
-                            v_90_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                        )
-                        results["t_30_us"] = t_30
-                        results["t_90_us"] = t_90
-                        if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
-                            delta_t_front = t_90 - t_30
-                            results["t_front_us"] = 1.67 * delta_t_front
-                            if delta_t_front > 1e-9:
-                                slope = (v_90_target - v_30_target) / delta_t_front
-                                if abs(slope) > 1e-9:
-                                    t_0_virtual_us = t_30 - (v_30_target / slope)
-                                else:
-                                    t_0_virtual_us = t_30
-                            results["t_0_virtual_us"] = t_0_virtual_us
-                        else:
-                            log.warning("t30 ou t90 inválidos ou não crescentes.")
-                    except Exception as e_interp_front:
-                        log.error(f"Erro interpolação frente LI: {e_interp_front}")
-                else:
-                    log.warning(f"Níveis 30%/90% fora do range ({v_min_b:.2f}-{v_max_b:.2f}).")
-            else:
-                log.warning("Dados insuficientes antes do pico.")
-        else:
-            log.warning("Pico de Vt muito baixo.")
 
-        # 4. Análise da Cauda (T2) baseada em Vt
-        v_50_target = 0.5 * results["peak_value_test"]
-        mask_after_peak = t_us >= results["peak_time_test_us"]
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_test_kv[mask_after_peak]
+# === Funções de Simulação e Análise de Forma de Onda (app_core.impulse_kernel) ===
+# As implementações ficam no kernel; aqui são expostas com o cache de impulso.
 
-        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
-            try:
-                # Robust interpolation for t_50
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = idx2 - 1 if idx2 > 0 else 0
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_50 = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                    elif v1_tail >= v_50_target:
-                        t_50 = t1_tail
-                    else:
-                        t_50 = t2_tail  # Should ideally not happen if search is correct
-                    if not np.isnan(t_50):
-                        results["t_50_us"] = t_50
-                        results["t_tail_us"] = t_50 - t_0_virtual_us
-            except Exception as e_interp_tail:
-                log.error(f"Erro interpolação cauda LI: {e_interp_tail}")
-        else:
-            log.warning("Dados insuficientes ou tensão não caiu para 50% na cauda.")
-
-        # 5. Verificação de Conformidade
-        t1 = results["t_front_us"]
-        t2 = results["t_tail_us"]
-        vt = results["peak_value_test"]
-        beta = results["overshoot_percent"]
-        if t1 is not None:
-            results["conforme_frente"] = (
-                constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
-                * (1 - constants.LIGHTNING_FRONT_TOLERANCE)
-                <= t1
-                <= constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
-                * (1 + constants.LIGHTNING_FRONT_TOLERANCE)
-            )
-        if t2 is not None:
-            results["conforme_cauda"] = (
-                constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM * (1 - constants.LIGHTNING_TAIL_TOLERANCE)
-                <= t2
-                <= constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM
-                * (1 + constants.LIGHTNING_TAIL_TOLERANCE)
-            )
-        if beta is not None:
-            results["conforme_overshoot"] = beta <= (constants.LIGHTNING_OVERSHOOT_MAX * 100.0)
-        # Conformidade de pico é omitida por padrão, precisa de um alvo
-
-        if (
-            results["conforme_frente"]
-            and results["conforme_cauda"]
-            and results["conforme_overshoot"]
-        ):
-            results["status_geral"] = "Conforme"
-        else:
-            results["status_geral"] = "Não Conforme"
+analyze_lightning_impulse = impulse_memoize(impulse_kernel.analyze_lightning_impulse)
+analyze_switching_impulse = impulse_memoize(impulse_kernel.analyze_switching_impulse)
+analyze_chopped_impulse = impulse_memoize(impulse_kernel.analyze_chopped_impulse)
+simulate_hybrid_impulse = impulse_memoize(impulse_kernel.simulate_hybrid_impulse)
+simulate_marx_impulse = impulse_memoize(impulse_kernel.simulate_marx_impulse)
 
-        log.info(
-            f"Análise LI Concluída: Vt={vt:.2f}kV, T1={t1:.2f}µs, T2={t2:.1f}µs, β={beta:.1f}%, Status={results['status_geral']}"
-        )
-        return results
+SIMULATION_MODELS = ("hybrid", "rlc", "marx")
 
-    except Exception as e:
-        log.exception(f"Erro geral em analyze_lightning_impulse: {e}")
-        results["error"] = f"Erro inesperado: {str(e)}"
-        results["status_geral"] = "Erro"
-        return results
-
-
-def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
-    """Analisa parâmetros de Impulso de Manobra (SI) conforme IEC 60060-1."""
-    log.info("Analisando Impulso de Manobra (SI)...")
-    results = {
-        "waveform_type": "SI",
-        "peak_value_measured": None,
-        "peak_time_us": None,
-        "t_p_us": None,
-        "t_d_us": None,
-        "t_half_us": None,
-        "t_2_us": None,
-        "t_z_us": None,
-        "t_zero_us": None,
-        "t_ab_us": None,
-        "t_30_us": None,
-        "t_90_us": None,
-        "conforme_tp": False,
-        "conforme_t2": False,
-        "conforme_td": False,
-        "conforme_tzero": False,
-        "status_geral": "Indeterminado",
-        "error": None,
-    }
-    try:
-        if (
-            v_kv is None
-            or t_us is None
-            or len(v_kv) < 10
-            or len(t_us) != len(v_kv)
-            or np.std(v_kv) < 1e-9
-        ):
-            results["error"] = "Dados de entrada inválidos ou insuficientes para análise SI."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-
-        peak_index = np.argmax(v_kv)
-        results["peak_time_us"] = t_us[peak_index]
-        results["peak_value_measured"] = v_kv[peak_index]
-        t_origin_us = t_us[0]
-
-        # --- Cálculo de Td ---
-        v_90_target = 0.9 * results["peak_value_measured"]
-        indices_above_90 = np.where(v_kv >= v_90_target)[0]
-        if len(indices_above_90) > 1:
-            first_idx, last_idx = indices_above_90[0], indices_above_90[-1]
-            if 0 <= first_idx < len(t_us) and 0 <= last_idx < len(t_us):
-                results["td_us"] = t_us[last_idx] - t_us[first_idx]
-            else:
-                log.warning("Índices Td fora dos limites.")
-        else:
-            log.warning("Não foi possível calcular Td (pontos >= 90%).")
-
-        # --- Cálculo de T2 ---
-        v_50_target = 0.5 * results["peak_value_measured"]
-        mask_after_peak = t_us >= results["peak_time_us"]
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_kv[mask_after_peak]
-        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
-            try:
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = max(0, idx2 - 1)
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_half = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                    elif v1_tail >= v_50_target:
-                        t_half = t1_tail
-                    else:
-                        t_half = t2_tail
-                    if not np.isnan(t_half):
-                        results["t_half_us"] = t_half
-                        results["t_2_us"] = t_half - t_origin_us
-            except Exception as e:
-                log.error(f"Erro interpolação T2 SI: {e}")
-        else:
-            log.warning("Tensão não caiu para 50% para cálculo T2.")
 
-        # --- Cálculo de Tz ---
-        if len(v_after_kv) > 0 and np.min(v_after_kv) <= 1e-6:
-            try:
-                zero_cross_indices = np.where(v_after_kv <= 0)[0]
-                if len(zero_cross_indices) > 0:
-                    first_zero_idx_rel = zero_cross_indices[0]
-                    first_zero_idx_abs = np.where(t_us == t_after_us[first_zero_idx_rel])[0][0]
-                    if first_zero_idx_abs > 0:
-                        idx1_z, idx2_z = first_zero_idx_abs - 1, first_zero_idx_abs
-                        t1_z, v1_z = t_us[idx1_z], v_kv[idx1_z]
-                        t2_z, v2_z = t_us[idx2_z], v_kv[idx2_z]
-                        if v1_z > 0 and v2_z <= 0 and abs(v2_z - v1_z) > 1e-9:
-                            t_z = t1_z - v1_z * (t2_z - t1_z) / (v2_z - v1_z)
-                        elif v2_z <= 0:
-                            t_z = t2_z
-                        else:
-                            t_z = np.nan  # Should not happen if logic is correct
-                        if not np.isnan(t_z):
-                            results["t_z_us"] = t_z
-                            results["t_zero_us"] = t_z - t_origin_us
-            except Exception as e:
-                log.error(f"Erro interpolação Tz SI: {e}")
-        else:
-            log.warning("Tensão não cruzou zero para cálculo Tz.")
-
-        # --- Cálculo de Tp ---
-        v_30_target = 0.3 * results["peak_value_measured"]
-        v_90_target_tp = 0.9 * results["peak_value_measured"]
-        mask_before_peak = t_us <= results["peak_time_us"]
-        t_before_us = t_us[mask_before_peak]
-        v_before_kv = v_kv[mask_before_peak]
-        t_30, t_90 = np.nan, np.nan
-        if len(v_before_kv) > 1:
-            v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
-            if v_max_b >= v_90_target_tp and v_min_b <= v_30_target:
-                try:
-                    t_30 = np.interp(
-                        v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    t_90 = np.interp(
-                        v_90_target_tp, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    results["t_30_us"] = t_30
-                    results["t_90_us"] = t_90
-                    if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
-                        results["t_ab_us"] = t_90 - t_30
-                except Exception as e:
-                    log.error(f"Erro interpolação T_AB SI: {e}")
-            else:
-                log.warning("Níveis 30%/90% fora do range T_AB.")
+def simulate_impulse_waveform(
+    t_sec: np.ndarray,
+    v0_charge: float,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+    model: str = "hybrid",
+    n_stages: int = 1,
+    n_parallel: int = 1,
+    fit_method: str = "curve_fit",
+) -> tuple:
+    """
+    Simula o impulso com o modelo selecionado em "simulation-model-type".
 
-        if results.get("t_ab_us") is not None and results.get("t_2_us") is not None:
-            try:
-                tab, t2 = results["t_ab_us"], results["t_2_us"]
-                K = 2.42 - (3.08e-3 * tab) + (1.51e-6 * (t2**2))  # Fórmula K aproximada
-                results["t_p_us"] = K * tab
-            except Exception as e:
-                log.error(f"Erro cálculo Tp fórmula K: {e}")
-                results["t_p_us"] = results["peak_time_us"] - t_origin_us
-        else:
-            results["t_p_us"] = results["peak_time_us"] - t_origin_us
-
-        # --- Verificação de Conformidade ---
-        tp, t2, td, tz = (
-            results["t_p_us"],
-            results["t_2_us"],
-            results.get("td_us"),
-            results.get("t_zero_us"),
-        )
-        if tp is not None:
-            results["conforme_tp"] = (
-                constants.SWITCHING_IMPULSE_PEAK_TIME_NOM
-                * (1 - constants.SWITCHING_PEAK_TIME_TOLERANCE)
-                <= tp
-                <= constants.SWITCHING_IMPULSE_PEAK_TIME_NOM
-                * (1 + constants.SWITCHING_PEAK_TIME_TOLERANCE)
-            )
-        if t2 is not None:
-            results["conforme_t2"] = (
-                constants.SWITCHING_IMPULSE_TAIL_TIME_NOM * (1 - constants.SWITCHING_TAIL_TOLERANCE)
-                <= t2
-                <= constants.SWITCHING_IMPULSE_TAIL_TIME_NOM
-                * (1 + constants.SWITCHING_TAIL_TOLERANCE)
-            )
-        if td is not None:
-            results["conforme_td"] = td >= constants.SWITCHING_TIME_ABOVE_90_MIN
-        if tz is not None:
-            results["conforme_tzero"] = tz >= constants.SWITCHING_TIME_TO_ZERO_MIN
-
-        if (
-            results["conforme_tp"]
-            and results["conforme_t2"]
-            and results["conforme_td"]
-            and results["conforme_tzero"]
-        ):
-            results["status_geral"] = "Conforme"
-        else:
-            results["status_geral"] = "Não Conforme"
+    Os parâmetros são sempre os totais equivalentes do gerador (como no modelo híbrido);
+    para o modelo "marx" eles são redistribuídos por estágio: Rf/Rt por coluna, C do
+    estágio, tensão de carga por estágio e a indutância que excede a dos estágios como
+    indutância externa.
 
-        log.info(
-            f"Análise SI Concluída: Vp={results['peak_value_measured']:.1f}kV, Tp={tp:.1f}µs, T2={t2:.1f}µs, Td={td:.1f}µs, Tz={tz:.1f}µs, Status={results['status_geral']}"
-        )
-        return results
+    Args:
+        model: "hybrid" (RLC+K), "rlc" (RLC equivalente sem cauda) ou "marx"
+            (espaço de estados multiestágio)
+        n_stages, n_parallel: Configuração do gerador (apenas para "marx")
 
-    except Exception as e:
-        log.exception(f"Erro geral em analyze_switching_impulse: {e}")
-        results["error"] = f"Erro inesperado: {str(e)}"
-        results["status_geral"] = "Erro"
-        return results
+    Returns:
+        Tupla (v_rlc, v_final, i_load, alpha, beta, chop_time_sec) de
+        `simulate_hybrid_impulse`.
+    """
+    if model == "marx":
+        n_s, n_p = max(int(n_stages), 1), max(int(n_parallel), 1)
+        l_external = max(l_total - constants.L_PER_STAGE_H * n_s / n_p, 0.0)
+        return simulate_marx_impulse(
+            t_sec,
+            v0_charge / n_s,
+            n_s,
+            rf * n_p / n_s,
+            rt * n_p / n_s,
+            c_load,
+            impulse_type,
+            gap_distance_cm,
+            n_parallel=n_p,
+            l_external=l_external,
+            c_stage=c_gen * n_s / n_p,
+        )
+    if model == "rlc":
+        t_sec = np.asarray(t_sec, dtype=float)
+        c_eq = c_gen * c_load / (c_gen + c_load) if c_gen > 0 and c_load > 0 else 0.0
+        v_rlc = rlc_solution(t_sec, v0_charge, rf, l_total, c_eq)
+        i_load = c_load * np.gradient(v_rlc, t_sec) if t_sec.size > 1 else np.zeros_like(t_sec)
+        return v_rlc, v_rlc.copy(), i_load, 0, 0, None
+    if model != "hybrid":
+        log.warning(f"Modelo de simulação desconhecido '{model}'; usando 'hybrid'")
+    return simulate_hybrid_impulse(
+        t_sec,
+        v0_charge,
+        rf,
+        rt,
+        l_total,
+        c_gen,
+        c_load,
+        impulse_type,
+        gap_distance_cm,
+        fit_method=fit_method,
+    )
 
 
-def analyze_chopped_impulse(
-    t_us: np.ndarray, v_kv: np.ndarray, chop_time_actual_us: float | None
+def simulate_impulse_test(
+    config_value: str,
+    test_voltage_kv: float,
+    c_dut_pf: float,
+    rf_per_column: float,
+    rt_per_column: float,
+    impulse_type: str = "lightning",
+    c_stray_pf: float = 0.0,
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+    l_inductor_h: float = 0.0,
+    gap_distance_cm: float | None = None,
+    model: str = "hybrid",
+    inductance_factor: float = 1.0,
+    tail_resistance_factor: float = 1.0,
+    n_points: int = 4000,
 ) -> dict:
-    """Analisa parâmetros de Impulso Cortado (LIC) usando K-Factor na frente."""
-    log.info(f"Analisando Impulso Cortado (LIC) com corte real em ~{chop_time_actual_us:.2f} µs...")
-    results = {
-        "waveform_type": "LIC",
-        "peak_value_full_wave_test": None,
-        "peak_time_full_wave_us": None,
-        "t_front_us": None,
-        "t_0_virtual_us": None,
-        "chop_time_us": None,
-        "chop_time_absolute_us": None,
-        "chop_voltage_test_kv": None,
-        "chop_voltage_measured_kv": None,
-        "undershoot_percent": 0.0,
-        "t_30_us": None,
-        "t_90_us": None,
-        "conforme_frente": False,
-        "conforme_corte": False,
-        "conforme_undershoot": True,  # Conformidade Vc omitida
-        "status_geral": "Indeterminado",
-        "error": None,
-    }
-
-    try:
-        if (
-            v_kv is None
-            or t_us is None
-            or len(v_kv) < 10
-            or len(t_us) != len(v_kv)
-            or np.std(v_kv) < 1e-9
-        ):
-            results["error"] = "Dados de entrada inválidos/insuficientes para análise LIC."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-        if (
-            chop_time_actual_us is None
-            or chop_time_actual_us <= t_us[0]
-            or chop_time_actual_us >= t_us[-1]
-        ):
-            results["error"] = f"Tempo de corte ({chop_time_actual_us}) inválido ou fora do range."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-
-        results["chop_time_absolute_us"] = chop_time_actual_us
-        chop_start_index = np.argmin(np.abs(t_us - chop_time_actual_us))
-        if chop_start_index < 10:
-            results["error"] = f"Tempo de corte ({chop_time_actual_us}µs) muito próximo do início."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-
-        t_before_chop_us = t_us[: chop_start_index + 1]
-        v_before_chop_kv = v_kv[: chop_start_index + 1]
-        v_test_before_chop, _, _, _, _ = calculate_k_factor_transform(
-            v_before_chop_kv, t_before_chop_us, return_params=False
-        )
-        if v_test_before_chop is None or len(v_test_before_chop) < 5:
-            results["error"] = "Falha K-factor na frente cortada."
-            log.error(results["error"])
-            results["status_geral"] = "Erro"
-            return results
-
-        # --- Parâmetros da Onda Plena Subjacente ---
-        peak_idx_before = np.argmax(v_test_before_chop)
-        results["peak_time_full_wave_us"] = t_before_chop_us[peak_idx_before]
-        results["peak_value_full_wave_test"] = v_test_before_chop[peak_idx_before]
-        t_0_virtual_us_subj = 0.0
-        if results["peak_value_full_wave_test"] > 1e-6:
-            v_30_t = 0.3 * results["peak_value_full_wave_test"]
-            v_90_t = 0.9 * results["peak_value_full_wave_test"]
-            mask_f = t_before_chop_us <= results["peak_time_full_wave_us"]
-            t_f_us = t_before_chop_us[mask_f]
-            v_f_kv = v_test_before_chop[mask_f]
-            if len(v_f_kv) > 1:
-                v_min_s, v_max_s = np.min(v_f_kv), np.max(v_f_kv)
-                if v_max_s >= v_90_t and v_min_s <= v_30_t:
-                    try:
-                        t_30 = np.interp(v_30_t, v_f_kv, t_f_us, left=np.nan, right=np.nan)
-                        t_90 = np.interp(v_90_t, v_f_kv, t_f_us, left=np.nan, right=np.nan)
-                        results["t_30_us"] = t_30
-                        results["t_90_us"] = t_90
-                        if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
-                            delta_t = t_90 - t_30
-                            results["t_front_us"] = 1.67 * delta_t
-                            if delta_t > 1e-9:
-                                slope = (v_90_t - v_30_t) / delta_t
-                                if abs(slope) > 1e-9:
-                                    t_0_virtual_us_subj = t_30 - (v_30_t / slope)
-                                else:
-                                    t_0_virtual_us_subj = t_30
-                            results["t_0_virtual_us"] = t_0_virtual_us_subj
-                    except Exception as e:
-                        log.error(f"Erro interpolação frente LIC: {e}")
-                else:
-                    log.warning("Níveis 30/90 não encontrados na frente subj.")
-            else:
-                log.warning("Dados insuficientes na frente subj.")
-        else:
-            log.warning("Pico da onda plena subj. muito baixo.")
-
-        # --- Parâmetros do Corte ---
-        if results["t_0_virtual_us"] is not None:
-            results["chop_time_us"] = results["chop_time_absolute_us"] - results["t_0_virtual_us"]
-        results["chop_voltage_test_kv"] = np.interp(
-            results["chop_time_absolute_us"],
-            t_before_chop_us,
-            v_test_before_chop,
-            left=np.nan,
-            right=np.nan,
-        )
-        results["chop_voltage_measured_kv"] = v_kv[chop_start_index]
-
-        # --- Undershoot ---
-        v_after_chop_kv = v_kv[chop_start_index + 1 :]
-        if len(v_after_chop_kv) > 0:
-            min_after_chop = np.min(v_after_chop_kv)
-            vc_ref = results["chop_voltage_test_kv"]
-            if min_after_chop < 0 and vc_ref is not None and abs(vc_ref) > 1e-6:
-                results["undershoot_percent"] = max(0.0, abs(min_after_chop) / abs(vc_ref)) * 100.0
-                log.debug(
-                    f"Undershoot LIC: Vmin={min_after_chop:.2f}, Vc={vc_ref:.2f} => Undershoot={results['undershoot_percent']:.1f}%"
-                )
-            elif vc_ref is None or abs(vc_ref) < 1e-6:
-                log.warning("Vc inválido para undershoot.")
-
-        # --- Conformidade ---
-        t1, tc, undershoot = (
-            results["t_front_us"],
-            results["chop_time_us"],
-            results["undershoot_percent"],
-        )
-        if t1 is not None:
-            results["conforme_frente"] = (
-                constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 - constants.CHOPPED_FRONT_TOLERANCE)
-                <= t1
-                <= constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
-                * (1 + constants.CHOPPED_FRONT_TOLERANCE)
-            )
-        if tc is not None:
-            results["conforme_corte"] = (
-                constants.CHOPPED_IMPULSE_CHOP_TIME_MIN
-                <= tc
-                <= constants.CHOPPED_IMPULSE_CHOP_TIME_MAX
-            )
-        if undershoot is not None:
-            results["conforme_undershoot"] = undershoot <= (
-                constants.CHOPPED_UNDERSHOOT_MAX * 100.0
-            )
+    """
+    Simula o ensaio de impulso da página com o modelo selecionado e analisa a forma de onda.
 
-        if (
-            results["conforme_frente"]
-            and results["conforme_corte"]
-            and results["conforme_undershoot"]
-        ):
-            results["status_geral"] = "Conforme"
-        else:
-            results["status_geral"] = "Não Conforme"
+    O circuito é montado como em `optimize_impulse_circuit`: Cg e Lg da configuração do
+    gerador, carga = objeto + parasita + divisor (+ gap de corte no impulso cortado) e
+    L total = gerador + externa + transformador + indutor, com os fatores de ajuste.
+    A tensão de carga é a de ensaio dividida pela eficiência estimada.
 
-        log.info(
-            f"Análise LIC Concluída: Vc={results['chop_voltage_test_kv']:.1f}kV, T1_subj={t1:.2f}µs, Tc={tc:.2f}µs, Undershoot={undershoot:.1f}%, Status={results['status_geral']}"
+    Returns:
+        Dicionário com t_us, v_kv, i_load_a, chop_time_us, analysis (de analyze_*_impulse),
+        parâmetros do gerador e da carga (F, H, Ω), eficiências, charging_voltage_kv,
+        energy_required_kj e energy_available_kj. Em caso de erro, {"error": mensagem}.
+    """
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        return {"error": f"Tipo de impulso inválido: {impulse_type}"}
+    if model not in SIMULATION_MODELS:
+        return {"error": f"Modelo de simulação inválido: {model}"}
+    if not test_voltage_kv or test_voltage_kv <= 0:
+        return {"error": "Tensão de ensaio inválida."}
+
+    n_stages, n_parallel, max_voltage_kv, energy_kj = get_generator_params(config_value)
+    c_divider_f = get_divider_capacitance(max_voltage_kv)
+    c_load = calculate_total_load_capacitance(
+        c_dut_pf, c_stray_pf, impulse_type, max_voltage_kv
+    )
+    params = calculate_rlc_equivalent_params(
+        n_stages,
+        n_parallel,
+        rf_per_column,
+        rt_per_column,
+        c_load,
+        l_extra_h,
+        l_transformer_h,
+        l_inductor_h,
+        inductance_factor,
+        tail_resistance_factor,
+    )
+    if params is None:
+        return {"error": "Parâmetros do circuito inválidos."}
+    c_gen = params["c_gen_effective_f"]
+    eff_total, eff_circuit, eff_shape = calculate_circuit_efficiency(c_gen, c_load, impulse_type)
+    if eff_total <= 0:
+        return {"error": "Eficiência do circuito nula."}
+    charging_voltage_kv = test_voltage_kv / eff_total
+
+    target = _impulse_time_targets(impulse_type)
+    # Impulso cortado: janela curta para resolver o corte (2–6 µs); se o gap não romper,
+    # a onda plena é simulada de novo na janela do LI para a análise da cauda
+    windows_s = [target["tail_nom"] * (1 + target["tail_tol"]) * 3e-6]
+    if impulse_type == "chopped":
+        windows_s.insert(0, constants.CHOPPED_IMPULSE_CHOP_TIME_MAX * 3e-6)
+    for t_end_s in windows_s:
+        t_sec = np.linspace(0.0, t_end_s, n_points)
+        _, v_volts, i_load, _, _, chop_time_s = simulate_impulse_waveform(
+            t_sec,
+            charging_voltage_kv * 1e3,
+            params["rf_total_ohm"],
+            params["rt_total_ohm"],
+            params["l_total_h"],
+            c_gen,
+            c_load,
+            impulse_type,
+            gap_distance_cm if impulse_type == "chopped" else None,
+            model=model,
+            n_stages=n_stages,
+            n_parallel=n_parallel,
         )
-        return results
-
-    except Exception as e:
-        log.exception(f"Erro geral em analyze_chopped_impulse: {e}")
-        results["error"] = f"Erro inesperado: {str(e)}"
-        results["status_geral"] = "Erro"
-        return results
+        if chop_time_s is not None:
+            break
+    t_us, v_kv = t_sec * 1e6, np.asarray(v_volts, dtype=float) / 1e3
+    chop_time_us = chop_time_s * 1e6 if chop_time_s is not None else None
+    if impulse_type == "switching":
+        analysis = analyze_switching_impulse(t_us, v_kv)
+    elif impulse_type == "chopped" and chop_time_us is not None:
+        analysis = analyze_chopped_impulse(t_us, v_kv, chop_time_us)
+    else:
+        analysis = analyze_lightning_impulse(t_us, v_kv)
+
+    return {
+        "model": model,
+        "impulse_type": impulse_type,
+        "t_us": t_us,
+        "v_kv": v_kv,
+        "i_load_a": np.asarray(i_load, dtype=float),
+        "chop_time_us": chop_time_us,
+        "analysis": analysis,
+        "n_stages": n_stages,
+        "n_parallel": n_parallel,
+        "max_voltage_kv": max_voltage_kv,
+        "c_dut_f": float(c_dut_pf or 0.0) * 1e-12,
+        "c_stray_f": float(c_stray_pf or 0.0) * 1e-12,
+        "c_divider_f": c_divider_f,
+        "c_load_extra_f": constants.C_CHOPPING_GAP_F if impulse_type == "chopped" else 0.0,
+        "l_extra_h": l_extra_h,
+        "l_transformer_h": l_transformer_h,
+        "l_inductor_h": l_inductor_h,
+        **params,
+        "efficiency_total": eff_total,
+        "efficiency_circuit": eff_circuit,
+        "efficiency_shape": eff_shape,
+        "charging_voltage_kv": charging_voltage_kv,
+        "energy_required_kj": 0.5 * c_gen * (charging_voltage_kv * 1e3) ** 2 / 1e3,
+        "energy_available_kj": energy_kj,
+    }
 
 
 # === Funções de Cálculo de Elevação de Temperatura (de temperature_rise.py) ===
@@ -1802,12 +1712,26 @@ def evaluate_eps_limits(
 
 # --- Function for Bilinear Interpolation (Moved here) ---
 def buscar_valores_tabela(
-    inducao_teste: float | None, frequencia_teste: float | None, df: pd.DataFrame
+    inducao_teste: float | None,
+    frequencia_teste: float | None,
+    df: "pd.DataFrame | GridTable2D",
+    method: str = "linear",
 ) -> float | None:
-    """Realiza interpolação bilinear nos DataFrames de perdas/potência."""
-    if df.empty or inducao_teste is None or frequencia_teste is None:
+    """
+    Realiza interpolação bilinear (ou cúbica/monotônica) nas tabelas de perdas/potência.
+
+    Aceita uma tabela já compilada (`utils.material_tables`, ex.: TABELA_PERDAS_NUCLEO)
+    ou um DataFrame indexado por (inducao_nominal, frequencia_nominal), que é compilado
+    na chamada. Para varreduras, use `GridTable2D.interp` diretamente.
+    """
+    if isinstance(df, pd.DataFrame):
+        if df.empty:
+            log.warning("DataFrame vazio para buscar_valores_tabela.")
+            return None
+        df = GridTable2D.from_dataframe(df)
+    if inducao_teste is None or frequencia_teste is None:
         log.warning(
-            f"DataFrame vazio ou inputs inválidos ({inducao_teste=}, {frequencia_teste=}) para buscar_valores_tabela."
+            f"Inputs inválidos ({inducao_teste=}, {frequencia_teste=}) para buscar_valores_tabela."
         )
         return None
     if not isinstance(inducao_teste, (int, float)) or not isinstance(
@@ -1817,272 +1741,87 @@ def buscar_valores_tabela(
             f"Tipos inválidos para inducao/frequencia ({type(inducao_teste)}, {type(frequencia_teste)})."
         )
         return None
-    if math.isnan(inducao_teste) or math.isnan(frequencia_teste):
-        log.warning("Valores NaN recebidos para inducao/frequencia.")
-        return None
-
-    try:
-        # Extrai índices únicos e ordenados
-        inducoes = sorted(df.index.get_level_values("inducao_nominal").unique())
-        frequencias = sorted(df.index.get_level_values("frequencia_nominal").unique())
-
-        if not inducoes or not frequencias:
-            log.warning("Índices de indução ou frequência vazios no DataFrame.")
-            return None
-
-        # Clamping
-        inducao_teste_clamped = max(min(inducao_teste, inducoes[-1]), inducoes[0])
-        frequencia_teste_clamped = max(min(frequencia_teste, frequencias[-1]), frequencias[0])
-
-        # Encontra índices
-        ind_idx = np.searchsorted(inducoes, inducao_teste_clamped)
-        freq_idx = np.searchsorted(frequencias, frequencia_teste_clamped)
-
-        # Garante limites
-        ind_idx = min(max(ind_idx, 1), len(inducoes) - 1)
-        freq_idx = min(max(freq_idx, 1), len(frequencias) - 1)
-
-        ind_low, ind_high = inducoes[ind_idx - 1], inducoes[ind_idx]
-        freq_low, freq_high = frequencias[freq_idx - 1], frequencias[freq_idx]
-
-        try:
-            # Acessa valores - iloc[0] para Series, iloc[0,0] para DataFrame (se index não for único)
-            q11 = (
-                df.loc[(ind_low, freq_low)].iloc[0]
-                if isinstance(df.loc[(ind_low, freq_low)], pd.Series)
-                else df.loc[(ind_low, freq_low)].iloc[0, 0]
-            )
-            q12 = (
-                df.loc[(ind_low, freq_high)].iloc[0]
-                if isinstance(df.loc[(ind_low, freq_high)], pd.Series)
-                else df.loc[(ind_low, freq_high)].iloc[0, 0]
-            )
-            q21 = (
-                df.loc[(ind_high, freq_low)].iloc[0]
-                if isinstance(df.loc[(ind_high, freq_low)], pd.Series)
-                else df.loc[(ind_high, freq_low)].iloc[0, 0]
-            )
-            q22 = (
-                df.loc[(ind_high, freq_high)].iloc[0]
-                if isinstance(df.loc[(ind_high, freq_high)], pd.Series)
-                else df.loc[(ind_high, freq_high)].iloc[0, 0]
-            )
-        except (KeyError, IndexError) as e:
-            log.error(
-                f"Erro ao acessar DataFrame em buscar_valores_tabela: {e}. Índices: ({ind_low},{freq_low}), etc."
-            )
-            return None
-
-        # Pesos
-        delta_ind = (ind_high - ind_low) + 1e-12
-        delta_freq = (freq_high - freq_low) + 1e-12
-        x_weight = (inducao_teste_clamped - ind_low) / delta_ind
-        y_weight = (frequencia_teste_clamped - freq_low) / delta_freq
-
-        # Interpolação
-        valor_interpolado = (
-            (1 - x_weight) * (1 - y_weight) * q11
-            + x_weight * (1 - y_weight) * q21
-            + (1 - x_weight) * y_weight * q12
-            + x_weight * y_weight * q22
-        )
-
-        col_name = df.columns[0] if not df.empty else "valor"
-        log.debug(
-            f"Interpolação ({col_name}): B={inducao_teste_clamped:.2f}T, f={frequencia_teste_clamped:.1f}Hz -> {valor_interpolado:.3f}"
-        )
-        return valor_interpolado
-
-    except Exception as e:
-        log.exception(
-            f"Erro durante interpolação bilinear para B={inducao_teste}, f={frequencia_teste}: {e}"
-        )
-        return None
-
+    return df.lookup(inducao_teste, frequencia_teste, method)
 
-# === Funções de Simulação de Impulso (Híbrida) ===
 
-
-def simulate_hybrid_impulse(
-    t_sec: np.ndarray,
-    v0_charge: float,
-    rf: float,
-    rt: float,
-    l_total: float,
-    c_gen: float,
-    c_load: float,
+def build_impulse_parameter_grid(
+    c_dut_pf: float,
+    c_stray_pf: float,
     impulse_type: str,
-    gap_distance_cm: float = None,
-) -> tuple:
+    l_extra_h: float = 0.0,
+    l_transformer_h: float = 0.0,
+    l_inductor_h: float = 0.0,
+    generator_configs: list[dict] | None = None,
+    rf_values: list[float] | None = None,
+    rt_values: list[float] | None = None,
+) -> dict:
     """
-    Simula o circuito de impulso usando a abordagem híbrida RLC + K-Factor + Dupla Exponencial.
+    Monta a grade (configuração do gerador x Rf x Rt) em arrays 1D prontos para
+    `simulate_hybrid_impulse_batch`.
 
-    Args:
-        t_sec: Array de tempo em segundos
-        v0_charge: Tensão de carga inicial em Volts
-        rf: Resistência de frente em Ohms
-        rt: Resistência de cauda em Ohms
-        l_total: Indutância total em Henries
-        c_gen: Capacitância do gerador em Farads
-        c_load: Capacitância da carga em Farads
-        impulse_type: Tipo de impulso ("lightning", "chopped", "switching")
-        gap_distance_cm: Distância do gap em cm (apenas para impulso cortado)
+    Por padrão varre todas as `GENERATOR_CONFIGURATIONS` contra o catálogo de resistores
+    do tipo de impulso (LI para "lightning"/"chopped", SI para "switching").
+    Rf e Rt são valores por coluna; os totais seguem `calculate_rlc_equivalent_params`.
 
     Returns:
-        Tupla contendo (v_rlc, v_final, i_load, alpha, beta, chop_time_sec)
+        Dicionário de arrays com o mesmo comprimento: config_value, stages, parallel,
+        max_voltage_kv, energy_kj, rf_per_column, rt_per_column, rf_total, rt_total,
+        c_gen, c_load, l_total.
     """
-    # Validação de parâmetros de entrada
-    if t_sec is None or len(t_sec) < 2:
-        log.error("Vetor de tempo inválido ou muito curto para simulação de impulso")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(v0_charge, (int, float)) or v0_charge <= 0:
-        log.error(f"Tensão de carga inválida: {v0_charge}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(rf, (int, float)) or rf <= 0:
-        log.error(f"Resistência de frente inválida: {rf}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(rt, (int, float)) or rt <= 0:
-        log.error(f"Resistência de cauda inválida: {rt}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(l_total, (int, float)) or l_total <= 0:
-        log.error(f"Indutância total inválida: {l_total}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(c_gen, (int, float)) or c_gen <= 0:
-        log.error(f"Capacitância do gerador inválida: {c_gen}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if not isinstance(c_load, (int, float)) or c_load <= 0:
-        log.error(f"Capacitância da carga inválida: {c_load}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    if impulse_type not in ["lightning", "chopped", "switching"]:
-        log.error(f"Tipo de impulso inválido: {impulse_type}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
-
-    # Parâmetros da simulação
-    collapse_time = 0.1e-6  # Tempo de colapso do gap em segundos
-    log.info(f"Simulando Híbrido: Tipo={impulse_type}, V0_carga={v0_charge/1000:.1f}kV")
-
-    try:
-        # Cálculo da capacitância equivalente
-        c_eq = (c_gen * c_load) / (c_gen + c_load) if (c_gen + c_load) > 1e-15 else 0
-        r_rlc = rf + constants.R_PARASITIC_OHM  # Adiciona resistência parasita
-
-        log.debug(f"Simulando RLC: R={r_rlc:.1f}, L={l_total:.2e}, Ceq={c_eq:.2e}")
-
-        # Solução RLC
-        v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
-        v_rlc_kv = v_rlc / 1000  # Converte para kV para K-factor
-        t_us = t_sec * 1e6  # Converte para µs para K-factor
-
-        # Transformação K-factor
-        v_test, v_base, _, overshoot, (alpha_fit, beta_fit) = calculate_k_factor_transform(
-            v_rlc_kv, t_us, return_params=True
+    if generator_configs is None:
+        generator_configs = constants.GENERATOR_CONFIGURATIONS
+    if rf_values is None:
+        catalog = (
+            constants.RESISTORS_SI_FRONT_AVAILABLE
+            if impulse_type == "switching"
+            else constants.RESISTORS_LI_FRONT_AVAILABLE
         )
+        rf_values = [item["value"] for item in catalog]
+    if rt_values is None:
+        catalog = (
+            constants.RESISTORS_SI_TAIL_AVAILABLE
+            if impulse_type == "switching"
+            else constants.RESISTORS_LI_TAIL_AVAILABLE
+        )
+        rt_values = [item["value"] for item in catalog]
+
+    stages = np.array([int(cfg["stages"]) for cfg in generator_configs])
+    parallel = np.array([int(cfg["parallel"]) for cfg in generator_configs])
+    vmax = np.array([float(cfg["max_voltage_kv"]) for cfg in generator_configs])
+    energy = np.array([float(cfg.get("energy_kj", 0.0)) for cfg in generator_configs])
+    values = np.array([cfg["value"] for cfg in generator_configs])
+
+    i_cfg, i_rf, i_rt = np.meshgrid(
+        np.arange(len(generator_configs)),
+        np.arange(len(rf_values)),
+        np.arange(len(rt_values)),
+        indexing="ij",
+    )
+    i_cfg, i_rf, i_rt = i_cfg.ravel(), i_rf.ravel(), i_rt.ravel()
+    rf_col = np.asarray(rf_values, dtype=float)[i_rf]
+    rt_col = np.asarray(rt_values, dtype=float)[i_rt]
+    n_s, n_p = stages[i_cfg], parallel[i_cfg]
 
-        # Se o ajuste K-factor falhar, usa estimativas teóricas
-        if alpha_fit is None or beta_fit is None:
-            log.warning("Ajuste K-factor falhou. Usando estimativas teóricas.")
-            # Estimativas teóricas baseadas nos parâmetros do circuito
-            alpha = 1 / (rt * (c_gen + c_load)) if rt > 1e-9 and (c_gen + c_load) > 1e-15 else 0
-            beta = 1 / (rf * c_eq) if rf > 1e-9 and c_eq > 1e-15 else 0
-
-            # Garante que beta > alpha (necessário para dupla exponencial)
-            if beta <= alpha + 1e-9:
-                adjust_factor = 1.05
-                add_factor = 1e3 if impulse_type in ["lightning", "chopped"] else 1e2
-                beta = alpha * adjust_factor + add_factor
-                log.warning(f"Beta ajustado para {beta:.2e} (era <= alpha)")
-        else:
-            alpha = alpha_fit
-            beta = beta_fit
-            log.info(f"Parâmetros K-factor: alpha={alpha:.2e}, beta={beta:.2e}")
-
-        # Gera forma de onda final usando dupla exponencial
-        v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
-
-        # Processamento especial para impulso cortado
-        chop_time_sec = None
-        if impulse_type == "chopped" and gap_distance_cm is not None and gap_distance_cm > 0:
-            # Tensão de breakdown estimada (30 kV/cm)
-            breakdown_voltage = 30.0 * gap_distance_cm * 1000  # Converte para V
-
-            # Encontra o primeiro ponto onde a tensão excede a tensão de breakdown
-            times_above_threshold = np.where(v_final >= breakdown_voltage)[0]
-
-            if len(times_above_threshold) > 0:
-                chop_idx = times_above_threshold[0]
-
-                if chop_idx < len(t_sec):
-                    chop_time_sec = t_sec[chop_idx]
-                    log.info(
-                        f"Corte detectado: t={chop_time_sec*1e6:.2f} µs, V={v_final[chop_idx]/1000:.1f} kV"
-                    )
-
-                    # Índices após o corte
-                    collapse_idx = np.where(t_sec >= chop_time_sec)[0]
-
-                    if len(collapse_idx) > 0:
-                        chop_voltage_final = v_final[chop_idx]
-                        dt_after_chop = t_sec[collapse_idx] - chop_time_sec
-
-                        # Fase de colapso (queda linear)
-                        mask_collapse = dt_after_chop <= collapse_time
-                        idx_collapse = collapse_idx[mask_collapse]
-
-                        # Fase de oscilação (após colapso)
-                        mask_osc = dt_after_chop > collapse_time
-                        idx_osc = collapse_idx[mask_osc]
-
-                        # Aplica queda linear durante o colapso
-                        if len(idx_collapse) > 0:
-                            v_final[idx_collapse] = chop_voltage_final * (
-                                1 - (t_sec[idx_collapse] - chop_time_sec) / collapse_time
-                            )
-
-                        # Aplica oscilação amortecida após o colapso
-                        if len(idx_osc) > 0:
-                            freq_osc = 5e6  # Frequência de oscilação em Hz
-                            damp_factor = 1.5  # Fator de amortecimento
-                            undershoot_ratio = 0.25  # Razão de undershoot
-
-                            # Tempo após o colapso
-                            time_after_collapse = t_sec[idx_osc] - chop_time_sec - collapse_time
-
-                            # Amplitude da oscilação
-                            amp = (
-                                -chop_voltage_final
-                                * undershoot_ratio
-                                * np.exp(-damp_factor * time_after_collapse * 1e6)
-                            )
-
-                            # Oscilação
-                            osc = amp * np.cos(2 * np.pi * freq_osc * time_after_collapse)
-                            v_final[idx_osc] = osc
-
-                            # Limita o undershoot e zera após algumas oscilações
-                            v_final[idx_osc] = np.clip(
-                                v_final[idx_osc], -0.3 * abs(chop_voltage_final), float("inf")
-                            )
-                            v_final[idx_osc[time_after_collapse > 3 / freq_osc]] = 0
-            else:
-                log.warning(
-                    f"Tensão não atingiu breakdown ({breakdown_voltage/1000:.1f} kV) para gap={gap_distance_cm} cm"
-                )
-
-        # Calcula corrente na carga (derivada da tensão)
-        i_load = c_load * np.gradient(v_final, t_sec)
-
-        return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
-
-    except Exception as e:
-        log.exception(f"Erro na simulação de impulso híbrido: {e}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+    c_divider = np.where(
+        vmax[i_cfg] <= 1200, constants.C_DIVIDER_LOW_VOLTAGE_F, constants.C_DIVIDER_HIGH_VOLTAGE_F
+    )
+    c_extra = constants.C_CHOPPING_GAP_F if impulse_type == "chopped" else 0.0
+    c_load = (float(c_dut_pf or 0.0) + float(c_stray_pf or 0.0)) * 1e-12 + c_divider + c_extra
+
+    return {
+        "config_value": values[i_cfg],
+        "stages": n_s,
+        "parallel": n_p,
+        "max_voltage_kv": vmax[i_cfg],
+        "energy_kj": energy[i_cfg],
+        "rf_per_column": rf_col,
+        "rt_per_column": rt_col,
+        "rf_total": rf_col * n_s / n_p,
+        "rt_total": rt_col * n_s / n_p,
+        "c_gen": constants.C_PER_STAGE_F * n_p / n_s,
+        "c_load": c_load,
+        "l_total": constants.L_PER_STAGE_H * n_s / n_p + l_extra_h + l_transformer_h + l_inductor_h,
+    }
 
 
 # --- END OF FILE app_core/calculations.py ---
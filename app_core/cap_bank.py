@@ -0,0 +1,447 @@
+# app_core/cap_bank.py
+"""
+Solver de configuração do banco de capacitores do ensaio de perdas em carga.
+
+Na importação, enumera para cada tensão de banco (CAPACITORS_BY_VOLTAGE) e tipo de
+circuito todas as configurações alcançáveis: grupos de capacitores (1 ou 1+2), arranjo
+de fases, subconjunto de unidades CP por fase (o mesmo em todas as fases usadas) e
+combinação de chaves Q (Q_SWITCH_POWERS). As potências ficam em um índice ordenado por
+(potência, número de chaves fechadas); cada consulta é uma busca binária que devolve as
+k melhores configurações com a sequência de manobras.
+"""
+import itertools
+import logging
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from utils.constants import (
+    CAPACITORS_BY_VOLTAGE,
+    CS_SWITCHES_BY_VOLTAGE_MONO,
+    CS_SWITCHES_BY_VOLTAGE_TRI,
+    Q_SWITCH_POWERS,
+)
+
+log = logging.getLogger(__name__)
+
+POWER_TOLERANCE_MVAR = 1e-6
+CIRCUIT_TYPES = ("Trifásico", "Monofásico")
+# Arranjos de fases: o banco trifásico usa sempre as três fases; no monofásico as
+# fases do banco podem ser ligadas em paralelo uma a uma
+PHASE_LAYOUTS = {"Trifásico": ("ABC",), "Monofásico": ("A", "AB", "ABC")}
+GROUP_SETS = (("1",), ("1", "2"))
+
+_CAP_PATTERN = re.compile(r"^CP(\d+)([ABC])([12])$")
+_CS_PHASE_PATTERN = re.compile(r"^CS\d*([ABC])")
+
+
+def _q_steps() -> list[float]:
+    """Potências (MVAr) das chaves Q1..Q5 de cada unidade capacitiva."""
+    steps = Q_SWITCH_POWERS.get("generic_cp")
+    if not steps or len(steps) != 5:
+        log.error("Generic Q switch power profile is missing or invalid.")
+        return []
+    return [float(p) for p in steps]
+
+
+def _parse_capacitors(bank_voltage_key: str) -> dict[tuple[int, str, str], str]:
+    """Mapeia (unidade, fase, grupo) -> nome do capacitor para a tensão de banco."""
+    caps = {}
+    for name in CAPACITORS_BY_VOLTAGE.get(bank_voltage_key, []):
+        match = _CAP_PATTERN.match(name)
+        if match:
+            caps[(int(match.group(1)), match.group(2), match.group(3))] = name
+        else:
+            log.warning(f"Nome de capacitor fora do padrão CP<n><fase><grupo>: {name}")
+    return caps
+
+
+def _cs_switches(bank_voltage_key: str, circuit_type: str, groups: tuple, phases: str) -> tuple:
+    """
+    Chaves CS da configuração: as da tensão de banco, sem as de grupo 2 quando só o
+    grupo 1 é usado (trifásico) e sem as de fases fora do arranjo.
+    """
+    cs_dict = (
+        CS_SWITCHES_BY_VOLTAGE_TRI if circuit_type == "Trifásico" else CS_SWITCHES_BY_VOLTAGE_MONO
+    )
+    selected = []
+    for name in cs_dict.get(bank_voltage_key, []):
+        is_group_2_switch = len(name) > 4 and name.endswith("2")
+        if groups == ("1",) and circuit_type == "Trifásico" and is_group_2_switch:
+            continue
+        phase = _CS_PHASE_PATTERN.match(name)
+        if phase and phase.group(1) not in phases:
+            continue
+        selected.append(name)
+    return tuple(sorted(selected))
+
+
+class _CapBankIndex:
+    """Índice ordenado das configurações alcançáveis para uma tensão e tipo de circuito."""
+
+    def __init__(self, bank_voltage_key: str, circuit_type: str):
+        self.bank_voltage_key = bank_voltage_key
+        self.circuit_type = circuit_type
+        self.caps = _parse_capacitors(bank_voltage_key)
+        self.units = sorted({unit for unit, _, _ in self.caps})
+        self.layouts = PHASE_LAYOUTS.get(circuit_type, ("ABC",))
+        steps = _q_steps()
+        q_combos = [
+            combo
+            for size in range(1, len(steps) + 1)
+            for combo in itertools.combinations(range(1, len(steps) + 1), size)
+        ]
+        unit_sets = [
+            combo
+            for size in range(1, len(self.units) + 1)
+            for combo in itertools.combinations(self.units, size)
+        ]
+        self.q_combos = q_combos
+        self.unit_sets = unit_sets
+        self.cs_by_layout = {
+            (g, layout): _cs_switches(bank_voltage_key, circuit_type, g, layout)
+            for g in GROUP_SETS
+            for layout in self.layouts
+        }
+        self._decoded: dict[int, dict] = {}
+
+        # Uma linha por (grupos, arranjo, unidades); combinada com todas as chaves Q
+        rows = []
+        for g_idx, groups in enumerate(GROUP_SETS):
+            for l_idx, layout in enumerate(self.layouts):
+                for u_idx, units in enumerate(unit_sets):
+                    n_caps = sum(
+                        (u, p, g) in self.caps for u in units for p in layout for g in groups
+                    )
+                    if n_caps:
+                        n_cs = len(self.cs_by_layout[(groups, layout)])
+                        rows.append((g_idx, l_idx, u_idx, n_caps, n_cs))
+        q_power = np.array([sum(steps[q - 1] for q in combo) for combo in q_combos])
+        q_count = np.array([len(combo) for combo in q_combos])
+        if not rows or not q_combos:
+            self.power = np.empty(0)
+            self.config = np.empty((0, 4), dtype=np.int64)
+            self.n_switches = np.empty(0, dtype=np.int64)
+            return
+
+        rows = np.array(rows, dtype=np.int64)
+        power = np.round(np.outer(rows[:, 3], q_power).ravel(), 9)
+        n_switches = (rows[:, 4][:, None] + rows[:, 3][:, None] * q_count[None, :]).ravel()
+        row_idx, q_idx = np.divmod(np.arange(power.size), q_count.size)
+        order = np.lexsort((n_switches, power))
+        self.power = power[order]
+        self.n_switches = n_switches[order]
+        # Colunas: grupos, arranjo, unidades, chaves Q
+        self.config = np.column_stack((rows[row_idx, :3], q_idx))[order]
+
+    @property
+    def max_power(self) -> float:
+        return float(self.power[-1]) if self.power.size else 0.0
+
+    def _decode(self, pos: int) -> dict:
+        """Configuração da posição `pos` do índice (decodificada uma vez e reutilizada)."""
+        if pos not in self._decoded:
+            self._decoded[pos] = self._build_config(pos)
+        config = self._decoded[pos]
+        return {**config, "switching_sequence": list(config["switching_sequence"])}
+
+    def _build_config(self, pos: int) -> dict:
+        g_idx, l_idx, u_idx, q_idx = (int(v) for v in self.config[pos])
+        groups, layout = GROUP_SETS[g_idx], self.layouts[l_idx]
+        units, q_combo = self.unit_sets[u_idx], self.q_combos[q_idx]
+        capacitors = tuple(
+            self.caps[(u, p, g)]
+            for u in units
+            for p in layout
+            for g in groups
+            if (u, p, g) in self.caps
+        )
+        cs_switches = self.cs_by_layout[(groups, layout)]
+        q_config = ", ".join(f"Q{q}" for q in q_combo)
+        sequence = [f"Fechar {cs}" for cs in cs_switches]
+        sequence += [f"{cap}: fechar {q_config}" for cap in capacitors]
+        return {
+            "bank_voltage_kv": self.bank_voltage_key,
+            "circuit_type": self.circuit_type,
+            "power_mvar": float(self.power[pos]),
+            "groups": groups,
+            "use_group1_only": groups == ("1",),
+            "phases": layout,
+            "units": units,
+            "q_steps": q_combo,
+            "q_config": q_config,
+            "capacitors": capacitors,
+            "cs_switches": cs_switches,
+            "cs_config": ", ".join(cs_switches) if cs_switches else "N/A",
+            "n_switches": int(self.n_switches[pos]),
+            "switching_sequence": sequence,
+        }
+
+    def query(self, required_power_mvar: float, k: int = 1, mask: np.ndarray | None = None) -> list:
+        """
+        As `k` configurações de menor potência >= requerida (desempate: menos chaves).
+
+        Com `mask`, considera apenas as entradas marcadas (já na ordem do índice).
+        """
+        start = int(np.searchsorted(self.power, required_power_mvar - POWER_TOLERANCE_MVAR))
+        if mask is None:
+            positions = range(start, min(start + k, self.power.size))
+        else:
+            positions = start + np.flatnonzero(mask[start:])[:k]
+        return [self._decode(int(pos)) for pos in positions]
+
+    def mask(self, groups: tuple | None = None, all_units: bool = False, full_phases: bool = False):
+        """Máscara booleana sobre o índice restringindo grupos, unidades e arranjo."""
+        selected = np.ones(self.power.size, dtype=bool)
+        if groups is not None:
+            selected &= self.config[:, 0] == GROUP_SETS.index(groups)
+        if all_units:
+            selected &= self.config[:, 2] == len(self.unit_sets) - 1
+        if full_phases:
+            selected &= self.config[:, 1] == len(self.layouts) - 1
+        return selected
+
+
+_INDEX = {
+    (voltage_key, circuit_type): _CapBankIndex(voltage_key, circuit_type)
+    for voltage_key in CAPACITORS_BY_VOLTAGE
+    for circuit_type in CIRCUIT_TYPES
+}
+class CapBankCatalog:
+    """
+    Catálogo compilado das tensões de banco, montado uma vez na importação.
+
+    Arrays em ordem crescente de tensão: `voltages_kv`, `group_mask` (banco × GROUP_SETS,
+    True se o banco tem capacitores do conjunto de grupos) e `max_power_mvar[circuito]`
+    (banco × GROUP_SETS, maior potência alcançável com os grupos). `select_cf` e
+    `select_sf` escolhem, para arrays de tensões de ensaio, a menor tensão de banco com
+    V <= 1,1·V_banco (com fator) ou V <= V_banco (sem fator), ou a maior disponível.
+    """
+
+    CF_FACTOR = 1.1
+    SF_FACTOR = 1.0
+
+    def __init__(self, indexes: dict):
+        keys = sorted({key for key, _ in indexes}, key=float)
+        self.keys = tuple(keys)
+        self.voltages_kv = np.array([float(key) for key in keys])
+        self._positions = {float(key): pos for pos, key in enumerate(keys)}
+        self._voltage_list = self.voltages_kv.tolist()
+        self._limits: dict[float, np.ndarray] = {}
+        self._limit_lists: dict[float, list] = {}
+        self.max_power_mvar = {}
+        for circuit_type in CIRCUIT_TYPES:
+            self.max_power_mvar[circuit_type] = np.array(
+                [
+                    [_masked_max(indexes[(key, circuit_type)], groups) for groups in GROUP_SETS]
+                    for key in keys
+                ]
+            ).reshape(len(keys), len(GROUP_SETS))
+        self.group_mask = np.array(
+            [
+                [indexes[(key, "Trifásico")].mask(groups=groups).any() for groups in GROUP_SETS]
+                for key in keys
+            ],
+            dtype=bool,
+        ).reshape(len(keys), len(GROUP_SETS))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def position(self, voltage_kv) -> int | None:
+        """Posição da tensão de banco no catálogo (None se não houver banco nessa tensão)."""
+        try:
+            return self._positions.get(float(voltage_kv))
+        except (TypeError, ValueError):
+            return None
+
+    def key(self, voltage_kv) -> str | None:
+        pos = self.position(voltage_kv)
+        return None if pos is None else self.keys[pos]
+
+    def _limits_kv(self, factor: float) -> np.ndarray:
+        if factor not in self._limits:
+            self._limits[factor] = self.voltages_kv * factor
+        return self._limits[factor]
+
+    def select(self, voltage_kv, factor: float = SF_FACTOR) -> np.ndarray:
+        """Posições da menor tensão com voltage_kv <= V_banco·factor (busca binária)."""
+        pos = np.searchsorted(
+            self._limits_kv(factor), np.asarray(voltage_kv, dtype=float) - POWER_TOLERANCE_MVAR
+        )
+        return np.minimum(pos, len(self.keys) - 1)
+
+    def select_one(self, voltage_kv: float, factor: float = SF_FACTOR) -> int:
+        """`select` para um escalar (bisect em lista, sem overhead de array)."""
+        if factor not in self._limit_lists:
+            self._limit_lists[factor] = self._limits_kv(factor).tolist()
+        pos = bisect_left(self._limit_lists[factor], voltage_kv - POWER_TOLERANCE_MVAR)
+        return min(pos, len(self.keys) - 1)
+
+    def select_cf(self, voltage_kv) -> np.ndarray:
+        """Tensões de banco (kV) com fator 1,1 para as tensões de ensaio."""
+        return self.voltages_kv[self.select(voltage_kv, self.CF_FACTOR)]
+
+    def select_sf(self, voltage_kv) -> np.ndarray:
+        """Tensões de banco (kV) sem fator para as tensões de ensaio."""
+        return self.voltages_kv[self.select(voltage_kv, self.SF_FACTOR)]
+
+    def nearest(self, voltage_kv) -> np.ndarray:
+        """Posições das tensões de banco mais próximas (empate: a menor)."""
+        voltage_kv = np.asarray(voltage_kv, dtype=float)
+        upper = np.clip(np.searchsorted(self.voltages_kv, voltage_kv), 1, len(self.keys) - 1)
+        lower = upper - 1
+        closer_lower = voltage_kv - self.voltages_kv[lower] <= self.voltages_kv[upper] - voltage_kv
+        return np.where(closer_lower, lower, upper) if len(self.keys) > 1 else upper * 0
+
+    def nearest_one(self, voltage_kv: float) -> int:
+        """`nearest` para um escalar."""
+        if voltage_kv in self._positions:
+            return self._positions[voltage_kv]
+        pos = bisect_left(self._voltage_list, voltage_kv)
+        candidates = range(max(pos - 1, 0), min(pos + 1, len(self.keys)))
+        return min(candidates, key=lambda i: abs(self._voltage_list[i] - voltage_kv))
+
+    def max_power(self, voltage_kv, circuit_type: str = "Trifásico", groups=None) -> float:
+        """Maior potência alcançável (MVAr) na tensão de banco, opcionalmente com `groups`."""
+        pos = self.position(voltage_kv)
+        if pos is None:
+            return 0.0
+        powers = self.max_power_mvar.get(circuit_type, self.max_power_mvar["Monofásico"])
+        return float(powers[pos, GROUP_SETS.index(groups) if groups is not None else -1])
+
+
+def _masked_max(index: _CapBankIndex, groups: tuple) -> float:
+    selected = index.power[index.mask(groups=groups)]
+    return float(selected[-1]) if selected.size else 0.0
+
+
+CATALOG = CapBankCatalog(_INDEX)
+
+
+def _get_index(bank_voltage_key, circuit_type: str) -> _CapBankIndex | None:
+    key = CATALOG.key(bank_voltage_key) if bank_voltage_key else None
+    if circuit_type not in CIRCUIT_TYPES:
+        circuit_type = "Monofásico"
+    index = _INDEX.get((key, circuit_type))
+    if index is None:
+        log.warning(
+            f"No capacitors found for key '{bank_voltage_key}'. "
+            f"Available keys: {list(CAPACITORS_BY_VOLTAGE.keys())}"
+        )
+    return index
+
+
+def bank_voltage_keys() -> list[str]:
+    """Chaves de tensão do banco em ordem crescente de tensão."""
+    return list(CATALOG.keys)
+
+
+def nearest_bank_voltage_key(voltage_kv: float) -> str | None:
+    """Chave da tensão de banco mais próxima de `voltage_kv` (busca binária)."""
+    if voltage_kv is None or not len(CATALOG):
+        return None
+    return CATALOG.keys[CATALOG.nearest_one(voltage_kv)]
+
+
+def smallest_bank_voltage_key(voltage_kv: float, factor: float = 1.0) -> str | None:
+    """
+    Menor tensão de banco com voltage_kv <= V_banco·factor (busca binária); se nenhuma
+    atender, retorna a maior disponível.
+    """
+    if voltage_kv is None or not len(CATALOG):
+        return None
+    return CATALOG.keys[CATALOG.select_one(voltage_kv, factor)]
+
+
+def max_bank_power(
+    bank_voltage_key, circuit_type: str = "Trifásico", groups: tuple | None = None
+) -> float:
+    """Maior potência alcançável (MVAr) na tensão de banco, opcionalmente só com `groups`."""
+    if _get_index(bank_voltage_key, circuit_type) is None:
+        return 0.0
+    return CATALOG.max_power(bank_voltage_key, circuit_type, groups)
+
+
+def query_cap_bank(
+    bank_voltage_key,
+    required_power_mvar: float,
+    circuit_type: str = "Trifásico",
+    k: int = 5,
+    groups: tuple | None = None,
+    all_units: bool = False,
+    full_phases: bool = False,
+) -> list[dict]:
+    """
+    Retorna as k melhores configurações do banco para a potência requerida.
+
+    A melhor é a de menor potência fornecida >= requerida; empates ficam com a que fecha
+    menos chaves (CS + chaves Q de cada capacitor).
+
+    Args:
+        bank_voltage_key: Tensão do banco (chave de CAPACITORS_BY_VOLTAGE ou número)
+        required_power_mvar: Potência reativa requerida (MVAr)
+        circuit_type: "Trifásico" ou "Monofásico"
+        k: Número de configurações retornadas
+        groups: Restringe a ("1",) ou ("1", "2"); None considera ambos
+        all_units: Exige todas as unidades CP em cada fase (busca apenas nas chaves Q)
+        full_phases: Exige todas as fases do banco
+
+    Returns:
+        Lista (possivelmente vazia) de dicionários com potência, capacitores, chaves CS,
+        chaves Q e a sequência de manobras (`switching_sequence`).
+    """
+    if required_power_mvar is None or required_power_mvar <= POWER_TOLERANCE_MVAR:
+        return []
+    index = _get_index(bank_voltage_key, circuit_type)
+    if index is None:
+        return []
+    mask = None
+    if groups is not None or all_units or full_phases:
+        mask = index.mask(groups, all_units, full_phases)
+    return index.query(required_power_mvar, k, mask)
+
+
+def best_cap_bank_config(
+    bank_voltage_key, required_power_mvar: float, circuit_type: str = "Trifásico", **filters
+) -> dict | None:
+    """Melhor configuração de `query_cap_bank` ou None se a potência não for alcançável."""
+    result = query_cap_bank(bank_voltage_key, required_power_mvar, circuit_type, k=1, **filters)
+    return result[0] if result else None
+
+
+
+def provided_bank_power(
+    bank_voltage_kv, required_power_mvar, circuit_type: str = "Trifásico"
+) -> np.ndarray:
+    """
+    Versão vetorizada da potência fornecida pela melhor configuração (`best_cap_bank_config`).
+
+    Para cada par (tensão do banco, potência requerida), retorna a menor potência do
+    índice >= requerida; acima da máxima, a máxima do banco (como nas tabelas de perdas);
+    requerida nula, infinita ou inválida, ou tensão sem banco, 0.
+
+    Args:
+        bank_voltage_kv: Tensões de banco (kV), array ou escalar
+        required_power_mvar: Potências requeridas (MVAr), mesmo shape (broadcast)
+        circuit_type: "Trifásico" ou "Monofásico"
+    """
+    voltages, required = np.broadcast_arrays(
+        np.asarray(bank_voltage_kv, dtype=float), np.asarray(required_power_mvar, dtype=float)
+    )
+    provided = np.zeros(voltages.shape)
+    valid = np.isfinite(voltages) & np.isfinite(required) & (required > POWER_TOLERANCE_MVAR)
+    for voltage in np.unique(voltages[valid]).tolist():
+        index = _get_index(voltage, circuit_type) if CATALOG.key(voltage) else None
+        if index is None or not index.power.size:
+            continue
+        selected = valid & (voltages == voltage)
+        pos = np.searchsorted(index.power, required[selected] - POWER_TOLERANCE_MVAR)
+        reachable = pos < index.power.size
+        provided[selected] = np.where(
+            reachable, index.power[np.where(reachable, pos, 0)], index.max_power
+        )
+    return provided
+
+# --- END OF FILE app_core/cap_bank.py ---
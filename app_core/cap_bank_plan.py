@@ -0,0 +1,363 @@
+# app_core/cap_bank_plan.py
+"""
+Otimizador do arranjo do banco de capacitores para todo o ensaio em carga.
+
+Cada condição de ensaio (tap × cenário × C/F ou S/F) é uma demanda: tensão, corrente e
+potência de ensaio. Uma configuração do catálogo (tensão do banco + posição no índice
+de `cap_bank`) atende a demanda quando:
+
+- a tensão de ensaio cabe no banco (V <= 1,1·V_banco com fator, V <= V_banco sem);
+- a potência fornecida cobre a requerida referida ao banco, P·(V_banco/V_ensaio)²;
+- opcionalmente, a corrente no EPS (mesmo modelo de `sut_eps`: corrente refletida pelo
+  tap do SUT mais próximo menos a corrente capacitiva) fica dentro do limite, tanto por
+  falta quanto por excesso de compensação.
+
+Para uma tensão de banco, as duas últimas condições são um intervalo de potência por
+demanda, de modo que a cobertura de todas as configurações do índice sai de uma única
+comparação vetorizada. Configurações com a mesma cobertura são reduzidas à de menos
+chaves (e menor potência), as dominadas são descartadas e um branch-and-bound sobre a
+cobertura de conjuntos encontra o menor número de arranjos (desempate: total de chaves
+fechadas) que atende todas as demandas atendíveis.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from app_core import cap_bank, sut_eps
+from utils.constants import EPS_CURRENT_LIMIT, SUT_BT_VOLTAGE
+
+log = logging.getLogger(__name__)
+
+EPSILON = 1e-6
+FACTOR_LABELS = {
+    "C/F": cap_bank.CapBankCatalog.CF_FACTOR,
+    "S/F": cap_bank.CapBankCatalog.SF_FACTOR,
+}
+DEFAULT_MAX_NODES = 20_000
+
+
+class PlanDemand(NamedTuple):
+    """Uma condição de ensaio a ser atendida pelo banco."""
+
+    tap: str
+    scenario: str
+    factor: str  # "C/F" ou "S/F"
+    tensao_kv: float
+    corrente_a: float
+    pteste_mva: float
+
+    @property
+    def label(self) -> str:
+        return f"{self.tap} {self.scenario} {self.factor}"
+
+
+@dataclass
+class BankSetup:
+    """Um arranjo físico do banco (configuração de `cap_bank`) e as demandas atendidas."""
+
+    config: dict
+    demands: list = field(default_factory=list)
+
+    @property
+    def bank_voltage_kv(self) -> str:
+        return self.config["bank_voltage_kv"]
+
+    @property
+    def closed_switches(self) -> frozenset:
+        """Chaves CS e (capacitor, chave Q) fechadas no arranjo."""
+        q_switches = {(cap, q) for cap in self.config["capacitors"] for q in self.config["q_steps"]}
+        return frozenset(self.config["cs_switches"]) | frozenset(q_switches)
+
+
+@dataclass
+class CapBankPlan:
+    """
+    Resultado do otimizador: arranjos em ordem crescente de tensão do banco, demandas
+    que nenhuma configuração atende e estatísticas da busca.
+    """
+
+    setups: list
+    uncovered: list
+    n_candidates: int = 0
+    nodes_explored: int = 0
+    optimal: bool = True
+
+    @property
+    def single_setup(self) -> bool:
+        return len(self.setups) == 1 and not self.uncovered
+
+    @property
+    def n_reconfigurations(self) -> int:
+        """Trocas de arranjo ao longo do ensaio (arranjos - 1)."""
+        return max(len(self.setups) - 1, 0)
+
+    @property
+    def switch_operations(self) -> int:
+        """Manobras de chaves entre arranjos consecutivos (abrir + fechar)."""
+        return sum(
+            len(a.closed_switches ^ b.closed_switches)
+            for a, b in zip(self.setups, self.setups[1:])
+        )
+
+    def setup_for(self, tap: str, scenario: str, factor: str) -> Optional[BankSetup]:
+        return next(
+            (
+                setup
+                for setup in self.setups
+                if any(d[:3] == (tap, scenario, factor) for d in setup.demands)
+            ),
+            None,
+        )
+
+    def summary(self) -> str:
+        if not self.setups:
+            return "Nenhum arranjo do banco atende as condições de ensaio."
+        parts = [
+            f"{s.bank_voltage_kv} kV [CS: {s.config['cs_config']}; Q: {s.config['q_config']}; "
+            f"{s.config['power_mvar']:.1f} MVAr; {len(s.demands)} condições]"
+            for s in self.setups
+        ]
+        text = f"{len(self.setups)} arranjo(s): " + " | ".join(parts)
+        if self.uncovered:
+            text += f" | Sem arranjo: {', '.join(d.label for d in self.uncovered)}"
+        return text
+
+    def to_store(self) -> dict:
+        """Seção `plano_banco` de `resultados_perdas_carga` (somente tipos JSON)."""
+        return {
+            "arranjos": [
+                {
+                    "tensao_banco_kv": setup.bank_voltage_kv,
+                    "cs_config": setup.config["cs_config"],
+                    "q_config": setup.config["q_config"],
+                    "potencia_mvar": setup.config["power_mvar"],
+                    "condicoes": [demand.label for demand in setup.demands],
+                }
+                for setup in self.setups
+            ],
+            "sem_arranjo": [demand.label for demand in self.uncovered],
+            "trocas_de_arranjo": self.n_reconfigurations,
+            "manobras_de_chaves": self.switch_operations,
+            "otimo": self.optimal,
+            "resumo": self.summary(),
+        }
+
+
+def _eps_ratio(demands: list, tensao_sut_bt_v: float) -> np.ndarray:
+    """Relação do tap do SUT mais próximo de cada tensão de ensaio (V_tap/V_bt)."""
+    tap_v, valid = sut_eps.select_sut_taps([d.tensao_kv * 1000.0 for d in demands], n_top=1)
+    ratio = tap_v[:, 0] / tensao_sut_bt_v if tensao_sut_bt_v > EPSILON else tap_v[:, 0] * 0
+    return np.where(valid[:, 0], ratio, np.nan)
+
+
+def power_windows(
+    demands: list,
+    circuit_type: str,
+    check_eps: bool = True,
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Intervalo de potência fornecida (MVAr, referida ao banco) que atende cada demanda em
+    cada tensão de banco do catálogo.
+
+    Returns:
+        (lo, hi), arrays (demandas, bancos); demanda impossível no banco: lo = inf.
+    """
+    v_test = np.array([d.tensao_kv for d in demands], dtype=float)[:, None]
+    i_test = np.array([d.corrente_a for d in demands], dtype=float)[:, None]
+    p_test = np.array([d.pteste_mva for d in demands], dtype=float)[:, None]
+    factor = np.array([FACTOR_LABELS[d.factor] for d in demands])[:, None]
+    v_bank = cap_bank.CATALOG.voltages_kv[None, :]
+
+    fits = v_test <= v_bank * factor + EPSILON
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lo = p_test * (v_bank / v_test) ** 2
+        hi = np.full(lo.shape, np.inf)
+        if check_eps:
+            sqrt_3_factor = math.sqrt(3) if circuit_type == "Trifásico" else 1.0
+            # S/F: potência corrigida pelo fator da tensão do banco (como em sut_eps)
+            sf_correction = np.array(
+                [sut_eps.SF_CAP_CORRECTION_FACTORS.get(v, 1.0) for v in v_bank[0].tolist()]
+            )[None, :]
+            correction = np.where(factor == FACTOR_LABELS["S/F"], sf_correction, 1.0)
+            # Corrente capacitiva por MVAr fornecido: i_cap = q·k
+            k = (v_test / v_bank) ** 2 * correction * 1000.0 / (v_test * sqrt_3_factor)
+            margin = limite_corrente_eps_a / _eps_ratio(demands, tensao_sut_bt_v)[:, None]
+            lo = np.maximum(lo, (i_test - margin) / k)
+            hi = (i_test + margin) / k
+    valid = fits & np.isfinite(lo) & (p_test > EPSILON) & (v_test > EPSILON) & ~np.isnan(hi)
+    return np.where(valid, lo, np.inf), np.where(valid, hi, -np.inf)
+
+
+class _Candidate(NamedTuple):
+    mask: int  # bit d = demanda d atendida
+    n_switches: int
+    power: float
+    bank_position: int
+    index_position: int
+
+
+def _bank_candidates(index, lo: np.ndarray, hi: np.ndarray, bank_position: int) -> list:
+    """Melhor configuração do índice para cada cobertura distinta de demandas."""
+    if not index.power.size or not np.isfinite(lo).any():
+        return []
+    power = index.power[:, None]
+    covered = (power >= lo[None, :] - cap_bank.POWER_TOLERANCE_MVAR) & (
+        power <= hi[None, :] + cap_bank.POWER_TOLERANCE_MVAR
+    )
+    masks = covered.astype(np.int64) @ (np.int64(1) << np.arange(lo.size, dtype=np.int64))
+    # Índice já ordenado por (potência, chaves); melhor por cobertura: menos chaves
+    order = np.lexsort((index.power, index.n_switches, masks))
+    masks, first = np.unique(masks[order], return_index=True)
+    best = order[first]
+    return [
+        _Candidate(int(mask), int(index.n_switches[pos]), float(index.power[pos]), bank_position,
+                   int(pos))
+        for mask, pos in zip(masks.tolist(), best.tolist())
+        if mask
+    ]
+
+
+def _prune_dominated(candidates: list) -> list:
+    """Remove candidatos cuja cobertura está contida na de outro com menos ou iguais chaves."""
+    candidates = sorted(candidates, key=lambda c: (-c.mask.bit_count(), c.n_switches, c.power))
+    kept = []
+    for cand in candidates:
+        if not any(
+            cand.mask | other.mask == other.mask and other.n_switches <= cand.n_switches
+            for other in kept
+        ):
+            kept.append(cand)
+    return kept
+
+
+class _SetCoverSearch:
+    """Branch-and-bound: menor número de candidatos (desempate: chaves) cobrindo `universe`."""
+
+    def __init__(self, candidates: list, universe: int, max_nodes: int):
+        self.candidates = candidates
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.complete = True
+        self.by_bit = {
+            bit: [c for c in candidates if c.mask >> bit & 1]
+            for bit in range(universe.bit_length())
+            if universe >> bit & 1
+        }
+        self.best_cost = (math.inf, math.inf)
+        self.best: list = []
+
+    def greedy(self, universe: int) -> None:
+        """Solução inicial gulosa (maior cobertura restante) para podar a busca."""
+        chosen, remaining = [], universe
+        while remaining:
+            cand = max(
+                self.candidates,
+                key=lambda c: ((c.mask & remaining).bit_count(), -c.n_switches),
+            )
+            chosen.append(cand)
+            remaining &= ~cand.mask
+        self.best = chosen
+        self.best_cost = (len(chosen), sum(c.n_switches for c in chosen))
+
+    def search(self, remaining: int, chosen: list, switches: int) -> None:
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            self.complete = False
+            return
+        if not remaining:
+            cost = (len(chosen), switches)
+            if cost < self.best_cost:
+                self.best_cost, self.best = cost, list(chosen)
+            return
+        gain = max((c.mask & remaining).bit_count() for c in self.candidates)
+        lower_bound = len(chosen) + -(-remaining.bit_count() // gain)
+        if (lower_bound, switches) >= self.best_cost:
+            return
+        # Ramifica pela demanda com menos alternativas
+        bit = min(
+            (b for b in self.by_bit if remaining >> b & 1), key=lambda b: len(self.by_bit[b])
+        )
+        options = sorted(
+            self.by_bit[bit], key=lambda c: (-(c.mask & remaining).bit_count(), c.n_switches)
+        )
+        for cand in options:
+            chosen.append(cand)
+            self.search(remaining & ~cand.mask, chosen, switches + cand.n_switches)
+            chosen.pop()
+
+
+def optimize_cap_bank_plan(
+    demands: list,
+    circuit_type: str = "Trifásico",
+    check_eps: bool = True,
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+    max_nodes: int = DEFAULT_MAX_NODES,
+) -> CapBankPlan:
+    """
+    Menor conjunto de arranjos do banco que atende as demandas.
+
+    Args:
+        demands: Lista de PlanDemand (no máximo 62)
+        circuit_type: "Trifásico" ou "Monofásico"
+        check_eps: Exige a corrente do EPS dentro do limite
+        tensao_sut_bt_v, limite_corrente_eps_a: Parâmetros do SUT/EPS
+        max_nodes: Limite de nós do branch-and-bound; ao atingi-lo, retorna a melhor
+            solução encontrada (`optimal=False`)
+    """
+    if len(demands) > 62:
+        raise ValueError("optimize_cap_bank_plan aceita no máximo 62 demandas.")
+    if circuit_type not in cap_bank.CIRCUIT_TYPES:
+        circuit_type = "Monofásico"
+    if not demands:
+        return CapBankPlan(setups=[], uncovered=[])
+    lo, hi = power_windows(demands, circuit_type, check_eps, tensao_sut_bt_v, limite_corrente_eps_a)
+    indexes = [cap_bank._get_index(key, circuit_type) for key in cap_bank.CATALOG.keys]
+    candidates = [
+        cand
+        for pos, index in enumerate(indexes)
+        if index is not None
+        for cand in _bank_candidates(index, lo[:, pos], hi[:, pos], pos)
+    ]
+    candidates = _prune_dominated(candidates)
+
+    coverable = 0
+    for cand in candidates:
+        coverable |= cand.mask
+    uncovered = [d for bit, d in enumerate(demands) if not coverable >> bit & 1]
+    search = _SetCoverSearch(candidates, coverable, max_nodes)
+    if coverable:
+        search.greedy(coverable)
+        search.search(coverable, [], 0)
+
+    chosen = sorted(search.best, key=lambda c: (c.bank_position, c.power))
+    setups = [
+        BankSetup(config=indexes[cand.bank_position]._decode(cand.index_position))
+        for cand in chosen
+    ]
+    # Cada demanda fica com o primeiro arranjo (menor tensão) que a atende
+    for bit, demand in enumerate(demands):
+        for setup, cand in zip(setups, chosen):
+            if cand.mask >> bit & 1:
+                setup.demands.append(demand)
+                break
+    plan = CapBankPlan(
+        setups=setups,
+        uncovered=uncovered,
+        n_candidates=len(candidates),
+        nodes_explored=search.nodes,
+        optimal=search.complete,
+    )
+    log.debug(
+        f"Plano do banco: {len(setups)} arranjo(s), {len(uncovered)} sem arranjo, "
+        f"{len(candidates)} candidatos, {search.nodes} nós"
+    )
+    return plan
+
+
+# --- END OF FILE app_core/cap_bank_plan.py ---
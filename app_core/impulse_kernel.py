@@ -0,0 +1,2211 @@
+# app_core/impulse_kernel.py
+"""
+Kernel numérico único para simulação e análise de formas de onda de impulso.
+
+Funções array-in/array-out, sem dependência do Dash: solução RLC, dupla exponencial,
+transformação K-factor (IEC 61083-2), análises LI/SI/LIC, simulação híbrida e suas
+versões em lote. `app_core.calculations`, `callbacks.impulse` e `formulas.impulse_math`
+importam daqui; o cache de resultados fica em `app_core.calculations`.
+"""
+import functools
+import logging
+import math
+import time
+import warnings
+
+import numpy as np
+from scipy.fftpack import fft, fftfreq, ifft
+from scipy.optimize import OptimizeWarning, curve_fit
+
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+warnings.filterwarnings("ignore", category=OptimizeWarning)
+
+
+# === Funções de Simulação da Forma de Onda (de impulse.py) ===
+
+
+def rlc_solution(
+    t_sec: np.ndarray,
+    v0: float | np.ndarray,
+    r_total: float | np.ndarray,
+    l_total: float | np.ndarray,
+    c_eq: float | np.ndarray,
+) -> np.ndarray:
+    """
+    Calcula a solução da EDO para o circuito RLC série (resposta ao degrau).
+
+    Com parâmetros escalares retorna um array do tamanho de `t_sec`; se algum parâmetro
+    for um array 1D de N circuitos, delega a `rlc_solution_batch` e retorna (N, len(t)).
+    """
+    if any(np.ndim(p) > 0 for p in (v0, r_total, l_total, c_eq)):
+        return rlc_solution_batch(t_sec, v0, r_total, l_total, c_eq)
+    v_out = np.zeros_like(t_sec)
+    # Verifica parâmetros básicos
+    if l_total <= 1e-12 or c_eq <= 1e-15:
+        log.warning(f"Parâmetros L ou Ceq inválidos para solução RLC: L={l_total}, Ceq={c_eq}")
+        return v_out  # Retorna zeros
+    if r_total < 0:  # Resistência não pode ser negativa
+        log.warning(f"Resistência total negativa ({r_total}) inválida para solução RLC.")
+        return v_out
+
+    try:
+        omega0_sq = 1.0 / (l_total * c_eq)
+        alpha_damp = r_total / (2.0 * l_total) if l_total > 1e-12 else float("inf")
+
+        if alpha_damp < 0:  # Amortecimento não pode ser negativo
+            log.warning(f"Fator de amortecimento alpha_damp ({alpha_damp}) negativo inválido.")
+            return v_out
+
+        delta = alpha_damp**2 - omega0_sq
+        t_valid = t_sec[t_sec >= 0]  # Calcula apenas para t >= 0
+
+        if abs(delta / omega0_sq) < 1e-6:  # Criticamente Amortecido (delta ≈ 0)
+            if alpha_damp < 1e-9:  # Praticamente não amortecido
+                omega_n = math.sqrt(omega0_sq)
+                v_out[t_sec >= 0] = v0 * np.cos(omega_n * t_valid)
+            else:
+                a = alpha_damp
+                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
+            log.debug("RLC: Caso Criticamente Amortecido")
+
+        elif delta < 0:  # Subamortecido (Oscilatório)
+            omega_d = np.sqrt(-delta)
+            a = alpha_damp
+            if omega_d < 1e-6 * a:  # Próximo ao crítico
+                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
+                log.debug("RLC: Caso Subamortecido (próximo ao crítico)")
+            elif a < 1e-9:  # R=0 (oscilador puro)
+                omega_n = math.sqrt(omega0_sq)
+                v_out[t_sec >= 0] = v0 * np.cos(omega_n * t_valid)
+                log.debug("RLC: Caso Subamortecido (R=0, Oscilador Puro)")
+            else:
+                cos_term = np.cos(omega_d * t_valid)
+                sin_term = (a / omega_d) * np.sin(omega_d * t_valid)
+                exp_term = np.exp(-a * t_valid)
+                v_out[t_sec >= 0] = v0 * exp_term * (cos_term + sin_term)
+                log.debug("RLC: Caso Subamortecido (Oscilatório)")
+
+        else:  # Sobreamortecido (delta > 0)
+            sqrt_delta = np.sqrt(delta)
+            s1 = -alpha_damp + sqrt_delta
+            s2 = -alpha_damp - sqrt_delta
+
+            if s1 > 1e-9 or s2 > 1e-9:
+                log.warning(
+                    f"Raízes instáveis ou zeradas na solução RLC sobreamortecida: s1={s1:.2e}, s2={s2:.2e}."
+                )
+                return np.zeros_like(t_sec)
+
+            if abs(s1 - s2) < 1e-9 * abs(s1 + s2):  # Quase criticamente amortecido
+                a = alpha_damp
+                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
+                log.debug("RLC: Caso Sobreamortecido (próximo ao crítico)")
+            else:
+                exp_s1 = np.exp(s1 * t_valid)
+                exp_s2 = np.exp(s2 * t_valid)
+                v_out[t_sec >= 0] = v0 / (s1 - s2) * (s1 * exp_s2 - s2 * exp_s1)
+                log.debug("RLC: Caso Sobreamortecido")
+
+        # Limit output based on v0 (Allowing for some overshoot/undershoot)
+        v_out[v_out > v0 * 1.1] = v0 * 1.1  # Limit overshoot to 10%
+        v_out[v_out < -v0 * 0.3] = -v0 * 0.3  # Limit undershoot to 30% (adjust as needed)
+
+        return v_out
+    except (ValueError, OverflowError, ZeroDivisionError) as e:
+        log.error(f"Erro na solução RLC: {e}")
+        return np.zeros_like(t_sec)
+
+
+def double_exp_func(
+    t_sec: np.ndarray,
+    V0_norm: float | np.ndarray,
+    alpha: float | np.ndarray,
+    beta: float | np.ndarray,
+) -> np.ndarray:
+    """
+    Função de dupla exponencial normalizada V(t) = K * [exp(-alpha*t) - exp(-beta*t)],
+    onde K é ajustado para que o pico da função seja V0_norm.
+    Requer beta > alpha.
+
+    Aceita V0_norm/alpha/beta como arrays 1D de N formas de onda, retornando
+    (N, len(t)); linhas com parâmetros inválidos são zero.
+    """
+    if any(np.ndim(p) > 0 for p in (V0_norm, alpha, beta)):
+        amplitude, alpha, beta = np.broadcast_arrays(
+            *(np.atleast_1d(np.asarray(p, dtype=float)) for p in (V0_norm, alpha, beta))
+        )
+        valid = (alpha > 0) & (beta > alpha * (1 + 1e-9))
+        if not np.all(valid):
+            log.warning(f"{np.count_nonzero(~valid)} pares (alpha, beta) inválidos ignorados.")
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            values, _ = _double_exp_batch(
+                np.maximum(np.asarray(t_sec, dtype=float), 0),
+                np.where(valid, amplitude, 0.0),
+                np.where(valid, alpha, 1.0),
+                np.where(valid, beta, 2.0),
+            )
+        values[~valid] = 0.0
+        return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    v_out = np.zeros_like(t_sec)
+    if alpha <= 0 or beta <= 0:
+        log.warning(
+            f"Alpha ({alpha}) ou Beta ({beta}) inválido (não positivo) para dupla exponencial."
+        )
+        return v_out
+    if beta <= alpha + 1e-9 * alpha:  # Adiciona tolerância relativa
+        log.warning(
+            f"Beta ({beta:.3e}) deve ser maior que Alpha ({alpha:.3e}) para dupla exponencial."
+        )
+        return v_out
+    # Allow negative V0_norm, as it might represent negative polarity pulses
+    # if V0_norm < 0:
+    #      log.warning(f"V0_norm ({V0_norm}) negativo não usual para dupla exponencial padrão.")
+
+    try:
+        t_peak = math.log(beta / alpha) / (beta - alpha)
+        val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
+
+        if abs(val_at_peak) < 1e-12:
+            log.warning(
+                "Valor no pico da dupla exponencial próximo de zero. Não é possível normalizar."
+            )
+            return v_out
+
+        k_norm = V0_norm / val_at_peak
+        t_valid = np.maximum(t_sec, 0)
+        exp_alpha = np.exp(-alpha * t_valid)
+        exp_beta = np.exp(-beta * t_valid)
+        v_out = k_norm * (exp_alpha - exp_beta)
+        return v_out
+
+    except (ValueError, OverflowError, ZeroDivisionError) as e:
+        log.error(f"Erro na função dupla exponencial: {e}")
+        return np.zeros_like(t_sec)
+
+
+def is_uniform_time_grid(t: np.ndarray, rtol: float = 1e-6) -> bool:
+    """Indica se o vetor de tempo tem passo constante (dentro de `rtol` relativo)."""
+    t = np.asarray(t, dtype=float)
+    if t.size < 3:
+        return True
+    steps = np.diff(t)
+    mean_step = (t[-1] - t[0]) / (t.size - 1)
+    return mean_step > 0 and np.max(np.abs(steps - mean_step)) <= rtol * mean_step
+
+
+def _uniform_resample(
+    t: np.ndarray, v: np.ndarray, max_points: int = 2**16
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reamostra (t, v) numa grade uniforme para operações que exigem passo constante (FFT).
+    Retorna os arrays originais se a grade já for uniforme. O passo uniforme é o menor
+    passo da grade original, limitado a `max_points` amostras no intervalo total.
+    """
+    t = np.asarray(t, dtype=float)
+    if is_uniform_time_grid(t):
+        return t, v
+    span = t[-1] - t[0]
+    min_step = np.min(np.diff(t))
+    n_points = int(min(max_points, np.ceil(span / max(min_step, span / max_points)) + 1))
+    t_uniform = np.linspace(t[0], t[-1], n_points)
+    return t_uniform, np.interp(t_uniform, t, v)
+
+
+def build_adaptive_time_grid(
+    t_end_s: float,
+    t_peak_s: float,
+    t_chop_s: float | None = None,
+    min_step_s: float | None = None,
+    n_dense: int = 2000,
+    n_tail: int = 1000,
+    n_chop: int = 400,
+) -> np.ndarray:
+    """
+    Gera um vetor de tempo não uniforme para simulação de impulso.
+
+    A frente e o pico (até 3 x t_peak) recebem `n_dense` pontos uniformes; a cauda
+    recebe `n_tail` pontos com espaçamento crescendo geometricamente até `t_end_s`; e,
+    se houver corte, uma janela de ±5% (mín. 0.2 µs) em torno de `t_chop_s` recebe
+    `n_chop` pontos uniformes. O total fica limitado a n_dense + n_tail + n_chop,
+    independentemente da duração ou do tipo de impulso.
+
+    Args:
+        t_end_s: Duração total da simulação em segundos
+        t_peak_s: Tempo estimado do pico em segundos
+        t_chop_s: Instante de corte em segundos (None se não houver)
+        min_step_s: Passo mínimo desejado na região densa (ex.: passo informado na UI)
+        n_dense, n_tail, n_chop: Número de pontos de cada região
+
+    Returns:
+        Vetor de tempo crescente em segundos, começando em 0 e terminando em t_end_s.
+    """
+    if not t_end_s or t_end_s <= 0:
+        log.error(f"Duração de simulação inválida para grade adaptativa: {t_end_s}")
+        return np.array([0.0])
+    if not t_peak_s or not np.isfinite(t_peak_s) or t_peak_s <= 0:
+        t_peak_s = t_end_s / 20.0
+
+    t_dense_end = min(t_end_s, 3.0 * t_peak_s)
+    step_dense = t_dense_end / max(n_dense - 1, 1)
+    if min_step_s and min_step_s > step_dense:
+        step_dense = min_step_s
+    parts = [np.arange(0.0, t_dense_end, step_dense), [t_dense_end]]
+
+    if t_end_s > t_dense_end:
+        # Deslocamentos geométricos a partir do fim da região densa
+        span = t_end_s - t_dense_end
+        offsets = np.geomspace(step_dense, span + step_dense, n_tail) - step_dense
+        parts.append(t_dense_end + offsets)
+
+    if t_chop_s is not None and 0 < t_chop_s < t_end_s:
+        half_window = max(0.2e-6, 0.05 * t_chop_s)
+        t_chop_start = max(0.0, t_chop_s - half_window)
+        t_chop_end = min(t_end_s, t_chop_s + half_window)
+        parts.append(np.linspace(t_chop_start, t_chop_end, n_chop))
+
+    return np.unique(np.clip(np.concatenate(parts), 0.0, t_end_s))
+
+
+@functools.lru_cache(maxsize=1)
+def _double_exp_shape_tables() -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Tabelas adimensionais da dupla exponencial em função de r = β/α.
+
+    Com α = 1 todos os tempos escalam com 1/α, então as razões t30/t_pico, t90/t_pico
+    (frente) e t50/t_pico (cauda) dependem apenas de r. São calculadas uma única vez
+    por bissecção vetorizada e permitem ir de (α, β) para os tempos da onda e vice-versa
+    sem ajuste numérico.
+
+    Returns:
+        (r, t30/t_pico, t90/t_pico, t50/t_pico), arrays 1D ordenados por r.
+    """
+    r = np.geomspace(1.05, 1e5, 800)
+    t_peak = np.log(r) / (r - 1.0)
+    p_norm = np.exp(-t_peak) - np.exp(-r * t_peak)
+
+    def _crossing(level, lo, hi, rising):
+        target = level * p_norm
+        lo, hi = lo.copy(), hi.copy()
+        for _ in range(60):
+            mid = 0.5 * (lo + hi)
+            above = (np.exp(-mid) - np.exp(-r * mid)) >= target
+            go_right = above if rising else ~above
+            lo = np.where(go_right, mid, lo)
+            hi = np.where(go_right, hi, mid)
+        return 0.5 * (lo + hi)
+
+    zeros = np.zeros_like(r)
+    t30 = _crossing(0.3, zeros, t_peak, rising=False)
+    t90 = _crossing(0.9, zeros, t_peak, rising=False)
+    # h(t) < exp(-t), logo h < P/2 para t >= ln(2/P)
+    t50 = _crossing(0.5, t_peak, np.maximum(np.log(2.0 / p_norm), t_peak), rising=True)
+    return r, t30 / t_peak, t90 / t_peak, t50 / t_peak
+
+
+def double_exp_waveform_times(
+    alpha: np.ndarray | float, beta: np.ndarray | float
+) -> dict[str, np.ndarray]:
+    """
+    Tempos característicos da dupla exponencial exp(-αt) - exp(-βt), vetorizado.
+
+    Args:
+        alpha, beta: Constantes em s⁻¹ (escalares ou arrays; requer β > α).
+
+    Returns:
+        Dicionário com arrays em segundos: "t_peak", "t_30", "t_90", "t_50",
+        "t_front" (T1 = 1.67·(t90 - t30)) e "t_tail" (T2 a partir da origem virtual O1).
+        Entradas inválidas resultam em NaN.
+    """
+    alpha = np.asarray(alpha, dtype=float)
+    beta = np.asarray(beta, dtype=float)
+    r_table, t30_ratio, t90_ratio, t50_ratio = _double_exp_shape_tables()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        valid = (alpha > 0) & (beta > alpha)
+        r = np.where(valid, beta / alpha, np.nan)
+        t_peak = np.log(r) / (beta - alpha)
+        t_30 = np.interp(r, r_table, t30_ratio) * t_peak
+        t_90 = np.interp(r, r_table, t90_ratio) * t_peak
+        t_50 = np.interp(r, r_table, t50_ratio) * t_peak
+    t_origin = t_30 - 0.5 * (t_90 - t_30)  # reta 30%-90% cruza o zero em t30 - Δt/2
+    return {
+        "t_peak": t_peak,
+        "t_30": t_30,
+        "t_90": t_90,
+        "t_50": t_50,
+        "t_front": 1.67 * (t_90 - t_30),
+        "t_tail": t_50 - t_origin,
+    }
+
+
+def _estimate_double_exp_params_analytic(
+    t_sec: np.ndarray, v: np.ndarray
+) -> tuple[float, float, float] | None:
+    """
+    Estimativa analítica de (A, α, β) a partir dos cruzamentos da forma de onda.
+
+    Usa o instante de pico (refinado por interpolação parabólica) e o cruzamento de 50%
+    na cauda (T2). Sem cauda disponível (ex: onda cortada), usa os cruzamentos de 30% e
+    90% da frente (T1). A razão medida é invertida nas tabelas de `_double_exp_shape_tables`.
+
+    Returns:
+        (A, alpha, beta) ou None se os cruzamentos não puderem ser determinados.
+    """
+    peak_idx = int(np.argmax(v))
+    peak_value = float(v[peak_idx])
+    if peak_value <= 0 or peak_idx == 0:
+        return None
+
+    t_peak = float(t_sec[peak_idx])
+    if 0 < peak_idx < len(v) - 1:
+        y0, y1, y2 = v[peak_idx - 1], v[peak_idx], v[peak_idx + 1]
+        curvature = y0 - 2 * y1 + y2
+        if curvature < 0:
+            offset = 0.5 * (y0 - y2) / curvature
+            t_peak += offset * (t_sec[peak_idx + 1] - t_sec[peak_idx - 1]) / 2.0
+    if t_peak <= 0:
+        return None
+
+    r_table, t30_ratio, t90_ratio, t50_ratio = _double_exp_shape_tables()
+    ratio, table = None, None
+
+    after = v[peak_idx:]
+    below = np.flatnonzero(after <= 0.5 * peak_value)
+    if below.size and below[0] > 0:
+        i2 = peak_idx + below[0]
+        i1 = i2 - 1
+        t50 = t_sec[i1] + (0.5 * peak_value - v[i1]) * (t_sec[i2] - t_sec[i1]) / (v[i2] - v[i1])
+        ratio, table = t50 / t_peak, t50_ratio
+    else:
+        front_t, front_v = t_sec[: peak_idx + 1], v[: peak_idx + 1]
+        if front_v[0] <= 0.3 * peak_value:
+            t30 = np.interp(0.3 * peak_value, front_v, front_t)
+            t90 = np.interp(0.9 * peak_value, front_v, front_t)
+            # tabela da frente é decrescente em r; inverte para np.interp
+            ratio, table = (t90 - t30) / t_peak, t90_ratio - t30_ratio
+            r_table, table = r_table[::-1], table[::-1]
+
+    if ratio is None or not np.isfinite(ratio) or not (table[0] < ratio < table[-1]):
+        return None
+
+    r = float(np.interp(ratio, table, r_table))
+    alpha = math.log(r) / ((r - 1.0) * t_peak)
+    return peak_value, alpha, r * alpha
+
+
+def calculate_k_factor_transform(
+    v_kv: np.ndarray,
+    t_us: np.ndarray,
+    return_params: bool = False,
+    fit_method: str = "curve_fit",
+    max_iter: int = 100,
+    time_budget_s: float | None = None,
+) -> tuple:
+    """
+    Aplica a transformação K-factor (IEC 61083-2) a uma forma de onda de impulso.
+
+    Args:
+        v_kv: Array de tensão em kV.
+        t_us: Array de tempo em µs.
+        return_params: Se True, retorna também os parâmetros alpha e beta ajustados.
+        fit_method: "curve_fit" (ajuste TRF do SciPy) ou "fast" (estimativa analítica a
+            partir dos cruzamentos T1/T2 seguida de Levenberg-Marquardt com Jacobiano
+            explícito e limites).
+        max_iter: Máximo de iterações do modo "fast".
+        time_budget_s: Orçamento de tempo do modo "fast" em segundos (None = sem limite).
+            Esgotado o orçamento, usa o melhor ajuste encontrado até então.
+
+    Returns:
+        Uma tupla contendo:
+        - v_test_kv (np.ndarray): Onda de ensaio filtrada.
+        - v_base_kv (np.ndarray): Curva base (dupla exponencial ajustada).
+        - v_residual_filtered (np.ndarray): Resíduo filtrado.
+        - overshoot_rel (float): Overshoot relativo em %.
+        - (alpha_fit, beta_fit) (tuple | None): Parâmetros ajustados, se return_params=True.
+    """
+    log.debug("Aplicando transformação K-Factor...")
+    v_test = np.copy(v_kv)
+    v_base = np.copy(v_kv)
+    v_residual_filtered = np.zeros_like(v_kv)
+    overshoot_rel = 0.0
+    alpha_fit, beta_fit = None, None
+    fit_success = False
+
+    # --- Validações Iniciais ---
+    if (
+        not isinstance(v_kv, np.ndarray)
+        or not isinstance(t_us, np.ndarray)
+        or v_kv.ndim != 1
+        or t_us.ndim != 1
+        or len(v_kv) != len(t_us)
+        or len(v_kv) < 10
+    ):
+        log.warning("Dados de entrada inválidos para K-factor (tamanho/tipo).")
+        return (
+            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
+            if return_params
+            else (v_test, v_base, v_residual_filtered, overshoot_rel)
+        )
+    if np.std(v_kv) < 1e-9 * np.mean(np.abs(v_kv)):
+        log.warning("Variação muito baixa na tensão para aplicar K-factor.")
+        return (
+            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
+            if return_params
+            else (v_test, v_base, v_residual_filtered, overshoot_rel)
+        )
+    if t_us[-1] <= t_us[0]:
+        log.warning("Vetor de tempo inválido (não crescente) para K-factor.")
+        return (
+            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
+            if return_params
+            else (v_test, v_base, v_residual_filtered, overshoot_rel)
+        )
+
+    peak_value_orig = np.max(v_kv)
+    if abs(peak_value_orig) < 1e-3:  # Check absolute value for negative pulses
+        log.warning(
+            f"Amplitude de pico ({peak_value_orig:.2e} kV) muito baixa para K-factor significativo."
+        )
+        return (
+            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
+            if return_params
+            else (v_test, v_base, v_residual_filtered, overshoot_rel)
+        )
+
+    # --- 1. Ajuste da Curva Base (Dupla Exponencial) ---
+    try:
+        t_sec = t_us * 1e-6
+        peak_idx = np.argmax(v_kv)
+        t_peak_sec = t_sec[peak_idx]
+
+        # Find t_half (time to 50% on the tail) - more robustly
+        v_half_target = 0.5 * peak_value_orig
+        indices_after_peak = np.where(t_sec >= t_peak_sec)[0]
+        if len(indices_after_peak) < 2:  # Need at least two points for interpolation
+            raise ValueError("Not enough data points after peak to find t_half.")
+
+        v_after_peak = v_kv[indices_after_peak]
+        t_after_peak = t_sec[indices_after_peak]
+
+        # Find where voltage drops below 50% target
+        # Handle cases where voltage might oscillate around 50%
+        crossed_indices = np.where(np.diff(np.sign(v_after_peak - v_half_target)))[0]
+        t_half_sec = t_sec[-1]  # Default to last time if it never drops below 50%
+        if len(crossed_indices) > 0:
+            # Find the first crossing index after the peak
+            first_cross_idx = crossed_indices[0]
+            idx1 = first_cross_idx
+            idx2 = first_cross_idx + 1
+            if idx1 < len(t_after_peak) and idx2 < len(t_after_peak):
+                t1_tail, v1_tail = t_after_peak[idx1], v_after_peak[idx1]
+                t2_tail, v2_tail = t_after_peak[idx2], v_after_peak[idx2]
+                if abs(v2_tail - v1_tail) > 1e-9:  # Avoid division by zero
+                    t_half_sec = t1_tail + (v_half_target - v1_tail) * (t2_tail - t1_tail) / (
+                        v2_tail - v1_tail
+                    )
+                elif v1_tail >= v_half_target:  # If already at or above the point
+                    t_half_sec = t1_tail
+                else:  # If v2_tail is the point or below
+                    t_half_sec = t2_tail
+            else:
+                log.warning("Indices for t_half interpolation out of bounds.")
+        elif np.all(v_after_peak > v_half_target):
+            log.warning("Voltage never dropped below 50% on tail.")
+            t_half_sec = t_sec[-1]  # Use last time point
+
+        # Estimate initial parameters
+        T2_approx_sec = max(1.4 * t_half_sec, 5e-6)
+        T1_approx_sec = max(t_peak_sec, 0.5e-6) if t_peak_sec > 0 else 1e-6
+        alpha_est = 1.0 / T2_approx_sec
+        beta_est = 2.0 / T1_approx_sec
+        if beta_est <= alpha_est:
+            beta_est = alpha_est * 5
+        A_est = peak_value_orig
+
+        def _double_exp_fit_func(t, A_norm, alpha, beta):
+            try:
+                if alpha <= 0 or beta <= 0 or beta <= alpha + 1e-9 * alpha:
+                    return np.full_like(t, 1e12)
+                t_peak = math.log(beta / alpha) / (beta - alpha)
+                val_at_peak = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
+                if abs(val_at_peak) < 1e-12:
+                    return np.zeros_like(t)
+                k_norm = A_norm / val_at_peak
+                t_safe = np.maximum(t, 0)
+                res = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
+                return res
+            except (ValueError, OverflowError, ZeroDivisionError):
+                return np.full_like(t, 1e12)
+
+        # Adjust bounds based on sign of A_est
+        if A_est > 0:
+            lower_bounds = [A_est * 0.5, alpha_est * 0.1, beta_est * 0.1]
+            upper_bounds = [A_est * 1.5, alpha_est * 10, beta_est * 10]
+        else:  # Negative pulse
+            lower_bounds = [A_est * 1.5, alpha_est * 0.1, beta_est * 0.1]  # A_est is negative
+            upper_bounds = [A_est * 0.5, alpha_est * 10, beta_est * 10]  # A_est is negative
+
+        p0 = [A_est, alpha_est, beta_est]
+
+        if fit_method == "fast":
+            analytic = _estimate_double_exp_params_analytic(t_sec, v_kv)
+            if analytic is not None:
+                p0 = list(analytic)
+            A_fit, alpha_fit, beta_fit, fit_ok = _fit_double_exp_batch(
+                t_sec,
+                v_kv[None, :],
+                tuple(np.array([p]) for p in p0),
+                tuple(np.array([b]) for b in lower_bounds),
+                tuple(np.array([b]) for b in upper_bounds),
+                max_iter=max_iter,
+                time_budget_s=time_budget_s,
+            )
+            if not fit_ok[0]:
+                raise RuntimeError("Ajuste rápido (LM) não convergiu.")
+            A_fit, alpha_fit, beta_fit = float(A_fit[0]), float(alpha_fit[0]), float(beta_fit[0])
+        elif fit_method == "curve_fit":
+            popt, pcov = curve_fit(
+                _double_exp_fit_func,
+                t_sec,
+                v_kv,
+                p0=p0,
+                bounds=(lower_bounds, upper_bounds),
+                maxfev=5000,
+                method="trf",
+            )
+            A_fit, alpha_fit, beta_fit = popt
+        else:
+            raise ValueError(f"Método de ajuste desconhecido: {fit_method}")
+
+        log.debug(
+            f"Ajuste Curva Base K-Factor: A={A_fit:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
+        )
+        v_base = _double_exp_fit_func(t_sec, A_fit, alpha_fit, beta_fit)
+        fit_success = True
+
+    except (RuntimeError, ValueError, OptimizeWarning, Exception) as e:
+        log.warning(
+            f"Ajuste da curva base para K-Factor falhou: {e}. Usando onda original como base."
+        )
+        v_base = np.copy(v_kv)  # Use original as base if fit fails
+        alpha_fit, beta_fit = None, None
+        fit_success = False
+
+    # --- 2. Cálculo do Resíduo ---
+    v_residual = v_kv - v_base  # This is kV
+
+    # --- 3. Filtragem do Resíduo (Filtro K) ---
+    if fit_success and len(t_us) > 1:
+        # Grades não uniformes: o filtro é aplicado numa reamostragem uniforme do resíduo
+        t_fft_us, v_residual_fft_in = _uniform_resample(t_us, v_residual)
+        dt_us = t_fft_us[1] - t_fft_us[0] if len(t_fft_us) > 1 else 0.0
+        if dt_us > 1e-9:
+            dt_sec = dt_us * 1e-6
+            try:
+                frequencies = fftfreq(len(t_fft_us), dt_sec)
+                v_residual_fft = fft(v_residual_fft_in)
+
+                # IEC 61083-2 filter K(f) = 1 / (1 + (f / fc)^2)^n
+                # Parameters: fc = 0.2 MHz, n = 1.1
+                fc_mhz = 0.2
+                n_filter = 1.1
+                f_mhz = np.abs(frequencies) * 1e-6
+
+                # Calculate |K(f)|^2 = 1 / (1 + (f/fc)^2)^(2n)
+                filter_power = np.ones_like(frequencies, dtype=float)
+                non_zero_freq_mask = f_mhz > 1e-12
+                denominator = 1.0 + (f_mhz[non_zero_freq_mask] / fc_mhz) ** 2
+                # Add small epsilon to avoid issues with denominator near 1 if needed
+                filter_power[non_zero_freq_mask] = 1.0 / (denominator ** (2 * n_filter) + 1e-18)
+
+                # Apply the amplitude filter K(f) = sqrt(|K(f)|^2)
+                k_filter_amplitude = np.sqrt(filter_power + 0j)
+                v_residual_filtered_fft = v_residual_fft * k_filter_amplitude
+                v_residual_filtered = np.real(ifft(v_residual_filtered_fft))
+                if t_fft_us is not t_us:
+                    v_residual_filtered = np.interp(t_us, t_fft_us, v_residual_filtered)
+
+            except Exception as e_fft:
+                log.error(
+                    f"Erro durante FFT/Filtragem/IFFT no K-factor: {e_fft}. Resíduo filtrado será zero."
+                )
+                v_residual_filtered = np.zeros_like(v_residual)
+        else:
+            log.warning(
+                "Passo de tempo inválido ou ajuste base falhou. Resíduo filtrado K-factor será zero."
+            )
+            v_residual_filtered = np.zeros_like(v_residual)
+    else:  # If fit failed
+        v_residual_filtered = np.zeros_like(v_residual)
+
+    # --- 4. Cálculo da Onda de Ensaio Vt(t) ---
+    v_test = v_base + v_residual_filtered
+    # Keep negative values if the pulse is negative polarity
+    # v_test = np.maximum(v_test, 0) # Remove this line
+
+    # --- 5. Cálculo do Overshoot ---
+    peak_value_base = np.max(np.abs(v_base)) if len(v_base) > 0 else 0
+    # Overshoot = max(v_residual) / |peak_base| * 100%
+    if peak_value_base > 1e-9:
+        max_residual = np.max(v_residual)  # Use the actual residual, not filtered
+        overshoot_rel = max(0.0, (max_residual / peak_value_base)) * 100.0
+        log.debug(
+            f"Overshoot K-Factor: Vp_orig={peak_value_orig:.2f}, Vp_base={np.max(v_base):.2f}, MaxRes={max_residual:.2f} => Overshoot={overshoot_rel:.1f}%"
+        )
+    else:
+        overshoot_rel = 0.0
+
+    if return_params:
+        return v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit)
+    else:
+        return v_test, v_base, v_residual_filtered, overshoot_rel
+
+
+# --- Funções de Análise de Forma de Onda (de impulse.py) ---
+
+
+def analyze_lightning_impulse(
+    t_us: np.ndarray, v_kv: np.ndarray, fit_method: str = "curve_fit"
+) -> dict:
+    """
+    Analisa parâmetros de Impulso Atmosférico (LI) usando K-Factor.
+    `fit_method` é repassado a `calculate_k_factor_transform`.
+    """
+    log.info("Analisando Impulso Atmosférico (LI)...")
+    results = {
+        "waveform_type": "LI",
+        "peak_value_measured": None,
+        "peak_value_base": None,
+        "peak_value_test": None,
+        "peak_time_test_us": None,
+        "t_30_us": None,
+        "t_90_us": None,
+        "t_0_virtual_us": None,
+        "t_front_us": None,
+        "t_50_us": None,
+        "t_tail_us": None,
+        "overshoot_percent": 0.0,
+        "params_base_alpha": None,
+        "params_base_beta": None,
+        "conforme_frente": False,
+        "conforme_cauda": False,
+        "conforme_overshoot": True,
+        "conforme_pico": False,  # Pico check needs target
+        "status_geral": "Indeterminado",
+        "error": None,
+    }
+
+    try:
+        if (
+            v_kv is None
+            or t_us is None
+            or len(v_kv) < 10
+            or len(t_us) != len(v_kv)
+            or np.std(v_kv) < 1e-9
+        ):
+            results["error"] = "Dados de entrada inválidos ou insuficientes para análise LI."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+
+        results["peak_value_measured"] = np.max(v_kv)
+
+        # 1. Aplica K-Factor
+        v_test_kv, v_base_kv, _, overshoot_rel, params_base = calculate_k_factor_transform(
+            v_kv, t_us, return_params=True, fit_method=fit_method
+        )
+        results["overshoot_percent"] = overshoot_rel
+        results["peak_value_base"] = (
+            np.max(v_base_kv) if v_base_kv is not None and len(v_base_kv) > 0 else 0.0
+        )
+        if params_base:
+            results["params_base_alpha"], results["params_base_beta"] = params_base
+
+        if (
+            v_test_kv is None
+            or len(v_test_kv) < 5
+            or np.std(v_test_kv) < 1e-6 * np.mean(np.abs(v_test_kv))
+        ):
+            results["error"] = "Onda de ensaio (Vt) inválida após K-factor. Usando original."
+            log.warning(results["error"])
+            v_test_kv = v_kv
+            results["overshoot_percent"] = 0.0  # Assume zero overshoot if K-factor failed
+
+        # 2. Encontra Pico de Vt
+        test_peak_idx = np.argmax(v_test_kv)
+        results["peak_time_test_us"] = t_us[test_peak_idx]
+        results["peak_value_test"] = v_test_kv[test_peak_idx]
+
+        # 3. Análise da Frente (T1 e O1) baseada em Vt
+        t_0_virtual_us = 0.0
+        if results["peak_value_test"] > 1e-6:
+            v_30_target = 0.3 * results["peak_value_test"]
+            v_90_target = 0.9 * results["peak_value_test"]
+            mask_before_peak = t_us <= results["peak_time_test_us"]
+            t_before_us = t_us[mask_before_peak]
+            v_before_kv = v_test_kv[mask_before_peak]
+
+            if len(v_before_kv) > 1:
+                v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
+                if v_max_b >= v_90_target and v_min_b <= v_30_target:
+                    try:
+                        t_30 = np.interp(
+                            v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
+                        )
+                        t_90 = np.interp(
+                            v_90_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
+                        )
+                        results["t_30_us"] = t_30
+                        results["t_90_us"] = t_90
+                        if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
+                            delta_t_front = t_90 - t_30
+                            results["t_front_us"] = 1.67 * delta_t_front
+                            if delta_t_front > 1e-9:
+                                slope = (v_90_target - v_30_target) / delta_t_front
+                                if abs(slope) > 1e-9:
+                                    t_0_virtual_us = t_30 - (v_30_target / slope)
+                                else:
+                                    t_0_virtual_us = t_30
+                            results["t_0_virtual_us"] = t_0_virtual_us
+                        else:
+                            log.warning("t30 ou t90 inválidos ou não crescentes.")
+                    except Exception as e_interp_front:
+                        log.error(f"Erro interpolação frente LI: {e_interp_front}")
+                else:
+                    log.warning(f"Níveis 30%/90% fora do range ({v_min_b:.2f}-{v_max_b:.2f}).")
+            else:
+                log.warning("Dados insuficientes antes do pico.")
+        else:
+            log.warning("Pico de Vt muito baixo.")
+
+        # 4. Análise da Cauda (T2) baseada em Vt
+        v_50_target = 0.5 * results["peak_value_test"]
+        mask_after_peak = t_us >= results["peak_time_test_us"]
+        t_after_us = t_us[mask_after_peak]
+        v_after_kv = v_test_kv[mask_after_peak]
+
+        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
+            try:
+                # Robust interpolation for t_50
+                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
+                if len(indices_below_50) > 0:
+                    idx2 = indices_below_50[0]
+                    idx1 = idx2 - 1 if idx2 > 0 else 0
+                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
+                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
+                    if abs(v2_tail - v1_tail) > 1e-9:
+                        t_50 = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
+                            v2_tail - v1_tail
+                        )
+                    elif v1_tail >= v_50_target:
+                        t_50 = t1_tail
+                    else:
+                        t_50 = t2_tail  # Should ideally not happen if search is correct
+                    if not np.isnan(t_50):
+                        results["t_50_us"] = t_50
+                        results["t_tail_us"] = t_50 - t_0_virtual_us
+            except Exception as e_interp_tail:
+                log.error(f"Erro interpolação cauda LI: {e_interp_tail}")
+        else:
+            log.warning("Dados insuficientes ou tensão não caiu para 50% na cauda.")
+
+        # 5. Verificação de Conformidade
+        t1 = results["t_front_us"]
+        t2 = results["t_tail_us"]
+        vt = results["peak_value_test"]
+        beta = results["overshoot_percent"]
+        if t1 is not None:
+            results["conforme_frente"] = (
+                constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
+                * (1 - constants.LIGHTNING_FRONT_TOLERANCE)
+                <= t1
+                <= constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
+                * (1 + constants.LIGHTNING_FRONT_TOLERANCE)
+            )
+        if t2 is not None:
+            results["conforme_cauda"] = (
+                constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM * (1 - constants.LIGHTNING_TAIL_TOLERANCE)
+                <= t2
+                <= constants.LIGHTNING_IMPULSE_TAIL_TIME_NOM
+                * (1 + constants.LIGHTNING_TAIL_TOLERANCE)
+            )
+        if beta is not None:
+            results["conforme_overshoot"] = beta <= (constants.LIGHTNING_OVERSHOOT_MAX * 100.0)
+        # Conformidade de pico é omitida por padrão, precisa de um alvo
+
+        if (
+            results["conforme_frente"]
+            and results["conforme_cauda"]
+            and results["conforme_overshoot"]
+        ):
+            results["status_geral"] = "Conforme"
+        else:
+            results["status_geral"] = "Não Conforme"
+
+        # T1/T2 ficam None quando a onda não cruza os níveis dentro da janela simulada
+        t1_s, t2_s = ("N/A" if v is None else f"{v:.2f}" for v in (t1, t2))
+        log.info(
+            f"Análise LI Concluída: Vt={vt:.2f}kV, T1={t1_s}µs, T2={t2_s}µs, β={beta:.1f}%, "
+            f"Status={results['status_geral']}"
+        )
+        return results
+
+    except Exception as e:
+        log.exception(f"Erro geral em analyze_lightning_impulse: {e}")
+        results["error"] = f"Erro inesperado: {str(e)}"
+        results["status_geral"] = "Erro"
+        return results
+
+
+def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
+    """Analisa parâmetros de Impulso de Manobra (SI) conforme IEC 60060-1."""
+    log.info("Analisando Impulso de Manobra (SI)...")
+    results = {
+        "waveform_type": "SI",
+        "peak_value_measured": None,
+        "peak_time_us": None,
+        "t_p_us": None,
+        "t_d_us": None,
+        "t_half_us": None,
+        "t_2_us": None,
+        "t_z_us": None,
+        "t_zero_us": None,
+        "t_ab_us": None,
+        "t_30_us": None,
+        "t_90_us": None,
+        "conforme_tp": False,
+        "conforme_t2": False,
+        "conforme_td": False,
+        "conforme_tzero": False,
+        "status_geral": "Indeterminado",
+        "error": None,
+    }
+    try:
+        if (
+            v_kv is None
+            or t_us is None
+            or len(v_kv) < 10
+            or len(t_us) != len(v_kv)
+            or np.std(v_kv) < 1e-9
+        ):
+            results["error"] = "Dados de entrada inválidos ou insuficientes para análise SI."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+
+        peak_index = np.argmax(v_kv)
+        results["peak_time_us"] = t_us[peak_index]
+        results["peak_value_measured"] = v_kv[peak_index]
+        t_origin_us = t_us[0]
+
+        # --- Cálculo de Td ---
+        v_90_target = 0.9 * results["peak_value_measured"]
+        indices_above_90 = np.where(v_kv >= v_90_target)[0]
+        if len(indices_above_90) > 1:
+            first_idx, last_idx = indices_above_90[0], indices_above_90[-1]
+            if 0 <= first_idx < len(t_us) and 0 <= last_idx < len(t_us):
+                results["td_us"] = t_us[last_idx] - t_us[first_idx]
+            else:
+                log.warning("Índices Td fora dos limites.")
+        else:
+            log.warning("Não foi possível calcular Td (pontos >= 90%).")
+
+        # --- Cálculo de T2 ---
+        v_50_target = 0.5 * results["peak_value_measured"]
+        mask_after_peak = t_us >= results["peak_time_us"]
+        t_after_us = t_us[mask_after_peak]
+        v_after_kv = v_kv[mask_after_peak]
+        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
+            try:
+                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
+                if len(indices_below_50) > 0:
+                    idx2 = indices_below_50[0]
+                    idx1 = max(0, idx2 - 1)
+                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
+                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
+                    if abs(v2_tail - v1_tail) > 1e-9:
+                        t_half = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
+                            v2_tail - v1_tail
+                        )
+                    elif v1_tail >= v_50_target:
+                        t_half = t1_tail
+                    else:
+                        t_half = t2_tail
+                    if not np.isnan(t_half):
+                        results["t_half_us"] = t_half
+                        results["t_2_us"] = t_half - t_origin_us
+            except Exception as e:
+                log.error(f"Erro interpolação T2 SI: {e}")
+        else:
+            log.warning("Tensão não caiu para 50% para cálculo T2.")
+
+        # --- Cálculo de Tz ---
+        if len(v_after_kv) > 0 and np.min(v_after_kv) <= 1e-6:
+            try:
+                zero_cross_indices = np.where(v_after_kv <= 0)[0]
+                if len(zero_cross_indices) > 0:
+                    first_zero_idx_rel = zero_cross_indices[0]
+                    first_zero_idx_abs = np.where(t_us == t_after_us[first_zero_idx_rel])[0][0]
+                    if first_zero_idx_abs > 0:
+                        idx1_z, idx2_z = first_zero_idx_abs - 1, first_zero_idx_abs
+                        t1_z, v1_z = t_us[idx1_z], v_kv[idx1_z]
+                        t2_z, v2_z = t_us[idx2_z], v_kv[idx2_z]
+                        if v1_z > 0 and v2_z <= 0 and abs(v2_z - v1_z) > 1e-9:
+                            t_z = t1_z - v1_z * (t2_z - t1_z) / (v2_z - v1_z)
+                        elif v2_z <= 0:
+                            t_z = t2_z
+                        else:
+                            t_z = np.nan  # Should not happen if logic is correct
+                        if not np.isnan(t_z):
+                            results["t_z_us"] = t_z
+                            results["t_zero_us"] = t_z - t_origin_us
+            except Exception as e:
+                log.error(f"Erro interpolação Tz SI: {e}")
+        else:
+            log.warning("Tensão não cruzou zero para cálculo Tz.")
+
+        # --- Cálculo de Tp ---
+        v_30_target = 0.3 * results["peak_value_measured"]
+        v_90_target_tp = 0.9 * results["peak_value_measured"]
+        mask_before_peak = t_us <= results["peak_time_us"]
+        t_before_us = t_us[mask_before_peak]
+        v_before_kv = v_kv[mask_before_peak]
+        t_30, t_90 = np.nan, np.nan
+        if len(v_before_kv) > 1:
+            v_min_b, v_max_b = np.min(v_before_kv), np.max(v_before_kv)
+            if v_max_b >= v_90_target_tp and v_min_b <= v_30_target:
+                try:
+                    t_30 = np.interp(
+                        v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
+                    )
+                    t_90 = np.interp(
+                        v_90_target_tp, v_before_kv, t_before_us, left=np.nan, right=np.nan
+                    )
+                    results["t_30_us"] = t_30
+                    results["t_90_us"] = t_90
+                    if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
+                        results["t_ab_us"] = t_90 - t_30
+                except Exception as e:
+                    log.error(f"Erro interpolação T_AB SI: {e}")
+            else:
+                log.warning("Níveis 30%/90% fora do range T_AB.")
+
+        if results.get("t_ab_us") is not None and results.get("t_2_us") is not None:
+            try:
+                tab, t2 = results["t_ab_us"], results["t_2_us"]
+                K = 2.42 - (3.08e-3 * tab) + (1.51e-6 * (t2**2))  # Fórmula K aproximada
+                results["t_p_us"] = K * tab
+            except Exception as e:
+                log.error(f"Erro cálculo Tp fórmula K: {e}")
+                results["t_p_us"] = results["peak_time_us"] - t_origin_us
+        else:
+            results["t_p_us"] = results["peak_time_us"] - t_origin_us
+
+        # --- Verificação de Conformidade ---
+        tp, t2, td, tz = (
+            results["t_p_us"],
+            results["t_2_us"],
+            results.get("td_us"),
+            results.get("t_zero_us"),
+        )
+        if tp is not None:
+            results["conforme_tp"] = (
+                constants.SWITCHING_IMPULSE_PEAK_TIME_NOM
+                * (1 - constants.SWITCHING_PEAK_TIME_TOLERANCE)
+                <= tp
+                <= constants.SWITCHING_IMPULSE_PEAK_TIME_NOM
+                * (1 + constants.SWITCHING_PEAK_TIME_TOLERANCE)
+            )
+        if t2 is not None:
+            results["conforme_t2"] = (
+                constants.SWITCHING_IMPULSE_TAIL_TIME_NOM * (1 - constants.SWITCHING_TAIL_TOLERANCE)
+                <= t2
+                <= constants.SWITCHING_IMPULSE_TAIL_TIME_NOM
+                * (1 + constants.SWITCHING_TAIL_TOLERANCE)
+            )
+        if td is not None:
+            results["conforme_td"] = td >= constants.SWITCHING_TIME_ABOVE_90_MIN
+        if tz is not None:
+            results["conforme_tzero"] = tz >= constants.SWITCHING_TIME_TO_ZERO_MIN
+
+        if (
+            results["conforme_tp"]
+            and results["conforme_t2"]
+            and results["conforme_td"]
+            and results["conforme_tzero"]
+        ):
+            results["status_geral"] = "Conforme"
+        else:
+            results["status_geral"] = "Não Conforme"
+
+        # Td/Tz ficam None quando a onda não permanece acima de 90% ou não cruza zero
+        tp_s, t2_s, td_s, tz_s = ("N/A" if v is None else f"{v:.1f}" for v in (tp, t2, td, tz))
+        log.info(
+            f"Análise SI Concluída: Vp={results['peak_value_measured']:.1f}kV, Tp={tp_s}µs, "
+            f"T2={t2_s}µs, Td={td_s}µs, Tz={tz_s}µs, Status={results['status_geral']}"
+        )
+        return results
+
+    except Exception as e:
+        log.exception(f"Erro geral em analyze_switching_impulse: {e}")
+        results["error"] = f"Erro inesperado: {str(e)}"
+        results["status_geral"] = "Erro"
+        return results
+
+
+def analyze_chopped_impulse(
+    t_us: np.ndarray,
+    v_kv: np.ndarray,
+    chop_time_actual_us: float | None,
+    fit_method: str = "curve_fit",
+) -> dict:
+    """
+    Analisa parâmetros de Impulso Cortado (LIC) usando K-Factor na frente.
+    `fit_method` é repassado a `calculate_k_factor_transform`.
+    """
+    log.info(f"Analisando Impulso Cortado (LIC) com corte real em ~{chop_time_actual_us:.2f} µs...")
+    results = {
+        "waveform_type": "LIC",
+        "peak_value_full_wave_test": None,
+        "peak_time_full_wave_us": None,
+        "t_front_us": None,
+        "t_0_virtual_us": None,
+        "chop_time_us": None,
+        "chop_time_absolute_us": None,
+        "chop_voltage_test_kv": None,
+        "chop_voltage_measured_kv": None,
+        "undershoot_percent": 0.0,
+        "t_30_us": None,
+        "t_90_us": None,
+        "conforme_frente": False,
+        "conforme_corte": False,
+        "conforme_undershoot": True,  # Conformidade Vc omitida
+        "status_geral": "Indeterminado",
+        "error": None,
+    }
+
+    try:
+        if (
+            v_kv is None
+            or t_us is None
+            or len(v_kv) < 10
+            or len(t_us) != len(v_kv)
+            or np.std(v_kv) < 1e-9
+        ):
+            results["error"] = "Dados de entrada inválidos/insuficientes para análise LIC."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+        if (
+            chop_time_actual_us is None
+            or chop_time_actual_us <= t_us[0]
+            or chop_time_actual_us >= t_us[-1]
+        ):
+            results["error"] = f"Tempo de corte ({chop_time_actual_us}) inválido ou fora do range."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+
+        results["chop_time_absolute_us"] = chop_time_actual_us
+        chop_start_index = np.argmin(np.abs(t_us - chop_time_actual_us))
+        if chop_start_index < 10:
+            results["error"] = f"Tempo de corte ({chop_time_actual_us}µs) muito próximo do início."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+
+        t_before_chop_us = t_us[: chop_start_index + 1]
+        v_before_chop_kv = v_kv[: chop_start_index + 1]
+        v_test_before_chop, _, _, _ = calculate_k_factor_transform(
+            v_before_chop_kv, t_before_chop_us, return_params=False, fit_method=fit_method
+        )
+        if v_test_before_chop is None or len(v_test_before_chop) < 5:
+            results["error"] = "Falha K-factor na frente cortada."
+            log.error(results["error"])
+            results["status_geral"] = "Erro"
+            return results
+
+        # --- Parâmetros da Onda Plena Subjacente ---
+        peak_idx_before = np.argmax(v_test_before_chop)
+        results["peak_time_full_wave_us"] = t_before_chop_us[peak_idx_before]
+        results["peak_value_full_wave_test"] = v_test_before_chop[peak_idx_before]
+        t_0_virtual_us_subj = 0.0
+        if results["peak_value_full_wave_test"] > 1e-6:
+            v_30_t = 0.3 * results["peak_value_full_wave_test"]
+            v_90_t = 0.9 * results["peak_value_full_wave_test"]
+            mask_f = t_before_chop_us <= results["peak_time_full_wave_us"]
+            t_f_us = t_before_chop_us[mask_f]
+            v_f_kv = v_test_before_chop[mask_f]
+            if len(v_f_kv) > 1:
+                v_min_s, v_max_s = np.min(v_f_kv), np.max(v_f_kv)
+                if v_max_s >= v_90_t and v_min_s <= v_30_t:
+                    try:
+                        t_30 = np.interp(v_30_t, v_f_kv, t_f_us, left=np.nan, right=np.nan)
+                        t_90 = np.interp(v_90_t, v_f_kv, t_f_us, left=np.nan, right=np.nan)
+                        results["t_30_us"] = t_30
+                        results["t_90_us"] = t_90
+                        if not np.isnan(t_30) and not np.isnan(t_90) and t_90 > t_30:
+                            delta_t = t_90 - t_30
+                            results["t_front_us"] = 1.67 * delta_t
+                            if delta_t > 1e-9:
+                                slope = (v_90_t - v_30_t) / delta_t
+                                if abs(slope) > 1e-9:
+                                    t_0_virtual_us_subj = t_30 - (v_30_t / slope)
+                                else:
+                                    t_0_virtual_us_subj = t_30
+                            results["t_0_virtual_us"] = t_0_virtual_us_subj
+                    except Exception as e:
+                        log.error(f"Erro interpolação frente LIC: {e}")
+                else:
+                    log.warning("Níveis 30/90 não encontrados na frente subj.")
+            else:
+                log.warning("Dados insuficientes na frente subj.")
+        else:
+            log.warning("Pico da onda plena subj. muito baixo.")
+
+        # --- Parâmetros do Corte ---
+        if results["t_0_virtual_us"] is not None:
+            results["chop_time_us"] = results["chop_time_absolute_us"] - results["t_0_virtual_us"]
+        results["chop_voltage_test_kv"] = np.interp(
+            results["chop_time_absolute_us"],
+            t_before_chop_us,
+            v_test_before_chop,
+            left=np.nan,
+            right=np.nan,
+        )
+        results["chop_voltage_measured_kv"] = v_kv[chop_start_index]
+
+        # --- Undershoot ---
+        v_after_chop_kv = v_kv[chop_start_index + 1 :]
+        if len(v_after_chop_kv) > 0:
+            min_after_chop = np.min(v_after_chop_kv)
+            vc_ref = results["chop_voltage_test_kv"]
+            if min_after_chop < 0 and vc_ref is not None and abs(vc_ref) > 1e-6:
+                results["undershoot_percent"] = max(0.0, abs(min_after_chop) / abs(vc_ref)) * 100.0
+                log.debug(
+                    f"Undershoot LIC: Vmin={min_after_chop:.2f}, Vc={vc_ref:.2f} => Undershoot={results['undershoot_percent']:.1f}%"
+                )
+            elif vc_ref is None or abs(vc_ref) < 1e-6:
+                log.warning("Vc inválido para undershoot.")
+
+        # --- Conformidade ---
+        t1, tc, undershoot = (
+            results["t_front_us"],
+            results["chop_time_us"],
+            results["undershoot_percent"],
+        )
+        if t1 is not None:
+            results["conforme_frente"] = (
+                constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 - constants.CHOPPED_FRONT_TOLERANCE)
+                <= t1
+                <= constants.LIGHTNING_IMPULSE_FRONT_TIME_NOM
+                * (1 + constants.CHOPPED_FRONT_TOLERANCE)
+            )
+        if tc is not None:
+            results["conforme_corte"] = (
+                constants.CHOPPED_IMPULSE_CHOP_TIME_MIN
+                <= tc
+                <= constants.CHOPPED_IMPULSE_CHOP_TIME_MAX
+            )
+        if undershoot is not None:
+            results["conforme_undershoot"] = undershoot <= (
+                constants.CHOPPED_UNDERSHOOT_MAX * 100.0
+            )
+
+        if (
+            results["conforme_frente"]
+            and results["conforme_corte"]
+            and results["conforme_undershoot"]
+        ):
+            results["status_geral"] = "Conforme"
+        else:
+            results["status_geral"] = "Não Conforme"
+
+        log.info(
+            f"Análise LIC Concluída: Vc={results['chop_voltage_test_kv']:.1f}kV, T1_subj={t1:.2f}µs, Tc={tc:.2f}µs, Undershoot={undershoot:.1f}%, Status={results['status_geral']}"
+        )
+        return results
+
+    except Exception as e:
+        log.exception(f"Erro geral em analyze_chopped_impulse: {e}")
+        results["error"] = f"Erro inesperado: {str(e)}"
+        results["status_geral"] = "Erro"
+        return results
+
+
+# === Funções de Simulação de Impulso (Híbrida) ===
+
+
+def simulate_hybrid_impulse(
+    t_sec: np.ndarray,
+    v0_charge: float,
+    rf: float,
+    rt: float,
+    l_total: float,
+    c_gen: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float = None,
+    fit_method: str = "curve_fit",
+) -> tuple:
+    """
+    Simula o circuito de impulso usando a abordagem híbrida RLC + K-Factor + Dupla Exponencial.
+
+    Args:
+        t_sec: Array de tempo em segundos
+        v0_charge: Tensão de carga inicial em Volts
+        rf: Resistência de frente em Ohms
+        rt: Resistência de cauda em Ohms
+        l_total: Indutância total em Henries
+        c_gen: Capacitância do gerador em Farads
+        c_load: Capacitância da carga em Farads
+        impulse_type: Tipo de impulso ("lightning", "chopped", "switching")
+        gap_distance_cm: Distância do gap em cm (apenas para impulso cortado)
+        fit_method: Método de ajuste da curva base ("curve_fit" ou "fast")
+
+    Returns:
+        Tupla contendo (v_rlc, v_final, i_load, alpha, beta, chop_time_sec)
+    """
+    # Validação de parâmetros de entrada
+    if t_sec is None or len(t_sec) < 2:
+        log.error("Vetor de tempo inválido ou muito curto para simulação de impulso")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(v0_charge, (int, float)) or v0_charge <= 0:
+        log.error(f"Tensão de carga inválida: {v0_charge}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(rf, (int, float)) or rf <= 0:
+        log.error(f"Resistência de frente inválida: {rf}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(rt, (int, float)) or rt <= 0:
+        log.error(f"Resistência de cauda inválida: {rt}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(l_total, (int, float)) or l_total <= 0:
+        log.error(f"Indutância total inválida: {l_total}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(c_gen, (int, float)) or c_gen <= 0:
+        log.error(f"Capacitância do gerador inválida: {c_gen}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if not isinstance(c_load, (int, float)) or c_load <= 0:
+        log.error(f"Capacitância da carga inválida: {c_load}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        log.error(f"Tipo de impulso inválido: {impulse_type}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+    # Parâmetros da simulação
+    collapse_time = 0.1e-6  # Tempo de colapso do gap em segundos
+    log.info(f"Simulando Híbrido: Tipo={impulse_type}, V0_carga={v0_charge/1000:.1f}kV")
+
+    try:
+        # Cálculo da capacitância equivalente
+        c_eq = (c_gen * c_load) / (c_gen + c_load) if (c_gen + c_load) > 1e-15 else 0
+        r_rlc = rf + constants.R_PARASITIC_OHM  # Adiciona resistência parasita
+
+        log.debug(f"Simulando RLC: R={r_rlc:.1f}, L={l_total:.2e}, Ceq={c_eq:.2e}")
+
+        # Solução RLC
+        v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
+        v_rlc_kv = v_rlc / 1000  # Converte para kV para K-factor
+        t_us = t_sec * 1e6  # Converte para µs para K-factor
+
+        # Transformação K-factor
+        v_test, v_base, _, overshoot, (alpha_fit, beta_fit) = calculate_k_factor_transform(
+            v_rlc_kv, t_us, return_params=True, fit_method=fit_method
+        )
+
+        # Se o ajuste K-factor falhar, usa estimativas teóricas
+        if alpha_fit is None or beta_fit is None:
+            log.warning("Ajuste K-factor falhou. Usando estimativas teóricas.")
+            # Estimativas teóricas baseadas nos parâmetros do circuito
+            alpha = 1 / (rt * (c_gen + c_load)) if rt > 1e-9 and (c_gen + c_load) > 1e-15 else 0
+            beta = 1 / (rf * c_eq) if rf > 1e-9 and c_eq > 1e-15 else 0
+
+            # Garante que beta > alpha (necessário para dupla exponencial)
+            if beta <= alpha + 1e-9:
+                adjust_factor = 1.05
+                add_factor = 1e3 if impulse_type in ["lightning", "chopped"] else 1e2
+                beta = alpha * adjust_factor + add_factor
+                log.warning(f"Beta ajustado para {beta:.2e} (era <= alpha)")
+        else:
+            alpha = alpha_fit
+            beta = beta_fit
+            log.info(f"Parâmetros K-factor: alpha={alpha:.2e}, beta={beta:.2e}")
+
+        # Gera forma de onda final usando dupla exponencial
+        v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
+
+        # Processamento especial para impulso cortado
+        chop_time_sec = None
+        if impulse_type == "chopped" and gap_distance_cm is not None and gap_distance_cm > 0:
+            # Tensão de breakdown estimada (30 kV/cm)
+            breakdown_voltage = 30.0 * gap_distance_cm * 1000  # Converte para V
+
+            # Encontra o primeiro ponto onde a tensão excede a tensão de breakdown
+            times_above_threshold = np.where(v_final >= breakdown_voltage)[0]
+
+            if len(times_above_threshold) > 0:
+                chop_idx = times_above_threshold[0]
+
+                if chop_idx < len(t_sec):
+                    chop_time_sec = t_sec[chop_idx]
+                    log.info(
+                        f"Corte detectado: t={chop_time_sec*1e6:.2f} µs, V={v_final[chop_idx]/1000:.1f} kV"
+                    )
+
+                    # Índices após o corte
+                    collapse_idx = np.where(t_sec >= chop_time_sec)[0]
+
+                    if len(collapse_idx) > 0:
+                        chop_voltage_final = v_final[chop_idx]
+                        dt_after_chop = t_sec[collapse_idx] - chop_time_sec
+
+                        # Fase de colapso (queda linear)
+                        mask_collapse = dt_after_chop <= collapse_time
+                        idx_collapse = collapse_idx[mask_collapse]
+
+                        # Fase de oscilação (após colapso)
+                        mask_osc = dt_after_chop > collapse_time
+                        idx_osc = collapse_idx[mask_osc]
+
+                        # Aplica queda linear durante o colapso
+                        if len(idx_collapse) > 0:
+                            v_final[idx_collapse] = chop_voltage_final * (
+                                1 - (t_sec[idx_collapse] - chop_time_sec) / collapse_time
+                            )
+
+                        # Aplica oscilação amortecida após o colapso
+                        if len(idx_osc) > 0:
+                            freq_osc = 5e6  # Frequência de oscilação em Hz
+                            damp_factor = 1.5  # Fator de amortecimento
+                            undershoot_ratio = 0.25  # Razão de undershoot
+
+                            # Tempo após o colapso
+                            time_after_collapse = t_sec[idx_osc] - chop_time_sec - collapse_time
+
+                            # Amplitude da oscilação
+                            amp = (
+                                -chop_voltage_final
+                                * undershoot_ratio
+                                * np.exp(-damp_factor * time_after_collapse * 1e6)
+                            )
+
+                            # Oscilação
+                            osc = amp * np.cos(2 * np.pi * freq_osc * time_after_collapse)
+                            v_final[idx_osc] = osc
+
+                            # Limita o undershoot e zera após algumas oscilações
+                            v_final[idx_osc] = np.clip(
+                                v_final[idx_osc], -0.3 * abs(chop_voltage_final), float("inf")
+                            )
+                            v_final[idx_osc[time_after_collapse > 3 / freq_osc]] = 0
+            else:
+                log.warning(
+                    f"Tensão não atingiu breakdown ({breakdown_voltage/1000:.1f} kV) para gap={gap_distance_cm} cm"
+                )
+
+        # Calcula corrente na carga (derivada da tensão)
+        i_load = c_load * np.gradient(v_final, t_sec)
+
+        return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
+
+    except Exception as e:
+        log.exception(f"Erro na simulação de impulso híbrido: {e}")
+        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+
+
+# === Simulação de Impulso em Lote (Vetorizada) ===
+
+
+def rlc_solution_batch(
+    t_sec: np.ndarray,
+    v0: np.ndarray | float,
+    r_total: np.ndarray | float,
+    l_total: np.ndarray | float,
+    c_eq: np.ndarray | float,
+) -> np.ndarray:
+    """
+    Versão vetorizada de `rlc_solution` para N circuitos sobre o mesmo vetor de tempo.
+
+    Os regimes são avaliados por blocos de linhas com aritmética real: subamortecido
+    exp(-a·t)·[cos(w·t) + (a/w)·sin(w·t)], sobreamortecido (s1·e^(s2·t) - s2·e^(s1·t))/(s1 - s2)
+    e criticamente amortecido (1 + a·t)·exp(-a·t).
+
+    Args:
+        t_sec: Array 1D de tempo em segundos (compartilhado por todos os circuitos).
+        v0, r_total, l_total, c_eq: Escalares ou arrays 1D de mesmo tamanho N.
+
+    Returns:
+        Array (N, len(t_sec)) com a tensão em Volts. Linhas com parâmetros inválidos são zero.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    v0, r_total, l_total, c_eq = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(p, dtype=float)) for p in (v0, r_total, l_total, c_eq))
+    )
+    n_rows = v0.shape[0]
+    shape = np.zeros((n_rows, t_sec.size))
+
+    valid = (l_total > 1e-12) & (c_eq > 1e-15) & (r_total >= 0) & np.isfinite(v0)
+    if not np.any(valid):
+        log.warning("Nenhum circuito válido recebido em rlc_solution_batch.")
+        return shape
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        l_safe = np.where(valid, l_total, 1.0)
+        c_safe = np.where(valid, c_eq, 1.0)
+        omega0_sq = 1.0 / (l_safe * c_safe)
+        a = np.where(valid, r_total, 0.0) / (2.0 * l_safe)
+        delta = a**2 - omega0_sq
+        critical = valid & (np.abs(delta / omega0_sq) < 1e-6)
+        under = valid & ~critical & (delta < 0)
+        over = valid & ~critical & (delta > 0)
+        t_pos = np.maximum(t_sec, 0.0)[None, :]
+
+        if np.any(critical):
+            a_c = a[critical, None]
+            shape[critical] = (1.0 + a_c * t_pos) * np.exp(-a_c * t_pos)
+        if np.any(under):
+            a_u = a[under, None]
+            w_u = np.sqrt(-delta[under])[:, None]
+            wt = w_u * t_pos
+            shape[under] = np.exp(-a_u * t_pos) * (np.cos(wt) + (a_u / w_u) * np.sin(wt))
+        if np.any(over):
+            sqrt_delta = np.sqrt(delta[over])
+            s1 = (-a[over] + sqrt_delta)[:, None]
+            s2 = (-a[over] - sqrt_delta)[:, None]
+            shape[over] = (s1 * np.exp(s2 * t_pos) - s2 * np.exp(s1 * t_pos)) / (s1 - s2)
+
+    v_out = v0[:, None] * shape
+    v_out[:, t_sec < 0] = 0.0
+    v_out[~valid] = 0.0
+
+    # Mesmos limites de overshoot/undershoot aplicados em rlc_solution
+    v_lim = v0[:, None]
+    np.minimum(v_out, v_lim * 1.1, out=v_out)
+    np.maximum(v_out, -v_lim * 0.3, out=v_out)
+    return np.nan_to_num(v_out, nan=0.0, posinf=0.0, neginf=0.0, copy=False)
+
+
+def _double_exp_batch(
+    t_sec: np.ndarray,
+    amplitude: np.ndarray,
+    alpha: np.ndarray,
+    beta: np.ndarray,
+    with_jacobian: bool = False,
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """
+    Avalia A·[exp(-αt) - exp(-βt)] / P(α, β) (pico normalizado em A) para N conjuntos
+    de parâmetros.
+
+    Se `with_jacobian` for True, retorna também o Jacobiano analítico (N, T, 3) em relação a
+    (A, ln α, ln β). Como dh/dt = 0 no pico, dP/dα e dP/dβ saem direto do teorema do envelope.
+    """
+    t_pos = np.maximum(t_sec, 0.0)[None, :]
+    a_col, b_col, amp_col = alpha[:, None], beta[:, None], amplitude[:, None]
+    t_peak = np.log(beta / alpha) / (beta - alpha)
+    e_a_peak, e_b_peak = np.exp(-alpha * t_peak), np.exp(-beta * t_peak)
+    p_norm = (e_a_peak - e_b_peak)[:, None]
+
+    e_a, e_b = np.exp(-a_col * t_pos), np.exp(-b_col * t_pos)
+    h = e_a - e_b
+    values = amp_col * h / p_norm
+    if not with_jacobian:
+        return values, None
+
+    dp_da = (-t_peak * e_a_peak)[:, None]
+    dp_db = (t_peak * e_b_peak)[:, None]
+    jac = np.empty(values.shape + (3,))
+    jac[..., 0] = h / p_norm
+    jac[..., 1] = a_col * amp_col / p_norm * (-t_pos * e_a - h * dp_da / p_norm)
+    jac[..., 2] = b_col * amp_col / p_norm * (t_pos * e_b - h * dp_db / p_norm)
+    return values, jac
+
+
+def _estimate_double_exp_params_batch(
+    t_sec: np.ndarray, v: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Estimativas iniciais (A, α, β) por linha, com a mesma heurística de
+    `calculate_k_factor_transform`: α ≈ 1/(1.4·t50) e β ≈ 2/t_pico.
+    """
+    n_rows, n_t = v.shape
+    rows = np.arange(n_rows)
+    peak_idx = np.argmax(v, axis=1)
+    peak_value = v[rows, peak_idx]
+    t_peak = t_sec[peak_idx]
+
+    # Primeiro ponto após o pico abaixo de 50% do pico (com interpolação linear)
+    half = 0.5 * peak_value
+    after_peak = np.arange(n_t)[None, :] > peak_idx[:, None]
+    below = after_peak & (v <= half[:, None])
+    has_cross = below.any(axis=1)
+    idx2 = np.where(has_cross, np.argmax(below, axis=1), n_t - 1)
+    idx1 = np.maximum(idx2 - 1, 0)
+    v1, v2 = v[rows, idx1], v[rows, idx2]
+    t1, t2 = t_sec[idx1], t_sec[idx2]
+    dv = v2 - v1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_interp = np.where(np.abs(dv) > 1e-9, t1 + (half - v1) * (t2 - t1) / dv, t2)
+    t_half = np.where(has_cross, t_interp, t_sec[-1])
+
+    t2_approx = np.maximum(1.4 * t_half, 5e-6)
+    t1_approx = np.where(t_peak > 0, np.maximum(t_peak, 0.5e-6), 1e-6)
+    alpha_est = 1.0 / t2_approx
+    beta_est = 2.0 / t1_approx
+    beta_est = np.where(beta_est <= alpha_est, alpha_est * 5, beta_est)
+    return peak_value, alpha_est, beta_est
+
+
+def _fit_double_exp_batch(
+    t_sec: np.ndarray,
+    v: np.ndarray,
+    p0: tuple[np.ndarray, np.ndarray, np.ndarray],
+    lower: tuple[np.ndarray, np.ndarray, np.ndarray],
+    upper: tuple[np.ndarray, np.ndarray, np.ndarray],
+    max_iter: int = 100,
+    ftol: float = 1e-8,
+    xtol: float = 1e-8,
+    time_budget_s: float | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ajuste em lote da dupla exponencial por Levenberg-Marquardt com restrições de caixa.
+
+    Otimiza (A, ln α, ln β) com Jacobiano analítico e escala de Marquardt (diag(JᵀJ)),
+    resolvendo os N sistemas 3x3 de uma vez. Passos que pioram o custo são rejeitados
+    linha a linha; os parâmetros são projetados nos limites após cada passo.
+    Os critérios de parada `ftol`/`xtol` têm o mesmo significado que em `curve_fit`;
+    `time_budget_s` interrompe as iterações e mantém o melhor ponto aceito até então.
+
+    Returns:
+        (A, alpha, beta, success), cada um com shape (N,).
+    """
+    lo = np.column_stack([lower[0], np.log(lower[1]), np.log(lower[2])])
+    hi = np.column_stack([upper[0], np.log(upper[1]), np.log(upper[2])])
+
+    def _project(th, rows):
+        th = np.clip(th, lo[rows], hi[rows])
+        # β > α é requisito da dupla exponencial
+        th[:, 2] = np.maximum(th[:, 2], th[:, 1] + 1e-6)
+        return th
+
+    def _evaluate(th, rows):
+        values, jac = _double_exp_batch(
+            t_sec, th[:, 0], np.exp(th[:, 1]), np.exp(th[:, 2]), with_jacobian=True
+        )
+        resid = values - v[rows]
+        cost = np.einsum("nt,nt->n", resid, resid)
+        jac_t = jac.transpose(0, 2, 1)
+        return cost, jac_t @ jac, (jac_t @ resid[..., None])[..., 0]
+
+    n_rows = v.shape[0]
+    all_rows = np.arange(n_rows)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore", under="ignore"):
+        theta = _project(
+            np.column_stack([p0[0], np.log(p0[1]), np.log(p0[2])]).astype(float), all_rows
+        )
+        cost, jtj, jtr = _evaluate(theta, all_rows)
+        cost_initial = cost.copy()
+        lam = np.full(n_rows, 1e-3)
+        active = np.isfinite(cost) & np.all(np.isfinite(jtj), axis=(1, 2))
+
+        deadline = None if time_budget_s is None else time.perf_counter() + time_budget_s
+        for _ in range(max_iter):
+            idx = np.flatnonzero(active)
+            if idx.size == 0 or (deadline is not None and time.perf_counter() > deadline):
+                break
+            # Parâmetros presos num limite com o gradiente apontando para fora ficam fixos
+            th, grad = theta[idx], jtr[idx]
+            fixed = ((th <= lo[idx]) & (grad > 0)) | ((th >= hi[idx]) & (grad < 0))
+            free = (~fixed).astype(float)
+            diag = np.maximum(np.diagonal(jtj[idx], axis1=1, axis2=2), 1e-30)
+            system = jtj[idx] * free[:, :, None] * free[:, None, :]
+            system += (lam[idx, None] * diag * free + (1.0 - free))[:, :, None] * np.eye(3)
+            step = np.linalg.solve(system, -(grad * free)[..., None])[..., 0]
+
+            th_new = _project(th + step, idx)
+            cost_new, jtj_new, jtr_new = _evaluate(th_new, idx)
+            improved = np.isfinite(cost_new) & (cost_new < cost[idx])
+
+            acc = idx[improved]
+            rel_change = (cost[acc] - cost_new[improved]) / np.maximum(cost[acc], 1e-300)
+            theta[acc], cost[acc] = th_new[improved], cost_new[improved]
+            jtj[acc], jtr[acc] = jtj_new[improved], jtr_new[improved]
+            lam[acc] = np.maximum(lam[acc] / 3.0, 1e-12)
+            rej = idx[~improved]
+            lam[rej] *= 4.0
+
+            # Convergência: melhoria relativa abaixo de ftol, passo abaixo de xtol
+            # ou amortecimento saturado
+            step_acc = np.abs(step[improved]) <= xtol * (np.abs(th_new[improved]) + xtol)
+            active[acc[(rel_change < ftol) | np.all(step_acc, axis=1)]] = False
+            active[rej[lam[rej] > 1e10]] = False
+
+    success = np.isfinite(cost) & (cost <= cost_initial) & np.all(np.isfinite(theta), axis=1)
+    return theta[:, 0], np.exp(theta[:, 1]), np.exp(theta[:, 2]), success
+
+
+def fit_double_exp_base_batch(
+    t_sec: np.ndarray, v: np.ndarray, chunk_size: int = 256
+) -> np.ndarray:
+    """
+    Curva base (dupla exponencial) de N formas de onda registradas, como no método do
+    fator K: ajuste em lote de A·[exp(-αt) - exp(-βt)] a cada linha de `v`.
+
+    Linhas em que o ajuste falha usam as estimativas iniciais de
+    `_estimate_double_exp_params_batch`; linhas sem variação retornam zeros.
+
+    Returns:
+        Array (N, len(t_sec)) com as curvas base.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    v = np.atleast_2d(np.asarray(v, dtype=float))
+    base = np.zeros_like(v)
+    step = max(1, int(chunk_size))
+    for start in range(0, v.shape[0], step):
+        chunk = v[start : start + step]
+        rows = np.flatnonzero(np.all(np.isfinite(chunk), axis=1) & (np.ptp(chunk, axis=1) > 0))
+        if rows.size == 0:
+            continue
+        a_est, alpha_est, beta_est = _estimate_double_exp_params_batch(t_sec, chunk[rows])
+        amp, alpha, beta, success = _fit_double_exp_batch(
+            t_sec,
+            chunk[rows],
+            (a_est, alpha_est, beta_est),
+            (a_est * 0.5, alpha_est * 0.1, beta_est * 0.1),
+            (a_est * 1.5, alpha_est * 10, beta_est * 10),
+        )
+        amp = np.where(success, amp, a_est)
+        alpha = np.where(success, alpha, alpha_est)
+        beta = np.where(success, beta, beta_est)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            values, _ = _double_exp_batch(t_sec, amp, alpha, beta)
+        base[start + rows] = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+    return base
+
+
+def simulate_hybrid_impulse_batch(
+    t_sec: np.ndarray,
+    v0_charge: np.ndarray | float,
+    rf: np.ndarray | float,
+    rt: np.ndarray | float,
+    l_total: np.ndarray | float,
+    c_gen: np.ndarray | float,
+    c_load: np.ndarray | float,
+    impulse_type: str,
+    gap_distance_cm: np.ndarray | float | None = None,
+    return_waveforms: bool = True,
+    chunk_size: int = 256,
+) -> tuple:
+    """
+    Simula N circuitos de impulso de uma vez com a abordagem híbrida RLC + Dupla Exponencial.
+
+    Equivalente a chamar `simulate_hybrid_impulse` para cada combinação de parâmetros, mas
+    com a solução RLC, o ajuste da curva base (α, β) e o corte avaliados por broadcasting.
+    Os parâmetros escalares são replicados para todas as linhas.
+
+    Args:
+        t_sec: Array 1D de tempo em segundos (compartilhado).
+        v0_charge: Tensão de carga em Volts.
+        rf, rt: Resistências totais de frente e cauda em Ohms.
+        l_total: Indutância total em Henries.
+        c_gen, c_load: Capacitâncias do gerador e da carga em Farads.
+        impulse_type: "lightning", "chopped" ou "switching" (comum a todo o lote).
+        gap_distance_cm: Distância do gap em cm (apenas para impulso cortado).
+        return_waveforms: Se False, retorna None no lugar das formas de onda (economiza memória
+            em varreduras grandes, onde só α, β e o instante de corte interessam).
+        chunk_size: Número de circuitos ajustados por bloco (limita a memória do Jacobiano).
+
+    Returns:
+        Tupla (v_rlc, v_final, i_load, alpha, beta, chop_time_sec):
+        formas de onda com shape (N, len(t_sec)) e parâmetros com shape (N,).
+        chop_time_sec é NaN onde não houve corte. Linhas inválidas retornam zeros.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    if t_sec.ndim != 1 or t_sec.size < 2:
+        raise ValueError("Vetor de tempo deve ser 1D com pelo menos 2 pontos.")
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        raise ValueError(f"Tipo de impulso inválido: {impulse_type}")
+
+    gap = np.nan if gap_distance_cm is None else gap_distance_cm
+    v0, rf, rt, l_total, c_gen, c_load, gap = np.broadcast_arrays(
+        *(
+            np.atleast_1d(np.asarray(p, dtype=float))
+            for p in (v0_charge, rf, rt, l_total, c_gen, c_load, gap)
+        )
+    )
+    n_rows, n_t = v0.shape[0], t_sec.size
+
+    params = np.stack([v0, rf, rt, l_total, c_gen, c_load])
+    valid = np.all(np.isfinite(params) & (params > 0), axis=0)
+    n_invalid = int(np.count_nonzero(~valid))
+    if n_invalid:
+        log.warning(f"{n_invalid} de {n_rows} circuitos com parâmetros inválidos no lote.")
+
+    log.info(f"Simulando Híbrido em lote: Tipo={impulse_type}, N={n_rows}, pontos={n_t}")
+
+    alpha = np.zeros(n_rows)
+    beta = np.zeros(n_rows)
+    chop_time_sec = np.full(n_rows, np.nan)
+    if return_waveforms:
+        v_rlc_all = np.zeros((n_rows, n_t))
+        v_final_all = np.zeros((n_rows, n_t))
+        i_load_all = np.zeros((n_rows, n_t))
+    else:
+        v_rlc_all = v_final_all = i_load_all = None
+
+    collapse_time = 0.1e-6
+    c_sum = c_gen + c_load
+    c_eq = np.where(valid, c_gen * c_load / np.where(c_sum > 1e-15, c_sum, 1.0), 0.0)
+    r_rlc = rf + constants.R_PARASITIC_OHM
+    n_fit_failed = 0
+
+    for start in range(0, n_rows, max(1, int(chunk_size))):
+        sl = slice(start, min(start + max(1, int(chunk_size)), n_rows))
+        ok = valid[sl]
+        if not np.any(ok):
+            continue
+
+        v_rlc = rlc_solution_batch(t_sec, v0[sl], r_rlc[sl], l_total[sl], c_eq[sl])
+        v_rlc[~ok] = 0.0
+
+        # Ajuste da curva base (equivalente ao curve_fit de calculate_k_factor_transform)
+        rows_fit = np.flatnonzero(ok & (np.ptp(v_rlc, axis=1) > 1e-9))
+        alpha_c = np.zeros(ok.size)
+        beta_c = np.zeros(ok.size)
+        fit_ok = np.zeros(ok.size, dtype=bool)
+        if rows_fit.size:
+            v_fit = v_rlc[rows_fit] / 1000.0  # kV, como no caminho escalar
+            a_est, alpha_est, beta_est = _estimate_double_exp_params_batch(t_sec, v_fit)
+            a_lo = np.minimum(a_est * 0.5, a_est * 1.5)
+            a_hi = np.maximum(a_est * 0.5, a_est * 1.5)
+            _, alpha_f, beta_f, success = _fit_double_exp_batch(
+                t_sec,
+                v_fit,
+                (a_est, alpha_est, beta_est),
+                (a_lo, alpha_est * 0.1, beta_est * 0.1),
+                (a_hi, alpha_est * 10, beta_est * 10),
+            )
+            alpha_c[rows_fit], beta_c[rows_fit], fit_ok[rows_fit] = alpha_f, beta_f, success
+
+        # Estimativas teóricas onde o ajuste falhou
+        fallback = ok & ~fit_ok
+        if np.any(fallback):
+            n_fit_failed += int(np.count_nonzero(fallback))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                alpha_th = np.where(c_sum[sl] > 1e-15, 1.0 / (rt[sl] * c_sum[sl]), 0.0)
+                beta_th = np.where(c_eq[sl] > 1e-15, 1.0 / (rf[sl] * c_eq[sl]), 0.0)
+            add_factor = 1e3 if impulse_type in ["lightning", "chopped"] else 1e2
+            beta_th = np.where(beta_th <= alpha_th + 1e-9, alpha_th * 1.05 + add_factor, beta_th)
+            alpha_c = np.where(fallback, alpha_th, alpha_c)
+            beta_c = np.where(fallback, beta_th, beta_c)
+        alpha_c[~ok], beta_c[~ok] = 0.0, 0.0
+        alpha[sl], beta[sl] = alpha_c, beta_c
+
+        # Forma de onda final (dupla exponencial com pico em V0)
+        rows_ok = np.flatnonzero(ok)
+        v_final = np.zeros_like(v_rlc)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            v_final[rows_ok], _ = _double_exp_batch(
+                t_sec, v0[sl][rows_ok], alpha_c[rows_ok], beta_c[rows_ok]
+            )
+        v_final = np.nan_to_num(v_final, nan=0.0, posinf=0.0, neginf=0.0)
+
+        # Corte (mesmo modelo de colapso + oscilação amortecida do caminho escalar)
+        gap_c = gap[sl]
+        if impulse_type == "chopped":
+            breakdown_v = np.where(np.isfinite(gap_c) & (gap_c > 0), 30.0 * gap_c * 1000.0, np.inf)
+            above = v_final >= breakdown_v[:, None]
+            has_chop = ok & above.any(axis=1)
+            if np.any(has_chop):
+                chop_idx = np.argmax(above, axis=1)
+                rows = np.flatnonzero(has_chop)
+                t_chop = t_sec[chop_idx[rows]]
+                chop_time_sec[sl][rows] = t_chop
+                v_chop = v_final[rows, chop_idx[rows]]
+
+                dt_after = t_sec[None, :] - t_chop[:, None]
+                sub = v_final[rows]
+                in_collapse = (dt_after >= 0) & (dt_after <= collapse_time)
+                sub = np.where(
+                    in_collapse, v_chop[:, None] * (1 - dt_after / collapse_time), sub
+                )
+                freq_osc, damp_factor, undershoot_ratio = 5e6, 1.5, 0.25
+                t_after_collapse = dt_after - collapse_time
+                in_osc = dt_after > collapse_time
+                osc = (
+                    -v_chop[:, None]
+                    * undershoot_ratio
+                    * np.exp(-damp_factor * np.maximum(t_after_collapse, 0) * 1e6)
+                    * np.cos(2 * np.pi * freq_osc * t_after_collapse)
+                )
+                osc = np.maximum(osc, -0.3 * np.abs(v_chop)[:, None])
+                osc = np.where(t_after_collapse > 3 / freq_osc, 0.0, osc)
+                v_final[rows] = np.where(in_osc, osc, sub)
+
+        if return_waveforms:
+            v_rlc_all[sl] = v_rlc
+            v_final_all[sl] = v_final
+            i_load_all[sl] = c_load[sl][:, None] * np.gradient(v_final, t_sec, axis=1)
+            i_load_all[sl][~ok] = 0.0
+
+    if n_fit_failed:
+        log.warning(
+            f"Ajuste da curva base falhou em {n_fit_failed} circuitos; usando estimativas teóricas."
+        )
+
+    return v_rlc_all, v_final_all, i_load_all, alpha, beta, chop_time_sec
+
+
+def simulate_impulse_circuit_batch(
+    t_sec: np.ndarray,
+    v0_charge: np.ndarray | float,
+    rf: np.ndarray | float,
+    rt: np.ndarray | float,
+    l_total: np.ndarray | float,
+    c_gen: np.ndarray | float,
+    c_load: np.ndarray | float,
+) -> np.ndarray:
+    """
+    Solução exata do circuito equivalente de impulso (Cg carregado, Rt em paralelo com Cg,
+    Rf + L em série até Cl) para N circuitos.
+
+    O sistema linear de 3 estados [v_Cg, i_L, v_Cl] é resolvido por autodecomposição
+    em lote: v_Cl(t) = Re(Σ c_k·u_k·exp(λ_k·t)), sem integração passo a passo.
+
+    Args:
+        t_sec: Array 1D de tempo em segundos.
+        v0_charge: Tensão de carga de Cg em Volts.
+        rf, rt, l_total, c_gen, c_load: Parâmetros totais (escalares ou arrays 1D).
+
+    Returns:
+        Array (N, len(t_sec)) com a tensão na carga em Volts (NaN em linhas inválidas).
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    v0, rf, rt, l_total, c_gen, c_load = np.broadcast_arrays(
+        *(
+            np.atleast_1d(np.asarray(p, dtype=float))
+            for p in (v0_charge, rf, rt, l_total, c_gen, c_load)
+        )
+    )
+    params = np.stack([rf, rt, l_total, c_gen, c_load])
+    valid = np.all(np.isfinite(params) & (params > 0), axis=0)
+    v_out = np.full((v0.shape[0], t_sec.size), np.nan)
+    if not np.any(valid):
+        return v_out
+
+    rf, rt, l_total, c_gen, c_load, v0 = (
+        p[valid] for p in (rf, rt, l_total, c_gen, c_load, v0)
+    )
+    n_rows = v0.shape[0]
+    a_mat = np.zeros((n_rows, 3, 3))
+    a_mat[:, 0, 0] = -1.0 / (rt * c_gen)
+    a_mat[:, 0, 1] = -1.0 / c_gen
+    a_mat[:, 1, 0] = 1.0 / l_total
+    a_mat[:, 1, 1] = -rf / l_total
+    a_mat[:, 1, 2] = -1.0 / l_total
+    a_mat[:, 2, 1] = 1.0 / c_load
+
+    eigvals, eigvecs = np.linalg.eig(a_mat)
+    # Autovalores repetidos (amortecimento crítico) tornam a base singular:
+    # uma perturbação relativa mínima em L resolve sem alterar o resultado visível.
+    singular = np.linalg.cond(eigvecs) > 1e10
+    if np.any(singular):
+        a_mat[singular, 1, :] /= 1.0 + 1e-7
+        eigvals[singular], eigvecs[singular] = np.linalg.eig(a_mat[singular])
+
+    x0 = np.zeros((n_rows, 3), dtype=complex)
+    x0[:, 0] = v0
+    coeffs = np.linalg.solve(eigvecs, x0[..., None])[..., 0]
+    weights = eigvecs[:, 2, :] * coeffs  # componente v_Cl de cada modo
+    with np.errstate(over="ignore", under="ignore", invalid="ignore"):
+        modes = np.exp(eigvals[:, :, None] * np.maximum(t_sec, 0.0)[None, None, :])
+        v_out[valid] = np.einsum("nk,nkt->nt", weights, modes).real
+    return v_out
+
+
+def _waveform_times_batch(t_sec: np.ndarray, v: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Extrai pico, t30, t90 (frente) e t50 (cauda) de N formas de onda por interpolação
+    linear dos cruzamentos, vetorizado por linha. Cruzamentos ausentes resultam em NaN.
+    """
+    n_rows, n_t = v.shape
+    rows = np.arange(n_rows)
+    peak_idx = np.nanargmax(np.where(np.isnan(v), -np.inf, v), axis=1)
+    peak = v[rows, peak_idx]
+    positions = np.arange(n_t)[None, :]
+
+    def _cross(level, after_peak):
+        target = (level * peak)[:, None]
+        if after_peak:
+            hit = (positions > peak_idx[:, None]) & (v <= target)
+        else:
+            hit = (positions <= peak_idx[:, None]) & (v >= target)
+        found = hit.any(axis=1)
+        i2 = np.argmax(hit, axis=1)
+        i1 = np.maximum(i2 - 1, 0)
+        v1, v2 = v[rows, i1], v[rows, i2]
+        t1, t2 = t_sec[i1], t_sec[i2]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_cross = np.where(v2 != v1, t1 + (target[:, 0] - v1) * (t2 - t1) / (v2 - v1), t2)
+        return np.where(found & (i2 > 0), t_cross, np.nan)
+
+    t_30, t_90, t_50 = _cross(0.3, False), _cross(0.9, False), _cross(0.5, True)
+    t_origin = t_30 - 0.5 * (t_90 - t_30)
+    return {
+        "peak": peak,
+        "t_peak": t_sec[peak_idx],
+        "t_front": 1.67 * (t_90 - t_30),
+        "t_tail": t_50 - t_origin,
+        "t_50": t_50,
+    }
+
+
+# === Modelo de Espaço de Estados do Gerador Marx Multiestágio ===
+
+
+def _marx_state_matrix(
+    n_stages: int,
+    c_stage: float,
+    l_stage: float,
+    rf_stage: float,
+    rt_stage: float,
+    c_node: float,
+    c_out: float,
+    l_external: float = 0.0,
+    gap: tuple[float, float] | None = None,
+) -> np.ndarray:
+    """
+    Matriz A (dx/dt = A·x) do gerador Marx de `n_stages` estágios após a disparada.
+
+    Estado x = [v_1..v_n (capacitores dos estágios), i_1..i_n (corrente em Rf+L de cada
+    estágio), u_1..u_n (tensão dos nós entre estágios; u_n é a saída)] e, se `gap` =
+    (R, L) for dado, a corrente i_g do gap de corte fechado entre a saída e a terra.
+
+        C·dv_k/dt = -i_k - v_k/Rt
+        L_k·di_k/dt = u_{k-1} + v_k - Rf·i_k - u_k          (u_0 = 0)
+        C_nó·du_k/dt = i_k - i_{k+1}                         (i_{n+1} = i_g ou 0)
+
+    A indutância externa (indutor, transformador) fica em série no último estágio e a
+    capacitância de saída soma carga, divisor e gap à capacitância parasita do nó.
+    """
+    n = n_stages
+    size = 3 * n + (1 if gap is not None else 0)
+    a_mat = np.zeros((size, size))
+    iv, ii, iu = 0, n, 2 * n
+    for k in range(n):
+        l_k = l_stage + (l_external if k == n - 1 else 0.0)
+        a_mat[iv + k, iv + k] = -1.0 / (rt_stage * c_stage)
+        a_mat[iv + k, ii + k] = -1.0 / c_stage
+        a_mat[ii + k, iv + k] = 1.0 / l_k
+        a_mat[ii + k, ii + k] = -rf_stage / l_k
+        a_mat[ii + k, iu + k] = -1.0 / l_k
+        if k > 0:
+            a_mat[ii + k, iu + k - 1] = 1.0 / l_k
+        c_k = c_node + (c_out if k == n - 1 else 0.0)
+        a_mat[iu + k, ii + k] = 1.0 / c_k
+        if k < n - 1:
+            a_mat[iu + k, ii + k + 1] = -1.0 / c_k
+    if gap is not None:
+        r_gap, l_gap = gap
+        ig = 3 * n
+        a_mat[ig, iu + n - 1] = 1.0 / l_gap
+        a_mat[ig, ig] = -r_gap / l_gap
+        a_mat[iu + n - 1, ig] = -1.0 / (c_node + c_out)
+    return a_mat
+
+
+class _StateSpaceResponse:
+    """
+    Resposta livre x(t) = exp(A·t)·x0 com fatoração precomputada.
+
+    Usa a autodecomposição A = V·Λ·V⁻¹ (avaliação exata em qualquer instante, vetorizada
+    no tempo); se a base for mal condicionada, recorre a exponenciais de matriz
+    exp(A·Δt) por passo, armazenadas por Δt.
+    """
+
+    def __init__(self, a_mat: np.ndarray, x0: np.ndarray):
+        self.a_mat = a_mat
+        self.x0 = np.asarray(x0, dtype=float)
+        eigvals, eigvecs = np.linalg.eig(a_mat)
+        self.use_eig = np.linalg.cond(eigvecs) < 1e8
+        if self.use_eig:
+            self.eigvals = eigvals
+            self.eigvecs = eigvecs
+            self.coeffs = np.linalg.solve(eigvecs, self.x0.astype(complex))
+
+    def states(self, t: np.ndarray, rows: list[int]) -> np.ndarray:
+        """Retorna os estados `rows` em cada instante de `t` (t >= 0), shape (len(rows), T)."""
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        if self.use_eig:
+            weights = self.eigvecs[rows, :] * self.coeffs[None, :]
+            with np.errstate(over="ignore", under="ignore", invalid="ignore"):
+                modes = np.exp(self.eigvals[:, None] * t[None, :])
+            return (weights @ modes).real
+        return self._states_expm(t, rows)
+
+    def _states_expm(self, t: np.ndarray, rows: list[int]) -> np.ndarray:
+        from scipy.linalg import expm
+
+        order = np.argsort(t)
+        out = np.empty((len(rows), t.size))
+        propagators: dict[float, np.ndarray] = {}
+        x, t_prev = self.x0.copy(), 0.0
+        for idx in order:
+            dt = t[idx] - t_prev
+            if dt > 0:
+                key = float(f"{dt:.9e}")
+                if key not in propagators:
+                    propagators[key] = expm(self.a_mat * dt)
+                x = propagators[key] @ x
+                t_prev = t[idx]
+            out[:, idx] = x[rows]
+        return out
+
+
+def simulate_marx_impulse(
+    t_sec: np.ndarray,
+    v_stage_charge: float,
+    n_stages: int,
+    rf_stage: float,
+    rt_stage: float,
+    c_load: float,
+    impulse_type: str,
+    gap_distance_cm: float | None = None,
+    n_parallel: int = 1,
+    l_external: float = 0.0,
+    c_stage: float = constants.C_PER_STAGE_F,
+    l_stage: float = constants.L_PER_STAGE_H,
+    c_stage_ground: float = constants.MARX_STAGE_STRAY_C_F,
+) -> tuple:
+    """
+    Simula o gerador Marx multiestágio por espaço de estados (sem integração passo a passo).
+
+    Cada estágio tem capacitor (C_PER_STAGE_F), resistor de cauda em paralelo, resistor de
+    frente e indutância (L_PER_STAGE_H) em série, e capacitância parasita à terra no nó
+    superior; a saída alimenta a carga total (objeto, divisor, parasitas, gap). Em impulso
+    cortado, quando a saída atinge a tensão de ruptura do gap, o gap fecha (R e L de
+    constants) e a solução continua a partir do estado nesse instante.
+
+    Args:
+        t_sec: Array de tempo em segundos (uniforme ou não).
+        v_stage_charge: Tensão de carga por estágio em Volts.
+        n_stages: Número de estágios em série.
+        rf_stage, rt_stage: Resistências de frente/cauda por coluna de cada estágio (Ohm).
+        c_load: Capacitância total na saída em Farads.
+        impulse_type: "lightning", "chopped" ou "switching".
+        gap_distance_cm: Distância do gap de corte em cm (apenas impulso cortado).
+        n_parallel: Colunas em paralelo (divide R e L e multiplica C de cada estágio).
+        l_external: Indutância externa em série na saída (H).
+        c_stage, l_stage: Capacitância e indutância de cada coluna de um estágio.
+        c_stage_ground: Capacitância parasita de cada nó entre estágios (F).
+
+    Returns:
+        Tupla (v_out, v_out, i_load, alpha, beta, chop_time_sec), no mesmo formato de
+        `simulate_hybrid_impulse`: não há onda RLC separada, e alpha/beta são os da dupla
+        exponencial equivalente estimada pelos tempos da onda simulada.
+    """
+    t_sec = np.asarray(t_sec, dtype=float)
+    zeros = np.zeros_like(t_sec)
+    if t_sec.size < 2:
+        log.error("Vetor de tempo inválido ou muito curto para simulação Marx")
+        return zeros, zeros, zeros, 0, 0, None
+    n_stages, n_parallel = int(n_stages), max(int(n_parallel), 1)
+    params = (v_stage_charge, rf_stage, rt_stage, c_load, c_stage, l_stage, c_stage_ground)
+    if n_stages < 1 or any(p is None or not p > 0 for p in params) or l_external < 0:
+        log.error(
+            f"Parâmetros inválidos para simulação Marx: n={n_stages}, V={v_stage_charge}, "
+            f"Rf={rf_stage}, Rt={rt_stage}, Cl={c_load}"
+        )
+        return zeros, zeros, zeros, 0, 0, None
+    if impulse_type not in ["lightning", "chopped", "switching"]:
+        log.error(f"Tipo de impulso inválido: {impulse_type}")
+        return zeros, zeros, zeros, 0, 0, None
+
+    log.info(
+        f"Simulando Marx: Tipo={impulse_type}, {n_stages}S-{n_parallel}P, "
+        f"V0={v_stage_charge * n_stages / 1000:.1f}kV"
+    )
+    try:
+        c_out = c_load
+        a_mat = _marx_state_matrix(
+            n_stages,
+            c_stage * n_parallel,
+            l_stage / n_parallel,
+            rf_stage / n_parallel,
+            rt_stage / n_parallel,
+            c_stage_ground,
+            c_out,
+            l_external,
+        )
+        x0 = np.zeros(a_mat.shape[0])
+        x0[:n_stages] = v_stage_charge
+        out_row, cur_row = 3 * n_stages - 1, 2 * n_stages - 1
+        response = _StateSpaceResponse(a_mat, x0)
+        t_pos = np.maximum(t_sec, 0.0)
+        v_out, i_last = response.states(t_pos, [out_row, cur_row])
+        # Corrente na carga: parcela de i_n que carrega c_load (o restante vai ao nó parasita)
+        i_load = i_last * c_load / (c_load + c_stage_ground)
+
+        chop_time_sec = None
+        if impulse_type == "chopped" and gap_distance_cm is not None and gap_distance_cm > 0:
+            breakdown_v = constants.GAP_BREAKDOWN_KV_PER_CM * gap_distance_cm * 1000
+            above = np.flatnonzero(v_out >= breakdown_v)
+            if above.size and above[0] > 0:
+                # Refina o instante de ruptura por bisseção na solução exata
+                lo, hi = t_pos[above[0] - 1], t_pos[above[0]]
+                for _ in range(40):
+                    mid = 0.5 * (lo + hi)
+                    if response.states(np.array([mid]), [out_row])[0, 0] >= breakdown_v:
+                        hi = mid
+                    else:
+                        lo = mid
+                chop_time_sec = hi
+                x_chop = response.states(np.array([hi]), list(range(a_mat.shape[0])))[:, 0]
+                a_gap = _marx_state_matrix(
+                    n_stages,
+                    c_stage * n_parallel,
+                    l_stage / n_parallel,
+                    rf_stage / n_parallel,
+                    rt_stage / n_parallel,
+                    c_stage_ground,
+                    c_out,
+                    l_external,
+                    gap=(constants.CHOPPING_GAP_R_OHM, constants.CHOPPING_GAP_L_H),
+                )
+                after = t_pos >= hi
+                response_gap = _StateSpaceResponse(a_gap, np.append(x_chop, 0.0))
+                v_after, i_after, i_gap = response_gap.states(
+                    t_pos[after] - hi, [out_row, cur_row, a_gap.shape[0] - 1]
+                )
+                v_out[after] = v_after
+                i_load[after] = (i_after - i_gap) * c_load / (c_load + c_stage_ground)
+                log.info(
+                    f"Corte Marx: t={chop_time_sec * 1e6:.2f} µs, V={breakdown_v / 1000:.1f} kV"
+                )
+            else:
+                log.warning(
+                    f"Tensão não atingiu ruptura ({breakdown_v / 1000:.1f} kV) para "
+                    f"gap={gap_distance_cm} cm"
+                )
+
+        v_out[t_sec < 0] = 0.0
+        i_load[t_sec < 0] = 0.0
+        full_wave = v_out if chop_time_sec is None else response.states(t_pos, [out_row])[0]
+        analytic = _estimate_double_exp_params_analytic(t_sec, full_wave)
+        alpha, beta = (analytic[1], analytic[2]) if analytic is not None else (0, 0)
+        return v_out, v_out.copy(), i_load, float(alpha), float(beta), chop_time_sec
+
+    except (np.linalg.LinAlgError, ValueError) as e:
+        log.exception(f"Erro na simulação Marx: {e}")
+        return zeros, zeros, zeros, 0, 0, None
+
+
+# --- END OF FILE app_core/impulse_kernel.py ---
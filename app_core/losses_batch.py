@@ -0,0 +1,225 @@
+# app_core/losses_batch.py
+"""
+Avaliação em lote das perdas de famílias de transformadores.
+
+Unidades de uma mesma família compartilham o projeto (dados nominais) e diferem nas
+perdas medidas. `evaluate_units` recebe as unidades (lista de dicionários ou
+DataFrame), avalia os ensaios em vazio e em carga de todas com `LossesEngine`,
+distribuindo blocos de unidades em um pool de processos, e devolve:
+
+- `units`: uma linha por unidade com os principais resultados e o arranjo de ensaio;
+- `setups`: os arranjos de ensaio distintos (taps do SUT, banco de capacitores, chaves
+  CS/Q), com as unidades que podem ser ensaiadas com cada um.
+"""
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Optional
+
+import pandas as pd
+
+from app_core.losses_engine import (
+    LoadLossInputs,
+    LossesEngine,
+    LossesInputError,
+    NoLoadInputs,
+    TransformerRating,
+    select_target_bank_voltage,
+)
+
+log = logging.getLogger(__name__)
+
+SERIAL_COLUMN = "serial"
+NO_LOAD_FIELDS = tuple(f.name for f in fields(NoLoadInputs))
+LOAD_FIELDS = tuple(f.name for f in fields(LoadLossInputs))
+RATING_FIELDS = tuple(f.name for f in fields(TransformerRating))
+# Colunas que definem o arranjo físico do ensaio (agrupadas na deduplicação)
+SETUP_COLUMNS = (
+    "Tap SUT Vazio 1.0 pu (kV)",
+    "Tap SUT Vazio 1.1 pu (kV)",
+    "Banco C/F (kV)",
+    "Banco S/F (kV)",
+    "CS Config",
+    "Q Config",
+    "Q Fornecida (MVAr)",
+)
+DEFAULT_CHUNK_SIZE = 8
+
+
+@dataclass
+class UnitBatchResult:
+    """Resultado consolidado: tabela por unidade e arranjos de ensaio deduplicados."""
+
+    units: pd.DataFrame
+    setups: pd.DataFrame
+
+    @property
+    def n_errors(self) -> int:
+        return int(self.units["Erro"].notna().sum()) if not self.units.empty else 0
+
+
+def _clean(value):
+    """None para valores ausentes (None/NaN do pandas); demais valores inalterados."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _unit_records(units) -> list[dict]:
+    if isinstance(units, pd.DataFrame):
+        units = units.to_dict("records")
+    return [{key: _clean(value) for key, value in dict(unit).items()} for unit in units]
+
+
+def _prepare_unit(position: int, unit: dict, design: TransformerRating) -> tuple:
+    """(serial, dados nominais, entradas em vazio ou None, entradas em carga ou None)."""
+    serial = unit.get(SERIAL_COLUMN, f"#{position + 1}")
+    overrides = {name: unit[name] for name in RATING_FIELDS if unit.get(name) is not None}
+    rating = TransformerRating(**{**design.__dict__, **overrides})
+
+    no_load = None
+    if all(unit.get(name) is not None for name in NO_LOAD_FIELDS[:4]):
+        no_load = NoLoadInputs(**{name: unit.get(name) for name in NO_LOAD_FIELDS})
+    load = None
+    if unit.get("perdas_totais_nom_kw") is not None:
+        nominal = unit["perdas_totais_nom_kw"]
+        load = LoadLossInputs(
+            perdas_totais_nom_kw=nominal,
+            perdas_totais_min_kw=unit.get("perdas_totais_min_kw") or nominal,
+            perdas_totais_max_kw=unit.get("perdas_totais_max_kw") or nominal,
+            perdas_vazio_kw=unit.get("perdas_vazio_kw"),
+            **(
+                {"temperatura_referencia_c": unit["temperatura_referencia_c"]}
+                if unit.get("temperatura_referencia_c") is not None
+                else {}
+            ),
+        )
+    return serial, rating, no_load, load
+
+
+def _first_tap_kv(sut_entry: Optional[dict]) -> Optional[float]:
+    taps = (sut_entry or {}).get("taps_info") or []
+    return taps[0]["tap_sut_kv"] if taps else None
+
+
+def _evaluate_unit(engine: LossesEngine, rating, no_load, load) -> dict:
+    row = {"Erro": None}
+    try:
+        if no_load is not None:
+            vazio = engine.no_load(rating, no_load)
+            projeto = vazio.resultados_projeto
+            row["Perdas em Vazio (kW)"] = no_load.perdas_vazio_kw
+            row["Tensão Ensaio Vazio 1.0 pu (kV)"] = projeto.get(
+                "Tensão nominal teste 1.0 pu (kV)"
+            )
+            row["Potência Ensaio Vazio 1.1 pu (kVA)"] = projeto.get(
+                "Potência de Ensaio (1.1 pu) (kVA)"
+            )
+            row["Tap SUT Vazio 1.0 pu (kV)"] = _first_tap_kv(vazio.sut_analysis.get("1.0"))
+            row["Tap SUT Vazio 1.1 pu (kV)"] = _first_tap_kv(vazio.sut_analysis.get("1.1"))
+        if load is not None:
+            carga = engine.load_losses(rating, load)
+            max_voltage = carga.max_test_voltage_kv_overall
+            bank_cf, bank_sf = select_target_bank_voltage(max_voltage)
+            row["Perdas Totais Nominal (kW)"] = load.perdas_totais_nom_kw
+            row["Tensão Máx. Ensaio Carga (kV)"] = max_voltage
+            row["Q Máx. Requerida (MVAr)"] = carga.max_test_power_mvar_overall_required
+            row["Banco C/F (kV)"] = bank_cf
+            row["Banco S/F (kV)"] = bank_sf
+            row["CS Config"] = carga.suggested_cs_config
+            row["Q Config"] = carga.suggested_q_config
+            row["Q Fornecida (MVAr)"] = carga.suggested_q_power_mvar
+    except LossesInputError as e:
+        row["Erro"] = str(e)
+    return row
+
+
+def _evaluate_chunk(args: tuple) -> list[dict]:
+    """Avalia um bloco de unidades (executado nos processos do pool)."""
+    engine_options, chunk = args
+    engine = LossesEngine(**engine_options)
+    return [_evaluate_unit(engine, *unit) for unit in chunk]
+
+
+def _deduplicate_setups(units: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numera os arranjos de ensaio distintos (coluna `Arranjo` em `units`, na ordem da
+    primeira ocorrência) e retorna uma linha por arranjo com as unidades atendidas.
+    """
+    columns = [c for c in SETUP_COLUMNS if c in units.columns]
+    ok = units[units["Erro"].isna()]
+    if not columns or ok.empty:
+        units["Arranjo"] = pd.NA
+        return pd.DataFrame(columns=["Arranjo", *columns, "Unidades", "Seriais"])
+    groups = ok.groupby(columns, sort=False, dropna=False)
+    units["Arranjo"] = (groups.ngroup() + 1).astype("Int64")
+    setups = groups[SERIAL_COLUMN].agg(list).reset_index()
+    setups["Unidades"] = setups[SERIAL_COLUMN].str.len()
+    setups["Seriais"] = setups.pop(SERIAL_COLUMN).map(lambda s: ", ".join(map(str, s)))
+    setups.insert(0, "Arranjo", range(1, len(setups) + 1))
+    return setups
+
+
+def evaluate_units(
+    units,
+    design: dict | TransformerRating,
+    n_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    engine_options: Optional[dict] = None,
+) -> UnitBatchResult:
+    """
+    Avalia os ensaios em vazio e em carga de várias unidades de uma família.
+
+    Args:
+        units: Lista de dicionários ou DataFrame; colunas `serial`, campos de
+            NoLoadInputs/LoadLossInputs (perdas medidas) e, opcionalmente, campos de
+            TransformerRating que diferem do projeto. O ensaio em vazio é avaliado
+            quando há perdas, peso do núcleo, corrente de excitação e indução; o em
+            carga quando há `perdas_totais_nom_kw` (min/max padrão: nominal)
+        design: Dados nominais comuns (conteúdo do transformer-inputs-store ou
+            TransformerRating)
+        n_workers: Processos do pool (None: os.cpu_count(); 1: no processo atual)
+        chunk_size: Unidades por tarefa do pool
+        engine_options: Argumentos de LossesEngine (ex.: limite de corrente do EPS)
+
+    Returns:
+        UnitBatchResult com a tabela por unidade (coluna `Erro` para entradas
+        inválidas) e os arranjos de ensaio distintos.
+    """
+    if not isinstance(design, TransformerRating):
+        design = TransformerRating.from_store(design or {})
+    records = _unit_records(units)
+    prepared = [_prepare_unit(i, unit, design) for i, unit in enumerate(records)]
+    # Unidades com entradas idênticas são avaliadas uma única vez
+    unique = list(dict.fromkeys(tuple(inputs) for _, *inputs in prepared))
+    engine_options = dict(engine_options or {})
+    chunk_size = max(int(chunk_size), 1)
+    chunks = [
+        (engine_options, unique[i : i + chunk_size]) for i in range(0, len(unique), chunk_size)
+    ]
+    n_workers = n_workers if n_workers is not None else (os.cpu_count() or 1)
+
+    results = None
+    if n_workers > 1 and len(chunks) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(n_workers, len(chunks))) as pool:
+                results = list(pool.map(_evaluate_chunk, chunks))
+        except Exception as e:
+            log.warning(f"Pool de processos indisponível ({e}); avaliando no processo atual.")
+    if results is None:
+        results = [_evaluate_chunk(chunk) for chunk in chunks]
+
+    by_inputs = dict(zip(unique, (row for chunk_rows in results for row in chunk_rows)))
+    rows = [{SERIAL_COLUMN: serial, **by_inputs[tuple(inputs)]} for serial, *inputs in prepared]
+    units_df = pd.DataFrame(rows, columns=None if rows else [SERIAL_COLUMN, "Erro"])
+    setups_df = _deduplicate_setups(units_df)
+    log.info(
+        f"Lote de perdas: {len(rows)} unidades ({len(unique)} entradas distintas), "
+        f"{len(setups_df)} arranjos de ensaio distintos"
+    )
+    return UnitBatchResult(units=units_df, setups=setups_df)
+
+
+# --- END OF FILE app_core/losses_batch.py ---
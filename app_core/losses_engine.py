@@ -0,0 +1,1104 @@
+# app_core/losses_engine.py
+"""
+Motor de cálculo de perdas (vazio e carga) independente da interface Dash.
+
+Recebe entradas tipadas (dados nominais do transformador e valores de ensaio) e devolve
+objetos de resultado com os mesmos dicionários que a página de perdas grava no
+`losses-store`: parâmetros de ensaio em vazio (aço M4 e projeto), cenários de perdas
+em carga por tap (25°C, frio, quente e sobrecargas), requisitos e configurações do
+banco de capacitores e a análise SUT/EPS. Nada aqui monta componentes, de modo que o
+mesmo motor atende os callbacks e cálculos em lote.
+"""
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from app_core import cap_bank, cap_bank_plan, sut_eps
+from utils.constants import (
+    CAPACITORS_BY_VOLTAGE,
+    CS_SWITCHES_BY_VOLTAGE_MONO,
+    CS_SWITCHES_BY_VOLTAGE_TRI,
+    EPS_CURRENT_LIMIT,
+    SUT_BT_VOLTAGE,
+)
+from utils.material_tables import TABELA_PERDAS_NUCLEO, TABELA_POTENCIA_MAGNET
+
+log = logging.getLogger(__name__)
+
+EPSILON = 1e-6
+VALID_FREQUENCIES_HZ = (50, 60, 100, 120, 150, 200, 240, 250, 300, 350, 400, 500)
+DEFAULT_REFERENCE_TEMPERATURE_C = 75
+OVERLOAD_MIN_AT_VOLTAGE_KV = 230
+OVERLOAD_LEVELS_PU = (1.2, 1.4)
+TAP_LABELS = ("Nominal", "Menor", "Maior")
+
+# Chaves (tensão, corrente, Pteste MVA, potência ativa, Pteste MVAr) de cada cenário
+SCENARIO_KEYS = {
+    "Frio": (
+        "Tensão frio (kV)",
+        "Corrente frio (A)",
+        "Pteste frio (MVA)",
+        "Potencia Ativa EPS Frio (kW)",
+        "Pteste frio (MVAr)",
+    ),
+    "Quente": (
+        "Tensão quente (kV)",
+        "Corrente quente (A)",
+        "Pteste quente (MVA)",
+        "Potencia Ativa Quente (kW)",
+        "Pteste quente (MVAr)",
+    ),
+    "25°C": (
+        "Tensão 25°C (kV)",
+        "Corrente 25°C (A)",
+        "Pteste 25°C (MVA)",
+        "Potencia Ativa 25°C (kW)",
+        "Pteste 25°C (MVAr)",
+    ),
+}
+for _pu in OVERLOAD_LEVELS_PU:
+    SCENARIO_KEYS[f"{_pu} pu"] = (
+        f"Tensão {_pu} pu (kV)",
+        f"Corrente {_pu} pu (A)",
+        f"Pteste {_pu} pu (MVA)",
+        f"Potencia Ativa {_pu} pu (kW)",
+        f"Pteste {_pu} pu (MVAr)",
+    )
+# Ordem em que as configurações do banco e a análise SUT/EPS são montadas
+BASE_SCENARIOS = ("25°C", "Frio", "Quente")
+OVERLOAD_SCENARIOS = tuple(f"{pu} pu" for pu in OVERLOAD_LEVELS_PU)
+
+
+class LossesInputError(ValueError):
+    """Entradas inválidas para o cálculo de perdas; a mensagem é exibida na interface."""
+
+
+def _to_float(value, default=None):
+    try:
+        return float(value) if value is not None and value != "" else default
+    except (ValueError, TypeError):
+        return default
+
+
+# === Entradas ===
+
+
+@dataclass(frozen=True)
+class TransformerRating:
+    """Dados nominais do transformador usados nos cálculos de perdas (kV, A, MVA, %)."""
+
+    potencia_mva: Optional[float]
+    tensao_at_kv: Optional[float]
+    tensao_bt_kv: Optional[float]
+    corrente_nominal_bt_a: Optional[float] = None
+    tipo_transformador: str = "Trifásico"
+    frequencia_hz: float = 60.0
+    tensao_at_tap_maior_kv: Optional[float] = None
+    tensao_at_tap_menor_kv: Optional[float] = None
+    impedancia_percent: Optional[float] = None
+    impedancia_tap_maior_percent: Optional[float] = None
+    impedancia_tap_menor_percent: Optional[float] = None
+    corrente_nominal_at_a: Optional[float] = None
+    corrente_nominal_at_tap_maior_a: Optional[float] = None
+    corrente_nominal_at_tap_menor_a: Optional[float] = None
+
+    # Nome de cada campo no transformer-inputs-store (usado também nas mensagens de erro)
+    STORE_KEYS = {
+        "potencia_mva": "potencia_mva",
+        "tensao_at_kv": "tensao_at",
+        "tensao_bt_kv": "tensao_bt",
+        "corrente_nominal_bt_a": "corrente_nominal_bt",
+        "frequencia_hz": "frequencia",
+        "tensao_at_tap_maior_kv": "tensao_at_tap_maior",
+        "tensao_at_tap_menor_kv": "tensao_at_tap_menor",
+        "impedancia_percent": "impedancia",
+        "impedancia_tap_maior_percent": "impedancia_tap_maior",
+        "impedancia_tap_menor_percent": "impedancia_tap_menor",
+        "corrente_nominal_at_a": "corrente_nominal_at",
+        "corrente_nominal_at_tap_maior_a": "corrente_nominal_at_tap_maior",
+        "corrente_nominal_at_tap_menor_a": "corrente_nominal_at_tap_menor",
+    }
+
+    @classmethod
+    def from_store(cls, transformer_data: dict) -> "TransformerRating":
+        """Converte o conteúdo do `transformer-inputs-store` (valores inválidos -> None)."""
+        values = {
+            attr: _to_float(transformer_data.get(key)) for attr, key in cls.STORE_KEYS.items()
+        }
+        values["frequencia_hz"] = _to_float(transformer_data.get("frequencia", 60), 60.0)
+        return cls(
+            tipo_transformador=transformer_data.get("tipo_transformador", "Trifásico"), **values
+        )
+
+    @property
+    def sqrt_3_factor(self) -> float:
+        return math.sqrt(3) if self.tipo_transformador == "Trifásico" else 1.0
+
+
+@dataclass(frozen=True)
+class NoLoadInputs:
+    """Entradas do ensaio em vazio (kW, Ton, %, T)."""
+
+    perdas_vazio_kw: Optional[float]
+    peso_nucleo_ton: Optional[float]
+    corrente_excitacao_percent: Optional[float]
+    inducao_t: Optional[float]
+    corrente_exc_1_1_percent: Optional[float] = None
+    corrente_exc_1_2_percent: Optional[float] = None
+
+    def to_store(self) -> dict:
+        """Seção `inputs_perdas_vazio` do losses-store."""
+        return {
+            "perdas_vazio_kw": self.perdas_vazio_kw,
+            "peso_nucleo_ton": self.peso_nucleo_ton,
+            "corrente_excitacao_percentual": self.corrente_excitacao_percent,
+            "inducao_nucleo_t": self.inducao_t,
+            "corrente_excitacao_1_1pu_percentual": self.corrente_exc_1_1_percent,
+            "corrente_excitacao_1_2pu_percentual": self.corrente_exc_1_2_percent,
+        }
+
+
+@dataclass(frozen=True)
+class LoadLossInputs:
+    """Entradas do ensaio em carga: perdas totais por tap (kW) e perdas em vazio (kW)."""
+
+    perdas_totais_nom_kw: Optional[float]
+    perdas_totais_min_kw: Optional[float]
+    perdas_totais_max_kw: Optional[float]
+    perdas_vazio_kw: Optional[float]
+    temperatura_referencia_c: int = DEFAULT_REFERENCE_TEMPERATURE_C
+
+    def to_store(self) -> dict:
+        """Seção `inputs_perdas_carga` do losses-store."""
+        return {
+            "temperatura_referencia_c": self.temperatura_referencia_c,
+            "perdas_totais_tap_menos_kw": self.perdas_totais_min_kw,
+            "perdas_totais_tap_nominal_kw": self.perdas_totais_nom_kw,
+            "perdas_totais_tap_mais_kw": self.perdas_totais_max_kw,
+        }
+
+
+# === Resultados ===
+
+
+@dataclass
+class NoLoadResult:
+    """Resultados do ensaio em vazio: referência aço M4, projeto e análise SUT/EPS por pu."""
+
+    inputs: NoLoadInputs
+    resultados_aco_m4: dict
+    resultados_projeto: dict
+    sut_analysis: dict
+    inducao_tabela_t: float
+    frequencia_tabela_hz: float
+
+    def to_store(self) -> dict:
+        """Seção `resultados_perdas_vazio` do losses-store."""
+        return {
+            "resultados_aco_m4": self.resultados_aco_m4,
+            "resultados_projeto": self.resultados_projeto,
+            "perdas_vazio_kw": self.inputs.perdas_vazio_kw,
+            "peso_nucleo": self.inputs.peso_nucleo_ton,
+            "corrente_excitacao": self.inputs.corrente_excitacao_percent,
+            "inducao": self.inputs.inducao_t,
+            "corrente_exc_1_1": self.inputs.corrente_exc_1_1_percent,
+            "corrente_exc_1_2": self.inputs.corrente_exc_1_2_percent,
+            "sut_analysis_data": self.sut_analysis,
+        }
+
+
+@dataclass
+class LoadLossResult:
+    """
+    Resultados do ensaio em carga.
+
+    `resultados` tem um dicionário por tap (Nominal, Menor, Maior) com as chaves usadas
+    nas tabelas; `sut_analysis` é indexado por (cenário, tap).
+    """
+
+    inputs: LoadLossInputs
+    resultados: list
+    overload_applicable: bool
+    suggested_cs_config: str
+    suggested_q_config: str
+    suggested_q_power_mvar: float
+    max_test_voltage_kv_overall: float
+    max_test_power_mvar_overall_required: float
+    sut_analysis: dict = field(default_factory=dict)
+
+    @property
+    def scenarios(self) -> tuple:
+        return BASE_SCENARIOS + (OVERLOAD_SCENARIOS if self.overload_applicable else ())
+
+    def by_tap(self, tap_label: str) -> Optional[dict]:
+        return next((r for r in self.resultados if r.get("Tap") == tap_label), None)
+
+    def to_store(self) -> dict:
+        """Seção `resultados_perdas_carga` do losses-store."""
+        return {
+            "resultados": self.resultados,
+            "perdas_carga_nom": self.inputs.perdas_totais_nom_kw,
+            "perdas_carga_min": self.inputs.perdas_totais_min_kw,
+            "perdas_carga_max": self.inputs.perdas_totais_max_kw,
+            "temperatura_referencia": self.inputs.temperatura_referencia_c,
+            "suggested_cs_config": self.suggested_cs_config,
+            "suggested_q_config": self.suggested_q_config,
+            "suggested_q_power_mvar": self.suggested_q_power_mvar,
+            "max_test_voltage_kv_overall": self.max_test_voltage_kv_overall,
+            "max_test_power_mvar_overall_required": self.max_test_power_mvar_overall_required,
+        }
+
+
+# === Banco de capacitores ===
+
+
+def required_cap_bank(voltage_kv, power_mva):
+    """
+    Tensões e potências requeridas do banco de capacitores para uma condição de ensaio.
+
+    C/F (com fator): menor banco com V_ensaio <= 1,1·V_banco; S/F (sem fator): menor banco
+    com V_ensaio <= V_banco. A potência requerida é a potência de ensaio referida à
+    tensão do banco, P·(V_banco/V_ensaio)².
+
+    Returns:
+        (V_banco_cf, Q_cf, V_banco_sf, Q_sf) em kV/MVAr, ou quatro None.
+    """
+    if voltage_kv is None or power_mva is None or voltage_kv <= EPSILON or power_mva <= EPSILON:
+        return None, None, None, None
+    key_cf = cap_bank.smallest_bank_voltage_key(voltage_kv, 1.1)
+    key_sf = cap_bank.smallest_bank_voltage_key(voltage_kv, 1.0)
+    if key_cf is None or key_sf is None:
+        log.error("Lista de tensões de banco de capacitores está vazia.")
+        return None, None, None, None
+    v_cf, v_sf = float(key_cf), float(key_sf)
+    q_denominator_cf = (voltage_kv / v_cf) ** 2
+    q_denominator_sf = (voltage_kv / v_sf) ** 2
+    return (
+        v_cf,
+        power_mva / q_denominator_cf if q_denominator_cf > EPSILON else float("inf"),
+        v_sf,
+        power_mva / q_denominator_sf if q_denominator_sf > EPSILON else float("inf"),
+    )
+
+
+def select_target_bank_voltage(max_test_voltage_kv):
+    """Selects the target capacitor bank voltage level based on max test voltage."""
+    # Busca binária no catálogo compilado de tensões de banco
+    target_v_cf_str = cap_bank.smallest_bank_voltage_key(max_test_voltage_kv, 1.1)
+    target_v_sf_str = cap_bank.smallest_bank_voltage_key(max_test_voltage_kv, 1.0)
+    if not len(cap_bank.CATALOG):
+        return target_v_cf_str, target_v_sf_str
+
+    highest_key = cap_bank.CATALOG.keys[-1]
+    highest_kv = float(cap_bank.CATALOG.voltages_kv[-1])
+    if max_test_voltage_kv > highest_kv * 1.1 + EPSILON:
+        log.warning(
+            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds 110% of highest bank "
+            f"({highest_key}kV). Using highest bank."
+        )
+    if max_test_voltage_kv > highest_kv + EPSILON:
+        log.warning(
+            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds highest bank "
+            f"({highest_key}kV). Using highest bank for S/F."
+        )
+
+    return target_v_cf_str, target_v_sf_str
+
+
+def get_cs_configuration(target_bank_voltage_key, use_group1_only, circuit_type):
+    """Determines the CS switch configuration string."""
+    if target_bank_voltage_key is None:
+        return "N/A (Tensão alvo inválida)"
+
+    cs_switch_dict = (
+        CS_SWITCHES_BY_VOLTAGE_TRI if circuit_type == "Trifásico" else CS_SWITCHES_BY_VOLTAGE_MONO
+    )
+    available_switches = cs_switch_dict.get(str(target_bank_voltage_key))
+    if not available_switches:
+        log.warning(
+            f"No CS switches found for key '{target_bank_voltage_key}' (Type: {circuit_type}). "
+            f"Available keys: {list(cs_switch_dict.keys())}"
+        )
+        return f"N/A (Sem chaves CS para {target_bank_voltage_key}kV)"
+
+    cs_config_list = []
+    for switch_name in available_switches:
+        # Chaves do grupo 2 terminam em '2' (CS1A2, CS2B2...); no trifásico com apenas o
+        # grupo 1 elas ficam abertas. No monofásico todas as chaves listadas são usadas.
+        is_group_2_switch = len(switch_name) > 4 and switch_name.endswith("2")
+        if use_group1_only and circuit_type == "Trifásico" and is_group_2_switch:
+            continue
+        cs_config_list.append(switch_name)
+
+    return ", ".join(sorted(cs_config_list)) if cs_config_list else "N/A"
+
+
+def _format_unreachable_q(target_bank_voltage_key, required_power_mvar, max_possible_power):
+    """Texto 'N/A' para potência requerida acima da máxima do banco."""
+    required_str = f"{required_power_mvar:.1f}" if required_power_mvar else "?"
+    max_str = f"{max_possible_power:.1f}" if max_possible_power is not None else "?"
+    log.warning(
+        f"Could not find suitable Q config for {target_bank_voltage_key}kV, "
+        f"{required_power_mvar:.2f} MVAr. Max possible: {max_possible_power:.2f} MVAr"
+    )
+    return f"N/A (Req: {required_str} MVAr > Max: {max_str} MVAr)"
+
+
+def find_best_q_configuration(target_bank_voltage_key, required_power_mvar, use_group1_only):
+    """
+    Finds the best Q switch combination using all capacitors of the selected groups.
+
+    Busca binária no índice de `app_core.cap_bank` restrita às chaves Q (todas as
+    unidades e fases do grupo).
+    """
+    if (
+        target_bank_voltage_key is None
+        or required_power_mvar is None
+        or required_power_mvar <= EPSILON
+    ):
+        return "N/A", 0.0
+
+    if not CAPACITORS_BY_VOLTAGE.get(str(target_bank_voltage_key)):
+        log.warning(
+            f"No capacitors found for key '{target_bank_voltage_key}'. "
+            f"Available keys: {list(CAPACITORS_BY_VOLTAGE.keys())}"
+        )
+        return f"N/A (Sem capacitores para {target_bank_voltage_key}kV)", 0.0
+
+    groups = ("1",) if use_group1_only else ("1", "2")
+    if use_group1_only and not cap_bank.max_bank_power(target_bank_voltage_key, groups=groups):
+        log.warning(
+            f"No Group 1 (ending in '1') capacitors found for {target_bank_voltage_key}kV, "
+            "trying all."
+        )
+        groups = ("1", "2")
+
+    best = cap_bank.best_cap_bank_config(
+        target_bank_voltage_key,
+        required_power_mvar,
+        groups=groups,
+        all_units=True,
+        full_phases=True,
+    )
+    if best:
+        return best["q_config"], best["power_mvar"]
+
+    max_possible_power = cap_bank.max_bank_power(target_bank_voltage_key, groups=groups)
+    return (
+        _format_unreachable_q(target_bank_voltage_key, required_power_mvar, max_possible_power),
+        max_possible_power,
+    )
+
+
+def find_best_cap_bank_configuration(target_bank_voltage_key, required_power_mvar, circuit_type):
+    """
+    Finds the best CS/Q configuration over groups, phase layouts and CP unit subsets.
+
+    Returns:
+        (cs_config_str, q_config_str, provided_power_mvar); q_config_str lista as
+        unidades usadas quando não são todas as do banco.
+    """
+    if (
+        target_bank_voltage_key is None
+        or required_power_mvar is None
+        or required_power_mvar <= EPSILON
+    ):
+        return "N/A", "N/A", 0.0
+
+    best = cap_bank.best_cap_bank_config(target_bank_voltage_key, required_power_mvar, circuit_type)
+    if best is None:
+        max_possible_power = cap_bank.max_bank_power(target_bank_voltage_key, circuit_type)
+        q_config_str = _format_unreachable_q(
+            target_bank_voltage_key, required_power_mvar, max_possible_power
+        )
+        return "N/A", q_config_str, max_possible_power
+
+    cs_config_str = best["cs_config"]
+    if not best["cs_switches"]:
+        cs_config_str = f"N/A (Sem chaves CS para {target_bank_voltage_key}kV)"
+    q_config_str = best["q_config"]
+    if len(best["capacitors"]) < len(CAPACITORS_BY_VOLTAGE.get(best["bank_voltage_kv"], [])):
+        q_config_str = f"{q_config_str} ({', '.join(best['capacitors'])})"
+    return cs_config_str, q_config_str, best["power_mvar"]
+
+
+def suggest_capacitor_bank_config(max_voltage_kv, max_power_mvar, circuit_type):
+    """Suggests CS and Q configuration based on max requirements."""
+    if (
+        max_voltage_kv is None
+        or max_voltage_kv <= EPSILON
+        or max_power_mvar is None
+        or max_power_mvar <= EPSILON
+    ):
+        return "N/A (Dados insuficientes)", "N/A", 0.0
+
+    # 1. Tensão alvo do banco (C/F)
+    target_v_cf_key, _ = select_target_bank_voltage(max_voltage_kv)
+    if target_v_cf_key is None:
+        log.error("Could not determine target bank voltage.")
+        return "N/A (Erro Tensão)", "N/A", 0.0
+
+    # 2. Melhor configuração CS/Q C/F (grupos, fases e unidades CP)
+    return find_best_cap_bank_configuration(target_v_cf_key, max_power_mvar, circuit_type)
+
+
+def suggested_cap_bank(max_voltage_kv, max_power_mvar, circuit_type) -> tuple:
+    """Sugestão geral (CS, Q, potência fornecida) para os máximos de todos os cenários."""
+    cs_config, q_config, q_power_provided = suggest_capacitor_bank_config(
+        max_voltage_kv, max_power_mvar, circuit_type
+    )
+    if "N/A" in cs_config or "N/A" in q_config:
+        log.warning(
+            "Não foi possível sugerir a configuração do banco de capacitores: "
+            f"{cs_config if 'N/A' in cs_config else q_config}"
+        )
+    return cs_config, q_config, q_power_provided
+
+
+def cap_bank_plan_demands(resultados: list, scenarios: tuple) -> list:
+    """Condições de ensaio (tap × cenário × C/F e S/F) atendidas pelo banco."""
+    demands = []
+    for res in resultados:
+        for scenario in scenarios:
+            v_key, i_key, mva_key = SCENARIO_KEYS[scenario][:3]
+            tensao, corrente, pteste = res.get(v_key), res.get(i_key), res.get(mva_key)
+            if not tensao or not pteste or tensao <= EPSILON or pteste <= EPSILON:
+                continue
+            for factor in ("C/F", "S/F"):
+                demands.append(
+                    cap_bank_plan.PlanDemand(
+                        res.get("Tap"), scenario, factor, tensao, corrente or 0.0, pteste
+                    )
+                )
+    return demands
+
+
+def suggest_capacitor_bank_plan(
+    resultados: list,
+    scenarios: tuple,
+    circuit_type: str,
+    check_eps: bool = True,
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+) -> cap_bank_plan.CapBankPlan:
+    """
+    Menor conjunto de arranjos CS/Q que atende todos os taps e cenários (C/F e S/F).
+
+    Diferente de `suggest_capacitor_bank_config` (uma configuração para o pior caso de
+    tensão e potência), verifica cada condição de ensaio e, com `check_eps`, a corrente
+    do EPS compensada; quando um único arranjo não basta, minimiza as trocas de arranjo.
+    """
+    return cap_bank_plan.optimize_cap_bank_plan(
+        cap_bank_plan_demands(resultados, scenarios),
+        circuit_type,
+        check_eps=check_eps,
+        tensao_sut_bt_v=tensao_sut_bt_v,
+        limite_corrente_eps_a=limite_corrente_eps_a,
+    )
+
+
+def scenario_cap_bank_config(res_dict: dict, scenario: str, circuit_type: str) -> dict:
+    """Configurações CS/Q e potência FORNECIDA (C/F e S/F) de um cenário de um tap."""
+    config = {}
+    for label, suffix, factor in (("C/F", "", "Com Fator"), ("S/F", " S/F", "Sem Fator")):
+        cs_key = f"CS Config {scenario}{suffix}"
+        q_key = f"Q Config {scenario}{suffix}"
+        power_key = f"Q Power Provided {scenario}{suffix} (MVAr)"
+        bank_voltage = res_dict.get(f"Cap Bank Voltage {scenario} {factor} (kV)")
+        required = res_dict.get(f"Cap Bank Power {scenario} {factor} (MVAr)")
+        config[cs_key], config[q_key], config[power_key] = "N/A", "N/A", 0.0
+        if (
+            bank_voltage is None
+            or required is None
+            or math.isinf(required)
+            or required <= 0
+        ):
+            log.warning(
+                f"Dados {label} insuficientes ou inválidos para config {scenario} no Tap "
+                f"{res_dict.get('Tap')}. V: {bank_voltage}, Req P: {required}"
+            )
+            config[cs_key] = f"N/A (Dados {label} Insuf.)"
+            continue
+        target_key = cap_bank.nearest_bank_voltage_key(bank_voltage)
+        if not target_key:
+            config[cs_key] = f"N/A (Erro Chave V {label})"
+            continue
+        config[cs_key], config[q_key], config[power_key] = find_best_cap_bank_configuration(
+            target_key, required, circuit_type
+        )
+    # Ordem das chaves igual à gravada anteriormente no store
+    order = (
+        f"CS Config {scenario}",
+        f"CS Config {scenario} S/F",
+        f"Q Config {scenario}",
+        f"Q Config {scenario} S/F",
+        f"Q Power Provided {scenario} (MVAr)",
+        f"Q Power Provided {scenario} S/F (MVAr)",
+    )
+    return {key: config[key] for key in order}
+
+
+# === Cenários do ensaio em carga ===
+
+
+def temperature_factor(temperatura_ref) -> float:
+    """Fator de correção (resistência do cobre) da temperatura de referência para 25°C."""
+    return (
+        (235.0 + 25.0) / (235.0 + float(temperatura_ref))
+        if (235.0 + float(temperatura_ref)) > EPSILON
+        else 1.0
+    )
+
+
+def at_current(corrente_a, tensao_kv, potencia_mva, sqrt_3_factor) -> float:
+    """Corrente AT (A) de um tap; calculada a partir da potência se não informada."""
+    if corrente_a is None or corrente_a <= EPSILON:
+        return potencia_mva * 1000 / (tensao_kv * sqrt_3_factor) if tensao_kv > EPSILON else 0
+    return corrente_a
+
+
+def tap_vcc(tensao_kv, vcc_percent) -> float:
+    """Tensão de curto-circuito (kV) de um tap."""
+    return (tensao_kv / 100.0) * vcc_percent if tensao_kv > 0 else 0.0
+
+
+def load_loss_without_no_load(perdas_totais_kw, perdas_vazio_kw, tap_label: str) -> float:
+    """Perdas em carga sem as perdas em vazio (kW); não positivas levantam LossesInputError."""
+    perdas_carga_sem_vazio = perdas_totais_kw - perdas_vazio_kw
+    if perdas_carga_sem_vazio <= EPSILON:
+        raise LossesInputError(
+            f"Perdas em carga ({perdas_carga_sem_vazio:.2f} kW) no Tap {tap_label} são "
+            "inválidas (não positivas). Verifique as perdas totais "
+            f"({perdas_totais_kw:.2f}) e em vazio ({perdas_vazio_kw:.2f})."
+        )
+    return perdas_carga_sem_vazio
+
+
+def cold_load_loss(perdas_carga_sem_vazio, temp_factor, tap_label: str) -> float:
+    """Perdas em carga referidas a 25°C (kW)."""
+    perdas_cc_a_frio = perdas_carga_sem_vazio * temp_factor
+    if perdas_cc_a_frio <= EPSILON:
+        raise LossesInputError(
+            f"Cálculo de Perdas CC a frio ({perdas_cc_a_frio:.2f} kW) no Tap {tap_label} "
+            "resultou em valor inválido."
+        )
+    return perdas_cc_a_frio
+
+
+def _test_powers(tensao_kv, corrente_a, potencia_ativa_kw, sqrt_3_factor):
+    """Potência de ensaio (kVA, MVA) e reativa Q = √(S² − P²) (MVAr) de uma condição."""
+    pteste_kva = tensao_kv * corrente_a * sqrt_3_factor
+    pteste_mvar = (
+        math.sqrt(max(0, pteste_kva**2 - potencia_ativa_kw**2)) / 1000.0
+        if pteste_kva >= potencia_ativa_kw
+        else 0
+    )
+    return pteste_kva / 1000.0, pteste_mvar
+
+
+def tap_scenarios(
+    tap_label: str,
+    tensao,
+    corrente,
+    vcc_percent,
+    vcc,
+    perdas_totais,
+    perdas_carga_sem_vazio,
+    perdas_cc_a_frio,
+    overload_applicable: bool,
+    sqrt_3_factor: float,
+) -> dict:
+    """
+    Dicionário de resultados de um tap (sem as configurações CS/Q): condições de ensaio
+    25°C, frio, quente e sobrecargas, com os requisitos C/F e S/F do banco.
+    """
+    res = {
+        "Tap": tap_label,
+        "Tensão": tensao,
+        "Corrente": corrente,
+        "Vcc (%)": vcc_percent,
+        "Vcc (kV)": vcc,
+        "Pnominal (kVA)": tensao * corrente * sqrt_3_factor,
+        "Perdas totais (kW)": perdas_totais,
+        "Perdas Carga Sem Vazio (kW)": perdas_carga_sem_vazio,
+        "Perdas a Frio (25°C) (kW)": perdas_cc_a_frio,
+    }
+    # Cenário -> (fator de escala de Vcc e I, potência ativa do EPS em kW)
+    conditions = {
+        "Frio": (math.sqrt(perdas_totais / perdas_cc_a_frio), perdas_totais),
+        "Quente": (
+            math.sqrt(perdas_carga_sem_vazio / perdas_cc_a_frio),
+            perdas_carga_sem_vazio,
+        ),
+        "25°C": (1.0, perdas_cc_a_frio),
+    }
+    if overload_applicable:
+        for pu in OVERLOAD_LEVELS_PU:
+            # Perdas em carga escaladas por I² (I²R)
+            conditions[f"{pu} pu"] = (pu, perdas_carga_sem_vazio * pu**2)
+    for scenario, (ratio, potencia_ativa_kw) in conditions.items():
+        v_key, i_key, mva_key, p_key, mvar_key = SCENARIO_KEYS[scenario]
+        tensao_teste, corrente_teste = ratio * vcc, ratio * corrente
+        pteste_mva, pteste_mvar = _test_powers(
+            tensao_teste, corrente_teste, potencia_ativa_kw, sqrt_3_factor
+        )
+        res[v_key] = tensao_teste
+        res[i_key] = corrente_teste
+        res[mva_key] = pteste_mva
+        if scenario in OVERLOAD_SCENARIOS:
+            res[f"Perdas {scenario} (kW)"] = potencia_ativa_kw
+        res[p_key] = potencia_ativa_kw
+        res[mvar_key] = pteste_mvar
+        v_cf, q_cf, v_sf, q_sf = required_cap_bank(tensao_teste, pteste_mva)
+        res[f"Cap Bank Voltage {scenario} Com Fator (kV)"] = v_cf
+        res[f"Cap Bank Power {scenario} Com Fator (MVAr)"] = q_cf
+        res[f"Cap Bank Voltage {scenario} Sem Fator (kV)"] = v_sf
+        res[f"Cap Bank Power {scenario} Sem Fator (MVAr)"] = q_sf
+    return res
+
+
+def scenario_maxima(res_dict: dict, scenarios: tuple) -> tuple[float, float]:
+    """Maior tensão de ensaio (kV) e maior potência requerida do banco (MVAr) de um tap."""
+    max_test_voltage_kv, max_test_power_mvar_required = 0.0, 0.0
+    for scenario in scenarios:
+        max_test_voltage_kv = max(max_test_voltage_kv, res_dict[SCENARIO_KEYS[scenario][0]] or 0)
+        for factor in ("Com Fator", "Sem Fator"):
+            q_required = res_dict[f"Cap Bank Power {scenario} {factor} (MVAr)"]
+            if q_required is not None and not math.isinf(q_required):
+                max_test_power_mvar_required = max(max_test_power_mvar_required, q_required)
+    return max_test_voltage_kv, max_test_power_mvar_required
+
+
+# === Motor ===
+
+
+class LossesEngine:
+    """
+    Cálculo de perdas em vazio e em carga sem dependência da interface.
+
+    Uso:
+        engine = LossesEngine()
+        vazio = engine.no_load(rating, NoLoadInputs(...))
+        carga = engine.load_losses(rating, LoadLossInputs(...))
+
+    Entradas inválidas levantam `LossesInputError` com a mensagem exibida na página.
+    """
+
+    def __init__(
+        self,
+        tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+        limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+        cap_bank_configs: bool = True,
+        sut_analysis: bool = True,
+    ):
+        """
+        Args:
+            tensao_sut_bt_v: Tensão BT do SUT (V)
+            limite_corrente_eps_a: Limite de corrente do EPS (A)
+            cap_bank_configs: Busca as configurações CS/Q de cada cenário e a sugestão
+                geral (desligar quando só as potências requeridas interessam)
+            sut_analysis: Calcula a análise SUT/EPS
+        """
+        self.tensao_sut_bt_v = tensao_sut_bt_v
+        self.limite_corrente_eps_a = limite_corrente_eps_a
+        self.cap_bank_configs = cap_bank_configs
+        self.sut_analysis = sut_analysis
+
+    # --- Perdas em vazio ---
+
+    def no_load(self, rating: TransformerRating, inputs: NoLoadInputs) -> NoLoadResult:
+        """Parâmetros do ensaio em vazio (aço M4 e projeto) e análise SUT/EPS por nível pu."""
+        frequencia = rating.frequencia_hz
+        potencia = rating.potencia_mva or 0.0
+        tensao_nominal_at = rating.tensao_at_kv or 0.0
+        tensao_bt_kv = rating.tensao_bt_kv or 0.0
+        corrente_nominal_bt = rating.corrente_nominal_bt_a or 0.0
+        tipo_transformador = rating.tipo_transformador
+        perdas_vazio = inputs.perdas_vazio_kw or 0.0
+        peso_nucleo = inputs.peso_nucleo_ton or 0.0
+        corrente_excitacao_percentual = inputs.corrente_excitacao_percent or 0.0
+        inducao = inputs.inducao_t or 0.0
+        corrente_exc_1_1_input = inputs.corrente_exc_1_1_percent
+        corrente_exc_1_2_input = inputs.corrente_exc_1_2_percent
+
+        required = {
+            "Potência": potencia,
+            "Tensão AT": tensao_nominal_at,
+            "Tensão BT": tensao_bt_kv,
+            "Corrente BT": corrente_nominal_bt,
+            "Perdas Vazio": perdas_vazio,
+            "Indução": inducao,
+            "Corr Exc %": corrente_excitacao_percentual,
+        }
+        invalid = [f"{k}={v}" for k, v in required.items() if v <= EPSILON]
+        if invalid:
+            raise LossesInputError(
+                "Dados essenciais devem ser maiores que zero ou não nulos. "
+                f"Inválidos: {', '.join(invalid)}"
+            )
+        if peso_nucleo <= EPSILON:
+            raise LossesInputError(
+                f"Peso do núcleo de projeto ({peso_nucleo}) deve ser maior que zero."
+            )
+
+        sqrt_3 = rating.sqrt_3_factor
+        inducao_arredondada = round(inducao * 10) / 10
+        frequencia_arredondada = min(VALID_FREQUENCIES_HZ, key=lambda x: abs(x - frequencia))
+
+        # Valores tabelados no nó (sem interpolação), das grades compiladas na importação
+        fator_perdas = TABELA_PERDAS_NUCLEO.node_value(inducao_arredondada, frequencia_arredondada)
+        fator_potencia_mag = TABELA_POTENCIA_MAGNET.node_value(
+            inducao_arredondada, frequencia_arredondada
+        )
+        if fator_perdas is None or fator_potencia_mag is None:
+            raise LossesInputError(
+                "Fatores de perdas/potência não encontrados para Indução "
+                f"{inducao_arredondada}T @ {frequencia_arredondada}Hz."
+            )
+        if fator_perdas <= EPSILON or fator_potencia_mag <= EPSILON:
+            raise LossesInputError(
+                f"Fatores de perdas/potência inválidos ({fator_perdas=}, {fator_potencia_mag=}) "
+                f"para Indução {inducao_arredondada}T @ {frequencia_arredondada}Hz."
+            )
+
+        # --- Núcleo e excitação (aço M4) ---
+        peso_nucleo_calc = perdas_vazio / fator_perdas
+        potencia_mag = fator_potencia_mag * peso_nucleo_calc  # kVAR
+        corrente_excitacao_calc = (
+            potencia_mag / (tensao_bt_kv * sqrt_3) if (tensao_bt_kv * sqrt_3) > EPSILON else 0
+        )
+        corrente_excitacao_percentual_calc = (corrente_excitacao_calc / corrente_nominal_bt) * 100
+
+        tensao_teste_1_1_kv = tensao_bt_kv * 1.1
+        tensao_teste_1_2_kv = tensao_bt_kv * 1.2
+        # Correntes 1.1/1.2 pu calculadas (premissa aço M4)
+        corrente_excitacao_1_1_calc = 2 * corrente_excitacao_calc
+        corrente_excitacao_1_2_calc = 4 * corrente_excitacao_calc
+
+        # --- Correntes de projeto (percentuais informados) ---
+        corrente_excitacao_projeto = corrente_nominal_bt * (corrente_excitacao_percentual / 100.0)
+        # Multiplicador padrão de 1.1 pu quando o percentual não é informado
+        fator_excitacao_default = 3 if tipo_transformador == "Trifásico" else 5
+        if corrente_exc_1_1_input is not None:
+            corrente_excitacao_1_1 = corrente_nominal_bt * (corrente_exc_1_1_input / 100.0)
+        else:
+            corrente_excitacao_1_1 = fator_excitacao_default * corrente_excitacao_projeto
+        corrente_excitacao_1_2 = (
+            corrente_nominal_bt * (corrente_exc_1_2_input / 100.0)
+            if corrente_exc_1_2_input is not None
+            else None  # Sem premissa padrão para 1.2 pu
+        )
+
+        # --- Potências de ensaio (kVA) ---
+        potencia_ensaio_1pu_calc_kva = tensao_bt_kv * corrente_excitacao_calc * sqrt_3
+        potencia_ensaio_1_1pu_calc_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1_calc * sqrt_3
+        potencia_ensaio_1_2pu_calc_kva = tensao_teste_1_2_kv * corrente_excitacao_1_2_calc * sqrt_3
+        potencia_ensaio_1pu_projeto_kva = tensao_bt_kv * corrente_excitacao_projeto * sqrt_3
+        potencia_ensaio_1_1pu_projeto_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1 * sqrt_3
+
+        # --- Fatores de projeto ---
+        # (kW/Ton)·(1000 W/kW)/(1000 kg/Ton) = W/kg; potência magnetizante aproximada pela
+        # potência de ensaio a 1 pu (kVAR), fator em VAR/kg
+        fator_perdas_projeto = perdas_vazio / peso_nucleo * 1000 / 1000
+        potencia_mag_projeto_kvar = potencia_ensaio_1pu_projeto_kva
+        fator_potencia_mag_projeto = (potencia_mag_projeto_kvar * 1000) / (peso_nucleo * 1000)
+
+        resultados_aco_m4 = {
+            "Perdas em Vazio (kW)": perdas_vazio,
+            "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
+            "Corrente de excitação calculada (A)": corrente_excitacao_calc,
+            "Corrente de excitação percentual (%)": corrente_excitacao_percentual_calc,
+            "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
+            "Tensão de teste 1.2 pu (kV)": tensao_teste_1_2_kv,
+            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1_calc,
+            "Corrente de excitação 1.2 pu (A)": corrente_excitacao_1_2_calc,
+            "Frequência (Hz)": frequencia,
+            "Potência Mag. (kVAR)": potencia_mag,
+            "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag,
+            "Fator de perdas (W/kg)": fator_perdas,
+            "Peso do núcleo Calculado(Ton)": peso_nucleo_calc,
+            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_calc_kva,
+            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_calc_kva,
+            "Potência de Ensaio (1.2 pu) (kVA)": potencia_ensaio_1_2pu_calc_kva,
+        }
+        resultados_projeto = {
+            "Perdas em Vazio (kW)": perdas_vazio,
+            "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
+            "Corrente Nominal BT (A)": corrente_nominal_bt,
+            "Corrente de excitação (A)": corrente_excitacao_projeto,
+            "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
+            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1,
+            "Frequência (Hz)": frequencia,
+            "Potência Mag. (kVAR)": potencia_mag_projeto_kvar,
+            "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag_projeto,
+            "Fator de perdas (W/kg)": fator_perdas_projeto,
+            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_projeto_kva,
+            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_projeto_kva,
+        }
+        if corrente_excitacao_1_2 is not None:
+            resultados_projeto["Tensão de teste 1.2 pu (kV)"] = tensao_teste_1_2_kv
+            resultados_projeto["Corrente de excitação 1.2 pu (A)"] = corrente_excitacao_1_2
+            resultados_projeto["Potência de Ensaio (1.2 pu) (kVA)"] = (
+                tensao_teste_1_2_kv * corrente_excitacao_1_2 * sqrt_3
+            )
+
+        pu_levels = {
+            "1.0": (tensao_bt_kv, corrente_excitacao_projeto),
+            "1.1": (tensao_teste_1_1_kv, corrente_excitacao_1_1),
+            "1.2": (tensao_teste_1_2_kv, corrente_excitacao_1_2),
+        }
+        sut_analysis = (
+            self._no_load_sut_analysis(pu_levels)
+            if self.sut_analysis
+            else dict.fromkeys(pu_levels)
+        )
+        return NoLoadResult(
+            inputs=inputs,
+            resultados_aco_m4=resultados_aco_m4,
+            resultados_projeto=resultados_projeto,
+            sut_analysis=sut_analysis,
+            inducao_tabela_t=inducao_arredondada,
+            frequencia_tabela_hz=frequencia_arredondada,
+        )
+
+    def _no_load_sut_analysis(self, pu_levels: dict) -> dict[str, dict[str, Any]]:
+        """SUT/EPS em vazio (reflexão simples, apenas taps >= tensão de ensaio)."""
+        sut_analysis: dict[str, dict[str, Any]] = {}
+        valid_levels = []
+        for pu_level, (v_test_kv, i_test_a) in pu_levels.items():
+            if v_test_kv is None or v_test_kv <= EPSILON or i_test_a is None or i_test_a <= EPSILON:
+                sut_analysis[pu_level] = {
+                    "status": "Sem dados de corrente/tensão",
+                    "taps_info": [],
+                }
+            else:
+                sut_analysis[pu_level] = None
+                valid_levels.append(pu_level)
+        if not valid_levels:
+            return sut_analysis
+
+        # Todos os níveis pu em uma única passada: taps adequados (>= alvo) mais próximos
+        analysis = sut_eps.sut_eps_analysis(
+            [pu_levels[pu][0] for pu in valid_levels],
+            [pu_levels[pu][1] for pu in valid_levels],
+            adequate_only=True,
+            tensao_sut_bt_v=self.tensao_sut_bt_v,
+            limite_corrente_eps_a=self.limite_corrente_eps_a,
+        )
+        for row, pu_level in enumerate(valid_levels):
+            taps_info = sut_eps.taps_info_rows(analysis, row, compensated=False)
+            if taps_info:
+                sut_analysis[pu_level] = {"status": "OK", "taps_info": taps_info}
+            else:
+                highest_sut_tap_kv = sut_eps.SUT_TAPS_V[-1] / 1000
+                sut_analysis[pu_level] = {
+                    "status": f"Tensão > {highest_sut_tap_kv}kV SUT Max",
+                    "taps_info": [],
+                }
+        return sut_analysis
+
+    # --- Perdas em carga ---
+
+    def _at_currents(self, rating: TransformerRating) -> tuple:
+        """Correntes AT (nominal, tap menor, tap maior); calculadas se não informadas."""
+        sqrt_3_factor = rating.sqrt_3_factor
+        currents = []
+        for current, voltage, label in (
+            (rating.corrente_nominal_at_a, rating.tensao_at_kv, "Nominal"),
+            (rating.corrente_nominal_at_tap_menor_a, rating.tensao_at_tap_menor_kv, "Tap Menor"),
+            (rating.corrente_nominal_at_tap_maior_a, rating.tensao_at_tap_maior_kv, "Tap Maior"),
+        ):
+            current = at_current(current, voltage, rating.potencia_mva, sqrt_3_factor)
+            log.debug(f"Corrente AT {label}: {current}A")
+            currents.append(current)
+        if any(v <= EPSILON for v in currents):
+            raise LossesInputError(
+                "Falha ao calcular correntes nominais AT (resultado zero ou negativo). "
+                "Verifique tensões e potência."
+            )
+        return tuple(currents)
+
+    def _validate_load_inputs(self, rating: TransformerRating, inputs: LoadLossInputs) -> None:
+        losses = (
+            inputs.perdas_totais_nom_kw,
+            inputs.perdas_totais_min_kw,
+            inputs.perdas_totais_max_kw,
+        )
+        if any(v is None for v in losses + (inputs.perdas_vazio_kw,)):
+            raise LossesInputError("Valores de perdas (carga e vazio) devem ser numéricos.")
+        if any(v <= 0 for v in losses):
+            raise LossesInputError("Valores de perdas totais em carga devem ser maiores que zero.")
+        if inputs.perdas_vazio_kw <= 0:
+            raise LossesInputError("Valor de perdas em vazio deve ser maior que zero.")
+
+        essential = (
+            "potencia_mva",
+            "tensao_at_kv",
+            "tensao_at_tap_maior_kv",
+            "tensao_at_tap_menor_kv",
+            "impedancia_percent",
+            "impedancia_tap_maior_percent",
+            "impedancia_tap_menor_percent",
+        )
+        values = {TransformerRating.STORE_KEYS[a]: getattr(rating, a) for a in essential}
+        missing = [k for k, v in values.items() if v is None]
+        if missing:
+            raise LossesInputError(
+                "Dados numéricos essenciais do transformador estão faltando: "
+                f"{', '.join(missing)}."
+            )
+        invalid = [k for k, v in values.items() if v <= EPSILON]
+        if invalid:
+            raise LossesInputError(
+                "Dados essenciais do transformador devem ser maiores que zero: "
+                f"{', '.join(invalid)}."
+            )
+
+    def load_losses(self, rating: TransformerRating, inputs: LoadLossInputs) -> LoadLossResult:
+        """
+        Cenários do ensaio em carga para os taps Nominal, Menor e Maior.
+
+        Para cada tap: Vcc, perdas em carga sem vazio, perdas a frio (25°C) e as condições
+        de ensaio 25°C, frio (perdas totais) e quente (perdas em carga na temperatura de
+        referência); para AT >= 230 kV, sobrecargas de 1.2 e 1.4 pu. Cada condição traz
+        os requisitos C/F e S/F do banco de capacitores, a configuração CS/Q e, ao
+        final, a sugestão geral e a análise SUT/EPS compensada.
+        """
+        self._validate_load_inputs(rating, inputs)
+        sqrt_3_factor = rating.sqrt_3_factor
+        corrente_at_nom, corrente_at_min, corrente_at_max = self._at_currents(rating)
+        perdas_vazio_nom = inputs.perdas_vazio_kw
+        temp_factor = temperature_factor(inputs.temperatura_referencia_c)
+
+        cenarios = (
+            (
+                rating.tensao_at_kv,
+                corrente_at_nom,
+                rating.impedancia_percent,
+                inputs.perdas_totais_nom_kw,
+                "Nominal",
+            ),
+            (
+                rating.tensao_at_tap_menor_kv,
+                corrente_at_min,
+                rating.impedancia_tap_menor_percent,
+                inputs.perdas_totais_min_kw,
+                "Menor",
+            ),
+            (
+                rating.tensao_at_tap_maior_kv,
+                corrente_at_max,
+                rating.impedancia_tap_maior_percent,
+                inputs.perdas_totais_max_kw,
+                "Maior",
+            ),
+        )
+        overload_applicable = rating.tensao_at_kv >= OVERLOAD_MIN_AT_VOLTAGE_KV
+        scenarios = BASE_SCENARIOS + (OVERLOAD_SCENARIOS if overload_applicable else ())
+
+        resultados = []
+        max_test_voltage_kv = 0.0
+        max_test_power_mvar_required = 0.0
+        for tensao, corrente, vcc_percent, perdas_totais, tap_label in cenarios:
+            perdas_carga_sem_vazio = load_loss_without_no_load(
+                perdas_totais, perdas_vazio_nom, tap_label
+            )
+            perdas_cc_a_frio = cold_load_loss(perdas_carga_sem_vazio, temp_factor, tap_label)
+            res = tap_scenarios(
+                tap_label,
+                tensao,
+                corrente,
+                vcc_percent,
+                tap_vcc(tensao, vcc_percent),
+                perdas_totais,
+                perdas_carga_sem_vazio,
+                perdas_cc_a_frio,
+                overload_applicable,
+                sqrt_3_factor,
+            )
+            tap_max_voltage, tap_max_power = scenario_maxima(res, scenarios)
+            max_test_voltage_kv = max(max_test_voltage_kv, tap_max_voltage)
+            max_test_power_mvar_required = max(max_test_power_mvar_required, tap_max_power)
+            resultados.append(res)
+
+        cs_config, q_config, q_power_provided = "N/A", "N/A", 0.0
+        if self.cap_bank_configs:
+            for res in resultados:
+                for scenario in scenarios:
+                    res.update(scenario_cap_bank_config(res, scenario, rating.tipo_transformador))
+            cs_config, q_config, q_power_provided = suggested_cap_bank(
+                max_test_voltage_kv, max_test_power_mvar_required, rating.tipo_transformador
+            )
+
+        result = LoadLossResult(
+            inputs=inputs,
+            resultados=resultados,
+            overload_applicable=overload_applicable,
+            suggested_cs_config=cs_config,
+            suggested_q_config=q_config,
+            suggested_q_power_mvar=q_power_provided,
+            max_test_voltage_kv_overall=max_test_voltage_kv,
+            max_test_power_mvar_overall_required=max_test_power_mvar_required,
+        )
+        if self.sut_analysis:
+            rows = [(scenario, res) for scenario in scenarios for res in resultados]
+            result.sut_analysis = self.load_sut_analysis(rows, rating.tipo_transformador)
+        return result
+
+    def cap_bank_plan(
+        self, result: LoadLossResult, circuit_type: str, check_eps: bool = True
+    ) -> cap_bank_plan.CapBankPlan:
+        """Plano de arranjos do banco para todos os cenários de `result` (ver
+        `suggest_capacitor_bank_plan`), com os parâmetros SUT/EPS do motor."""
+        return suggest_capacitor_bank_plan(
+            result.resultados,
+            result.scenarios,
+            circuit_type,
+            check_eps=check_eps,
+            tensao_sut_bt_v=self.tensao_sut_bt_v,
+            limite_corrente_eps_a=self.limite_corrente_eps_a,
+        )
+
+    def load_sut_analysis(self, rows: list, circuit_type: str) -> dict:
+        """
+        SUT/EPS compensada de vários cenários × taps em uma única passada do kernel.
+
+        Args:
+            rows: Lista de (cenário, dicionário de resultados do tap) com as configurações
+                CS/Q já preenchidas
+            circuit_type: "Trifásico" ou "Monofásico"
+
+        Returns:
+            {(cenário, tap): {"status", "taps_info"}} na ordem de `rows`.
+        """
+        rows = [
+            (scenario, res)
+            for scenario, res in rows
+            if res.get("Tap") in TAP_LABELS
+            and res.get(SCENARIO_KEYS[scenario][0]) is not None
+            and res.get(SCENARIO_KEYS[scenario][1]) is not None
+        ]
+        if not rows:
+            return {}
+        analysis = sut_eps.sut_eps_analysis(
+            [res[SCENARIO_KEYS[scen][0]] for scen, res in rows],
+            [res[SCENARIO_KEYS[scen][1]] for scen, res in rows],
+            q_sf_mvar=[res.get(f"Q Power Provided {scen} S/F (MVAr)") for scen, res in rows],
+            v_bank_sf_kv=[res.get(f"Cap Bank Voltage {scen} Sem Fator (kV)") for scen, res in rows],
+            q_cf_mvar=[res.get(f"Q Power Provided {scen} (MVAr)") for scen, res in rows],
+            v_bank_cf_kv=[res.get(f"Cap Bank Voltage {scen} Com Fator (kV)") for scen, res in rows],
+            transformer_type=circuit_type,
+            tensao_sut_bt_v=self.tensao_sut_bt_v,
+            limite_corrente_eps_a=self.limite_corrente_eps_a,
+        )
+        return {
+            (scen, res.get("Tap")): {
+                "status": "OK",
+                "taps_info": sut_eps.taps_info_rows(analysis, row),
+            }
+            for row, (scen, res) in enumerate(rows)
+        }
+
+
+# --- END OF FILE app_core/losses_engine.py ---
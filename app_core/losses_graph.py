@@ -0,0 +1,435 @@
+# app_core/losses_graph.py
+"""
+Grafo de dependências com recomputação incremental para as perdas em carga.
+
+Cada intermediário do ensaio em carga (corrente AT, Vcc, perdas sem vazio e a frio,
+condições de ensaio e configurações do banco de capacitores de cada tap, sugestão geral
+e análise SUT/EPS) é um nó com valor em cache. Ao mudar uma entrada, só os nós a jusante
+dela são recalculados; um nó recalculado com o mesmo valor de antes não invalida os seus
+dependentes (corte antecipado). Os nós do banco e da análise SUT/EPS agrupam as células
+(cenário × tap) e só refazem as que mudaram, com uma única chamada do kernel SUT/EPS por
+avaliação. O traço da última avaliação informa quais nós foram recalculados.
+
+Uso:
+    graph = LoadLossGraph(LossesEngine())
+    resultado = graph.load_losses(rating, LoadLossInputs(...))  # mesmo retorno do motor
+    graph.last_recomputed  # nós recalculados nesta chamada
+"""
+import logging
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from app_core.losses_engine import (
+    BASE_SCENARIOS,
+    EPSILON,
+    OVERLOAD_MIN_AT_VOLTAGE_KV,
+    OVERLOAD_SCENARIOS,
+    SCENARIO_KEYS,
+    TAP_LABELS,
+    LoadLossInputs,
+    LoadLossResult,
+    LossesEngine,
+    LossesInputError,
+    TransformerRating,
+    at_current,
+    cold_load_loss,
+    load_loss_without_no_load,
+    scenario_cap_bank_config,
+    scenario_maxima,
+    suggested_cap_bank,
+    tap_scenarios,
+    tap_vcc,
+    temperature_factor,
+)
+
+log = logging.getLogger(__name__)
+
+ALL_SCENARIOS = BASE_SCENARIOS + OVERLOAD_SCENARIOS
+
+# Chaves do dicionário do tap lidas por cenário: requisitos do banco de capacitores
+# (scenario_cap_bank_config) e grandezas do ensaio (load_sut_analysis)
+BANK_REQUIREMENT_KEYS = {
+    scenario: tuple(
+        f"Cap Bank {quantity} {scenario} {factor} ({unit})"
+        for factor in ("Com Fator", "Sem Fator")
+        for quantity, unit in (("Voltage", "kV"), ("Power", "MVAr"))
+    )
+    for scenario in ALL_SCENARIOS
+}
+SUT_ROW_KEYS = {
+    scenario: SCENARIO_KEYS[scenario][:2]
+    + (
+        f"Cap Bank Voltage {scenario} Sem Fator (kV)",
+        f"Cap Bank Voltage {scenario} Com Fator (kV)",
+    )
+    for scenario in ALL_SCENARIOS
+}
+
+# Campos de TransformerRating e LoadLossInputs de cada tap
+TAP_FIELDS = {
+    "Nominal": ("tensao_at_kv", "corrente_nominal_at_a", "impedancia_percent"),
+    "Menor": (
+        "tensao_at_tap_menor_kv",
+        "corrente_nominal_at_tap_menor_a",
+        "impedancia_tap_menor_percent",
+    ),
+    "Maior": (
+        "tensao_at_tap_maior_kv",
+        "corrente_nominal_at_tap_maior_a",
+        "impedancia_tap_maior_percent",
+    ),
+}
+TAP_LOSS_FIELDS = {
+    "Nominal": "perdas_totais_nom_kw",
+    "Menor": "perdas_totais_min_kw",
+    "Maior": "perdas_totais_max_kw",
+}
+
+
+def _overall_maxima(scenarios: tuple, *tap_results) -> tuple[float, float]:
+    """Máximos de tensão de ensaio e potência requerida sobre todos os taps."""
+    max_voltage, max_power = 0.0, 0.0
+    for res in tap_results:
+        tap_voltage, tap_power = scenario_maxima(res, scenarios)
+        max_voltage, max_power = max(max_voltage, tap_voltage), max(max_power, tap_power)
+    return max_voltage, max_power
+
+
+@dataclass
+class _Node:
+    name: str
+    fn: Optional[Callable]  # None: entrada
+    deps: tuple
+    value: Any = None
+    version: int = 0
+    dep_versions: Optional[tuple] = None
+    computed: bool = False
+    checked_epoch: int = -1
+    dep_nodes: tuple = ()
+
+
+def _same(old, new) -> bool:
+    """Igualdade usada no corte antecipado (tipos iguais; NaN nunca é igual)."""
+    if type(old) is not type(new):
+        return False
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+
+class DependencyGraph:
+    """
+    Grafo de computação com cache por nó, avaliado sob demanda (pull).
+
+    Entradas são nós sem função; ao receberem um valor diferente, incrementam a versão.
+    Um nó é recalculado quando a versão de alguma dependência mudou desde o último
+    cálculo; se o novo valor for igual ao anterior, a sua versão não muda.
+    """
+
+    def __init__(self):
+        self._nodes: dict[str, _Node] = {}
+        self._trace: list[str] = []
+        self._epoch = 0  # Incrementado a cada mudança de entrada
+        self.recompute_counts: Counter = Counter()
+
+    def add_input(self, name: str, value: Any = None) -> None:
+        self._nodes[name] = _Node(name, None, (), value, computed=True)
+
+    def add_node(self, name: str, fn: Callable, deps: tuple) -> None:
+        missing = [dep for dep in deps if dep not in self._nodes]
+        if missing:
+            raise KeyError(f"Dependências desconhecidas para o nó '{name}': {missing}")
+        self._nodes[name] = _Node(
+            name, fn, tuple(deps), dep_nodes=tuple(self._nodes[dep] for dep in deps)
+        )
+
+    def set_input(self, name: str, value: Any) -> bool:
+        """Atualiza uma entrada; retorna True se o valor mudou."""
+        node = self._nodes[name]
+        if node.fn is not None:
+            raise ValueError(f"'{name}' não é uma entrada do grafo.")
+        if _same(node.value, value):
+            return False
+        node.value = value
+        node.version += 1
+        self._epoch += 1
+        return True
+
+    def _refresh(self, node: _Node) -> int:
+        epoch = self._epoch
+        if node.fn is None or node.checked_epoch == epoch:
+            return node.version
+        # Entradas e nós já verificados nesta época são lidos sem recursão
+        dep_versions = tuple(
+            [
+                dep.version
+                if dep.fn is None or dep.checked_epoch == epoch
+                else self._refresh(dep)
+                for dep in node.dep_nodes
+            ]
+        )
+        if node.computed and dep_versions == node.dep_versions:
+            node.checked_epoch = epoch
+            return node.version
+        value = node.fn(*[dep.value for dep in node.dep_nodes])
+        self._trace.append(node.name)
+        self.recompute_counts[node.name] += 1
+        if not node.computed or not _same(node.value, value):
+            node.value = value
+            node.version += 1
+        node.dep_versions = dep_versions
+        node.computed = True
+        node.checked_epoch = epoch
+        return node.version
+
+    def get(self, name: str) -> Any:
+        """Valor atualizado do nó, recalculando apenas o necessário."""
+        node = self._nodes[name]
+        self._refresh(node)
+        return node.value
+
+    def start_trace(self) -> None:
+        self._trace = []
+
+    @property
+    def trace(self) -> tuple:
+        """Nós recalculados desde o último `start_trace`, na ordem de cálculo."""
+        return tuple(self._trace)
+
+    @property
+    def node_names(self) -> tuple:
+        return tuple(self._nodes)
+
+
+class LoadLossGraph:
+    """
+    Perdas em carga incrementais: mesmo resultado de `LossesEngine.load_losses`, com
+    os intermediários em um `DependencyGraph` mantido entre chamadas.
+
+    Thread-safe (uma avaliação por vez); as flags `cap_bank_configs` e `sut_analysis`
+    e os parâmetros do SUT vêm do motor informado.
+    """
+
+    def __init__(self, engine: Optional[LossesEngine] = None):
+        self.engine = engine or LossesEngine()
+        self.graph = DependencyGraph()
+        self.last_recomputed: tuple = ()
+        self._lock = threading.Lock()
+        # Células reaproveitadas entre avaliações: (assinatura das entradas, valor)
+        self._bank_cells: dict = {}  # (tap, cenário) -> configuração CS/Q
+        self._sut_cells: dict = {}  # (cenário, tap) -> análise SUT/EPS
+        self._build()
+
+    def _build(self) -> None:
+        g = self.graph
+        for name in (
+            "tipo_transformador",
+            "potencia_mva",
+            "perdas_vazio_kw",
+            "temperatura_referencia_c",
+        ):
+            g.add_input(name)
+        for tap in TAP_LABELS:
+            for name in ("tensao", "corrente_nominal", "impedancia", "perdas_totais"):
+                g.add_input(f"{name}:{tap}")
+
+        g.add_node(
+            "sqrt_3_factor",
+            lambda tipo: math.sqrt(3) if tipo == "Trifásico" else 1.0,
+            ("tipo_transformador",),
+        )
+        g.add_node("temp_factor", temperature_factor, ("temperatura_referencia_c",))
+        g.add_node(
+            "overload_applicable",
+            lambda tensao: tensao >= OVERLOAD_MIN_AT_VOLTAGE_KV,
+            ("tensao:Nominal",),
+        )
+        g.add_node(
+            "scenarios",
+            lambda overload: BASE_SCENARIOS + (OVERLOAD_SCENARIOS if overload else ()),
+            ("overload_applicable",),
+        )
+        for tap in TAP_LABELS:
+            self._build_tap(tap)
+        g.add_node(
+            "maximos",
+            _overall_maxima,
+            ("scenarios",) + tuple(f"condicoes:{tap}" for tap in TAP_LABELS),
+        )
+        g.add_node(
+            "sugestao",
+            lambda maximos, tipo: suggested_cap_bank(*maximos, tipo),
+            ("maximos", "tipo_transformador"),
+        )
+        # Análise SUT/EPS de todas as células em um único nó (uma chamada do kernel
+        # vetorizado por avaliação, apenas com as linhas cujas entradas mudaram)
+        g.add_node(
+            "sut",
+            self._sut_analysis,
+            ("scenarios", "tipo_transformador")
+            + tuple(f"condicoes:{tap}" for tap in TAP_LABELS)
+            + (
+                tuple(f"banco:{tap}" for tap in TAP_LABELS)
+                if self.engine.cap_bank_configs
+                else ()
+            ),
+        )
+
+    def _build_tap(self, tap: str) -> None:
+        g = self.graph
+        g.add_node(
+            f"corrente:{tap}",
+            at_current,
+            (f"corrente_nominal:{tap}", f"tensao:{tap}", "potencia_mva", "sqrt_3_factor"),
+        )
+        g.add_node(f"vcc:{tap}", tap_vcc, (f"tensao:{tap}", f"impedancia:{tap}"))
+        g.add_node(
+            f"perdas_carga:{tap}",
+            lambda totais, vazio, tap=tap: load_loss_without_no_load(totais, vazio, tap),
+            (f"perdas_totais:{tap}", "perdas_vazio_kw"),
+        )
+        g.add_node(
+            f"perdas_frio:{tap}",
+            lambda carga, factor, tap=tap: cold_load_loss(carga, factor, tap),
+            (f"perdas_carga:{tap}", "temp_factor"),
+        )
+        g.add_node(
+            f"condicoes:{tap}",
+            lambda *args, tap=tap: tap_scenarios(tap, *args),
+            (
+                f"tensao:{tap}",
+                f"corrente:{tap}",
+                f"impedancia:{tap}",
+                f"vcc:{tap}",
+                f"perdas_totais:{tap}",
+                f"perdas_carga:{tap}",
+                f"perdas_frio:{tap}",
+                "overload_applicable",
+                "sqrt_3_factor",
+            ),
+        )
+        g.add_node(
+            f"banco:{tap}",
+            lambda res, scenarios, tipo, tap=tap: self._bank_configs(tap, res, scenarios, tipo),
+            (f"condicoes:{tap}", "scenarios", "tipo_transformador"),
+        )
+
+    def _bank_configs(self, tap: str, res: dict, scenarios: tuple, tipo: str) -> dict:
+        """
+        Valor do nó "banco:{tap}": {cenário: configuração CS/Q} dos cenários ativos.
+
+        Um cenário só volta a `scenario_cap_bank_config` se os seus requisitos (tensões e
+        potências do banco C/F e S/F) mudaram; os demais reaproveitam a configuração
+        anterior.
+        """
+        configs = {}
+        for scenario in scenarios:
+            keys = BANK_REQUIREMENT_KEYS[scenario]
+            signature = (tipo,) + tuple(map(res.get, keys))
+            cached = self._bank_cells.get((tap, scenario))
+            if cached is None or cached[0] != signature:
+                req = {"Tap": tap, **dict(zip(keys, signature[1:]))}
+                cached = (signature, scenario_cap_bank_config(req, scenario, tipo))
+                self._bank_cells[(tap, scenario)] = cached
+            configs[scenario] = cached[1]
+        return configs
+
+    def _sut_analysis(self, scenarios: tuple, tipo: str, *tap_values) -> dict:
+        """
+        Valor do nó "sut": {(cenário, tap): análise} dos cenários ativos.
+
+        Cada linha (cenário × tap) é comparada pelas grandezas lidas pelo kernel; só as
+        linhas que mudaram voltam a `load_sut_analysis`, todas em uma única chamada
+        vetorizada. `tap_values` são os resultados de cada tap seguidos, se o motor busca
+        as configurações do banco, dos nós "banco:{tap}".
+        """
+        conditions = dict(zip(TAP_LABELS, tap_values))
+        banks = dict(zip(TAP_LABELS, tap_values[len(TAP_LABELS) :]))
+        cells, changed = {}, []
+        for scenario in scenarios:
+            keys = SUT_ROW_KEYS[scenario]
+            for tap in TAP_LABELS:
+                signature = (tipo,) + tuple(map(conditions[tap].get, keys))
+                bank = banks[tap][scenario] if tap in banks else {}
+                signature += tuple(bank.values())
+                cached = self._sut_cells.get((scenario, tap))
+                if cached is None or cached[0] != signature:
+                    row = {"Tap": tap, **dict(zip(keys, signature[1:])), **bank}
+                    changed.append((scenario, row))
+                    cached = (signature, None)
+                cells[(scenario, tap)] = cached
+        if changed:
+            computed = self.engine.load_sut_analysis(changed, tipo)
+            for scenario, row in changed:
+                key = (scenario, row["Tap"])
+                cells[key] = (cells[key][0], computed.get(key))
+        self._sut_cells = cells
+        return {key: entry for key, (_, entry) in cells.items() if entry is not None}
+
+    def _set_inputs(self, rating: TransformerRating, inputs: LoadLossInputs) -> None:
+        g = self.graph
+        g.set_input("tipo_transformador", rating.tipo_transformador)
+        g.set_input("potencia_mva", rating.potencia_mva)
+        g.set_input("perdas_vazio_kw", inputs.perdas_vazio_kw)
+        g.set_input("temperatura_referencia_c", inputs.temperatura_referencia_c)
+        for tap, (tensao, corrente, impedancia) in TAP_FIELDS.items():
+            g.set_input(f"tensao:{tap}", getattr(rating, tensao))
+            g.set_input(f"corrente_nominal:{tap}", getattr(rating, corrente))
+            g.set_input(f"impedancia:{tap}", getattr(rating, impedancia))
+            g.set_input(f"perdas_totais:{tap}", getattr(inputs, TAP_LOSS_FIELDS[tap]))
+
+    def load_losses(self, rating: TransformerRating, inputs: LoadLossInputs) -> LoadLossResult:
+        """Equivalente a `LossesEngine.load_losses`, recalculando só o que mudou."""
+        with self._lock:
+            self.engine._validate_load_inputs(rating, inputs)
+            g = self.graph
+            self._set_inputs(rating, inputs)
+            g.start_trace()
+            try:
+                result = self._evaluate(inputs)
+            finally:
+                self.last_recomputed = g.trace
+                log.debug(
+                    f"Perdas em carga: {len(self.last_recomputed)} de {len(g.node_names)} nós "
+                    f"recalculados: {', '.join(self.last_recomputed) or '-'}"
+                )
+            return result
+
+    def _evaluate(self, inputs: LoadLossInputs) -> LoadLossResult:
+        g = self.graph
+        if any(g.get(f"corrente:{tap}") <= EPSILON for tap in TAP_LABELS):
+            raise LossesInputError(
+                "Falha ao calcular correntes nominais AT (resultado zero ou negativo). "
+                "Verifique tensões e potência."
+            )
+        # Mesma ordem de validação do motor: tap a tap
+        resultados = [dict(g.get(f"condicoes:{tap}")) for tap in TAP_LABELS]
+        max_test_voltage_kv, max_test_power_mvar_required = g.get("maximos")
+
+        cs_config, q_config, q_power_provided = "N/A", "N/A", 0.0
+        if self.engine.cap_bank_configs:
+            for tap, res in zip(TAP_LABELS, resultados):
+                for config in g.get(f"banco:{tap}").values():
+                    res.update(config)
+            cs_config, q_config, q_power_provided = g.get("sugestao")
+
+        result = LoadLossResult(
+            inputs=inputs,
+            resultados=resultados,
+            overload_applicable=g.get("overload_applicable"),
+            suggested_cs_config=cs_config,
+            suggested_q_config=q_config,
+            suggested_q_power_mvar=q_power_provided,
+            max_test_voltage_kv_overall=max_test_voltage_kv,
+            max_test_power_mvar_overall_required=max_test_power_mvar_required,
+        )
+        if self.engine.sut_analysis:
+            result.sut_analysis = dict(g.get("sut"))
+        return result
+
+
+# --- END OF FILE app_core/losses_graph.py ---
@@ -0,0 +1,289 @@
+# app_core/losses_sweep.py
+"""
+Varreduras "what-if" de viabilidade do ensaio de perdas em carga.
+
+Avalia, em arrays NumPy, a mesma matemática dos cenários de `LossesEngine.load_losses`
+(25°C, frio, quente e sobrecargas 1.2/1.4 pu) para uma grade de combinações de
+impedância, tensão de tap, garantia de perdas etc., e indica onde o ensaio excede os
+limites do EPS: corrente no lado BT do SUT, potência ativa e potência reativa
+requerida do banco de capacitores. Os mapas resultantes têm o shape da grade e podem
+ser plotados diretamente como heatmaps.
+
+Uso:
+    resultado = sweep_load_losses(
+        {"impedancia_percent": np.linspace(6, 18, 300),
+         "perdas_totais_kw": np.linspace(100, 900, 300)},
+        potencia_mva=100, tensao_at_kv=230, perdas_vazio_kw=40,
+    )
+    mapa = resultado.feasible  # (300, 300), True onde todos os cenários são viáveis
+"""
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+from app_core import cap_bank, sut_eps
+from app_core.losses_engine import (
+    BASE_SCENARIOS,
+    DEFAULT_REFERENCE_TEMPERATURE_C,
+    EPSILON,
+    OVERLOAD_LEVELS_PU,
+    OVERLOAD_MIN_AT_VOLTAGE_KV,
+    OVERLOAD_SCENARIOS,
+)
+from utils.constants import (
+    EPS_ACTIVE_POWER_LIMIT_KW,
+    EPS_CURRENT_LIMIT,
+    EPS_REACTIVE_POWER_LIMIT_MVAR_HIGH,
+    SUT_BT_VOLTAGE,
+)
+
+log = logging.getLogger(__name__)
+
+# Parâmetros aceitos como eixo da varredura ou valor fixo (escalar)
+SWEEP_PARAMETERS = (
+    "potencia_mva",
+    "tensao_at_kv",
+    "impedancia_percent",
+    "perdas_totais_kw",
+    "perdas_vazio_kw",
+    "temperatura_referencia_c",
+    "corrente_at_a",
+    "tensao_at_nominal_kv",
+)
+OPTIONAL_PARAMETERS = {
+    "temperatura_referencia_c": DEFAULT_REFERENCE_TEMPERATURE_C,
+    "corrente_at_a": None,  # Calculada a partir da potência e da tensão do tap
+    "tensao_at_nominal_kv": None,  # Define a aplicabilidade das sobrecargas; padrão: tap
+}
+SCENARIOS = BASE_SCENARIOS + OVERLOAD_SCENARIOS
+LIMIT_NAMES = ("corrente_eps", "potencia_ativa", "potencia_reativa")
+
+
+@dataclass
+class SweepResult:
+    """
+    Resultado de uma varredura.
+
+    `axes` guarda os eixos na ordem das dimensões da grade; `scenarios[cenário]` tem
+    arrays com o shape da grade: tensão/corrente/potências de ensaio, tensões e
+    potências requeridas/fornecidas do banco (C/F e S/F), tap do SUT e correntes no
+    EPS, máscaras `exceeds_<limite>` e `feasible`. `valid` marca os pontos com perdas
+    em carga e correntes positivas (os demais nunca são viáveis).
+    """
+
+    axes: dict
+    scenarios: dict
+    valid: np.ndarray
+
+    @property
+    def shape(self) -> tuple:
+        return self.valid.shape
+
+    @property
+    def feasible(self) -> np.ndarray:
+        """Pontos em que todos os cenários aplicáveis respeitam os limites do EPS."""
+        return np.logical_and.reduce([res["feasible"] for res in self.scenarios.values()])
+
+    def exceeds(self, limit: str, scenario: str | None = None) -> np.ndarray:
+        """Máscara de excesso de `limit` (ver LIMIT_NAMES) em um ou em qualquer cenário."""
+        if limit not in LIMIT_NAMES:
+            raise ValueError(f"Limite desconhecido '{limit}'. Use um de {LIMIT_NAMES}.")
+        names = (scenario,) if scenario else tuple(self.scenarios)
+        return np.logical_or.reduce([self.scenarios[s][f"exceeds_{limit}"] for s in names])
+
+    def fraction_feasible(self) -> float:
+        return float(np.mean(self.feasible)) if self.valid.size else 0.0
+
+
+def _required_cap_bank(voltage_kv: np.ndarray, power_mva: np.ndarray) -> tuple:
+    """Versão vetorizada de `losses_engine.required_cap_bank` (NaN onde não se aplica)."""
+    applicable = (voltage_kv > EPSILON) & (power_mva > EPSILON)
+    results = []
+    for select in (cap_bank.CATALOG.select_cf, cap_bank.CATALOG.select_sf):
+        v_bank = np.where(applicable, select(voltage_kv), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            q_denominator = (voltage_kv / v_bank) ** 2
+            q_required = np.where(q_denominator > EPSILON, power_mva / q_denominator, np.inf)
+        results += [v_bank, np.where(applicable, q_required, np.nan)]
+    return tuple(results)
+
+
+def evaluate_load_loss_points(
+    tipo_transformador: str = "Trifásico",
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+    **params,
+) -> tuple[dict, np.ndarray]:
+    """
+    Cenários do ensaio em carga para pontos independentes (arrays com broadcast).
+
+    Args:
+        tipo_transformador: "Trifásico" ou "Monofásico"
+        tensao_sut_bt_v: Tensão BT do SUT (V)
+        limite_corrente_eps_a: Limite de corrente do EPS (A)
+        **params: Valores de SWEEP_PARAMETERS (escalares ou arrays); `potencia_mva`,
+            `tensao_at_kv`, `impedancia_percent`, `perdas_totais_kw` e `perdas_vazio_kw`
+            são obrigatórios
+
+    Returns:
+        (dicionário por cenário com arrays achatados, máscara `valid`).
+    """
+    unknown = set(params) - set(SWEEP_PARAMETERS)
+    missing = set(SWEEP_PARAMETERS) - set(params) - set(OPTIONAL_PARAMETERS)
+    if unknown or missing:
+        raise ValueError(
+            f"Parâmetros inválidos na varredura: desconhecidos {sorted(unknown)}, "
+            f"ausentes {sorted(missing)}."
+        )
+    params = {**OPTIONAL_PARAMETERS, **params}
+    sqrt_3_factor = np.sqrt(3) if tipo_transformador == "Trifásico" else 1.0
+    if params["tensao_at_nominal_kv"] is None:
+        params["tensao_at_nominal_kv"] = params["tensao_at_kv"]
+    if params["corrente_at_a"] is None:
+        params["corrente_at_a"] = np.nan
+    arrays = dict(
+        zip(params, (a.ravel() for a in np.broadcast_arrays(*map(np.asarray, params.values()))))
+    )
+    arrays = {name: array.astype(float) for name, array in arrays.items()}
+    tensao = arrays["tensao_at_kv"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corrente_calc = np.where(
+            tensao > EPSILON, arrays["potencia_mva"] * 1000 / (tensao * sqrt_3_factor), 0.0
+        )
+        corrente_at = arrays["corrente_at_a"]
+        corrente_calc = np.where(corrente_at > EPSILON, corrente_at, corrente_calc)
+        temperatura = arrays["temperatura_referencia_c"]
+        temp_factor = np.where(
+            235.0 + temperatura > EPSILON, (235.0 + 25.0) / (235.0 + temperatura), 1.0
+        )
+        vcc = np.where(tensao > 0, tensao / 100.0 * arrays["impedancia_percent"], 0.0)
+        perdas_totais = arrays["perdas_totais_kw"]
+        perdas_carga_sem_vazio = perdas_totais - arrays["perdas_vazio_kw"]
+        perdas_cc_a_frio = perdas_carga_sem_vazio * temp_factor
+        valid = (
+            (perdas_carga_sem_vazio > EPSILON)
+            & (perdas_cc_a_frio > EPSILON)
+            & (corrente_calc > EPSILON)
+        )
+        # Cenário -> (fator de escala de Vcc e I, potência ativa do EPS em kW)
+        conditions = {
+            "Frio": (np.sqrt(perdas_totais / perdas_cc_a_frio), perdas_totais),
+            "Quente": (
+                np.sqrt(perdas_carga_sem_vazio / perdas_cc_a_frio),
+                perdas_carga_sem_vazio,
+            ),
+            "25°C": (np.ones_like(vcc), perdas_cc_a_frio),
+        }
+    for pu, scenario in zip(OVERLOAD_LEVELS_PU, OVERLOAD_SCENARIOS):
+        conditions[scenario] = (np.full_like(vcc, pu), perdas_carga_sem_vazio * pu**2)
+    overload_applicable = arrays["tensao_at_nominal_kv"] >= OVERLOAD_MIN_AT_VOLTAGE_KV
+
+    scenarios = {}
+    for scenario in SCENARIOS:
+        ratio, potencia_ativa_kw = conditions[scenario]
+        applicable = valid & (overload_applicable if scenario in OVERLOAD_SCENARIOS else True)
+        tensao_teste = np.where(applicable, ratio * vcc, np.nan)
+        corrente_teste = np.where(applicable, ratio * corrente_calc, np.nan)
+        potencia_ativa_kw = np.where(applicable, potencia_ativa_kw, np.nan)
+        pteste_kva = tensao_teste * corrente_teste * sqrt_3_factor
+        pteste_mvar = np.where(
+            pteste_kva >= potencia_ativa_kw,
+            np.sqrt(np.maximum(0, pteste_kva**2 - potencia_ativa_kw**2)) / 1000.0,
+            np.where(applicable, 0.0, np.nan),
+        )
+        v_cf, q_cf, v_sf, q_sf = _required_cap_bank(tensao_teste, pteste_kva / 1000.0)
+        q_provided_cf = cap_bank.provided_bank_power(v_cf, q_cf, tipo_transformador)
+        q_provided_sf = cap_bank.provided_bank_power(v_sf, q_sf, tipo_transformador)
+        eps = sut_eps.sut_eps_analysis(
+            tensao_teste,
+            corrente_teste,
+            q_sf_mvar=q_provided_sf,
+            v_bank_sf_kv=v_sf,
+            q_cf_mvar=q_provided_cf,
+            v_bank_cf_kv=v_cf,
+            transformer_type=tipo_transformador,
+            n_top=1,
+            tensao_sut_bt_v=tensao_sut_bt_v,
+            limite_corrente_eps_a=limite_corrente_eps_a,
+        )
+        tap_valid = eps["valid"][:, 0]
+        corrente_eps_cf = np.where(tap_valid, eps["corrente_eps_cf_a"][:, 0], np.nan)
+        corrente_eps_sf = np.where(tap_valid, eps["corrente_eps_sf_a"][:, 0], np.nan)
+
+        # Corrente no EPS: melhor das duas compensações no tap do SUT mais próximo.
+        # Potência reativa: como no status das tabelas, excede se C/F ou S/F excederem.
+        exceeds = {
+            "corrente_eps": np.fmin(corrente_eps_cf, corrente_eps_sf) > limite_corrente_eps_a,
+            "potencia_ativa": potencia_ativa_kw > EPS_ACTIVE_POWER_LIMIT_KW,
+            "potencia_reativa": np.fmax(q_cf, q_sf) > EPS_REACTIVE_POWER_LIMIT_MVAR_HIGH,
+        }
+        exceeds_any = np.logical_or.reduce(list(exceeds.values()))
+        scenarios[scenario] = {
+            "applicable": applicable,
+            "tensao_kv": tensao_teste,
+            "corrente_a": corrente_teste,
+            "pteste_mva": pteste_kva / 1000.0,
+            "potencia_ativa_kw": potencia_ativa_kw,
+            "pteste_mvar": pteste_mvar,
+            "cap_bank_voltage_cf_kv": v_cf,
+            "cap_bank_power_cf_mvar": q_cf,
+            "cap_bank_voltage_sf_kv": v_sf,
+            "cap_bank_power_sf_mvar": q_sf,
+            "q_provided_cf_mvar": q_provided_cf,
+            "q_provided_sf_mvar": q_provided_sf,
+            "tap_sut_kv": np.where(tap_valid, eps["tap_v"][:, 0] / 1000.0, np.nan),
+            "corrente_eps_cf_a": corrente_eps_cf,
+            "corrente_eps_sf_a": corrente_eps_sf,
+            **{f"exceeds_{name}": mask for name, mask in exceeds.items()},
+            # Sobrecarga não aplicável não torna o ponto inviável
+            "feasible": valid & ~(applicable & exceeds_any),
+        }
+    return scenarios, valid
+
+
+def sweep_load_losses(
+    axes: dict,
+    tipo_transformador: str = "Trifásico",
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+    **fixed,
+) -> SweepResult:
+    """
+    Varredura em grade (produto cartesiano dos eixos) da viabilidade do ensaio em carga.
+
+    Args:
+        axes: {parâmetro: valores 1D}; a ordem define as dimensões da grade
+        tipo_transformador, tensao_sut_bt_v, limite_corrente_eps_a: Ver
+            `evaluate_load_loss_points`
+        **fixed: Demais parâmetros de SWEEP_PARAMETERS como escalares
+
+    Returns:
+        SweepResult com os mapas no shape (len(eixo_1), len(eixo_2), ...).
+    """
+    overlap = set(axes) & set(fixed)
+    if overlap:
+        raise ValueError(f"Parâmetros definidos como eixo e como valor fixo: {sorted(overlap)}.")
+    axes = {name: np.asarray(values, dtype=float).ravel() for name, values in axes.items()}
+    grids = np.meshgrid(*axes.values(), indexing="ij", sparse=True)
+    shape = tuple(values.size for values in axes.values())
+    scenarios, valid = evaluate_load_loss_points(
+        tipo_transformador,
+        tensao_sut_bt_v,
+        limite_corrente_eps_a,
+        **dict(zip(axes, grids)),
+        **fixed,
+    )
+    log.debug(f"Varredura de perdas em carga: {valid.size} pontos, eixos {list(axes)}")
+    return SweepResult(
+        axes=axes,
+        scenarios={
+            scenario: {key: array.reshape(shape) for key, array in res.items()}
+            for scenario, res in scenarios.items()
+        },
+        valid=valid.reshape(shape),
+    )
+
+
+# --- END OF FILE app_core/losses_sweep.py ---
@@ -0,0 +1,297 @@
+# app_core/mcp_sessions.py
+"""
+Registro de MCPs por sessão de usuário.
+
+Cada navegador recebe um cookie com o ID da sessão e passa a ter seu próprio
+TransformerMCP, de modo que dois engenheiros usando o servidor ao mesmo tempo não
+sobrescrevem os dados um do outro. `app.mcp` vira um proxy que encaminha cada acesso
+para o MCP da sessão da requisição atual; fora de requisições (inicialização, scripts,
+benchmarks, salvamento na saída) o proxy usa o MCP padrão, carregado do disco.
+
+Concorrência:
+- o lock do registro protege apenas o dicionário de sessões (busca, criação e despejo);
+- cada MCP tem o próprio lock de escrita (`mcp.lock`), e as leituras são snapshots
+  imutáveis (utils/store_snapshot.py), logo não precisam de lock.
+
+Sessões novas começam com os snapshots do MCP padrão (compartilhados, sem cópia). As
+sessões ociosas são despejadas em ordem LRU ao exceder `max_sessions` ou o tempo limite.
+
+Com um backend compartilhado (utils/mcp_session_store.py), os stores alterados são
+gravados ao fim de cada requisição e recarregados quando outro worker grava a sessão, o
+que permite servir a aplicação com vários workers do gunicorn.
+
+Em disco, cada sessão tem o próprio arquivo de estado, identificado pelo cookie
+(`mcp.mcp_session_id`, ver utils/mcp_disk_persistence.py), recarregado quando a sessão
+é recriada. Na saída, `save_to_disk` grava as sessões alteradas e, como estado
+principal (base das sessões novas), a alterada usada por último; o MCP padrão nunca é
+gravado, pois fora de requisições ainda tem o estado da inicialização.
+"""
+import logging
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from flask import g, has_request_context, request
+
+from app_core.transformer_mcp import TransformerMCP
+from utils.mcp_disk_persistence import (
+    flush_pending_saves,
+    load_mcp_state_from_disk,
+    save_mcp_state_to_disk,
+)
+
+log = logging.getLogger(__name__)
+
+SESSION_COOKIE = "tt_mcp_session"
+DEFAULT_SESSION_ID = "default"
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+_STALE_VERSION = -1  # Força a recarga do backend no próximo acesso
+
+
+class _SessionEntry:
+    """MCP de uma sessão e o estado de sincronização com o backend."""
+
+    __slots__ = ("mcp", "last_access", "version", "synced", "initial")
+
+    def __init__(self, mcp, version: int = 0):
+        self.mcp = mcp
+        self.last_access = time.monotonic()
+        self.version = version
+        # Snapshots já gravados no backend; comparados por identidade (são imutáveis)
+        self.synced: Dict[str, Any] = mcp.get_all_data()
+        # Snapshots na criação da sessão, para detectar alterações
+        self.initial: Dict[str, Any] = dict(self.synced)
+
+    @property
+    def modified(self) -> bool:
+        """Algum store da sessão mudou desde a criação."""
+        return any(
+            self.initial.get(store_id) is not snapshot
+            for store_id, snapshot in self.mcp.get_all_data().items()
+        )
+
+
+class MCPSessionRegistry:
+    """Mantém um MCP por sessão, com despejo LRU e backend compartilhado opcional."""
+
+    def __init__(
+        self,
+        default_mcp,
+        factory: Callable[[], Any] = TransformerMCP,
+        max_sessions: int = 32,
+        idle_timeout_s: float = 4 * 3600,
+        backend=None,
+    ):
+        self.default = default_mcp
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_timeout_s = idle_timeout_s
+        self.backend = backend
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: Optional[str]):
+        """Retorna o MCP da sessão, criando-o (ou recarregando-o do backend) se preciso."""
+        if not session_id or session_id == DEFAULT_SESSION_ID:
+            return self.default
+
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions.move_to_end(session_id)
+                entry.last_access = time.monotonic()
+
+        if entry is None:
+            # Criação fora do lock do registro (pode ler o backend)
+            new_entry = self._create(session_id)
+            with self._lock:
+                entry = self._sessions.setdefault(session_id, new_entry)
+                self._evict_locked(keep=session_id)
+        elif self.backend is not None:
+            self._refresh(session_id, entry)
+        return entry.mcp
+
+    def _create(self, session_id: str) -> _SessionEntry:
+        mcp = self.factory()
+        mcp.mcp_session_id = session_id
+        mcp.set_all_data(self.default.get_all_data())
+        # Estado gravado em disco por esta sessão (ex.: antes de reiniciar o servidor)
+        stores, restored = load_mcp_state_from_disk(session_id)
+        if restored:
+            mcp.set_all_data(stores)
+        version = 0
+        if self.backend is not None:
+            stores, version = self.backend.load_session(session_id)
+            mcp.set_all_data(stores)
+        log.info(f"[MCP SESSIONS] Sessão criada: {session_id[:8]}... (versão {version})")
+        return _SessionEntry(mcp, version)
+
+    def _refresh(self, session_id: str, entry: _SessionEntry) -> None:
+        """Recarrega a sessão se outro worker a gravou no backend."""
+        if self.backend.session_version(session_id) == entry.version:
+            return
+        stores, version = self.backend.load_session(session_id)
+        with entry.mcp.lock:
+            entry.mcp.set_all_data(stores)
+            entry.synced.update(
+                (store_id, entry.mcp.get_data(store_id)) for store_id in stores
+            )
+            entry.version = version
+        log.debug(f"[MCP SESSIONS] Sessão {session_id[:8]}... recarregada (versão {version})")
+
+    def _evict_locked(self, keep: str) -> None:
+        now = time.monotonic()
+        while len(self._sessions) > self.max_sessions or (
+            self._sessions
+            and now - next(iter(self._sessions.values())).last_access > self.idle_timeout_s
+        ):
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                break
+            _, entry = self._sessions.popitem(last=False)
+            if entry.modified:
+                entry.mcp.save_to_disk(force=True)  # Recarregada do disco se voltar
+            log.info(f"[MCP SESSIONS] Sessão despejada (LRU/ociosa): {session_id[:8]}...")
+
+    def flush(self, session_id: Optional[str]) -> int:
+        """
+        Grava no backend os stores da sessão alterados desde a última gravação.
+
+        Returns:
+            int: Número de stores gravados
+        """
+        entry = self._sessions.get(session_id) if session_id else None
+        if self.backend is None or entry is None:
+            return 0
+        with entry.mcp.lock:
+            changed = {
+                store_id: snapshot
+                for store_id, snapshot in entry.mcp.get_all_data().items()
+                if entry.synced.get(store_id) is not snapshot
+            }
+            if not changed:
+                return 0
+            version, conflict = self.backend.save_stores(session_id, changed, entry.version)
+            entry.synced.update(changed)
+            entry.version = _STALE_VERSION if conflict else version
+        return len(changed)
+
+    def save_to_disk(self, timeout: Optional[float] = 30.0) -> int:
+        """
+        Grava em disco as sessões alteradas (cada uma no próprio arquivo) e, como estado
+        principal, a alterada usada por último; aguarda a conclusão das gravações.
+
+        Sem sessões alteradas, o estado principal em disco é mantido.
+
+        Returns:
+            int: Número de sessões gravadas
+        """
+        with self._lock:
+            entries = list(self._sessions.values())  # Ordem LRU: a última é a mais recente
+        modified = [entry for entry in entries if entry.modified]
+        if not modified:
+            log.info("[MCP SESSIONS] Nenhuma sessão alterada; estado em disco mantido.")
+            return 0
+        for entry in modified:
+            entry.mcp.save_to_disk(force=True)
+        latest = max(modified, key=lambda entry: entry.last_access)
+        save_mcp_state_to_disk(latest.mcp.get_all_data(), create_backup=True)
+        if not flush_pending_saves(timeout):
+            log.error("[MCP SESSIONS] Falha ao gravar o estado das sessões em disco.")
+        log.info(
+            f"[MCP SESSIONS] {len(modified)} sessão(ões) gravada(s); estado principal: "
+            f"{latest.mcp.mcp_session_id[:8]}..."
+        )
+        return len(modified)
+
+    # --- Integração com o Flask ---
+
+    def current(self):
+        """MCP da sessão da requisição atual (ou o MCP padrão fora de requisições)."""
+        if not has_request_context():
+            return self.default
+        mcp = g.get("mcp_session")
+        if mcp is None:
+            mcp = g.mcp_session = self.get(g.get("mcp_session_id"))
+        return mcp
+
+    def _before_request(self) -> None:
+        session_id = request.cookies.get(SESSION_COOKIE)
+        g.mcp_session_new = not (session_id and _SESSION_ID_RE.match(session_id))
+        g.mcp_session_id = secrets.token_urlsafe(16) if g.mcp_session_new else session_id
+
+    def _after_request(self, response):
+        session_id = g.get("mcp_session_id")
+        if g.get("mcp_session") is not None:
+            try:
+                self.flush(session_id)
+            except Exception as e:
+                log.error(f"[MCP SESSIONS] Erro ao gravar sessão no backend: {e}", exc_info=True)
+        # Só define o cookie em páginas ou quando a sessão foi usada (não em assets)
+        if g.get("mcp_session_new") and (
+            g.get("mcp_session") is not None or response.mimetype == "text/html"
+        ):
+            response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="Lax")
+        return response
+
+    def init_app(self, server) -> None:
+        """Registra os hooks de requisição no servidor Flask."""
+        server.before_request(self._before_request)
+        server.after_request(self._after_request)
+
+
+class SessionMCPProxy:
+    """Encaminha `app.mcp` para o MCP da sessão da requisição atual."""
+
+    def __init__(self, registry: MCPSessionRegistry):
+        object.__setattr__(self, "registry", registry)
+
+    def __getattr__(self, name: str):
+        return getattr(self.registry.current(), name)
+
+    def __setattr__(self, name: str, value) -> None:
+        setattr(self.registry.current(), name, value)
+
+    def __repr__(self) -> str:
+        return f"<SessionMCPProxy sessões={len(self.registry)}>"
+
+
+def install_session_registry(
+    app,
+    max_sessions: int = 32,
+    idle_timeout_s: float = 4 * 3600,
+    backend=None,
+) -> MCPSessionRegistry:
+    """
+    Troca `app.mcp` (MCP global) por um proxy de MCPs por sessão.
+
+    Args:
+        app: Aplicação Dash com `app.mcp` já inicializado (vira o MCP padrão)
+        max_sessions: Número máximo de sessões em memória neste processo
+        idle_timeout_s: Tempo sem acesso após o qual a sessão é despejada
+        backend: Backend compartilhado opcional (ex.: SQLiteSessionStore)
+
+    Returns:
+        MCPSessionRegistry: O registro instalado (também em `app.mcp.registry`)
+    """
+    registry = MCPSessionRegistry(
+        app.mcp,
+        max_sessions=max_sessions,
+        idle_timeout_s=idle_timeout_s,
+        backend=backend,
+    )
+    registry.init_app(app.server)
+    app.mcp = SessionMCPProxy(registry)
+    log.info(
+        f"[MCP SESSIONS] MCP por sessão ativo (máx. {max_sessions} sessões, "
+        f"backend={'compartilhado' if backend is not None else 'em memória'})"
+    )
+    return registry
+
+# --- END OF FILE app_core/mcp_sessions.py ---
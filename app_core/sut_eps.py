@@ -0,0 +1,200 @@
+# app_core/sut_eps.py
+"""
+Kernel vetorizado de seleção de taps do SUT e corrente no EPS.
+
+Recebe as tensões e correntes de ensaio de todos os níveis/cenários como arrays e, em uma
+única passada NumPy, escolhe os N taps AT do SUT mais próximos de cada tensão alvo e
+calcula a corrente refletida no lado BT (EPS), com ou sem compensação do banco de
+capacitores (S/F e C/F), e o percentual do limite de corrente do EPS.
+"""
+import logging
+
+import numpy as np
+
+from utils.constants import (
+    EPS_CURRENT_LIMIT,
+    SUT_AT_MAX_VOLTAGE,
+    SUT_AT_MIN_VOLTAGE,
+    SUT_AT_STEP_VOLTAGE,
+    SUT_BT_VOLTAGE,
+)
+
+log = logging.getLogger(__name__)
+
+EPSILON = 1e-6
+DEFAULT_TOP_N = 5
+
+# Fatores de correção da potência do banco S/F por tensão nominal do banco (kV)
+SF_CAP_CORRECTION_FACTORS = {13.8: 0.25, 23.9: 0.25, 41.4: 0.75, 71.7: 0.75}
+
+# Taps AT do SUT (V), calculados uma única vez
+SUT_TAPS_V = np.arange(
+    SUT_AT_MIN_VOLTAGE, SUT_AT_MAX_VOLTAGE + SUT_AT_STEP_VOLTAGE, SUT_AT_STEP_VOLTAGE
+)
+SUT_TAPS_V = SUT_TAPS_V[SUT_TAPS_V > EPSILON]
+COMPENSATED_KEYS = (
+    "corrente_eps_sf_a",
+    "percent_limite_sf",
+    "corrente_eps_cf_a",
+    "percent_limite_cf",
+)
+
+
+def _as_column(values, n_rows: int) -> np.ndarray:
+    """Converte escalar/lista (None -> NaN) em array float de `n_rows` linhas."""
+    array = np.array(values, dtype=float).reshape(-1)  # dtype float converte None em NaN
+    return np.full(n_rows, array[0]) if array.size == 1 else array
+
+
+def select_sut_taps(
+    v_target_v,
+    n_top: int = DEFAULT_TOP_N,
+    adequate_only: bool = False,
+    taps_v: np.ndarray = SUT_TAPS_V,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Seleciona, para cada tensão alvo, os `n_top` taps mais próximos (empate: tap menor).
+
+    Args:
+        v_target_v: Tensões alvo no lado AT do SUT (V), shape (M,)
+        n_top: Número de taps por alvo
+        adequate_only: Considera apenas taps >= alvo (ensaio em vazio)
+        taps_v: Taps disponíveis (V), crescentes
+
+    Returns:
+        (taps (M, n_top) em ordem crescente de tensão, máscara de validade (M, n_top)).
+    """
+    targets = np.atleast_1d(np.asarray(v_target_v, dtype=float))
+    n_top = min(int(n_top), taps_v.size)
+    if n_top == 1:
+        return _nearest_sut_tap(targets, adequate_only, taps_v)
+    distance = np.abs(taps_v[None, :] - targets[:, None])
+    if adequate_only:
+        distance = np.where(taps_v[None, :] >= targets[:, None] - EPSILON, distance, np.inf)
+    distance = np.where(np.isfinite(targets)[:, None], distance, np.inf)
+    nearest = np.argsort(distance, axis=1, kind="stable")[:, :n_top]
+    valid = np.isfinite(np.take_along_axis(distance, nearest, axis=1))
+    # Ordem final crescente de tensão; inválidos vão para o fim
+    order_key = np.where(valid, nearest, taps_v.size + nearest)
+    order = np.argsort(order_key, axis=1)
+    nearest, valid = np.take_along_axis(nearest, order, 1), np.take_along_axis(valid, order, 1)
+    return taps_v[nearest], valid
+
+
+def _nearest_sut_tap(
+    targets: np.ndarray, adequate_only: bool, taps_v: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Caso n_top=1 por busca binária, sem a matriz de distâncias (M, n_taps)."""
+    if adequate_only:
+        pos = np.searchsorted(taps_v, targets - EPSILON)
+    else:
+        upper = np.clip(np.searchsorted(taps_v, targets), 1, taps_v.size - 1)
+        # Empate de distância fica com o tap menor, como na ordenação estável
+        closer_lower = targets - taps_v[upper - 1] <= taps_v[upper] - targets
+        pos = np.where(closer_lower, upper - 1, upper) if taps_v.size > 1 else upper * 0
+    valid = np.isfinite(targets) & (pos < taps_v.size)
+    tap_v = taps_v[np.where(valid, pos, 0)]
+    return tap_v[:, None], valid[:, None]
+
+
+def _compensation_current(q_mvar, v_bank_kv, v_test_kv, sqrt_3_factor, factor) -> np.ndarray:
+    """Corrente capacitiva (A, referida à tensão de ensaio) fornecida pelo banco."""
+    valid = (q_mvar > EPSILON) & (v_bank_kv > EPSILON) & (v_test_kv > EPSILON)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q_denominator = (v_test_kv / v_bank_kv) ** 2 * factor
+        q_corrected = np.where(q_denominator > EPSILON, q_mvar * q_denominator, 0.0)
+        i_cap = q_corrected * 1000.0 / (v_test_kv * sqrt_3_factor)
+    return np.where(valid, i_cap, 0.0)
+
+
+def _percent_of_limit(current_a: np.ndarray, limit_a: float) -> np.ndarray:
+    if limit_a > EPSILON:
+        return current_a / limit_a * 100
+    return np.where(current_a < 0, -np.inf, np.inf)
+
+
+def sut_eps_analysis(
+    v_test_kv,
+    i_test_a,
+    q_sf_mvar=None,
+    v_bank_sf_kv=None,
+    q_cf_mvar=None,
+    v_bank_cf_kv=None,
+    transformer_type: str = "Trifásico",
+    n_top: int = DEFAULT_TOP_N,
+    adequate_only: bool = False,
+    tensao_sut_bt_v: float = SUT_BT_VOLTAGE,
+    limite_corrente_eps_a: float = EPS_CURRENT_LIMIT,
+    taps_v: np.ndarray = SUT_TAPS_V,
+) -> dict[str, np.ndarray]:
+    """
+    Avalia todos os níveis/cenários de ensaio de uma vez.
+
+    Para cada linha i: seleciona os taps do SUT, reflete a corrente de ensaio para o
+    lado BT (I·V_tap/V_bt) e desconta a corrente capacitiva dos bancos S/F e C/F
+    (potência fornecida corrigida para a tensão de ensaio; S/F com fator de correção
+    por tensão do banco). Sem banco (potência None/0), a corrente não é compensada.
+
+    Args:
+        v_test_kv, i_test_a: Tensão (kV) e corrente (A) de ensaio do DUT, shape (M,)
+        q_sf_mvar, v_bank_sf_kv: Potência fornecida e tensão do banco S/F, (M,) ou None
+        q_cf_mvar, v_bank_cf_kv: Potência fornecida e tensão do banco C/F, (M,) ou None
+        transformer_type: "Trifásico" ou "Monofásico"
+        n_top: Número de taps por linha
+        adequate_only: Apenas taps >= tensão de ensaio
+
+    Returns:
+        Dicionário com arrays (M, n_top): "tap_v", "valid", "corrente_eps_sf_a",
+        "percent_limite_sf", "corrente_eps_cf_a", "percent_limite_cf".
+    """
+    v_test_kv = np.atleast_1d(np.asarray(v_test_kv, dtype=float))
+    n_rows = v_test_kv.size
+    i_test_a = _as_column(i_test_a, n_rows)
+    v_bank_sf = _as_column(v_bank_sf_kv, n_rows)
+    q_sf = np.nan_to_num(_as_column(q_sf_mvar, n_rows))
+    v_bank_cf = _as_column(v_bank_cf_kv, n_rows)
+    q_cf = np.nan_to_num(_as_column(q_cf_mvar, n_rows))
+
+    tap_v, valid = select_sut_taps(v_test_kv * 1000.0, n_top, adequate_only, taps_v)
+    ratio_sut = tap_v / tensao_sut_bt_v if tensao_sut_bt_v > EPSILON else np.zeros_like(tap_v)
+    i_reflected = i_test_a[:, None] * ratio_sut
+
+    sqrt_3_factor = np.sqrt(3) if transformer_type == "Trifásico" else 1.0
+    sf_factor = np.array([SF_CAP_CORRECTION_FACTORS.get(v, 1.0) for v in v_bank_sf.tolist()])
+    i_cap_sf = _compensation_current(q_sf, v_bank_sf, v_test_kv, sqrt_3_factor, sf_factor)
+    i_cap_cf = _compensation_current(q_cf, v_bank_cf, v_test_kv, sqrt_3_factor, 1.0)
+    # Sem tensão/corrente de ensaio válidas, a corrente não é compensada
+    compensate = (v_test_kv > EPSILON) & (i_test_a > EPSILON)
+    i_eps_sf = i_reflected - np.where(compensate, i_cap_sf, 0.0)[:, None] * ratio_sut
+    i_eps_cf = i_reflected - np.where(compensate, i_cap_cf, 0.0)[:, None] * ratio_sut
+
+    return {
+        "tap_v": tap_v,
+        "valid": valid,
+        "corrente_eps_sf_a": i_eps_sf,
+        "percent_limite_sf": _percent_of_limit(i_eps_sf, limite_corrente_eps_a),
+        "corrente_eps_cf_a": i_eps_cf,
+        "percent_limite_cf": _percent_of_limit(i_eps_cf, limite_corrente_eps_a),
+    }
+
+
+def taps_info_rows(analysis: dict[str, np.ndarray], row: int, compensated: bool = True) -> list:
+    """
+    Converte a linha `row` do resultado de `sut_eps_analysis` na lista `taps_info` usada
+    pelas tabelas SUT/EPS (taps em kV, ordem crescente).
+    """
+    if compensated:
+        names = keys = COMPENSATED_KEYS
+    else:
+        keys = ("corrente_eps_sf_a", "percent_limite_sf")
+        names = ("corrente_eps_a", "percent_limite")
+    # Conversão da linha inteira para listas; evita indexação NumPy por elemento
+    columns = [analysis[key][row].tolist() for key in ("valid", "tap_v") + keys]
+    return [
+        {"tap_sut_kv": tap_v / 1000.0, **dict(zip(names, values))}
+        for valid, tap_v, *values in zip(*columns)
+        if valid
+    ]
+
+
+# --- END OF FILE app_core/sut_eps.py ---
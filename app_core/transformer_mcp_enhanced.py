@@ -7,12 +7,15 @@ import logging
 import json
 import copy
 import math
+import threading
 from typing import Dict, Any, List, Optional, Tuple, Set, Callable
 
 from utils.store_diagnostics import convert_numpy_types, is_json_serializable, fix_store_data
 from utils.db_manager import save_test_session, get_test_session_details as db_get_session_details, session_name_exists, delete_test_session as db_delete_session
 from utils.mcp_disk_persistence import save_mcp_state_to_disk, load_mcp_state_from_disk
+from utils import store_snapshot
 from utils.mcp_persistence_enhanced import auto_update_on_change, sync_isolation_values, propagate_all_data
+from utils.mcp_subscriptions import get_changes
 
 log = logging.getLogger(__name__)
 
@@ -106,6 +109,10 @@ class TransformerMCPEnhanced:
         self._listeners = {}
         self._change_history = []
         self.last_save_error = None
+        self._lock = threading.RLock()  # Serializa as escritas; leituras usam snapshots
+        # Sessão de usuário dona deste MCP (app_core/mcp_sessions.py); None: MCP global.
+        # Define o arquivo de estado usado por save_to_disk/_load_from_disk.
+        self.mcp_session_id: Optional[str] = None
         self._initialize_stores()
 
         # Carregar dados do disco se solicitado
@@ -118,22 +125,31 @@ class TransformerMCPEnhanced:
         log.info("[MCP INITIALIZE] INICIALIZANDO STORES:")
 
         # Inicializar todos os stores com valores vazios
-        for store_id in STORE_IDS:
-            if store_id == 'transformer-inputs-store':
-                # Para transformer-inputs-store, usar os valores padrão
-                self._data[store_id] = DEFAULT_TRANSFORMER_INPUTS.copy()
-                log.info("===============================================================")
-                log.info("[MCP INITIALIZE] DADOS INICIAIS DO TRANSFORMER-INPUTS-STORE:")
-                log.info(f"DADOS COMPLETOS INICIAIS: {json.dumps(self._data[store_id], indent=2)}")
-                log.info("===============================================================")
-            else:
-                # Para outros stores, inicializar com dicionário vazio
-                self._data[store_id] = {}
+        with self._lock:
+            for store_id in STORE_IDS:
+                if store_id == 'transformer-inputs-store':
+                    # Para transformer-inputs-store, usar os valores padrão
+                    self._data[store_id] = store_snapshot.freeze(DEFAULT_TRANSFORMER_INPUTS)
+                    log.info("===============================================================")
+                    log.info("[MCP INITIALIZE] DADOS INICIAIS DO TRANSFORMER-INPUTS-STORE:")
+                    log.info(f"DADOS COMPLETOS INICIAIS: {json.dumps(self._data[store_id], indent=2)}")
+                    log.info("===============================================================")
+                else:
+                    # Para outros stores, inicializar com dicionário vazio
+                    self._data[store_id] = store_snapshot.freeze({})
 
         log.info("===============================================================")
         log.info(f"Enhanced MCP Initialized {len(STORE_IDS)} data stores")
         log.info("===============================================================")
 
+    @property
+    def lock(self) -> threading.RLock:
+        """
+        Lock das escritas do MCP. Use `with mcp.lock:` em sequências ler-alterar-gravar
+        que não podem ser intercaladas com outras requisições da mesma sessão.
+        """
+        return self._lock
+
     def get_data(self, store_id: str, force_reload: bool = False) -> Dict[str, Any]:
         """
         Obtém os dados de um store específico.
@@ -143,7 +159,8 @@ class TransformerMCPEnhanced:
             force_reload: Se True, tenta recarregar os dados do disco antes de retornar
 
         Returns:
-            Cópia dos dados do store ou dicionário vazio se o store não existir
+            Snapshot imutável do store (sem cópia; para editar, use
+            store_snapshot.mutable) ou dicionário vazio se o store não existir
         """
         # Se force_reload for True, tenta recarregar os dados do disco
         if force_reload:
@@ -154,8 +171,10 @@ class TransformerMCPEnhanced:
             log.warning(f"[MCP GET] Store ID '{store_id}' não encontrado. Retornando dicionário vazio.")
             return {}
 
-        # Retorna uma cópia profunda para evitar modificações acidentais
-        return copy.deepcopy(self._data.get(store_id, {}))
+        # Snapshot imutável: compartilhado sem cópia, pois não pode ser modificado
+        snapshot = self._data[store_id]
+        store_snapshot.record_read(snapshot)
+        return snapshot
 
     def set_data(self, store_id: str, data: Dict[str, Any], auto_propagate: bool = True, app_instance=None) -> None:
         """
@@ -171,30 +190,35 @@ class TransformerMCPEnhanced:
             log.warning(f"[MCP SET] Store ID '{store_id}' não é um store conhecido. Ignorando.")
             return
 
-        # Converter tipos numpy para tipos Python nativos
-        serializable_data = convert_numpy_types(data, debug_path=f"mcp_set.{store_id}")
+        with self._lock:
+            # Converter tipos numpy e congelar; nós inalterados são compartilhados com o anterior
+            serializable_data = store_snapshot.freeze(
+                data, self._data.get(store_id), debug_path=f"mcp_set.{store_id}"
+            )
 
-        # Registrar alteração no histórico
-        old_data = self.get_data(store_id)
-        self._register_change(store_id, old_data, serializable_data)
+            # Registrar alteração no histórico (o diff também guia a propagação)
+            old_data = self.get_data(store_id)
+            changes = self._register_change(store_id, old_data, serializable_data)
 
-        # Atualizar os dados
-        self._data[store_id] = serializable_data
+            # Atualizar os dados
+            self._data[store_id] = serializable_data
 
-        # Notificar listeners
-        self._notify_listeners(store_id, serializable_data)
+            # Notificar listeners
+            self._notify_listeners(store_id, serializable_data)
 
         # Propagar alterações automaticamente se solicitado
         if auto_propagate and app_instance is not None:
             try:
-                auto_update_on_change(app_instance, store_id, serializable_data)
+                auto_update_on_change(app_instance, store_id, serializable_data, changes)
                 log.info(f"[MCP SET] Alterações em '{store_id}' propagadas automaticamente.")
             except Exception as e:
                 log.error(f"[MCP SET] Erro ao propagar alterações de '{store_id}': {e}")
 
         log.debug(f"[MCP SET] Dados definidos para store '{store_id}'.")
 
-    def _register_change(self, store_id: str, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> None:
+    def _register_change(
+        self, store_id: str, old_data: Dict[str, Any], new_data: Dict[str, Any]
+    ) -> Dict[str, Tuple[Any, Any]]:
         """
         Registra uma alteração no histórico.
 
@@ -202,17 +226,22 @@ class TransformerMCPEnhanced:
             store_id: ID do store
             old_data: Dados antigos
             new_data: Dados novos
+
+        Returns:
+            Alterações registradas (ver _get_changes)
         """
         # Limitar o tamanho do histórico
         if len(self._change_history) > 100:
             self._change_history.pop(0)
 
         # Registrar alteração
+        changes = self._get_changes(old_data, new_data)
         self._change_history.append({
             'store_id': store_id,
             'timestamp': logging.Formatter.formatTime(logging.Formatter(), logging.LogRecord('', 0, '', 0, None, None, None)),
-            'changes': self._get_changes(old_data, new_data)
+            'changes': changes
         })
+        return changes
 
     def _get_changes(self, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
         """
@@ -225,21 +254,7 @@ class TransformerMCPEnhanced:
         Returns:
             Dicionário com as alterações (chave: (valor_antigo, valor_novo))
         """
-        changes = {}
-
-        # Identificar valores alterados ou adicionados
-        for key, new_value in new_data.items():
-            if key not in old_data:
-                changes[key] = (None, new_value)
-            elif old_data[key] != new_value:
-                changes[key] = (old_data[key], new_value)
-
-        # Identificar valores removidos
-        for key in old_data:
-            if key not in new_data:
-                changes[key] = (old_data[key], None)
-
-        return changes
+        return get_changes(old_data, new_data)
 
     def get_change_history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
@@ -259,15 +274,33 @@ class TransformerMCPEnhanced:
                 return copy.deepcopy(self._change_history)
             return copy.deepcopy(self._change_history[-limit:])
 
+    def set_all_data(self, stores_data: Dict[str, Any]) -> None:
+        """
+        Substitui de uma vez os stores informados (sem listeners nem propagação).
+
+        Usado pelo registro de sessões para semear uma sessão nova ou recarregá-la do
+        backend compartilhado; snapshots já congelados são reaproveitados sem cópia.
+
+        Args:
+            stores_data: Dicionário {store_id: dados}; stores desconhecidos são ignorados
+        """
+        with self._lock:
+            for store_id, data in stores_data.items():
+                if store_id in STORE_IDS:
+                    self._data[store_id] = store_snapshot.freeze(
+                        data, self._data.get(store_id), debug_path=f"mcp_set_all.{store_id}"
+                    )
+
     def get_all_data(self) -> Dict[str, Dict[str, Any]]:
         """
         Obtém todos os dados de todos os stores.
 
         Returns:
-            Cópia de todos os dados
+            Dicionário {store_id: snapshot imutável} (cópia rasa, sem copiar os stores)
         """
-        # Retorna uma cópia profunda para evitar modificações acidentais
-        return copy.deepcopy(self._data)
+        for snapshot in self._data.values():
+            store_snapshot.record_read(snapshot)
+        return dict(self._data)
 
     def clear_data(self, app_instance=None) -> Dict[str, Dict[str, Any]]:
         """
@@ -343,15 +376,17 @@ class TransformerMCPEnhanced:
             self._listeners[store_id].remove(listener)
             log.debug(f"[MCP REMOVE_LISTENER] Listener removido de store '{store_id}'.")
 
-    def save_to_disk(self, force: bool = False) -> bool:
+    def save_to_disk(self, force: bool = False, wait: bool = False) -> bool:
         """
-        Salva o estado atual do MCP em disco.
+        Salva o estado atual do MCP em disco (no arquivo da sessão, se for de uma).
 
         Args:
             force: Se True, força o salvamento mesmo que não haja alterações
+            wait: Se True, grava imediatamente e aguarda a conclusão
 
         Returns:
-            bool: True se o salvamento foi bem-sucedido, False caso contrário
+            bool: True se o salvamento foi agendado (a gravação ocorre em segundo plano;
+            ver utils.mcp_disk_persistence), False caso contrário
         """
         log.info("[MCP SAVE_TO_DISK] Salvando estado do MCP em disco...")
 
@@ -370,12 +405,14 @@ class TransformerMCPEnhanced:
             return False
 
         # Salvar dados em disco
-        success = save_mcp_state_to_disk(all_data, create_backup=True)
+        success = save_mcp_state_to_disk(
+            all_data, create_backup=True, wait=wait, session_id=self.mcp_session_id
+        )
 
         if success:
-            log.info("[MCP SAVE_TO_DISK] Estado do MCP salvo em disco com sucesso.")
+            log.info("[MCP SAVE_TO_DISK] Salvamento do estado do MCP agendado (gravação em segundo plano).")
         else:
-            log.error("[MCP SAVE_TO_DISK] Falha ao salvar estado do MCP em disco.")
+            log.error("[MCP SAVE_TO_DISK] Falha ao agendar o salvamento do estado do MCP.")
 
         return success
 
@@ -389,7 +426,7 @@ class TransformerMCPEnhanced:
         log.info("Carregando dados do MCP a partir do disco")
 
         # Carregar dados do disco
-        stores_data, success = load_mcp_state_from_disk()
+        stores_data, success = load_mcp_state_from_disk(self.mcp_session_id)
 
         if not success:
             log.warning("Falha ao carregar dados do MCP do disco. Mantendo valores padrão.")
@@ -418,7 +455,9 @@ class TransformerMCPEnhanced:
                         log.debug(f"[MCP LOAD FROM DISK] Dados mesclados para o store '{store_id}': {list(serializable_data.keys())}")
 
                 # Atualizar dados
-                self._data[store_id] = serializable_data
+                self._data[store_id] = store_snapshot.freeze(
+                    serializable_data, self._data.get(store_id)
+                )
                 log.info(f"Dados carregados do disco para store: {store_id}")
             else:
                 log.warning(f"Store ID '{store_id}' do disco não é um store conhecido. Ignorando.")
@@ -464,7 +503,7 @@ class TransformerMCPEnhanced:
 
         else:
             log.debug("[MCP SAVE SESSION] Usando dados do estado interno do MCP para salvamento.")
-            data_to_process = self.get_all_data() # Já retorna uma deepcopy
+            data_to_process = self.get_all_data() # Snapshots imutáveis
 
         # Verificar se há dados para salvar (após determinar a fonte)
         if not data_to_process:
@@ -552,8 +591,8 @@ class TransformerMCPEnhanced:
             # Atualizar dados do MCP
             for store_id, data in stores_data.items():
                 if store_id in STORE_IDS:
-                    self._data[store_id] = data
-                    self._notify_listeners(store_id, data)
+                    self._data[store_id] = store_snapshot.freeze(data, self._data.get(store_id))
+                    self._notify_listeners(store_id, self._data[store_id])
                     log.info(f"[MCP LOAD SESSION] Dados carregados para store: {store_id}")
                 else:
                     log.warning(f"[MCP LOAD SESSION] Store ID '{store_id}' não é um store conhecido. Ignorando.")
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Torna o diretório 'benchmarks' um pacote Python.
+# Scripts de medição de desempenho/precisão, executados com `python -m benchmarks.<nome>`.
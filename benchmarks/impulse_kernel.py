@@ -0,0 +1,213 @@
+# benchmarks/impulse_kernel.py
+"""
+Benchmark de regressão do kernel de impulso (`app_core.impulse_kernel`).
+
+1. Regressão: compara as saídas do kernel (RLC, dupla exponencial, simulação híbrida
+   e análises LI/SI/LIC) com a referência gravada em
+   `benchmarks/data/impulse_kernel_reference.npz`, gerada a partir das implementações
+   anteriores à unificação.
+2. Desempenho: compara o caminho escalar original (um circuito por chamada, ajuste
+   `curve_fit`) com o caminho vetorizado do kernel (parâmetros em array e ajuste
+   em lote) sobre uma grade de circuitos.
+
+Uso:
+    python -m benchmarks.impulse_kernel [--repeats N] [--grid N] [--update-reference]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app_core import impulse_kernel
+
+REFERENCE_PATH = os.path.join(os.path.dirname(__file__), "data", "impulse_kernel_reference.npz")
+N_POINTS = 1001
+RTOL = 1e-6
+ATOL_FRACTION = 1e-6  # Tolerância absoluta relativa ao pico de cada forma de onda
+
+# (v0 [V], rf [Ω], rt [Ω], L [H], Cg [F], Cl [F], tipo, gap [cm], duração [s])
+CASES = {
+    "LI": (1.2e6, 60.0, 500.0, 30e-6, 0.125e-6, 3e-9, "lightning", None, 100e-6),
+    "LI_osc": (1.2e6, 15.0, 400.0, 80e-6, 0.25e-6, 8e-9, "lightning", None, 100e-6),
+    "SI": (9.0e5, 3000.0, 20000.0, 60e-6, 0.125e-6, 3e-9, "switching", None, 5000e-6),
+    "LIC": (1.3e6, 60.0, 500.0, 30e-6, 0.125e-6, 3e-9, "chopped", 35.0, 20e-6),
+}
+
+ANALYSIS_KEYS = {
+    "lightning": ("peak_value_test", "t_front_us", "t_tail_us", "overshoot_percent"),
+    "switching": ("peak_value_measured", "t_p_us", "t_2_us", "t_d_us"),
+    "chopped": ("peak_value_full_wave_test", "t_front_us", "chop_time_us", "undershoot_percent"),
+}
+
+
+def _case_time(name: str) -> np.ndarray:
+    return np.linspace(0.0, CASES[name][8], N_POINTS)
+
+
+def _analyze(kernel, impulse_type: str, t_us, v_kv, chop_time_us) -> dict:
+    if impulse_type == "lightning":
+        return kernel.analyze_lightning_impulse(t_us, v_kv)
+    if impulse_type == "switching":
+        return kernel.analyze_switching_impulse(t_us, v_kv)
+    return kernel.analyze_chopped_impulse(t_us, v_kv, chop_time_us)
+
+
+def compute_outputs(kernel) -> dict[str, np.ndarray]:
+    """Calcula todas as saídas de regressão com o módulo `kernel` informado."""
+    out = {}
+    for name, (v0, rf, rt, l_tot, c_gen, c_load, imp, gap, _) in CASES.items():
+        t = _case_time(name)
+        c_eq = c_gen * c_load / (c_gen + c_load)
+        out[f"{name}/rlc"] = kernel.rlc_solution(t, v0, rf, l_tot, c_eq)
+        alpha, beta = 1.0 / (rt * (c_gen + c_load)), 1.0 / (rf * c_eq)
+        out[f"{name}/double_exp"] = kernel.double_exp_func(t, v0, alpha, beta)
+        v_rlc, v_final, i_load, a_fit, b_fit, chop = kernel.simulate_hybrid_impulse(
+            t, v0, rf, rt, l_tot, c_gen, c_load, imp, gap
+        )
+        out[f"{name}/hybrid_v_rlc"] = v_rlc
+        out[f"{name}/hybrid_v_final"] = v_final
+        out[f"{name}/hybrid_i_load"] = i_load
+        out[f"{name}/hybrid_params"] = np.array(
+            [a_fit, b_fit, np.nan if chop is None else chop], dtype=float
+        )
+        chop_us = None if chop is None else chop * 1e6
+        analysis = _analyze(kernel, imp, t * 1e6, v_final / 1e3, chop_us)
+        out[f"{name}/analysis"] = np.array(
+            [
+                np.nan if analysis.get(key) is None else float(analysis[key])
+                for key in ANALYSIS_KEYS[imp]
+            ]
+        )
+    return out
+
+
+def check_regression(outputs: dict, reference: dict) -> list[tuple[str, float, bool]]:
+    """Compara `outputs` com `reference`; retorna (chave, erro relativo máximo, ok)."""
+    rows = []
+    for key in sorted(reference):
+        ref = np.asarray(reference[key], dtype=float)
+        got = np.asarray(outputs.get(key, np.full_like(ref, np.nan)), dtype=float)
+        if got.shape != ref.shape:
+            rows.append((key, float("inf"), False))
+            continue
+        scale = np.nanmax(np.abs(ref)) if np.any(np.isfinite(ref)) else 1.0
+        atol = ATOL_FRACTION * max(scale, 1e-30)
+        both_nan = np.isnan(ref) & np.isnan(got)
+        ok = np.all(both_nan | np.isclose(got, ref, rtol=RTOL, atol=atol))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            err = np.where(both_nan, 0.0, np.abs(got - ref) / np.maximum(np.abs(ref), atol))
+        rows.append((key, float(np.nanmax(err)) if err.size else 0.0, bool(ok)))
+    return rows
+
+
+def _grid(n_grid: int) -> tuple:
+    """Grade LI de `n_grid` circuitos variando Rf, Rt e L em torno do caso LI."""
+    rng = np.random.default_rng(0)
+    v0, rf, rt, l_tot, c_gen, c_load = CASES["LI"][:6]
+    return (
+        np.full(n_grid, v0),
+        rf * rng.uniform(0.5, 2.0, n_grid),
+        rt * rng.uniform(0.5, 2.0, n_grid),
+        l_tot * rng.uniform(0.5, 2.0, n_grid),
+        np.full(n_grid, c_gen),
+        np.full(n_grid, c_load),
+    )
+
+
+def run_benchmark(repeats: int = 3, n_grid: int = 64) -> dict:
+    """Mede o caminho escalar (laço + curve_fit) contra o vetorizado do kernel."""
+    t = _case_time("LI")
+    v0, rf, rt, l_tot, c_gen, c_load = _grid(n_grid)
+    c_eq = c_gen * c_load / (c_gen + c_load)
+    hybrid = getattr(impulse_kernel.simulate_hybrid_impulse, "__wrapped__", None)
+    hybrid = hybrid or impulse_kernel.simulate_hybrid_impulse
+
+    def scalar_rlc():
+        return [impulse_kernel.rlc_solution(t, *p) for p in zip(v0, rf, l_tot, c_eq)]
+
+    def vector_rlc():
+        return impulse_kernel.rlc_solution(t, v0, rf, l_tot, c_eq)
+
+    def scalar_hybrid():
+        return [
+            hybrid(t, *p, "lightning", fit_method="curve_fit")
+            for p in zip(v0, rf, rt, l_tot, c_gen, c_load)
+        ]
+
+    def batch_hybrid():
+        return impulse_kernel.simulate_hybrid_impulse_batch(
+            t, v0, rf, rt, l_tot, c_gen, c_load, "lightning"
+        )
+
+    def timed(func):
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples) * 1e3
+
+    scalar_v = np.array([r[1] for r in scalar_hybrid()])
+    batch_v = batch_hybrid()[1]
+    peak = np.max(np.abs(scalar_v), axis=1, keepdims=True)
+    return {
+        "rlc_scalar_ms": timed(scalar_rlc),
+        "rlc_vector_ms": timed(vector_rlc),
+        "rlc_max_abs_diff": float(np.max(np.abs(np.array(scalar_rlc()) - vector_rlc()))),
+        "hybrid_scalar_ms": timed(scalar_hybrid),
+        "hybrid_batch_ms": timed(batch_hybrid),
+        "hybrid_max_rel_diff": float(np.max(np.abs(scalar_v - batch_v) / peak)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--grid", type=int, default=64)
+    parser.add_argument(
+        "--update-reference",
+        action="store_true",
+        help="Regrava a referência com as saídas atuais do kernel.",
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    outputs = compute_outputs(impulse_kernel)
+    if args.update_reference:
+        os.makedirs(os.path.dirname(REFERENCE_PATH), exist_ok=True)
+        np.savez_compressed(REFERENCE_PATH, **outputs)
+        print(f"Referência gravada em {REFERENCE_PATH}")
+        return
+
+    with np.load(REFERENCE_PATH) as data:
+        reference = {key: data[key] for key in data.files}
+    rows = check_regression(outputs, reference)
+    print(f"{'Saída':<28} {'Erro rel. máx.':>15} {'OK':>4}")
+    print("-" * 49)
+    for key, err, ok in rows:
+        print(f"{key:<28} {err:>15.2e} {'sim' if ok else 'NÃO':>4}")
+
+    res = run_benchmark(args.repeats, args.grid)
+    print()
+    print(
+        f"RLC ({args.grid} circuitos): escalar {res['rlc_scalar_ms']:.2f} ms, "
+        f"vetorizado {res['rlc_vector_ms']:.2f} ms "
+        f"({res['rlc_scalar_ms'] / max(res['rlc_vector_ms'], 1e-9):.1f}x), "
+        f"dif. máx. {res['rlc_max_abs_diff']:.2e} V"
+    )
+    print(
+        f"Híbrida ({args.grid} circuitos): escalar {res['hybrid_scalar_ms']:.1f} ms, "
+        f"lote {res['hybrid_batch_ms']:.1f} ms "
+        f"({res['hybrid_scalar_ms'] / max(res['hybrid_batch_ms'], 1e-9):.1f}x), "
+        f"dif. rel. máx. {res['hybrid_max_rel_diff']:.2e}"
+    )
+    if not all(ok for _, _, ok in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/k_factor_fit.py
+"""
+Benchmark do ajuste da curva base em `calculate_k_factor_transform`.
+
+Compara o caminho atual (`curve_fit`, TRF do SciPy) com o modo rápido (estimativa
+analítica + Levenberg-Marquardt com Jacobiano explícito) em formas de onda sintéticas
+LI (1.2/50 µs com overshoot), SI (250/2500 µs) e LIC (1.2/50 µs cortada em 3 µs).
+
+Uso:
+    python -m benchmarks.k_factor_fit [--repeats N] [--points N]
+"""
+import argparse
+import logging
+import math
+import statistics
+import time
+
+import numpy as np
+
+from app_core.calculations import calculate_k_factor_transform
+
+# Parâmetros (α, β) em s⁻¹ das formas normalizadas IEC 60060-1
+WAVEFORMS = {
+    "LI": {"alpha": 1 / 68.2e-6, "beta": 1 / 0.405e-6, "t_end_us": 100.0, "chop_us": None},
+    "SI": {"alpha": 1 / 3155e-6, "beta": 1 / 62.5e-6, "t_end_us": 5000.0, "chop_us": None},
+    "LIC": {"alpha": 1 / 68.2e-6, "beta": 1 / 0.405e-6, "t_end_us": 100.0, "chop_us": 3.0},
+}
+
+
+def make_waveform(name: str, n_points: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Gera (t_us, v_kv) sintéticos com ruído e, para LI/LIC, oscilação de overshoot."""
+    spec = WAVEFORMS[name]
+    rng = np.random.default_rng(seed)
+    t_us = np.linspace(0.0, spec["t_end_us"], n_points)
+    t_sec = t_us * 1e-6
+    alpha, beta = spec["alpha"], spec["beta"]
+    t_peak = math.log(beta / alpha) / (beta - alpha)
+    norm = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)
+    v_kv = 1000.0 * (np.exp(-alpha * t_sec) - np.exp(-beta * t_sec)) / norm
+    if name in ("LI", "LIC"):
+        v_kv += 30.0 * np.exp(-t_sec / 1e-6) * np.sin(2 * np.pi * 1.5e6 * t_sec)
+    v_kv += rng.normal(0.0, 2.0, size=n_points)
+    if spec["chop_us"] is not None:
+        keep = t_us <= spec["chop_us"]
+        t_us, v_kv = t_us[keep], v_kv[keep]
+    return t_us, v_kv
+
+
+def _run(method: str, t_us: np.ndarray, v_kv: np.ndarray, repeats: int) -> dict:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        _, v_base, _, _, (alpha, beta) = calculate_k_factor_transform(
+            v_kv, t_us, return_params=True, fit_method=method
+        )
+        timings.append(time.perf_counter() - start)
+    rms = float(np.sqrt(np.mean((v_base - v_kv) ** 2)))
+    return {
+        "alpha": alpha,
+        "beta": beta,
+        "rms_kv": rms,
+        "median_ms": statistics.median(timings) * 1e3,
+    }
+
+
+def run_benchmark(repeats: int = 20, n_points: int = 2001) -> list[dict]:
+    """Executa o benchmark e retorna uma linha de resultados por (forma de onda, método)."""
+    rows = []
+    for name, spec in WAVEFORMS.items():
+        t_us, v_kv = make_waveform(name, n_points)
+        for method in ("curve_fit", "fast"):
+            res = _run(method, t_us, v_kv, repeats)
+            fitted = res["alpha"] is not None and res["beta"] is not None
+            rows.append(
+                {
+                    "waveform": name,
+                    "method": method,
+                    "median_ms": res["median_ms"],
+                    "rms_kv": res["rms_kv"],
+                    "alpha_err_pct": (
+                        abs(res["alpha"] / spec["alpha"] - 1) * 100 if fitted else float("nan")
+                    ),
+                    "beta_err_pct": (
+                        abs(res["beta"] / spec["beta"] - 1) * 100 if fitted else float("nan")
+                    ),
+                }
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--points", type=int, default=2001)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    rows = run_benchmark(args.repeats, args.points)
+    header = (
+        f"{'Onda':<5} {'Método':<10} {'Mediana (ms)':>13} {'RMS (kV)':>10}"
+        f" {'Erro α (%)':>11} {'Erro β (%)':>11}"
+    )
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['waveform']:<5} {row['method']:<10} {row['median_ms']:>13.2f}"
+            f" {row['rms_kv']:>10.3f} {row['alpha_err_pct']:>11.3f} {row['beta_err_pct']:>11.3f}"
+        )
+    by_key = {(r["waveform"], r["method"]): r for r in rows}
+    for name in WAVEFORMS:
+        slow, fast = by_key[(name, "curve_fit")], by_key[(name, "fast")]
+        ratio = slow["median_ms"] / max(fast["median_ms"], 1e-9)
+        print(f"{name}: modo rápido {ratio:.1f}x mais rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+# benchmarks/losses_callbacks.py
+"""
+Benchmark dos callbacks de perdas (`losses_handle_perdas_vazio`/`_carga`).
+
+Executa os callbacks sem navegador (chamada direta, com o contexto do Dash simulando o
+clique em "Calcular") sobre um conjunto de transformadores de referência, de
+distribuição a autotransformadores de 500 MVA, e mede por etapa:
+
+- `calc_*`: caminho de cálculo (`LossesEngine.no_load` / `LoadLossGraph` a frio);
+- `callback_*`: callback completo a frio (grafo e cache de fragmentos limpos);
+- `render_*`: montagem do layout (callback - cálculo, derivado das medianas);
+- `serialize_*`: serialização JSON das saídas como o Dash envia ao navegador;
+- `callback_carga_incr`: recálculo após alterar uma única entrada (grafo aquecido).
+
+Tempos são medianas de `--repeats` execuções; o pico de memória (tracemalloc) de cada
+etapa vem de uma passada separada, para não distorcer os tempos. Os resultados podem
+ser gravados como referência e comparados em execuções posteriores (código de saída 1
+quando alguma etapa piora além da tolerância).
+
+Observação: importar `app` registra um uso em `data/usage.db`, como ao abrir a aplicação.
+
+Uso:
+    python -m benchmarks.losses_callbacks [--repeats N] [--case NOME ...]
+        [--save-baseline [ARQUIVO]] [--baseline [ARQUIVO]] [--tolerance FRAÇÃO]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from dash._callback_context import context_value
+from dash._utils import AttributeDict
+from plotly.io.json import to_json_plotly
+
+from utils.elec import calculate_nominal_currents
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "data", "losses_callbacks_baseline.json")
+DEFAULT_TOLERANCE = 0.25  # Piora relativa aceita antes de acusar regressão
+MIN_REGRESSION_MS = 0.5  # Diferenças absolutas menores são ruído de medição
+
+# Dados nominais (transformer-inputs-store) e entradas dos ensaios de cada referência.
+# vazio: (perdas kW, núcleo Ton, I exc. %, indução T, I exc. 1.1 pu %, I exc. 1.2 pu %)
+# carga: (perdas totais nominal, tap menor, tap maior em kW, temperatura de referência °C)
+CASES = {
+    "distribuicao_5MVA_34kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 5.0,
+            "tensao_at": 34.5,
+            "tensao_at_tap_maior": 36.2,
+            "tensao_at_tap_menor": 32.8,
+            "impedancia": 7.0,
+            "impedancia_tap_maior": 7.2,
+            "impedancia_tap_menor": 6.8,
+            "frequencia": 60,
+            "tensao_bt": 13.8,
+        },
+        "vazio": (4.5, 4.0, 0.6, 1.6, None, None),
+        "carga": (38.0, 40.0, 37.0, 75),
+    },
+    "forca_30MVA_138kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 30.0,
+            "tensao_at": 138.0,
+            "tensao_at_tap_maior": 151.8,
+            "tensao_at_tap_menor": 124.2,
+            "impedancia": 10.0,
+            "impedancia_tap_maior": 10.5,
+            "impedancia_tap_menor": 9.5,
+            "frequencia": 60,
+            "tensao_bt": 13.8,
+        },
+        "vazio": (18.0, 18.0, 0.3, 1.6, 1.0, None),
+        "carga": (150.0, 160.0, 145.0, 75),
+    },
+    "forca_100MVA_230kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 100.0,
+            "tensao_at": 230.0,
+            "tensao_at_tap_maior": 253.0,
+            "tensao_at_tap_menor": 207.0,
+            "impedancia": 12.0,
+            "impedancia_tap_maior": 12.5,
+            "impedancia_tap_menor": 11.5,
+            "frequencia": 60,
+            "tensao_bt": 13.8,
+        },
+        "vazio": (60.0, 50.0, 0.3, 1.6, 1.0, 2.0),
+        "carga": (400.0, 420.0, 390.0, 75),
+    },
+    "forca_150MVA_345kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 150.0,
+            "tensao_at": 345.0,
+            "tensao_at_tap_maior": 379.5,
+            "tensao_at_tap_menor": 310.5,
+            "impedancia": 12.0,
+            "impedancia_tap_maior": 12.6,
+            "impedancia_tap_menor": 11.4,
+            "frequencia": 60,
+            "tensao_bt": 34.5,
+        },
+        "vazio": (80.0, 60.0, 0.3, 1.6, 1.0, 2.0),
+        "carga": (600.0, 630.0, 580.0, 75),
+    },
+    "auto_300MVA_500kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 300.0,
+            "tensao_at": 500.0,
+            "tensao_at_tap_maior": 525.0,
+            "tensao_at_tap_menor": 475.0,
+            "impedancia": 11.0,
+            "impedancia_tap_maior": 11.5,
+            "impedancia_tap_menor": 10.5,
+            "frequencia": 60,
+            "tensao_bt": 230.0,
+        },
+        "vazio": (110.0, 95.0, 0.2, 1.7, 0.8, 1.8),
+        "carga": (700.0, 740.0, 680.0, 75),
+    },
+    "auto_mono_133MVA_500kV": {
+        "transformer": {
+            "tipo_transformador": "Monofásico",
+            "potencia_mva": 133.3,
+            "tensao_at": 288.7,
+            "tensao_at_tap_maior": 303.1,
+            "tensao_at_tap_menor": 274.3,
+            "impedancia": 14.0,
+            "impedancia_tap_maior": 14.5,
+            "impedancia_tap_menor": 13.5,
+            "frequencia": 60,
+            "tensao_bt": 132.8,
+        },
+        "vazio": (55.0, 60.0, 0.25, 1.7, 0.9, 2.0),
+        "carga": (350.0, 370.0, 340.0, 75),
+    },
+    "auto_500MVA_500kV": {
+        "transformer": {
+            "tipo_transformador": "Trifásico",
+            "potencia_mva": 500.0,
+            "tensao_at": 500.0,
+            "tensao_at_tap_maior": 525.0,
+            "tensao_at_tap_menor": 475.0,
+            "impedancia": 10.0,
+            "impedancia_tap_maior": 10.5,
+            "impedancia_tap_menor": 9.5,
+            "frequencia": 60,
+            "tensao_bt": 345.0,
+        },
+        "vazio": (150.0, 140.0, 0.2, 1.7, 0.8, 1.8),
+        "carga": (900.0, 950.0, 870.0, 85),
+    },
+}
+
+STAGES = (
+    "calc_vazio",
+    "callback_vazio",
+    "render_vazio",
+    "serialize_vazio",
+    "calc_carga",
+    "callback_carga",
+    "render_carga",
+    "serialize_carga",
+    "callback_carga_incr",
+)
+
+
+def transformer_store(case: dict) -> dict:
+    """transformer-inputs-store do caso, com as correntes nominais calculadas como na
+    página de dados básicos."""
+    data = dict(case["transformer"])
+    data.update(calculate_nominal_currents(data))
+    return data
+
+
+def _load_app():
+    """Importa a aplicação e os callbacks de perdas sem iniciar o servidor."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app
+        import callbacks.losses as losses_callbacks
+    return app, losses_callbacks
+
+
+@contextlib.contextmanager
+def _triggered_by(button_id: str):
+    """Contexto do Dash equivalente ao clique em `button_id` (ctx.triggered_id)."""
+    token = context_value.set(
+        AttributeDict(triggered_inputs=[{"prop_id": f"{button_id}.n_clicks", "value": 1}])
+    )
+    try:
+        yield
+    finally:
+        context_value.reset(token)
+
+
+def _checked_store(store, section: str) -> dict:
+    """losses-store retornado pelo callback; erro se o cálculo não gerou `section`."""
+    if not isinstance(store, dict) or not store.get(section):
+        raise RuntimeError(f"Callback não gerou '{section}' (entradas inválidas?)")
+    return store
+
+
+class _CaseRunner:
+    """Executa as etapas de um caso; cada método retorna o valor produzido pela etapa."""
+
+    def __init__(self, app, losses_callbacks, case: dict):
+        from app_core.losses_engine import LoadLossInputs, NoLoadInputs, TransformerRating
+
+        self.app = app
+        self.cb = losses_callbacks
+        self.case = case
+        self.transformer = transformer_store(case)
+        self.rating = TransformerRating.from_store(self.transformer)
+        self.no_load_inputs = NoLoadInputs(*case["vazio"])
+        self.vazio_outputs = None
+        self.carga_outputs = None
+        self.losses_store = {}
+        self.calc_graph = None
+        nom, menor, maior, temperatura = case["carga"]
+        self.load_inputs = LoadLossInputs(
+            nom, menor, maior, case["vazio"][0], temperatura_referencia_c=temperatura
+        )
+
+    def reset(self) -> None:
+        """Estado a frio: stores do MCP, grafo incremental e cache de fragmentos."""
+        from app_core.losses_graph import LoadLossGraph
+        from components import result_tables
+
+        self.app.mcp.set_data("transformer-inputs-store", dict(self.transformer))
+        self.app.mcp.set_data("losses-store", {})
+        self.cb.load_loss_graph = LoadLossGraph(self.cb.losses_engine)
+        self.calc_graph = LoadLossGraph(self.cb.losses_engine)
+        result_tables.clear_render_cache()
+
+    def calc_vazio(self):
+        return self.cb.losses_engine.no_load(self.rating, self.no_load_inputs)
+
+    def calc_carga(self):
+        return self.calc_graph.load_losses(self.rating, self.load_inputs)
+
+    def callback_vazio(self):
+        with _triggered_by("calcular-perdas-vazio"):
+            outputs = self.cb.losses_handle_perdas_vazio(1, *self.case["vazio"], {})
+        self.vazio_outputs, self.losses_store = outputs[:-1], _checked_store(
+            outputs[-1], "resultados_perdas_vazio"
+        )
+        return outputs
+
+    def callback_carga(self, perdas_carga=None):
+        nom, menor, maior, temperatura = perdas_carga or self.case["carga"]
+        with _triggered_by("calcular-perdas-carga"):
+            outputs = self.cb.losses_handle_perdas_carga(
+                1, nom, menor, maior, temperatura, self.losses_store
+            )
+        _checked_store(outputs[-1], "resultados_perdas_carga")
+        self.carga_outputs = outputs[:-1]
+        return outputs
+
+    def callback_carga_incr(self):
+        nom, menor, maior, temperatura = self.case["carga"]
+        return self.callback_carga((nom, menor, maior * 1.01, temperatura))
+
+    def serialize_vazio(self):
+        return to_json_plotly(list(self.vazio_outputs))
+
+    def serialize_carga(self):
+        return to_json_plotly(list(self.carga_outputs))
+
+    def run_once(self, clock) -> dict:
+        """Uma execução completa do caso; `clock(func)` mede cada etapa."""
+        self.reset()
+        measured = {"calc_vazio": clock(self.calc_vazio)}
+        measured["callback_vazio"] = clock(self.callback_vazio)
+        measured["serialize_vazio"] = clock(self.serialize_vazio)
+        measured["calc_carga"] = clock(self.calc_carga)
+        measured["callback_carga"] = clock(self.callback_carga)
+        measured["serialize_carga"] = clock(self.serialize_carga)
+        measured["callback_carga_incr"] = clock(self.callback_carga_incr)
+        return measured
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1e3
+
+
+def _peak_kb(func) -> float:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(app, losses_callbacks, case: dict, repeats: int = 15) -> dict:
+    """Medianas (ms), picos de memória (KB) e tamanho das saídas (KB) de um caso."""
+    runner = _CaseRunner(app, losses_callbacks, case)
+    runner.run_once(lambda func: func())  # Aquecimento (imports tardios, caches do Python)
+    runs = [runner.run_once(_timed) for _ in range(repeats)]
+    ms = {stage: statistics.median(run[stage] for run in runs) for stage in runs[0]}
+    for kind in ("vazio", "carga"):
+        ms[f"render_{kind}"] = max(ms[f"callback_{kind}"] - ms[f"calc_{kind}"], 0.0)
+    peak_kb = runner.run_once(_peak_kb)
+    payload_kb = {
+        "vazio": len(runner.serialize_vazio()) / 1024,
+        "carga": len(runner.serialize_carga()) / 1024,
+    }
+    return {
+        "ms": {stage: ms[stage] for stage in STAGES},
+        "peak_kb": peak_kb,
+        "payload_kb": payload_kb,
+    }
+
+
+def run_benchmark(repeats: int = 15, case_names=None) -> dict:
+    """Executa os casos selecionados (todos por padrão) e retorna os resultados por caso."""
+    app, losses_callbacks = _load_app()
+    return {
+        name: run_case(app, losses_callbacks, CASES[name], repeats)
+        for name in (case_names or CASES)
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """
+    Compara os tempos com a referência.
+
+    Returns:
+        Lista de (caso, etapa, ms referência, ms atual, variação relativa, regressão).
+    """
+    rows = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for stage in STAGES:
+            before, after = reference["ms"].get(stage), current["ms"][stage]
+            if before is None:
+                continue
+            change = (after - before) / before if before > 0 else 0.0
+            regression = change > tolerance and after - before > MIN_REGRESSION_MS
+            rows.append((name, stage, before, after, change, regression))
+    return rows
+
+
+def _print_results(results: dict) -> None:
+    for name, res in results.items():
+        print(
+            f"\n{name}  (saída: vazio {res['payload_kb']['vazio']:.1f} KB, "
+            f"carga {res['payload_kb']['carga']:.1f} KB)"
+        )
+        print(f"  {'Etapa':<22} {'Mediana (ms)':>13} {'Pico mem. (KB)':>15}")
+        for stage in STAGES:
+            peak = res["peak_kb"].get(stage)
+            peak_text = f"{peak:>15.0f}" if peak is not None else f"{'-':>15}"
+            print(f"  {stage:<22} {res['ms'][stage]:>13.2f} {peak_text}")
+
+
+def _print_comparison(rows: list) -> None:
+    print(f"\n{'Caso':<24} {'Etapa':<22} {'Ref. (ms)':>10} {'Atual (ms)':>11} {'Var.':>8}")
+    print("-" * 79)
+    for name, stage, before, after, change, regression in rows:
+        flag = "  REGRESSÃO" if regression else ""
+        print(f"{name:<24} {stage:<22} {before:>10.2f} {after:>11.2f} {change:>+8.1%}{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--case", action="append", choices=sorted(CASES), dest="cases")
+    parser.add_argument(
+        "--save-baseline",
+        nargs="?",
+        const=BASELINE_PATH,
+        metavar="ARQUIVO",
+        help="Grava os resultados como referência.",
+    )
+    parser.add_argument(
+        "--baseline",
+        nargs="?",
+        const=BASELINE_PATH,
+        metavar="ARQUIVO",
+        help="Compara os tempos com a referência gravada.",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = run_benchmark(args.repeats, args.cases)
+    _print_results(results)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\nReferência gravada em {args.save_baseline}")
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"\nReferência não encontrada: {args.baseline} (use --save-baseline)")
+            sys.exit(2)
+        with open(args.baseline, encoding="utf-8") as f:
+            rows = compare(results, json.load(f), args.tolerance)
+        _print_comparison(rows)
+        if any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/losses_sweep.py
+"""
+Benchmark da varredura de viabilidade do ensaio em carga (`app_core.losses_sweep`).
+
+1. Consistência: em uma amostra de pontos da grade, compara tensões, correntes,
+   potências de ensaio e potências do banco da varredura com `LossesEngine.load_losses`
+   (tap nominal).
+2. Desempenho: tempo da varredura vetorizada sobre a grade completa e tempo estimado
+   do laço ponto a ponto com o motor escalar.
+
+Uso:
+    python -m benchmarks.losses_sweep [--points N] [--samples N]
+"""
+import argparse
+import logging
+import math
+import time
+
+import numpy as np
+
+from app_core.losses_engine import (
+    SCENARIO_KEYS,
+    LoadLossInputs,
+    LossesEngine,
+    LossesInputError,
+    TransformerRating,
+)
+from app_core.losses_sweep import sweep_load_losses
+
+FIXED = {"potencia_mva": 150.0, "perdas_vazio_kw": 60.0, "tipo_transformador": "Trifásico"}
+COMPARED = (
+    ("tensao_kv", 0),
+    ("corrente_a", 1),
+    ("pteste_mva", 2),
+    ("potencia_ativa_kw", 3),
+    ("pteste_mvar", 4),
+)
+
+
+def make_axes(n_points: int) -> dict:
+    """Eixos impedância × tensão do tap × perdas totais com ~`n_points` pontos."""
+    n_side = max(int(round((n_points / 10) ** 0.5)), 2)
+    return {
+        "impedancia_percent": np.linspace(6.0, 18.0, n_side),
+        "tensao_at_kv": np.linspace(200.0, 260.0, 10),
+        "perdas_totais_kw": np.linspace(100.0, 1500.0, n_side),
+    }
+
+
+def _engine_point(engine: LossesEngine, point: dict):
+    tensao, impedancia = point["tensao_at_kv"], point["impedancia_percent"]
+    rating = TransformerRating(
+        potencia_mva=FIXED["potencia_mva"],
+        tensao_at_kv=tensao,
+        tensao_bt_kv=13.8,
+        corrente_nominal_bt_a=None,
+        tipo_transformador=FIXED["tipo_transformador"],
+        frequencia_hz=60,
+        tensao_at_tap_maior_kv=tensao,
+        tensao_at_tap_menor_kv=tensao,
+        impedancia_percent=impedancia,
+        impedancia_tap_maior_percent=impedancia,
+        impedancia_tap_menor_percent=impedancia,
+        corrente_nominal_at_a=None,
+        corrente_nominal_at_tap_maior_a=None,
+        corrente_nominal_at_tap_menor_a=None,
+    )
+    perdas = point["perdas_totais_kw"]
+    inputs = LoadLossInputs(perdas, perdas, perdas, FIXED["perdas_vazio_kw"])
+    try:
+        return engine.load_losses(rating, inputs)
+    except LossesInputError:
+        return None
+
+
+def run_benchmark(n_points: int = 100_000, n_samples: int = 200) -> dict:
+    """Executa o benchmark e retorna tempos e o maior desvio relativo encontrado."""
+    axes = make_axes(n_points)
+    fixed = {k: v for k, v in FIXED.items() if k != "tipo_transformador"}
+    start = time.perf_counter()
+    result = sweep_load_losses(axes, FIXED["tipo_transformador"], **fixed)
+    sweep_s = time.perf_counter() - start
+
+    engine = LossesEngine()
+    rng = np.random.default_rng(0)
+    indices = [tuple(rng.integers(0, n) for n in result.shape) for _ in range(n_samples)]
+    max_rel, mismatches = 0.0, 0
+    start = time.perf_counter()
+    for idx in indices:
+        point = {name: values[i] for (name, values), i in zip(axes.items(), idx)}
+        loss_result = _engine_point(engine, point)
+        if loss_result is None:
+            mismatches += bool(result.valid[idx])
+            continue
+        res = loss_result.by_tap("Nominal")
+        for scenario in loss_result.scenarios:
+            sweep = result.scenarios[scenario]
+            for key, pos in COMPARED:
+                expected = res[SCENARIO_KEYS[scenario][pos]]
+                max_rel = max(max_rel, abs(sweep[key][idx] - expected) / max(abs(expected), 1e-12))
+            q_cf = res[f"Cap Bank Power {scenario} Com Fator (MVAr)"]
+            if not math.isinf(q_cf):
+                q_rel = abs(sweep["cap_bank_power_cf_mvar"][idx] - q_cf) / max(q_cf, 1e-12)
+                max_rel = max(max_rel, q_rel)
+    engine_s = (time.perf_counter() - start) / n_samples * result.valid.size
+    return {
+        "points": result.valid.size,
+        "sweep_s": sweep_s,
+        "engine_estimate_s": engine_s,
+        "max_rel_diff": max_rel,
+        "validity_mismatches": mismatches,
+        "fraction_feasible": result.fraction_feasible(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--points", type=int, default=100_000)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    res = run_benchmark(args.points, args.samples)
+    print(f"Pontos na grade:            {res['points']}")
+    print(f"Varredura vetorizada:       {res['sweep_s']:.3f} s")
+    print(f"Motor escalar (estimativa): {res['engine_estimate_s']:.1f} s")
+    print(f"Aceleração:                 {res['engine_estimate_s'] / res['sweep_s']:.0f}x")
+    print(f"Maior desvio relativo:      {res['max_rel_diff']:.2e}")
+    print(f"Divergências de validade:   {res['validity_mismatches']}")
+    print(f"Fração viável:              {res['fraction_feasible']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
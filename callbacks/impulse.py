@@ -10,11 +10,23 @@ import numpy as np
 import plotly.graph_objects as go
 from dash import Input, Output, State, html, ctx
 from dash.exceptions import PreventUpdate
-from scipy.fftpack import fft, fftfreq, ifft
-from scipy.optimize import OptimizeWarning, curve_fit
+from scipy.optimize import OptimizeWarning
 
 # Import app instance and constants/utils
 from app import app  # Import app instance correctly
+from app_core.calculations import (  # noqa: F401 - API de impulso exposta por este módulo
+    analyze_chopped_impulse,
+    analyze_lightning_impulse,
+    analyze_switching_impulse,
+    build_adaptive_time_grid,
+    calculate_k_factor_transform,
+    double_exp_func,
+    impulse_memoize,
+    rlc_solution,
+    simulate_hybrid_impulse,
+    simulate_impulse_test,
+)
+from utils.plot_decimation import decimate_trace
 from utils import constants as const  # Assuming constants are in utils.constants
 from utils.routes import ROUTE_IMPULSE, normalize_pathname
 from utils.store_diagnostics import convert_numpy_types, is_json_serializable
@@ -378,733 +390,9 @@ def _calculate_waveform_parameters(
     )
 
 
-# --- Funções de Simulação da Forma de Onda (Copied from user feedback) ---
-
-
-def rlc_solution(t_sec, v0, r_total, l_total, c_eq):
-    """Calcula a solução para o circuito RLC série em função do tempo."""
-    if l_total <= 1e-12 or c_eq <= 1e-15 or r_total <= 1e-9:
-        logger.warning(f"Parâmetros RLC inválidos: R={r_total}, L={l_total}, Ceq={c_eq}")
-        return np.zeros_like(t_sec)
-    try:
-        omega0_sq = 1.0 / (l_total * c_eq)
-        alpha_damp = r_total / (2.0 * l_total)
-        if alpha_damp <= 0:
-            logger.warning("Amortecimento RLC não positivo.")
-            return np.zeros_like(t_sec)
-        delta = alpha_damp**2 - omega0_sq
-        v_out = np.zeros_like(t_sec)
-        t_valid = t_sec[t_sec >= 0]
-        if abs(delta) < 1e-12 * omega0_sq:
-            a = alpha_damp
-            v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-        elif delta < 0:
-            omega_d = np.sqrt(-delta)
-            a = alpha_damp
-            v_out[t_sec >= 0] = (
-                v0
-                * np.exp(-a * t_valid)
-                * (np.cos(omega_d * t_valid) + (a / omega_d) * np.sin(omega_d * t_valid))
-                if omega_d > 1e-9
-                else v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-            )
-        else:
-            sqrt_delta = np.sqrt(delta)
-            s1 = -alpha_damp + sqrt_delta
-            s2 = -alpha_damp - sqrt_delta
-            if abs(s1 - s2) < 1e-9 * abs(s1 + s2):
-                a = alpha_damp
-                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-            else:
-                if s1 > 1e-9 or s2 > 1e-9:
-                    logger.warning(f"Raízes instáveis RLC: s1={s1:.2e}, s2={s2:.2e}.")
-                    v_out = (
-                        np.zeros_like(t_sec)
-                        if s2 >= 0
-                        else v0 / (s1 - s2) * (-s2 * np.exp(s1 * t_valid))
-                    )
-                else:
-                    v_out[t_sec >= 0] = (
-                        v0 / (s1 - s2) * (s1 * np.exp(s2 * t_valid) - s2 * np.exp(s1 * t_valid))
-                    )
-        v_out[t_sec < 0] = 0
-        return v_out
-    except (ValueError, OverflowError, ZeroDivisionError) as e:
-        logger.error(f"Erro solução RLC: {e}")
-        return np.zeros_like(t_sec)
-
-
-def double_exp_func(t, V0_norm, alpha, beta):
-    """Função de dupla exponencial normalizada para ter pico V0_norm."""
-    if alpha <= 1e-12 or beta <= 1e-12 or beta <= alpha + 1e-9:
-        logger.warning(f"Alpha/Beta inválidos: a={alpha:.2e}, b={beta:.2e}")
-        return np.zeros_like(t)
-    try:
-        t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else 0
-        norm_factor = (math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)) if t_peak >= 0 else 0
-        if abs(norm_factor) < 1e-12:
-            logger.warning("Fator norm. dupla exp zero.")
-            return np.zeros_like(t)
-        k_norm = V0_norm / norm_factor
-        t_safe = np.maximum(t, 0)
-        result = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-        return result
-    except (ValueError, OverflowError, ZeroDivisionError) as e:
-        logger.error(f"Erro dupla exp: {e}")
-        return np.zeros_like(t)
-
-
-def calculate_k_factor_transform(v, t, return_params=False):
-    """Aplica a transformação K-factor conforme IEC 61083-2."""
-    v_test = np.copy(v)
-    v_base = np.copy(v)
-    v_residual_filtered = np.zeros_like(v)
-    overshoot_rel = 0.0
-    v_base_success = False
-    alpha_fit, beta_fit = None, None
-    if len(v) < 10 or len(t) < 10 or np.std(v) < 1e-9 or t[-1] <= t[0]:
-        logger.warning("Dados insuficientes/inválidos para k-factor.")
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
-    peak_value_orig = np.max(v)
-    if peak_value_orig < 1e-6:
-        logger.warning("Amplitude baixa para k-factor.")
-        return (
-            (v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit))
-            if return_params
-            else (v_test, v_base, v_residual_filtered, overshoot_rel)
-        )
-
-    def double_exp_func_fit(t_fit, A_norm, alpha, beta):
-        if alpha <= 1e-12 or beta <= 1e-12 or beta <= alpha + 1e-9:
-            return np.full_like(t_fit, 1e12)
-        try:
-            t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else 0
-            norm_factor = math.exp(-alpha * t_peak) - math.exp(-beta * t_peak) if t_peak >= 0 else 0
-            if abs(norm_factor) < 1e-12:
-                return np.zeros_like(t_fit)
-            k_norm = A_norm / norm_factor
-            t_safe = np.maximum(t_fit, 0)
-            result = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-            return result
-        except (ValueError, OverflowError, ZeroDivisionError) as e:
-            logger.error(f"Erro interno dupla exp ajuste: {e}")
-            return np.full_like(t_fit, 1e12)
-
-    try:
-        t_sec = t * 1e-6
-        peak_idx = np.argmax(v)
-        t_half_idx = (
-            np.argmin(np.abs(v[peak_idx:] - 0.5 * peak_value_orig)) + peak_idx
-            if peak_idx < len(v) - 1
-            else len(v) - 1
-        )
-        T2_approx_sec = max(1e-7, t_sec[t_half_idx])
-        t_30_idx = (
-            np.argmin(np.abs(v[: peak_idx + 1] - 0.3 * peak_value_orig)) if peak_idx > 0 else 0
-        )
-        t_90_idx = (
-            np.argmin(np.abs(v[: peak_idx + 1] - 0.9 * peak_value_orig))
-            if peak_idx > 0
-            else peak_idx
-        )
-        T1_approx_sec = (
-            (1.67 / 1e6) * max(1e-3, (t[t_90_idx] - t[t_30_idx]))
-            if t_90_idx > t_30_idx
-            else (LIGHTNING_IMPULSE_FRONT_TIME_NOM * 1e-6)
-        )
-        T1_approx_sec = max(0.1e-6, T1_approx_sec)
-        alpha_est = 0.7 / T2_approx_sec if T2_approx_sec > 1e-9 else 1e7
-        beta_est = 2.5 / T1_approx_sec if T1_approx_sec > 1e-9 else 1e8
-        if beta_est <= alpha_est:
-            beta_est = alpha_est * 5
-        A_est = peak_value_orig
-        lower_bounds = [peak_value_orig * 0.5, alpha_est * 0.1, beta_est * 0.5]
-        upper_bounds = [peak_value_orig * 1.5, alpha_est * 10, beta_est * 10]
-        popt, pcov = curve_fit(
-            double_exp_func_fit,
-            t_sec,
-            v,
-            p0=[A_est, alpha_est, beta_est],
-            bounds=(lower_bounds, upper_bounds),
-            maxfev=5000,
-            method="trf",
-        )
-        A_fit, alpha_fit, beta_fit = popt
-        logger.debug(
-            f"Ajuste curva base: A={A_fit:.2f}, alpha={alpha_fit:.2e}, beta={beta_fit:.2e}"
-        )
-        v_base = double_exp_func_fit(t_sec, A_fit, alpha_fit, beta_fit)
-        v_base_success = True
-    except (RuntimeError, ValueError, Exception) as e:
-        logger.warning(f"Ajuste curva base K-Factor falhou: {e}. Usando onda original.")
-        v_base = np.copy(v)
-        v_base_success = False
-        alpha_fit, beta_fit = None, None
-    v_base = np.maximum(v_base, 0)
-    v_residual = v - v_base
-    v_residual_filtered = np.zeros_like(v_residual)
-    if len(t) > 1 and abs(t[1] - t[0]) > 1e-12 and v_base_success:
-        try:
-            dt_fft = (t[1] - t[0]) * 1e-6
-            frequencies = fftfreq(len(t), dt_fft)
-            v_residual_fft = fft(v_residual)
-            k_factor_filter = np.ones_like(frequencies, dtype=complex)
-            f_MHz = np.abs(frequencies) * 1e-6
-            f_MHz_sq = f_MHz**2
-            non_zero_freq_mask = f_MHz_sq > 1e-12
-            denominator = 1.0 + 2.2 * f_MHz_sq[non_zero_freq_mask]
-            filter_values = np.divide(
-                1.0, denominator, where=denominator > 1e-12, out=np.zeros_like(denominator)
-            )
-            k_factor_filter[non_zero_freq_mask] = filter_values
-            v_residual_filtered_fft = v_residual_fft * k_factor_filter
-            v_residual_filtered = np.real(ifft(v_residual_filtered_fft))
-        except Exception as e_fft:
-            logger.error(f"Erro FFT/IFFT K-factor: {e_fft}.")
-            v_residual_filtered = np.zeros_like(v_residual)
-    elif not v_base_success:
-        logger.info("K-factor não aplicado (ajuste base falhou).")
-        v_residual_filtered = np.zeros_like(v)
-    else:
-        logger.warning("Vetor tempo inválido para FFT K-factor.")
-        v_residual_filtered = np.zeros_like(v_residual)
-    v_test = v_base + v_residual_filtered
-    v_test = np.maximum(v_test, 0)
-    peak_value_base = np.max(v_base) if len(v_base) > 0 else 0
-    overshoot_rel = 0.0
-    if peak_value_orig > 1e-9 and peak_value_base > 1e-9:
-        overshoot_rel = max(0.0, (peak_value_orig - peak_value_base) / peak_value_orig) * 100
-    if return_params:
-        return v_test, v_base, v_residual_filtered, overshoot_rel, (alpha_fit, beta_fit)
-    return v_test, v_base, v_residual_filtered, overshoot_rel
-
-
-def simulate_hybrid_impulse(
-    t_sec, v0_charge, rf, rt, l_total, c_gen, c_load, impulse_type, gap_distance_cm=None
-):
-    """Simula o circuito usando a abordagem híbrida RLC + K-Factor + Dupla Exp."""
-    collapse_time = 0.1e-6
-    logger.info(f"Simulando Híbrido: Tipo={impulse_type}, V0_carga={v0_charge/1000:.1f}kV")
-    c_eq = (c_gen * c_load) / (c_gen + c_load) if (c_gen + c_load) > 1e-15 else 0
-    r_rlc = rf + R_PARASITIC_OHM
-    logger.debug(f"Simulando RLC: R={r_rlc:.1f}, L={l_total:.2e}, Ceq={c_eq:.2e}")
-    v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
-    v_rlc_kv = v_rlc / 1000
-    t_us = t_sec * 1e6
-    v_test, v_base, _, overshoot, (alpha_fit, beta_fit) = calculate_k_factor_transform(
-        v_rlc_kv, t_us, return_params=True
-    )
-    if alpha_fit is None or beta_fit is None:
-        logger.warning("Ajuste K-factor falhou. Usando estimativas.")
-        alpha = 1 / (rt * (c_gen + c_load)) if rt > 1e-9 and (c_gen + c_load) > 1e-15 else 0
-        beta = 1 / (rf * c_eq) if rf > 1e-9 and c_eq > 1e-15 else 0
-        if beta <= alpha + 1e-9:
-            adjust_factor = 1.05
-            add_factor = 1e3 if impulse_type in ["lightning", "chopped"] else 1e2
-            beta = alpha * adjust_factor + add_factor
-    else:
-        alpha = alpha_fit
-        beta = beta_fit
-        logger.info(f"Parâmetros K-factor: alpha={alpha:.2e}, beta={beta:.2e}")
-    v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
-    chop_time_sec = None
-    if impulse_type == "chopped" and gap_distance_cm is not None and gap_distance_cm > 0:
-        breakdown_voltage = 30.0 * gap_distance_cm * 1000
-        times_above_threshold = np.where(v_final >= breakdown_voltage)[0]
-        if len(times_above_threshold) > 0:
-            chop_idx = times_above_threshold[0]
-            if chop_idx < len(t_sec):
-                chop_time_sec = t_sec[chop_idx]
-                logger.info(
-                    f"Corte detectado: t={chop_time_sec*1e6:.2f} µs, V={v_final[chop_idx]/1000:.1f} kV"
-                )
-                collapse_idx = np.where(t_sec >= chop_time_sec)[0]
-                if len(collapse_idx) > 0:
-                    chop_voltage_final = v_final[chop_idx]
-                    dt_after_chop = t_sec[collapse_idx] - chop_time_sec
-                    mask_collapse = dt_after_chop <= collapse_time
-                    mask_osc = dt_after_chop > collapse_time
-                    idx_collapse = collapse_idx[mask_collapse]
-                    idx_osc = collapse_idx[mask_osc]
-                    if len(idx_collapse) > 0:
-                        v_final[idx_collapse] = chop_voltage_final * (
-                            1 - (t_sec[idx_collapse] - chop_time_sec) / collapse_time
-                        )
-                    if len(idx_osc) > 0:
-                        freq_osc = 5e6
-                        damp_factor = 1.5
-                        undershoot_ratio = 0.25
-                        time_after_collapse = t_sec[idx_osc] - chop_time_sec - collapse_time
-                        amp = (
-                            -chop_voltage_final
-                            * undershoot_ratio
-                            * np.exp(-damp_factor * time_after_collapse * 1e6)
-                        )
-                        osc = amp * np.cos(2 * np.pi * freq_osc * time_after_collapse)
-                        v_final[idx_osc] = osc
-                        v_final[idx_osc] = np.clip(
-                            v_final[idx_osc], -0.3 * abs(chop_voltage_final), float("inf")
-                        )
-                        v_final[idx_osc[time_after_collapse > 3 / freq_osc]] = 0
-        else:
-            logger.warning(
-                f"Tensão não atingiu breakdown ({breakdown_voltage/1000:.1f} kV) para gap={gap_distance_cm} cm"
-            )
-    i_load = c_load * np.gradient(v_final, t_sec)
-    return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
-
-
-def analyze_lightning_impulse(t_us, v_kv):
-    """
-    Analisa os parâmetros de um impulso atmosférico (LI) a partir dos dados simulados ou medidos.
-    Aplica o K-factor para obter a curva de ensaio Vt(t).
-    Calcula T1, T2, Vp (Vt), Overshoot (β).
-    Verifica conformidade com as tolerâncias da IEC 60060-1.
-
-    Args:
-        t_us: Array de tempo em microssegundos (µs).
-        v_kv: Array de tensão em quilovolts (kV).
-
-    Returns:
-        Dicionário contendo os parâmetros calculados e flags de conformidade.
-        Retorna {"error": msg} em caso de falha na análise.
-    """
-    logger.info("Analisando Impulso Atmosférico (LI)...")
-    results = {
-        "peak_value": None,
-        "test_value": None,
-        "base_value": None,
-        "peak_time": None,
-        "t_30": None,
-        "t_90": None,
-        "t_0_virtual": None,
-        "t_front": None,
-        "t_tail": None,
-        "overshoot": 0.0,
-        "conforme_frente": False,
-        "conforme_cauda": False,
-        "conforme_overshoot": True,
-        "conforme_pico": False,
-        "error": None,
-    }
-
-    try:
-        if (
-            v_kv is None
-            or t_us is None
-            or len(v_kv) < 10
-            or len(t_us) != len(v_kv)
-            or np.std(v_kv) < 1e-9
-        ):
-            results["error"] = "Dados de entrada inválidos ou insuficientes para análise LI."
-            logger.error(results["error"])
-            return results
-
-        # 1. Aplica Transformação K-Factor
-        v_test_kv, v_base_kv, _, overshoot_rel = calculate_k_factor_transform(v_kv, t_us)
-
-        if v_test_kv is None or len(v_test_kv) < 5 or np.std(v_test_kv) < 1e-9:
-            results["error"] = "Onda de ensaio (V_test) inválida após K-factor."
-            logger.error(results["error"])
-            # Tenta analisar a onda original como fallback
-            v_test_kv = v_kv  # Usa a onda original se K-factor falhar
-            overshoot_rel = 0.0  # Assume zero overshoot se K-factor falhar
-            logger.warning("K-Factor falhou, análise LI será feita na onda original.")
-            # Não retorna erro ainda, tenta analisar o que for possível
-
-        results["overshoot"] = overshoot_rel
-        results["peak_value"] = np.max(v_kv) if len(v_kv) > 0 else 0
-        results["base_value"] = np.max(v_base_kv) if len(v_base_kv) > 0 else 0
-
-        # 2. Encontra o Pico da Curva de Ensaio (Vt)
-        test_peak_idx = np.argmax(v_test_kv)
-        test_peak_time_us = t_us[test_peak_idx]
-        test_peak_value_kv = v_test_kv[test_peak_idx]
-        results["test_value"] = test_peak_value_kv
-        results["peak_time"] = test_peak_time_us
-
-        # 3. Análise da Frente (T1 e O1)
-        t_0_virtual_us = t_us[0]  # Padrão: origem real
-        mask_before_peak = t_us <= test_peak_time_us
-        t_before_us = t_us[mask_before_peak]
-        v_before_kv = v_test_kv[mask_before_peak]
-
-        if (
-            len(v_before_kv) > 1 and test_peak_value_kv > 1e-6
-        ):  # Evita divisão por zero se pico for zero
-            v_max_before = np.max(v_before_kv)
-            v_min_before = np.min(v_before_kv)
-            v_30_target = 0.3 * test_peak_value_kv
-            v_90_target = 0.9 * test_peak_value_kv
-
-            if v_max_before >= v_90_target and v_min_before <= v_30_target:
-                try:
-                    t_30_us = np.interp(
-                        v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    t_90_us = np.interp(
-                        v_90_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    results["t_30"] = t_30_us
-                    results["t_90"] = t_90_us
-
-                    if not np.isnan(t_30_us) and not np.isnan(t_90_us) and t_90_us > t_30_us:
-                        delta_t_front = t_90_us - t_30_us
-                        delta_v_front = v_90_target - v_30_target
-                        if delta_t_front > 1e-9:
-                            results["t_front"] = 1.67 * delta_t_front
-                            slope = delta_v_front / delta_t_front
-                            if abs(slope) > 1e-9:
-                                t_0_virtual_us = t_30_us - (v_30_target / slope)
-                            else:
-                                t_0_virtual_us = t_30_us
-                        else:
-                            logger.warning("Intervalo t90-t30 muito pequeno para T1.")
-                            results["t_front"] = None
-                    else:
-                        logger.warning("Não foi possível interpolar t30 ou t90 na frente.")
-                        results["t_front"] = None
-                except Exception as e_interp_front:
-                    logger.error(f"Erro interpolação frente LI: {e_interp_front}")
-                    results["t_front"] = None
-            else:
-                logger.warning("Níveis 30%/90% não encontrados antes do pico.")
-        results["t_0_virtual"] = t_0_virtual_us
-
-        # 4. Análise da Cauda (T2)
-        mask_after_peak = t_us >= test_peak_time_us
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_test_kv[mask_after_peak]
-        v_50_target = 0.5 * test_peak_value_kv
-
-        if (
-            len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6
-        ):  # Adiciona tolerância pequena
-            try:
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = idx2 - 1 if idx2 > 0 else 0
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_50_us = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                        if not np.isnan(t_50_us):
-                            results["t_tail"] = t_50_us - t_0_virtual_us
-                    elif v1_tail >= v_50_target:
-                        results["t_tail"] = t1_tail - t_0_virtual_us
-                else:
-                    logger.warning("Não encontrou ponto < 50% na cauda (lógica np.where).")
-            except Exception as e_interp_tail:
-                logger.error(f"Erro interpolação cauda LI: {e_interp_tail}")
-                results["t_tail"] = None
-        else:
-            logger.warning("Dados insuficientes ou tensão não caiu abaixo de 50% na cauda.")
-
-        # 5. Verificação de Conformidade
-        if results["t_front"] is not None:
-            t1_min = LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 - LIGHTNING_FRONT_TOLERANCE)
-            t1_max = LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 + LIGHTNING_FRONT_TOLERANCE)
-            results["conforme_frente"] = t1_min <= results["t_front"] <= t1_max
-        if results["t_tail"] is not None:
-            t2_min = LIGHTNING_IMPULSE_TAIL_TIME_NOM * (1 - LIGHTNING_TAIL_TOLERANCE)
-            t2_max = LIGHTNING_IMPULSE_TAIL_TIME_NOM * (1 + LIGHTNING_TAIL_TOLERANCE)
-            results["conforme_cauda"] = t2_min <= results["t_tail"] <= t2_max
-        results["conforme_overshoot"] = results["overshoot"] <= LIGHTNING_OVERSHOOT_MAX
-        results["conforme_pico"] = (
-            results["test_value"] is not None
-        )  # Conformidade do pico é apenas se ele foi calculado
-
-        logger.info(
-            f"Análise LI: Vt={results.get('test_value', 'N/A'):.2f} kV, T1={results.get('t_front', 'N/A'):.2f} µs, T2={results.get('t_tail', 'N/A'):.1f} µs, β={results.get('overshoot', 'N/A'):.1f}%"
-        )
-        logger.info(
-            f"Conformidade LI: Frente={results['conforme_frente']}, Cauda={results['conforme_cauda']}, Overshoot={results['conforme_overshoot']}"
-        )
-        return results
-    except Exception as e:
-        logger.exception(f"Erro geral em analyze_lightning_impulse: {e}")
-        return {"error": str(e)}
-
-
-def analyze_switching_impulse(t_us, v_kv):
-    """Analisa os parâmetros de um impulso de manobra (SI) conforme IEC 60060-1."""
-    logger.info("Analisando Impulso de Manobra (SI)...")
-    results = {
-        "peak_value": None,
-        "peak_time": None,
-        "tp": None,
-        "td": None,
-        "t_half": None,
-        "t2_calculated": None,
-        "tz": None,
-        "tz_calculated": None,
-        "T_AB": None,
-        "t_30": None,
-        "t_90": None,
-        "conforme_pico": False,
-        "conforme_meia_onda": False,
-        "conforme_td": False,
-        "conforme_tz": False,
-        "error": None,
-    }
-    try:
-        if (
-            v_kv is None
-            or t_us is None
-            or len(v_kv) < 10
-            or len(t_us) != len(v_kv)
-            or np.std(v_kv) < 1e-9
-        ):
-            results["error"] = "Dados de entrada inválidos ou insuficientes para análise SI."
-            logger.error(results["error"])
-            return results
-
-        peak_index = np.argmax(v_kv)
-        peak_time_us_actual = t_us[peak_index]
-        peak_value_kv = v_kv[peak_index]
-        results["peak_value"] = peak_value_kv
-        results["peak_time"] = peak_time_us_actual
-        t_origin_us = t_us[0]
-
-        mask_before_peak = t_us <= peak_time_us_actual
-        t_before_us = t_us[mask_before_peak]
-        v_before_kv = v_kv[mask_before_peak]
-        if len(v_before_kv) > 1 and peak_value_kv > 1e-6:
-            v_max_before = np.max(v_before_kv)
-            v_min_before = np.min(v_before_kv)
-            v_30_target = 0.3 * peak_value_kv
-            v_90_target = 0.9 * peak_value_kv
-            if v_max_before >= v_90_target and v_min_before <= v_30_target:
-                try:
-                    results["t_30"] = np.interp(
-                        v_30_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    results["t_90"] = np.interp(
-                        v_90_target, v_before_kv, t_before_us, left=np.nan, right=np.nan
-                    )
-                    if (
-                        not np.isnan(results["t_30"])
-                        and not np.isnan(results["t_90"])
-                        and results["t_90"] > results["t_30"]
-                    ):
-                        results["T_AB"] = results["t_90"] - results["t_30"]
-                except Exception as e_interp_front:
-                    logger.error(f"Erro interpolação frente SI: {e_interp_front}")
-
-        mask_after_peak = t_us >= peak_time_us_actual
-        t_after_us = t_us[mask_after_peak]
-        v_after_kv = v_kv[mask_after_peak]
-        v_50_target = 0.5 * peak_value_kv
-        if len(v_after_kv) > 1 and np.min(v_after_kv) <= v_50_target + 1e-6:
-            try:
-                indices_below_50 = np.where(v_after_kv <= v_50_target)[0]
-                if len(indices_below_50) > 0:
-                    idx2 = indices_below_50[0]
-                    idx1 = idx2 - 1 if idx2 > 0 else 0
-                    t1_tail, v1_tail = t_after_us[idx1], v_after_kv[idx1]
-                    t2_tail, v2_tail = t_after_us[idx2], v_after_kv[idx2]
-                    if abs(v2_tail - v1_tail) > 1e-9:
-                        t_half_us = t1_tail + (v_50_target - v1_tail) * (t2_tail - t1_tail) / (
-                            v2_tail - v1_tail
-                        )
-                        if not np.isnan(t_half_us):
-                            results["t_half"] = t_half_us
-                            results["t2_calculated"] = t_half_us - t_origin_us
-                    elif v1_tail >= v_50_target:
-                        results["t_half"] = t1_tail
-                        results["t2_calculated"] = t1_tail - t_origin_us
-            except Exception as e_interp_tail:
-                logger.error(f"Erro interpolação cauda SI (T2): {e_interp_tail}")
-
-        if results["T_AB"] is not None and results.get("t2_calculated") is not None:
-            try:
-                K = 2.42 - (3.08e-3 * results["T_AB"]) + (1.51e-6 * (results["t2_calculated"] ** 2))
-                results["tp"] = K * results["T_AB"]
-            except Exception as e_tp_calc:
-                logger.error(f"Erro cálculo Tp fórmula K: {e_tp_calc}")
-                results["tp"] = peak_time_us_actual - t_origin_us
-        else:
-            results["tp"] = peak_time_us_actual - t_origin_us
-
-        indices_above_90 = np.where(v_kv >= 0.9 * peak_value_kv)[0]
-        if len(indices_above_90) > 1:
-            results["td"] = t_us[indices_above_90[-1]] - t_us[indices_above_90[0]]
-
-        if (
-            len(v_after_kv) > 0 and np.min(v_after_kv) <= 1e-6
-        ):  # Verifica se cruza zero (com tolerância)
-            try:
-                zero_cross_indices = np.where(v_after_kv <= 0)[0]
-                if len(zero_cross_indices) > 0:
-                    first_zero_idx_rel = zero_cross_indices[0]
-                    first_zero_idx_abs = peak_index + first_zero_idx_rel
-                    if first_zero_idx_abs > 0:
-                        idx1_z_abs = first_zero_idx_abs - 1
-                        idx2_z_abs = first_zero_idx_abs
-                        t1_z, v1_z = t_us[idx1_z_abs], v_kv[idx1_z_abs]
-                        t2_z, v2_z = t_us[idx2_z_abs], v_kv[idx2_z_abs]
-                        if abs(v2_z - v1_z) > 1e-9 and v1_z > 0:
-                            tz_us = t1_z - v1_z * (t2_z - t1_z) / (v2_z - v1_z)
-                            if not np.isnan(tz_us):
-                                results["tz"] = tz_us
-                                results["tz_calculated"] = tz_us - t_origin_us
-                    else:
-                        results["tz"] = t_us[first_zero_idx_abs]
-                        results["tz_calculated"] = results["tz"] - t_origin_us
-            except Exception as e_interp_zero:
-                logger.error(f"Erro interpolação Tz SI: {e_interp_zero}")
-
-        if results["tp"] is not None:
-            tp_min = SWITCHING_IMPULSE_PEAK_TIME_NOM * (1 - SWITCHING_PEAK_TIME_TOLERANCE)
-            tp_max = SWITCHING_IMPULSE_PEAK_TIME_NOM * (1 + SWITCHING_PEAK_TIME_TOLERANCE)
-            results["conforme_pico"] = tp_min <= results["tp"] <= tp_max
-        if results.get("t2_calculated") is not None:
-            t2_min = SWITCHING_IMPULSE_TAIL_TIME_NOM * (1 - SWITCHING_TAIL_TOLERANCE)
-            t2_max = SWITCHING_IMPULSE_TAIL_TIME_NOM * (1 + SWITCHING_TAIL_TOLERANCE)
-            results["conforme_meia_onda"] = t2_min <= results["t2_calculated"] <= t2_max
-        if results.get("td") is not None:
-            results["conforme_td"] = results["td"] >= SWITCHING_TIME_ABOVE_90_MIN
-        if results.get("tz_calculated") is not None:
-            results["conforme_tz"] = results["tz_calculated"] >= SWITCHING_TIME_TO_ZERO_MIN
-        logger.info(
-            f"Análise SI: Vp={results.get('peak_value', 'N/A'):.1f} kV, Tp={results.get('tp', 'N/A'):.1f} µs, T2={results.get('t2_calculated', 'N/A'):.1f} µs, Td={results.get('td', 'N/A'):.1f} µs, Tz={results.get('tz_calculated', 'N/A'):.1f} µs"
-        )
-        logger.info(
-            f"Conformidade SI: Pico={results['conforme_pico']}, Cauda={results['conforme_meia_onda']}, Td={results['conforme_td']}, Tz={results['conforme_tz']}"
-        )
-        return results
-    except Exception as e:
-        logger.exception(f"Erro geral em analyze_switching_impulse: {e}")
-        return {"error": str(e)}
-
-
-def analyze_chopped_impulse(t_us, v_kv, chop_time_actual_us):
-    """Analisa os parâmetros de um impulso cortado (LIC)."""
-    logger.info(f"Analisando Impulso Cortado (LIC) com corte em {chop_time_actual_us:.2f} µs...")
-    results = {
-        "peak_value_full_wave": None,
-        "peak_time_full_wave": None,
-        "t_front": None,
-        "t_0_virtual": None,
-        "chop_time": None,
-        "chop_voltage": None,
-        "chop_voltage_orig": None,
-        "t_30": None,
-        "t_90": None,
-        "chop_collapse_time": None,
-        "undershoot": 0.0,
-        "conforme_frente": False,
-        "conforme_corte": False,
-        "conforme_undershoot": True,
-        "conforme_pico_corte": False,
-        "error": None,
-    }
-    if chop_time_actual_us is None or chop_time_actual_us <= t_us[0]:
-        results["error"] = "Tempo de corte não determinado ou inválido."
-        logger.warning(results["error"])
-        li_params = analyze_lightning_impulse(t_us, v_kv)  # Tenta analisar como LI
-        if "error" not in li_params:
-            results.update({k: v for k, v in li_params.items() if k in results})
-        return results
-    try:
-        chop_start_index = np.argmin(np.abs(t_us - chop_time_actual_us))
-        chop_start_index = min(max(chop_start_index, 1), len(t_us) - 2)
-        chop_time_us = t_us[chop_start_index]
-        t_before_chop_us = t_us[: chop_start_index + 1]
-        v_before_chop_kv = v_kv[: chop_start_index + 1]
-        if len(t_before_chop_us) < 5:
-            results["error"] = "Dados insuficientes antes do corte."
-            logger.error(results["error"])
-            return results
-        v_test_before_chop, v_base_before_chop, _, overshoot_before = calculate_k_factor_transform(
-            v_before_chop_kv, t_before_chop_us
-        )
-        if v_test_before_chop is None:
-            results["error"] = "Falha K-factor pré-corte."
-            logger.error(results["error"])
-            return results
-        chop_voltage_kv = np.interp(
-            chop_time_us,
-            t_before_chop_us,
-            v_test_before_chop,
-            left=v_test_before_chop[0],
-            right=v_test_before_chop[-1],
-        )
-        results["chop_voltage"] = chop_voltage_kv
-        results["chop_voltage_orig"] = v_kv[chop_start_index]
-        peak_idx_before = np.argmax(v_test_before_chop)
-        peak_time_us_before = t_before_chop_us[peak_idx_before]
-        peak_value_kv_before = v_test_before_chop[peak_idx_before]
-        results["peak_value_full_wave"] = peak_value_kv_before
-        results["peak_time_full_wave"] = peak_time_us_before
-        t_0_virtual_us = t_us[0]
-        mask_front = t_before_chop_us <= peak_time_us_before
-        t_front_us = t_before_chop_us[mask_front]
-        v_front_kv = v_test_before_chop[mask_front]
-        if len(v_front_kv) > 1 and peak_value_kv_before > 1e-6:
-            v_max_front = np.max(v_front_kv)
-            v_min_front = np.min(v_front_kv)
-            v_30_target = 0.3 * peak_value_kv_before
-            v_90_target = 0.9 * peak_value_kv_before
-            if v_max_front >= v_90_target and v_min_front <= v_30_target:
-                try:
-                    results["t_30"] = np.interp(
-                        v_30_target, v_front_kv, t_front_us, left=np.nan, right=np.nan
-                    )
-                    results["t_90"] = np.interp(
-                        v_90_target, v_front_kv, t_front_us, left=np.nan, right=np.nan
-                    )
-                    if (
-                        not np.isnan(results["t_30"])
-                        and not np.isnan(results["t_90"])
-                        and results["t_90"] > results["t_30"]
-                    ):
-                        delta_t = results["t_90"] - results["t_30"]
-                        if delta_t > 1e-9:
-                            results["t_front"] = 1.67 * delta_t
-                            slope = (v_90_target - v_30_target) / delta_t
-                            if abs(slope) > 1e-9:
-                                t_0_virtual_us = results["t_30"] - (v_30_target / slope)
-                except Exception as e_interp_front_lic:
-                    logger.error(f"Erro interpolação frente LIC: {e_interp_front_lic}")
-        results["t_0_virtual"] = t_0_virtual_us
-        results["chop_time"] = chop_time_us - t_0_virtual_us
-        results["chop_collapse_time"] = None
-        v_after_chop_kv = v_kv[chop_start_index + 1 :]
-        if len(v_after_chop_kv) > 0:
-            min_after_chop = np.min(v_after_chop_kv)
-            if min_after_chop < 0 and abs(results["chop_voltage"]) > 1e-9:
-                results["undershoot"] = (
-                    max(0.0, abs(min_after_chop) / abs(results["chop_voltage"])) * 100
-                )
-        if results["t_front"] is not None:
-            t1_min = LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 - CHOPPED_FRONT_TOLERANCE)
-            t1_max = LIGHTNING_IMPULSE_FRONT_TIME_NOM * (1 + CHOPPED_FRONT_TOLERANCE)
-            results["conforme_frente"] = t1_min <= results["t_front"] <= t1_max
-        if results["chop_time"] is not None:
-            results["conforme_corte"] = (
-                CHOPPED_IMPULSE_CHOP_TIME_MIN
-                <= results["chop_time"]
-                <= CHOPPED_IMPULSE_CHOP_TIME_MAX
-            )
-        results["conforme_undershoot"] = results["undershoot"] <= CHOPPED_UNDERSHOOT_MAX
-        logger.info(
-            f"Análise LIC: Vc={results.get('chop_voltage', 'N/A'):.1f} kV, T1_subj={results.get('t_front', 'N/A'):.2f} µs, Tc={results.get('chop_time', 'N/A'):.2f} µs, Undershoot={results.get('undershoot', 'N/A'):.1f}%"
-        )
-        logger.info(
-            f"Conformidade LIC: Frente={results['conforme_frente']}, Corte={results['conforme_corte']}, Undershoot={results['conforme_undershoot']}"
-        )
-        return results
-    except Exception as e:
-        logger.exception(f"Erro geral em analyze_chopped_impulse: {e}")
-        return {"error": str(e)}
+# --- Funções de Simulação e Análise da Forma de Onda ---
+# rlc_solution, double_exp_func, calculate_k_factor_transform, simulate_hybrid_impulse e
+# analyze_*_impulse vêm de app_core (kernel único em app_core.impulse_kernel).
 
 
 def interpolate_resistor_data(c_load_nf, reference_data):
@@ -1380,7 +668,11 @@ def create_waveform_analysis_table(
 
     def add_analysis_row(label, param_key, unit, req_min, req_max, is_max_limit=False, precision=2):
         value = analysis_results.get(param_key)
-        val_str = format_parameter_value(value, precision, unit)
+        # Valores já em µs/kV/%: sem prefixo SI (format_parameter_value exibiria "1.0 kkV")
+        if value is None or not np.isfinite(float(value)):
+            val_str = "N/A"
+        else:
+            val_str = f"{float(value):.{precision}f} {unit}"
         req_str = ""
         if is_max_limit and req_max is not None:
             req_str = f"≤ {req_max:.{precision}f} {unit}"
@@ -1843,177 +1135,299 @@ def consolidated_transformer_inductance_callback(
     raise dash.exceptions.PreventUpdate
 
 
-# Callback para atualizar o gráfico de impulso e salvar no store
+SIMULATION_MODEL_LABELS = {"hybrid": "RLC+K", "rlc": "RLC", "marx": "Marx"}
+
+# Chaves de create_waveform_analysis_table -> chaves de analyze_*_impulse
+ANALYSIS_TABLE_KEYS = {
+    "lightning": {
+        "test_value": "peak_value_test",
+        "t_front": "t_front_us",
+        "t_tail": "t_tail_us",
+        "overshoot": "overshoot_percent",
+    },
+    "switching": {
+        "peak_value": "peak_value_measured",
+        "tp": "t_p_us",
+        "t2_calculated": "t_2_us",
+        "td": "td_us",
+        "tz_calculated": "t_zero_us",
+    },
+    "chopped": {
+        "chop_voltage": "chop_voltage_test_kv",
+        "t_front": "t_front_us",
+        "chop_time": "chop_time_us",
+        "undershoot": "undershoot_percent",
+    },
+}
+
+
+def _analysis_table_results(analysis, impulse_type):
+    """Converte o resultado de analyze_*_impulse para as chaves da tabela de análise."""
+    if analysis.get("error"):
+        return {"error": analysis["error"]}
+    keys = ANALYSIS_TABLE_KEYS.get(impulse_type, {})
+    results = {key: analysis.get(source) for key, source in keys.items()}
+    # Sem a curva de ensaio (ajuste K falhou antes do corte), Vc é a tensão medida no corte
+    if impulse_type == "chopped" and not np.isfinite(results.get("chop_voltage") or np.nan):
+        results["chop_voltage"] = analysis.get("chop_voltage_measured_kv")
+    return results
+
+
+def create_waveform_figure(t_us, values, name, y_title, color, height):
+    """Figura (dicionário) de uma forma de onda simulada, decimada para o navegador."""
+    t_plot, y_plot = decimate_trace(t_us, values)
+    fig = go.Figure(
+        go.Scatter(x=t_plot, y=y_plot, mode="lines", name=name, line=dict(color=color, width=2))
+    )
+    fig.update_layout(
+        height=height,
+        margin=dict(t=10, b=30, l=40, r=10),
+        xaxis_title="Tempo (µs)",
+        yaxis_title=y_title,
+        paper_bgcolor="rgba(0,0,0,0)",
+        template="plotly_dark",
+        font={"size": 10},
+    )
+    return fig.to_dict()
+
+
+# Callback para simular a forma de onda com o modelo selecionado e salvar no store
 @app.callback(
     [
-        Output("impulse-graph", "figure"),
-        Output("impulse-results", "children"),
+        Output("impulse-waveform", "figure"),
+        Output("impulse-current", "figure"),
+        Output("waveform-analysis-table", "children"),
+        Output("circuit-parameters-display", "children"),
+        Output("energy-details-table", "children"),
         Output("impulse-store", "data"),
     ],
-    [Input("run-simulation", "n_clicks_timestamp")],  # Usando n_clicks_timestamp em vez de n_clicks
+    [Input("simulate-button", "n_clicks")],
     [
-        State("front-resistor", "value"),
-        State("tail-resistor", "value"),
-        State("capacitance", "value"),
-        State("transformer-inductance", "value"),
+        State("test-voltage", "value"),
+        State("generator-config", "value"),
+        State("simulation-model-type", "value"),
+        State("test-object-capacitance", "value"),
         State("stray-capacitance", "value"),
-        State("shunt-resistance", "value"),
-        State("simulation-time", "value"),
-        State("time-step", "value"),
+        State("shunt-resistor", "value"),
+        State("front-resistor-expression", "value"),
+        State("tail-resistor-expression", "value"),
+        State("inductance-adjustment-factor", "value"),
+        State("tail-resistance-adjustment-factor", "value"),
+        State("external-inductance", "value"),
+        State("transformer-inductance", "value"),
+        State("inductor", "value"),
         State("impulse-type", "value"),
+        State("gap-distance", "value"),
+        State("si-capacitor-value", "value"),
         State("impulse-store", "data"),
     ],
     prevent_initial_call=True,
 )
 def update_impulse_simulation(
     n_clicks,
-    r_front,
-    r_tail,
-    capacitance,
-    inductance,
-    stray_cap,
+    test_voltage,
+    generator_config,
+    simulation_model,
+    c_dut_pf,
+    c_stray_pf,
     shunt_res,
-    sim_time,
-    time_step,
+    rf_expression,
+    rt_expression,
+    inductance_factor,
+    tail_resistance_factor,
+    l_extra_uh,
+    l_transformer_h,
+    inductor_h,
     impulse_type,
+    gap_distance,
+    si_capacitor_value,
     current_store_data,
 ):
-    if n_clicks is None:
-        raise dash.exceptions.PreventUpdate
-
-    log.info(f"[IMPULSE SIMULATION] Iniciando simulação de impulso. Tipo: {impulse_type}")
-
-    try:
-        # Validar entradas
-        if None in [
-            r_front,
-            r_tail,
-            capacitance,
-            inductance,
-            stray_cap,
-            shunt_res,
-            sim_time,
-            time_step,
-        ]:
-            return dash.no_update, html.Div(
-                "Preencha todos os campos para simular", style={"color": "red"}
-            )
+    """
+    Simula o ensaio com o modelo de "simulation-model-type" (RLC+K, RLC ou Marx) e os
+    parâmetros da página; a carga inclui divisor e gap de corte (simulate_impulse_test).
+    """
+    if not n_clicks:
+        raise PreventUpdate
 
-        # Converter para valores numéricos
-        r_front = float(r_front)
-        r_tail = float(r_tail)
-        capacitance = float(capacitance) * 1e-9  # nF para F
-        inductance = float(inductance)
-        stray_cap = float(stray_cap) * 1e-12  # pF para F
-        shunt_res = float(shunt_res)
-        sim_time = float(sim_time) * 1e-6  # µs para s
-        time_step = float(time_step) * 1e-9  # ns para s
-
-        # Simular o circuito de impulso
-        t, v = simulate_impulse_circuit(
-            r_front, r_tail, capacitance, inductance, stray_cap, shunt_res, sim_time, time_step
-        )
+    simulation_model = simulation_model or "hybrid"
+    log.info(
+        f"[IMPULSE SIMULATION] Simulando {impulse_type} com o modelo {simulation_model} "
+        f"({generator_config})"
+    )
 
-        # Analisar a forma de onda
-        peak_voltage, rise_time, tail_time = analyze_impulse_waveform(t, v)
+    def error_outputs(message):
+        alert = dbc.Alert(message, color="danger", style={"fontSize": "0.7rem"})
+        return dash.no_update, dash.no_update, alert, alert, dash.no_update, dash.no_update
 
-        # Criar gráfico
-        fig = create_impulse_graph(t, v, peak_voltage, rise_time, tail_time)
+    if test_voltage is None or c_dut_pf is None:
+        return error_outputs("Preencha a tensão de ensaio e a capacitância do objeto.")
+    rf_per_column, _ = parse_resistor_expression(rf_expression)
+    rt_per_column, _ = parse_resistor_expression(rt_expression)
+    if math.isinf(rf_per_column) or math.isinf(rt_per_column):
+        return error_outputs("Expressão de resistor de frente ou cauda inválida.")
 
-        # Criar resultados
-        results = html.Div(
-            [
-                html.H5("Resultados da Simulação"),
-                html.P(f"Tensão de Pico: {peak_voltage:.2f} kV"),
-                html.P(f"Tempo de Frente (T1): {rise_time:.2f} µs"),
-                html.P(f"Tempo de Cauda (T2): {tail_time:.2f} µs"),
-                html.P(f"Forma de Onda: {rise_time:.1f}/{tail_time:.1f} µs"),
-            ]
+    try:
+        inductance_factor = float(inductance_factor or 1.0)
+        tail_resistance_factor = float(tail_resistance_factor or 1.0)
+        result = simulate_impulse_test(
+            generator_config,
+            float(test_voltage),
+            float(c_dut_pf),
+            rf_per_column,
+            rt_per_column,
+            impulse_type,
+            c_stray_pf=float(c_stray_pf or 0.0),
+            l_extra_h=float(l_extra_uh or 0.0) * 1e-6,  # µH para H
+            l_transformer_h=float(l_transformer_h or 0.0),
+            l_inductor_h=float(inductor_h or 0.0) if impulse_type != "switching" else 0.0,
+            gap_distance_cm=float(gap_distance) if gap_distance else None,
+            model=simulation_model,
+            inductance_factor=inductance_factor,
+            tail_resistance_factor=tail_resistance_factor,
         )
-
-        logger.info(f"Simulação de impulso concluída: {rise_time:.1f}/{tail_time:.1f} µs")
-
-        # Preparar dados para o store
-        if current_store_data is None:
-            current_store_data = {}
-
-        # Dados para o store - inputs usados e resultados calculados
-        import datetime
-
-        data_for_store = {
-            "impulse_type": impulse_type,
-            "inputs": {
-                "r_front": r_front,
-                "r_tail": r_tail,
-                "capacitance": capacitance,
-                "inductance": inductance,
-                "stray_cap": stray_cap,
-                "shunt_res": shunt_res,
-                "sim_time": sim_time,
-                "time_step": time_step,
+    except (TypeError, ValueError) as e:
+        log.exception(f"[IMPULSE SIMULATION] Erro na simulação: {e}")
+        return error_outputs(f"Erro na simulação: {e}")
+    if "error" in result:
+        return error_outputs(result["error"])
+
+    analysis = result["analysis"]
+    # O impulso cortado sem corte (gap não rompeu) é analisado como onda plena
+    table_type = "lightning" if analysis.get("waveform_type") == "LI" else impulse_type
+    table_results = _analysis_table_results(analysis, table_type)
+    analysis_table = create_waveform_analysis_table(
+        table_results, table_type, float(test_voltage), gap_distance
+    )
+    params_display = create_circuit_parameters_display(
+        {
+            "generator_config": generator_config,
+            "capacitances": {
+                "cg_eff": result["c_gen_effective_f"],
+                "c_dut": result["c_dut_f"],
+                "c_divider": result["c_divider_f"],
+                "c_stray": result["c_stray_f"],
+                "c_load_extra": result["c_load_extra_f"],
+                "cload": result["c_load_total_f"],
+                "ceq": result["c_eq_f"],
             },
-            "results": {
-                "peak_voltage": peak_voltage,
-                "rise_time": rise_time,
-                "tail_time": tail_time,
-                "waveform_type": f"{rise_time:.1f}/{tail_time:.1f} µs",
+            "inductances": {
+                "gen_eff": result["l_gen_effective_h"],
+                "ext": result["l_extra_h"],
+                "add": result["l_inductor_h"],
+                "load": result["l_transformer_h"],
+                "total_initial": result["l_total_h"] / inductance_factor,
+                "total": result["l_total_h"],
             },
-            "timestamp": datetime.datetime.now().isoformat(),
+            "resistances": {
+                "front_col": rf_per_column,
+                "tail_col": rt_per_column,
+                "rf_eff": result["rf_total_ohm"],
+                "rt_initial": result["rt_total_ohm"] / tail_resistance_factor,
+                "rt_eff": result["rt_total_ohm"],
+            },
+            "derived_params": {
+                "alpha": result["alpha"],
+                "beta": result["beta"],
+                "zeta": result["zeta"],
+            },
+            "efficiency": {
+                "circuit": result["efficiency_circuit"],
+                "shape": result["efficiency_shape"],
+                "total": result["efficiency_total"],
+            },
+            "charging_voltage": result["charging_voltage_kv"],
+            "actual_test_voltage": float(test_voltage),
         }
+    )
+    energy_table = create_energy_details_table(
+        result["energy_required_kj"], result["energy_available_kj"], generator_config
+    )
+    voltage_fig = create_waveform_figure(
+        result["t_us"], result["v_kv"], "Tensão", "Tensão (kV)", "#007bff", 300
+    )
+    current_fig = create_waveform_figure(
+        result["t_us"], result["i_load_a"], "Corrente", "Corrente (A)", "#dc3545", 250
+    )
 
-        # Adicionar os inputs específicos para impulso conforme solicitado
-        inputs_impulso = {
-            "tensao_kv": peak_voltage,
-            "config": impulse_type,
-            "modelo": "RLC+K",
-            "cap_dut_pf": capacitance * 1e12,  # Converter de F para pF
+    # Campos do formulário no nível principal (lidos por load_impulse_data_on_page_load)
+    data_for_store = {
+        "test_voltage": test_voltage,
+        "generator_config": generator_config,
+        "simulation_model_type": simulation_model,
+        "test_object_capacitance": c_dut_pf,
+        "stray_capacitance": c_stray_pf,
+        "shunt_resistor": shunt_res,
+        "front_resistor_expression": rf_expression,
+        "tail_resistor_expression": rt_expression,
+        "inductance_adjustment_factor": inductance_factor,
+        "tail_resistance_adjustment_factor": tail_resistance_factor,
+        "external_inductance": l_extra_uh,
+        "transformer_inductance": l_transformer_h,
+        "impulse_type": impulse_type,
+        "gap_distance": gap_distance,
+        "si_capacitor_value": si_capacitor_value,
+        "inputs_impulso": {
+            "tensao_kv": test_voltage,
+            "config": generator_config,
+            "tipo": impulse_type,
+            "modelo": SIMULATION_MODEL_LABELS.get(simulation_model, simulation_model),
+            "cap_dut_pf": c_dut_pf,
             "shunt_ohm": shunt_res,
-            "cap_parasita_pf": stray_cap * 1e12,  # Converter de F para pF
-            "rf_por_coluna": r_front,
-            "rt_por_coluna": r_tail,
-            "aj_l_fator": 1.0,  # Valor padrão
-            "aj_rt_fator": 1.0,  # Valor padrão
-            "l_extra_uh": 0.0,  # Valor padrão
-            "indutor_extra": "Não",  # Valor padrão
-            "l_carga_trafo_h": inductance,
-        }
-
-        # Atualizar o store com os novos dados
-        current_store_data.update(data_for_store)
-
-        # Adicionar os inputs específicos para impulso no store
-        if "inputs_impulso" not in current_store_data:
-            current_store_data["inputs_impulso"] = {}
-        current_store_data["inputs_impulso"].update(inputs_impulso)
-
-        # Serializar os dados antes de armazenar no MCP
-        serializable_data = convert_numpy_types(current_store_data, debug_path="impulse_update")
-
-        # Salvar no MCP para que outros módulos possam acessar
-        app.mcp.set_data("impulse-store", serializable_data)
-        log.info(f"[IMPULSE] Dados salvos no MCP (impulse-store)")
-
-        return fig, results, serializable_data
+            "cap_parasita_pf": c_stray_pf,
+            "rf_por_coluna": rf_per_column,
+            "rt_por_coluna": rt_per_column,
+            "aj_l_fator": inductance_factor,
+            "aj_rt_fator": tail_resistance_factor,
+            "l_extra_uh": l_extra_uh,
+            "indutor_extra": "Sim" if inductor_h else "Não",
+            "l_carga_trafo_h": l_transformer_h,
+        },
+        "resultados_impulso": {
+            "Tempo de Frente (μs)": analysis.get("t_front_us", analysis.get("t_p_us")),
+            "Tempo de Cauda (μs)": analysis.get("t_tail_us", analysis.get("t_2_us")),
+            "Eficiência (%)": result["efficiency_total"] * 100.0,
+            "Tensão de Carga (kV)": result["charging_voltage_kv"],
+            "Conforme": table_results.get("overall_compliance"),
+        },
+    }
+    store_data = dict(current_store_data or {})
+    store_data.update(data_for_store)
+    serializable_data = convert_numpy_types(store_data, debug_path="impulse_update")
+    app.mcp.set_data("impulse-store", serializable_data)
+    log.info("[IMPULSE] Dados salvos no MCP (impulse-store)")
 
-    except Exception as e:
-        logger.error(f"Erro na simulação de impulso: {e}")
-        return dash.no_update, html.Div(f"Erro: {str(e)}", style={"color": "red"}), dash.no_update
+    return (
+        voltage_fig,
+        current_fig,
+        analysis_table,
+        params_display,
+        energy_table,
+        serializable_data,
+    )
 
 
 # Funções auxiliares para simulação de impulso
+# (memoizadas no cache de impulso: re-simular com os mesmos parâmetros não recalcula)
+@impulse_memoize
 def simulate_impulse_circuit(
     r_front, r_tail, capacitance, inductance, stray_cap, shunt_res, sim_time, time_step
 ):
-    """Simula o circuito de impulso e retorna os vetores de tempo e tensão"""
-    # Implementação simplificada - em um sistema real, usaríamos uma biblioteca de simulação de circuitos
-    num_points = int(sim_time / time_step) + 1
-    t = np.linspace(0, sim_time, num_points)
+    """
+    Simula o circuito de impulso e retorna os vetores de tempo e tensão.
 
+    O vetor de tempo é adaptativo (denso na frente/pico, geométrico na cauda), com
+    `time_step` como passo da região densa; o número de pontos não depende de sim_time.
+    """
+    # Implementação simplificada - em um sistema real, usaríamos uma biblioteca de simulação de circuitos
     # Cálculo da forma de onda de impulso usando a equação padrão
     alpha = 1 / (r_tail * capacitance)
     beta = 1 / (r_front * capacitance)
     v0 = 1.0  # Tensão normalizada
 
+    t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else None
+    t = build_adaptive_time_grid(sim_time, t_peak, min_step_s=time_step)
+
     v = v0 * (np.exp(-alpha * t) - np.exp(-beta * t))
 
     # Normalizar para tensão de pico = 1.0
@@ -2023,6 +1437,7 @@ def simulate_impulse_circuit(
     return t, v
 
 
+@impulse_memoize
 def analyze_impulse_waveform(t, v):
     """Analisa a forma de onda de impulso e retorna os parâmetros principais"""
     # Encontrar tensão de pico
@@ -2032,18 +1447,28 @@ def analyze_impulse_waveform(t, v):
     # Converter tempo para µs para análise
     t_us = t * 1e6
 
+    def crossing_time(idx, level):
+        """Interpola linearmente o instante de cruzamento entre as amostras idx-1 e idx."""
+        if idx == 0 or v[idx] == v[idx - 1]:
+            return t_us[idx]
+        frac = (level - v[idx - 1]) / (v[idx] - v[idx - 1])
+        return t_us[idx - 1] + frac * (t_us[idx] - t_us[idx - 1])
+
     # Encontrar tempo de frente (T1)
     # Tempo entre 30% e 90% da tensão de pico, multiplicado por 1.67
+    # (interpolado, pois a grade de tempo pode ser não uniforme)
     idx_30 = np.where(v >= 0.3 * peak_voltage)[0][0]
     idx_90 = np.where(v >= 0.9 * peak_voltage)[0][0]
-    rise_time = 1.67 * (t_us[idx_90] - t_us[idx_30])
+    rise_time = 1.67 * (
+        crossing_time(idx_90, 0.9 * peak_voltage) - crossing_time(idx_30, 0.3 * peak_voltage)
+    )
 
     # Encontrar tempo de cauda (T2)
     # Tempo do início até 50% da tensão de pico na cauda
     idx_50_tail = np.where(v[peak_idx:] <= 0.5 * peak_voltage)[0]
     if len(idx_50_tail) > 0:
         idx_50_tail = idx_50_tail[0] + peak_idx
-        tail_time = t_us[idx_50_tail] - t_us[0]
+        tail_time = crossing_time(idx_50_tail, 0.5 * peak_voltage) - t_us[0]
     else:
         # Se não encontrar o ponto de 50%, estimar
         tail_time = 50.0  # valor padrão
@@ -2051,16 +1476,26 @@ def analyze_impulse_waveform(t, v):
     return peak_voltage, rise_time, tail_time
 
 
+@impulse_memoize
 def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
-    """Cria o gráfico da forma de onda de impulso"""
+    """
+    Cria o gráfico da forma de onda de impulso.
+
+    Retorna a figura como dicionário (aceito pelo dcc.Graph), que o cache copia a cada
+    acerto; um go.Figure memoizado seria compartilhado entre requisições.
+    """
     # Converter tempo para µs para exibição
     t_us = t * 1e6
+    t_max_us = max(t_us)
 
     fig = go.Figure()
 
-    # Adicionar a forma de onda
+    # Adicionar a forma de onda (decimada por envelope mín/máx para limitar o payload)
+    t_plot, v_plot = decimate_trace(t_us, v)
     fig.add_trace(
-        go.Scatter(x=t_us, y=v, mode="lines", name="Tensão", line=dict(color="#007bff", width=2))
+        go.Scatter(
+            x=t_plot, y=v_plot, mode="lines", name="Tensão", line=dict(color="#007bff", width=2)
+        )
     )
 
     # Adicionar linhas de referência
@@ -2068,7 +1503,7 @@ def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
         type="line",
         x0=0,
         y0=0.3,
-        x1=max(t_us),
+        x1=t_max_us,
         y1=0.3,
         line=dict(color="gray", width=1, dash="dash"),
     )
@@ -2076,7 +1511,7 @@ def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
         type="line",
         x0=0,
         y0=0.9,
-        x1=max(t_us),
+        x1=t_max_us,
         y1=0.9,
         line=dict(color="gray", width=1, dash="dash"),
     )
@@ -2084,7 +1519,7 @@ def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
         type="line",
         x0=0,
         y0=0.5,
-        x1=max(t_us),
+        x1=t_max_us,
         y1=0.5,
         line=dict(color="gray", width=1, dash="dash"),
     )
@@ -2094,14 +1529,14 @@ def create_impulse_graph(t, v, peak_voltage, rise_time, tail_time):
         title=f"Forma de Onda de Impulso {rise_time:.1f}/{tail_time:.1f} µs",
         xaxis_title="Tempo (µs)",
         yaxis_title="Tensão (p.u.)",
-        xaxis=dict(range=[0, min(100, max(t_us))]),  # Limitar a visualização a 100 µs
+        xaxis=dict(range=[0, min(100, t_max_us)]),  # Limitar a visualização a 100 µs
         yaxis=dict(range=[0, 1.1]),
         margin=dict(l=50, r=50, t=50, b=50),
         height=500,
         template="plotly_white",
     )
 
-    return fig
+    return fig.to_dict()
 
 
 # --- Callback para exibir informações do transformador removido ---
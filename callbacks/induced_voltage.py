@@ -10,7 +10,6 @@ import numbers # For type checking
 
 import dash_bootstrap_components as dbc
 import numpy as np
-import pandas as pd
 from dash import Input, Output, State, dcc, html, no_update, callback_context
 from dash.exceptions import PreventUpdate
 from plotly import graph_objects as go
@@ -19,6 +18,8 @@ from plotly import graph_objects as go
 from components.formatters import format_parameter_value
 from utils.theme_colors import APP_COLORS # Import centralized APP_COLORS
 from utils.routes import ROUTE_INDUCED_VOLTAGE, normalize_pathname
+from utils.plot_decimation import decimate_figure
+from utils.material_tables import TABELA_PERDAS_NUCLEO, TABELA_POTENCIA_MAGNET
 
 # Configurar logger
 log = logging.getLogger(__name__)
@@ -36,102 +37,6 @@ def safe_float(value, default=None):
         log.warning(f"safe_float: Não foi possível converter '{value}' para float. Retornando default: {default}")
         return default
 
-# Tabelas de potência magnética e perdas do núcleo
-potencia_magnet = {
-    (0.5, 50): 0.10, (0.5, 60): 0.15, (0.5, 100): 0.35, (0.5, 120): 0.45, (0.5, 150): 0.70, (0.5, 200): 1.00, (0.5, 240): 1.30,
-    (0.6, 50): 0.15, (0.6, 60): 0.20, (0.6, 100): 0.45, (0.6, 120): 0.60, (0.6, 150): 0.90, (0.6, 200): 1.40, (0.6, 240): 1.80,
-    (0.7, 50): 0.23, (0.7, 60): 0.28, (0.7, 100): 0.60, (0.7, 120): 0.80, (0.7, 150): 1.10, (0.7, 200): 1.70, (0.7, 240): 2.30,
-    (0.8, 50): 0.30, (0.8, 60): 0.35, (0.8, 100): 0.80, (0.8, 120): 1.00, (0.8, 150): 1.40, (0.8, 200): 2.20, (0.8, 240): 3.00,
-    (0.9, 50): 0.38, (0.9, 60): 0.45, (0.9, 100): 0.95, (0.9, 120): 1.30, (0.9, 150): 1.70, (0.9, 200): 2.80, (0.9, 240): 3.80,
-    (1.0, 50): 0.45, (1.0, 60): 0.55, (1.0, 100): 1.10, (1.0, 120): 1.60, (1.0, 150): 2.20, (1.0, 200): 3.50, (1.0, 240): 4.50,
-    (1.1, 50): 0.55, (1.1, 60): 0.70, (1.1, 100): 1.50, (1.1, 120): 2.00, (1.1, 150): 2.80, (1.1, 200): 4.10, (1.1, 240): 5.50,
-    (1.2, 50): 0.65, (1.2, 60): 0.85, (1.2, 100): 2.00, (1.2, 120): 2.40, (1.2, 150): 3.30, (1.2, 200): 5.00, (1.2, 240): 6.50,
-    (1.3, 50): 0.80, (1.3, 60): 1.00, (1.3, 100): 2.20, (1.3, 120): 2.85, (1.3, 150): 3.80, (1.3, 200): 6.00, (1.3, 240): 7.50,
-    (1.4, 50): 0.95, (1.4, 60): 1.20, (1.4, 100): 2.50, (1.4, 120): 3.30, (1.4, 150): 4.50, (1.4, 200): 7.00, (1.4, 240): 9.00,
-    (1.5, 50): 1.10, (1.5, 60): 1.40, (1.5, 100): 3.00, (1.5, 120): 4.00, (1.5, 150): 5.50, (1.5, 200): 9.00, (1.5, 240): 11.00,
-    (1.6, 50): 1.30, (1.6, 60): 1.60, (1.6, 100): 3.50, (1.6, 120): 4.80, (1.6, 150): 6.50, (1.6, 200): 12.00, (1.6, 240): 14.00,
-    (1.7, 50): 1.60, (1.7, 60): 2.00, (1.7, 100): 4.00, (1.7, 120): 5.50, (1.7, 150): 7.00, (1.7, 200): 15.00, (1.7, 240): 17.00,
-}
-perdas_nucleo = {
-    (0.5, 50): 0.10, (0.5, 60): 0.13, (0.5, 100): 0.25, (0.5, 120): 0.35, (0.5, 150): 0.50, (0.5, 200): 0.80, (0.5, 240): 1.10,
-    (0.6, 50): 0.12, (0.6, 60): 0.18, (0.6, 100): 0.38, (0.6, 120): 0.48, (0.6, 150): 0.70, (0.6, 200): 1.10, (0.6, 240): 1.50,
-    (0.7, 50): 0.15, (0.7, 60): 0.23, (0.7, 100): 0.50, (0.7, 120): 0.62, (0.7, 150): 0.95, (0.7, 200): 1.55, (0.7, 240): 2.10,
-    (0.8, 50): 0.20, (0.8, 60): 0.30, (0.8, 100): 0.65, (0.8, 120): 0.80, (0.8, 150): 1.20, (0.8, 200): 2.00, (0.8, 240): 2.80,
-    (0.9, 50): 0.25, (0.9, 60): 0.37, (0.9, 100): 0.82, (0.9, 120): 1.00, (0.9, 150): 1.50, (0.9, 200): 2.50, (0.9, 240): 3.50,
-    (1.0, 50): 0.32, (1.0, 60): 0.46, (1.0, 100): 1.00, (1.0, 120): 1.25, (1.0, 150): 1.85, (1.0, 200): 3.10, (1.0, 240): 4.20,
-    (1.1, 50): 0.41, (1.1, 60): 0.55, (1.1, 100): 1.21, (1.1, 120): 1.55, (1.1, 150): 2.20, (1.1, 200): 3.70, (1.1, 240): 5.00,
-    (1.2, 50): 0.50, (1.2, 60): 0.65, (1.2, 100): 1.41, (1.2, 120): 1.90, (1.2, 150): 2.70, (1.2, 200): 4.50, (1.2, 240): 6.00,
-    (1.3, 50): 0.60, (1.3, 60): 0.80, (1.3, 100): 1.65, (1.3, 120): 2.30, (1.3, 150): 3.20, (1.3, 200): 5.20, (1.3, 240): 7.00,
-    (1.4, 50): 0.71, (1.4, 60): 0.95, (1.4, 100): 1.95, (1.4, 120): 2.80, (1.4, 150): 3.80, (1.4, 200): 6.00, (1.4, 240): 8.50,
-    (1.5, 50): 0.85, (1.5, 60): 1.10, (1.5, 100): 2.30, (1.5, 120): 3.30, (1.5, 150): 4.50, (1.5, 200): 7.00, (1.5, 240): 10.00,
-    (1.6, 50): 1.00, (1.6, 60): 1.30, (1.6, 100): 2.80, (1.6, 120): 3.80, (1.6, 150): 5.30, (1.6, 200): 8.00, (1.6, 240): 12.00,
-    (1.7, 50): 1.20, (1.7, 60): 1.55, (1.7, 100): 3.50, (1.7, 120): 4.40, (1.7, 150): 6.00, (1.7, 200): 9.00, (1.7, 240): 15.00,
-}
-
-df_potencia_magnet = pd.DataFrame(list(potencia_magnet.items()), columns=["key", "potencia_magnet"])
-df_potencia_magnet[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-    df_potencia_magnet["key"].tolist(), index=df_potencia_magnet.index
-)
-df_potencia_magnet.drop("key", axis=1, inplace=True)
-df_potencia_magnet.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-
-df_perdas_nucleo = pd.DataFrame(list(perdas_nucleo.items()), columns=["key", "perdas_nucleo"])
-df_perdas_nucleo[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-    df_perdas_nucleo["key"].tolist(), index=df_perdas_nucleo.index
-)
-df_perdas_nucleo.drop("key", axis=1, inplace=True)
-df_perdas_nucleo.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-
-def buscar_valores_tabela(inducao_teste, frequencia_teste, df):
-    """Busca valores nas tabelas usando interpolação bilinear."""
-    # Ensure inputs are float
-    inducao_teste = safe_float(inducao_teste, default=0.0)
-    frequencia_teste = safe_float(frequencia_teste, default=0.0)
-
-    # Ensure values are not None and are floats
-    if inducao_teste is None:
-        inducao_teste = 0.0
-    if frequencia_teste is None:
-        frequencia_teste = 0.0
-
-    inducoes = sorted(df.index.get_level_values("inducao_nominal").unique())
-    frequencias = sorted(df.index.get_level_values("frequencia_nominal").unique())
-
-    inducao_teste_clipped = max(min(float(inducao_teste), max(inducoes)), min(inducoes))
-    frequencia_teste_clipped = max(min(float(frequencia_teste), max(frequencias)), min(frequencias))
-    
-    if inducao_teste != inducao_teste_clipped:
-        log.warning(f"Indução de teste {inducao_teste:.3f}T fora do range da tabela [{min(inducoes)}, {max(inducoes)}], usando {inducao_teste_clipped:.3f}T.")
-    if frequencia_teste != frequencia_teste_clipped:
-        log.warning(f"Frequência de teste {frequencia_teste:.1f}Hz fora do range da tabela [{min(frequencias)}, {max(frequencias)}], usando {frequencia_teste_clipped:.1f}Hz.")
-
-    inducao_teste = inducao_teste_clipped
-    frequencia_teste = frequencia_teste_clipped
-
-    ind_idx = np.searchsorted(inducoes, inducao_teste)
-    freq_idx = np.searchsorted(frequencias, frequencia_teste)
-
-    ind_idx = min(max(ind_idx, 1), len(inducoes) - 1)
-    freq_idx = min(max(freq_idx, 1), len(frequencias) - 1)
-
-    ind_low, ind_high = inducoes[ind_idx - 1], inducoes[ind_idx]
-    freq_low, freq_high = frequencias[freq_idx - 1], frequencias[freq_idx]
-    
-    q11 = df.loc[(ind_low, freq_low), df.columns[0]]
-    q12 = df.loc[(ind_low, freq_high), df.columns[0]]
-    q21 = df.loc[(ind_high, freq_low), df.columns[0]]
-    q22 = df.loc[(ind_high, freq_high), df.columns[0]]
-    
-    # Ensure q values are float
-    q11, q12, q21, q22 = float(q11), float(q12), float(q21), float(q22)
-
-    x = (inducao_teste - ind_low) / (ind_high - ind_low) if (ind_high - ind_low) != 0 else 0
-    y = (frequencia_teste - freq_low) / (freq_high - freq_low) if (freq_high - freq_low) != 0 else 0
-    
-    valor_interpolado = (1 - x) * (1 - y) * q11 + x * (1 - y) * q21 + (1 - x) * y * q12 + x * y * q22
-    return float(valor_interpolado)
-
-
 def register_induced_voltage_callbacks(app_instance):
     log.debug("Registrando callbacks de Tensão Induzida")
 
@@ -293,8 +198,10 @@ def register_induced_voltage_callbacks(app_instance):
             
             tensao_aplicada_bt = (float(tensao_bt) / float(tensao_at)) * tensao_prova if tensao_bt is not None and tensao_at not in (None, 0) else 0
 
-            fator_potencia_mag = buscar_valores_tabela(beta_teste, freq_teste, df_potencia_magnet)
-            fator_perdas = buscar_valores_tabela(beta_teste, freq_teste, df_perdas_nucleo)
+            fator_potencia_mag = TABELA_POTENCIA_MAGNET.lookup(beta_teste, freq_teste)
+            fator_perdas = TABELA_PERDAS_NUCLEO.lookup(beta_teste, freq_teste)
+            if fator_potencia_mag is None or fator_perdas is None:
+                raise ValueError("Fatores de potência/perdas não encontrados nas tabelas do núcleo.")
 
             results_data = {}
             pot_ativa = fator_perdas * peso_nucleo_kg / 1000.0
@@ -513,18 +420,17 @@ def register_induced_voltage_callbacks(app_instance):
             if un_ref_at == 0: raise ValueError("Un_ref_at (Tensão de referência AT) não pode ser zero.")
 
 
-            frequencias_tabela = [100, 120, 150, 180, 200, 240]
+            frequencias_tabela = np.array([100, 120, 150, 180, 200, 240], dtype=float)
             table_data = []
 
-            for freq_teste_tabela in frequencias_tabela:
-                fp_fn_tabela = freq_teste_tabela / freq_nominal
-                up_un_tabela = tensao_prova / un_ref_at if un_ref_at != 0 else 0
-                
-                beta_teste_tabela = inducao_nominal * (up_un_tabela / fp_fn_tabela) if fp_fn_tabela != 0 else 0
-                beta_teste_tabela = min(max(beta_teste_tabela, 0.01), 1.9)
+            # Varredura inteira avaliada de uma vez nas tabelas compiladas do núcleo
+            up_un_tabela = tensao_prova / un_ref_at if un_ref_at != 0 else 0
+            betas_tabela = np.clip(inducao_nominal * up_un_tabela * freq_nominal / frequencias_tabela, 0.01, 1.9)
+            fpm_array = TABELA_POTENCIA_MAGNET.interp(betas_tabela, frequencias_tabela)
+            fp_array = TABELA_PERDAS_NUCLEO.interp(betas_tabela, frequencias_tabela)
 
-                fpm_tabela = buscar_valores_tabela(beta_teste_tabela, freq_teste_tabela, df_potencia_magnet)
-                fp_tabela = buscar_valores_tabela(beta_teste_tabela, freq_teste_tabela, df_perdas_nucleo)
+            for freq_teste_tabela, fpm_tabela, fp_tabela in zip(frequencias_tabela, fpm_array, fp_array):
+                freq_teste_tabela, fpm_tabela, fp_tabela = float(freq_teste_tabela), float(fpm_tabela), float(fp_tabela)
 
                 pa_tabela = fp_tabela * peso_nucleo_kg / 1000.0
                 pm_tabela = fpm_tabela * peso_nucleo_kg / 1000.0
@@ -581,6 +487,7 @@ def register_induced_voltage_callbacks(app_instance):
             if tipo_transformador == "Monofásico":
                  fig.add_trace(go.Scatter(x=frequencias_plot, y=[row["pot_induzida"] for row in table_data], name="Potência Indutiva (kVAr ind)", line=dict(color=APP_COLORS.get("accent_alt","yellow"))))
             fig.add_trace(go.Scatter(x=frequencias_plot, y=[abs(row["pcap"]) for row in table_data], name="Potência Capacitiva (kVAr cap)", line=dict(color=APP_COLORS.get("success","green"))))
+            decimate_figure(fig)
             fig.update_layout(title="Potências vs. Frequência", template="plotly_dark", height=300, paper_bgcolor=APP_COLORS.get("background_card", "#2c2c2c"), plot_bgcolor=APP_COLORS.get("background_card", "#2c2c2c"), font_color=APP_COLORS.get("text_light", "#e0e0e0"))
             
             return html.Div([
@@ -1,20 +1,26 @@
 # callbacks/losses.py
 
 import datetime
-import itertools
 import logging
 import math
 
 import dash
 import dash_bootstrap_components as dbc
-import numpy as np
-import pandas as pd
 from dash import Input, Output, State, html, no_update, ctx
 from dash.exceptions import PreventUpdate
-from typing import Any, Optional
+from typing import Optional
 
 from app import app  # Garante que app está disponível
 from app_core.transformer_mcp_enhanced import TransformerMCPEnhanced # Importar o tipo correto
+from app_core.losses_engine import (
+    LoadLossInputs,
+    LossesEngine,
+    LossesInputError,
+    NoLoadInputs,
+    TransformerRating,
+)
+from app_core import cap_bank
+from app_core.losses_graph import LoadLossGraph
 # Garante que mcp está disponível corretamente
 mcp: Optional[TransformerMCPEnhanced] = getattr(app, "mcp", None) # Adicionar anotação de tipo com Optional
 # --- Local Style Constants (fallbacks) ---
@@ -39,6 +45,7 @@ COLORS = {
     "background_faint": "#343a40",
     "background_card": "#343a40",
     "text_header": "#f8f9fa",
+    "text_muted": "#6c757d",
     "danger": "#dc3545",
 }
 COMPONENTS = {
@@ -60,16 +67,8 @@ CONFIG_COLORS = {
     "info_bg_faint": "rgba(0, 191, 255, 0.2)",
 }
 from utils.constants import (
-    CAPACITORS_BY_VOLTAGE,
-    CS_SWITCHES_BY_VOLTAGE_MONO,
-    CS_SWITCHES_BY_VOLTAGE_TRI,
     DUT_POWER_LIMIT,
     EPS_CURRENT_LIMIT,
-    Q_SWITCH_POWERS,
-    SUT_AT_MAX_VOLTAGE,
-    SUT_AT_MIN_VOLTAGE,
-    SUT_AT_STEP_VOLTAGE,
-    SUT_BT_VOLTAGE,
     perdas_nucleo_data,
     potencia_magnet_data,
 )
@@ -86,6 +85,8 @@ if not hasattr(app, 'mcp'):
 
 # Importações da aplicação
 from components.validators import validate_dict_inputs
+from components import result_tables
+from utils import store_snapshot
 # from utils.components import create_input_row # Adicionado import para create_input_row
 
 log = logging.getLogger(__name__)
@@ -97,27 +98,17 @@ perdas_nucleo = perdas_nucleo_data
 # Tolerance for floating point comparisons
 epsilon = 1e-6
 
-# DataFrame Creation (No-Load Losses)
-try:
-    df_potencia_magnet = pd.DataFrame(
-        list(potencia_magnet.items()), columns=["key", "potencia_magnet"]
-    )
-    df_potencia_magnet[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-        df_potencia_magnet["key"].tolist(), index=df_potencia_magnet.index
-    )
-    df_potencia_magnet.drop("key", axis=1, inplace=True)
-    df_potencia_magnet.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
+# Motor de cálculo de perdas; os callbacks apenas convertem entradas e renderizam
+losses_engine = LossesEngine()
+# Perdas em carga incrementais: só recalcula os nós a jusante das entradas alteradas
+load_loss_graph = LoadLossGraph(losses_engine)
 
-    df_perdas_nucleo = pd.DataFrame(list(perdas_nucleo.items()), columns=["key", "perdas_nucleo"])
-    df_perdas_nucleo[["inducao_nominal", "frequencia_nominal"]] = pd.DataFrame(
-        df_perdas_nucleo["key"].tolist(), index=df_perdas_nucleo.index
-    )
-    df_perdas_nucleo.drop("key", axis=1, inplace=True)
-    df_perdas_nucleo.set_index(["inducao_nominal", "frequencia_nominal"], inplace=True)
-except Exception as e:
-    log.error(f"Erro criando DataFrames: {e}")
-    df_potencia_magnet, df_perdas_nucleo = pd.DataFrame(), pd.DataFrame()
 
+def safe_float(value, default=None):
+    try:
+        return float(value) if value is not None and value != "" else default
+    except (ValueError, TypeError):
+        return default
 
 # --- Render Functions (Assumed to be in layouts/losses.py) ---
 # Import render functions locally to avoid circular dependency
@@ -392,296 +383,32 @@ def losses_handle_perdas_vazio(
     # losses_data = app.mcp.get_data("losses-store")
 
     try:
-        # --- Constants & Helpers ---
-        tensao_sut_bt = SUT_BT_VOLTAGE
-        tensao_sut_at_min = SUT_AT_MIN_VOLTAGE
-        tensao_sut_at_max = SUT_AT_MAX_VOLTAGE
-        step_sut_at = SUT_AT_STEP_VOLTAGE
+        # --- Constants ---
         limite_corrente_eps = EPS_CURRENT_LIMIT
         limite_potencia_dut = DUT_POWER_LIMIT
-        # Small number for safe division is now epsilon (defined at module level)
-
-        def safe_float(value, default=None):
-            try:
-                return float(value) if value is not None and value != "" else default
-            except (ValueError, TypeError):
-                return default
-
-        # --- Calculations ---
-        frequencia = safe_float(transformer_data.get("frequencia", 60), 60)
-        perdas_vazio = safe_float(perdas_vazio_ui, 0.0)
-        peso_nucleo = safe_float(peso_nucleo_ui, 0.0)
-        corrente_excitacao_percentual = safe_float(corrente_excitacao_ui, 0.0)
-        tensao_bt_kv = safe_float(transformer_data.get("tensao_bt", 0), 0.0)  # Assume BT is in kV
-        inducao = safe_float(inducao_ui, 0.0)
-        tipo_transformador = transformer_data.get("tipo_transformador", "Trifásico")
-        corrente_nominal_bt = safe_float(transformer_data.get("corrente_nominal_bt", 0), 0.0)
-        potencia = safe_float(transformer_data.get("potencia_mva", 0), 0.0)
-        tensao_nominal_at = safe_float(transformer_data.get("tensao_at", 0), 0.0)
-        corrente_exc_1_1_input = safe_float(corrente_exc_1_1_ui)  # Keep None if empty/invalid
-        corrente_exc_1_2_input = safe_float(corrente_exc_1_2_ui)  # Keep None if empty/invalid
-
-        # --- Data Validation after Conversion ---
-        if any(
-            v is None or v <= epsilon
-            for v in [
-                potencia,
-                tensao_nominal_at,
-                tensao_bt_kv,
-                corrente_nominal_bt,
-                perdas_vazio,
-                inducao,
-                corrente_excitacao_percentual,
-            ]
-        ):
-            # Peso núcleo can be zero if calculated
-            error_msg_detail = ", ".join(
-                [
-                    f"{k}={v}"
-                    for k, v in {
-                        "Potência": potencia,
-                        "Tensão AT": tensao_nominal_at,
-                        "Tensão BT": tensao_bt_kv,
-                        "Corrente BT": corrente_nominal_bt,
-                        "Perdas Vazio": perdas_vazio,
-                        "Indução": inducao,
-                        "Corr Exc %": corrente_excitacao_percentual,
-                    }.items()
-                    if v is None or v <= epsilon
-                ]
-            )
-            error_div = html.Div(
-                f"Dados essenciais devem ser maiores que zero ou não nulos. Inválidos: {error_msg_detail}",
-                style=ERROR_STYLE,
-            )
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-        # Special check for peso_nucleo if it was an input > 0
-        if peso_nucleo is not None and peso_nucleo <= epsilon:
-            error_div = html.Div(
-                f"Peso do núcleo de projeto ({peso_nucleo}) deve ser maior que zero.",
-                style=ERROR_STYLE,
-            )
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-
-        sqrt_3 = math.sqrt(3) if tipo_transformador == "Trifásico" else 1.0
-        inducao_arredondada = round(inducao * 10) / 10
-        frequencias_validas = [50, 60, 100, 120, 150, 200, 240, 250, 300, 350, 400, 500]
-        frequencia_arredondada = min(frequencias_validas, key=lambda x: abs(x - frequencia))
 
-        # --- Factor Lookup ---
-        lookup_key = (inducao_arredondada, frequencia_arredondada)
+        # --- Calculations (motor de perdas, sem dependência da interface) ---
+        inputs_vazio = NoLoadInputs(
+            perdas_vazio_kw=safe_float(perdas_vazio_ui, 0.0),
+            peso_nucleo_ton=safe_float(peso_nucleo_ui, 0.0),
+            corrente_excitacao_percent=safe_float(corrente_excitacao_ui, 0.0),
+            inducao_t=safe_float(inducao_ui, 0.0),
+            corrente_exc_1_1_percent=safe_float(corrente_exc_1_1_ui),  # None se vazio/inválido
+            corrente_exc_1_2_percent=safe_float(corrente_exc_1_2_ui),  # None se vazio/inválido
+        )
         try:
-            # Use .get with a default to handle potential missing keys more gracefully
-            fator_perdas = (
-                df_perdas_nucleo.loc[lookup_key, "perdas_nucleo"]
-                if lookup_key in df_perdas_nucleo.index
-                else None
-            )
-            fator_potencia_mag = (
-                df_potencia_magnet.loc[lookup_key, "potencia_magnet"]
-                if lookup_key in df_potencia_magnet.index
-                else None
-            )
-            # More specific error if lookup worked but value is missing/None
-            if fator_perdas is None or fator_potencia_mag is None:
-                raise KeyError(f"Valor não encontrado para {lookup_key} em um dos DataFrames.")
-        except KeyError:
-            error_div = html.Div(
-                f"Fatores de perdas/potência não encontrados para Indução {inducao_arredondada}T @ {frequencia_arredondada}Hz.",
-                style=ERROR_STYLE,
-            )
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-        except Exception as e:
-            log.error(f"Erro ao buscar fatores no DataFrame: {e}")
-            error_div = html.Div(f"Erro ao buscar fatores: {e}", style=ERROR_STYLE)
-            return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
-
-        if (
-            fator_perdas is None
-            or not isinstance(fator_perdas, (int, float)) or fator_perdas <= epsilon
-            or fator_potencia_mag is None
-            or not isinstance(fator_potencia_mag, (int, float)) or fator_potencia_mag <= epsilon
-        ):
-            error_div = html.Div(
-                f"Fatores de perdas/potência inválidos ({fator_perdas=}, {fator_potencia_mag=}) para Indução {inducao_arredondada}T @ {frequencia_arredondada}Hz.",
-                style=ERROR_STYLE,
+            resultado_vazio = losses_engine.no_load(
+                TransformerRating.from_store(transformer_data), inputs_vazio
             )
+        except LossesInputError as e:
+            error_div = html.Div(str(e), style=ERROR_STYLE)
             return error_div, initial_dut_volt, initial_sut, initial_legend_obs, no_update
 
-        # --- Core & Excitation Calculations ---
-        peso_nucleo_calc = perdas_vazio / fator_perdas if isinstance(fator_perdas, (int, float)) and fator_perdas > epsilon else 0
-        potencia_mag = fator_potencia_mag * peso_nucleo_calc if isinstance(fator_potencia_mag, (int, float)) else 0  # kVAR
-        corrente_excitacao_calc = (
-            potencia_mag / (tensao_bt_kv * sqrt_3) if isinstance(tensao_bt_kv, (int, float)) and isinstance(sqrt_3, (int, float)) and (tensao_bt_kv * sqrt_3) > epsilon else 0
-        )  # A
-        corrente_excitacao_percentual_calc = (
-            (corrente_excitacao_calc / corrente_nominal_bt) * 100
-            if corrente_nominal_bt > epsilon
-            else 0
-        )
-
-        tensao_teste_1_1_kv = tensao_bt_kv * 1.1
-        tensao_teste_1_2_kv = tensao_bt_kv * 1.2
-
-        # Calculated 1.1pu / 1.2pu currents (based on M4 assumption)
-        corrente_excitacao_1_1_calc = 2 * corrente_excitacao_calc
-        corrente_excitacao_1_2_calc = 4 * corrente_excitacao_calc
-
-        # Project currents (from % input)
-        corrente_excitacao_projeto = corrente_nominal_bt * (corrente_excitacao_percentual / 100.0)
-        fator_excitacao_default = (
-            3 if tipo_transformador == "Trifásico" else 5
-        )  # Default multiplier if inputs are missing
-
-        if corrente_exc_1_1_input is not None:
-            corrente_excitacao_1_1 = corrente_nominal_bt * (corrente_exc_1_1_input / 100.0)
-        else:
-            corrente_excitacao_1_1 = fator_excitacao_default * corrente_excitacao_projeto
-
-        if corrente_exc_1_2_input is not None:
-            corrente_excitacao_1_2 = corrente_nominal_bt * (corrente_exc_1_2_input / 100.0)
-        else:
-            corrente_excitacao_1_2 = None  # No default assumption for 1.2pu
-
-        # Test Powers (kVA)
-        potencia_ensaio_1pu_calc_kva = tensao_bt_kv * corrente_excitacao_calc * sqrt_3
-        potencia_ensaio_1_1pu_calc_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1_calc * sqrt_3
-        potencia_ensaio_1_2pu_calc_kva = tensao_teste_1_2_kv * corrente_excitacao_1_2_calc * sqrt_3
-
-        potencia_ensaio_1pu_projeto_kva = tensao_bt_kv * corrente_excitacao_projeto * sqrt_3
-        potencia_ensaio_1_1pu_projeto_kva = tensao_teste_1_1_kv * corrente_excitacao_1_1 * sqrt_3
-        potencia_ensaio_1_2pu_projeto_kva = (
-            (tensao_teste_1_2_kv * corrente_excitacao_1_2 * sqrt_3)
-            if corrente_excitacao_1_2 is not None
-            else None
-        )
-
-        # Project Factors
-        fator_perdas_projeto = (
-            perdas_vazio / peso_nucleo if peso_nucleo > epsilon else 0
-        )  # W/kg (assuming peso is Ton -> *1000) -> Actually kW/Ton
-        potencia_mag_projeto_kvar = (
-            potencia_ensaio_1pu_projeto_kva  # Approximated as test power at 1pu
-        )
-        # fator_potencia_mag_projeto = potencia_mag_projeto_kvar / peso_nucleo if peso_nucleo > epsilon else 0 # kVAR / Ton
-        # Match units with M4 factor (VAR/kg)
-        fator_potencia_mag_projeto = (
-            (potencia_mag_projeto_kvar * 1000) / (peso_nucleo * 1000)
-            if peso_nucleo > epsilon
-            else 0
-        )  # VAR/kg
-
-        # --- Result Dictionaries ---
-        resultados_aco_m4 = {
-            "Perdas em Vazio (kW)": perdas_vazio,
-            "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
-            "Corrente de excitação calculada (A)": corrente_excitacao_calc,
-            "Corrente de excitação percentual (%)": corrente_excitacao_percentual_calc,
-            "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
-            "Tensão de teste 1.2 pu (kV)": tensao_teste_1_2_kv,
-            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1_calc,
-            "Corrente de excitação 1.2 pu (A)": corrente_excitacao_1_2_calc,
-            "Frequência (Hz)": frequencia,
-            "Potência Mag. (kVAR)": potencia_mag,
-            "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag,
-            "Fator de perdas (W/kg)": fator_perdas,  # Assuming input fator_perdas is W/kg
-            "Peso do núcleo Calculado(Ton)": peso_nucleo_calc,
-            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_calc_kva,
-            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_calc_kva,
-            "Potência de Ensaio (1.2 pu) (kVA)": potencia_ensaio_1_2pu_calc_kva,
-        }
-        resultados_projeto = {
-            "Perdas em Vazio (kW)": perdas_vazio,
-            "Tensão nominal teste 1.0 pu (kV)": tensao_bt_kv,
-            "Corrente Nominal BT (A)": corrente_nominal_bt,
-            "Corrente de excitação (A)": corrente_excitacao_projeto,
-            "Tensão de teste 1.1 pu (kV)": tensao_teste_1_1_kv,
-            "Corrente de excitação 1.1 pu (A)": corrente_excitacao_1_1,
-            "Frequência (Hz)": frequencia,
-            "Potência Mag. (kVAR)": potencia_mag_projeto_kvar,
-            "Fator de perdas Mag. (VAR/kg)": fator_potencia_mag_projeto,
-            "Fator de perdas (W/kg)": fator_perdas_projeto
-            * 1000
-            / 1000,  # kW/Ton -> W/kg? Assuming input perdas_vazio is kW, peso_nucleo is Ton. Then perdas_vazio / peso_nucleo = kW/Ton. Need W/kg. (kW/Ton) * (1000 W/kW) / (1000 kg/Ton) = W/kg
-            "Potência de Ensaio (1 pu) (kVA)": potencia_ensaio_1pu_projeto_kva,
-            "Potência de Ensaio (1.1 pu) (kVA)": potencia_ensaio_1_1pu_projeto_kva,
-        }
-        if corrente_excitacao_1_2 is not None:
-            resultados_projeto["Tensão de teste 1.2 pu (kV)"] = tensao_teste_1_2_kv
-            resultados_projeto["Corrente de excitação 1.2 pu (A)"] = corrente_excitacao_1_2
-            resultados_projeto[
-                "Potência de Ensaio (1.2 pu) (kVA)"
-            ] = potencia_ensaio_1_2pu_projeto_kva
-
-        # --- SUT/EPS Analysis (Vazio - Simple Reflection) ---
-        sut_analysis_data: dict[str, dict[str, str | list[Any]] | None] = {"1.0": None, "1.1": None, "1.2": None}
-        for pu_level in ["1.0", "1.1", "1.2"]:
-            V_teste_dut_lv_kv, I_exc_dut_lv = (None, None)
-            if pu_level == "1.0":
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_bt_kv, corrente_excitacao_projeto
-            elif pu_level == "1.1":
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_teste_1_1_kv, corrente_excitacao_1_1
-            elif pu_level == "1.2" and corrente_excitacao_1_2 is not None:
-                V_teste_dut_lv_kv, I_exc_dut_lv = tensao_teste_1_2_kv, corrente_excitacao_1_2
-
-            if (
-                V_teste_dut_lv_kv is None
-                or V_teste_dut_lv_kv <= epsilon
-                or I_exc_dut_lv is None
-                or I_exc_dut_lv <= epsilon
-            ):
-                sut_analysis_data[pu_level] = {
-                    "status": "Sem dados de corrente/tensão",
-                    "taps_info": [],
-                }
-                continue
-
-            V_target_sut_hv = V_teste_dut_lv_kv * 1000  # Target in Volts
-            taps_sut_hv = np.arange(tensao_sut_at_min, tensao_sut_at_max + step_sut_at, step_sut_at)
-            taps_sut_hv = taps_sut_hv[taps_sut_hv > epsilon]
-            if len(taps_sut_hv) == 0:
-                sut_analysis_data[pu_level] = {"status": "Faixa SUT inválida", "taps_info": []}  # Ensure type matches the annotation
-                continue
-
-            taps_adequados = [
-                tap for tap in taps_sut_hv if tap >= V_target_sut_hv - 1e-6
-            ]  # Tolerance
-
-            if not taps_adequados:
-                highest_sut_tap_kv = taps_sut_hv[-1] / 1000 if len(taps_sut_hv) > 0 else "N/A"
-                sut_analysis_data[pu_level] = {
-                    "status": f"Tensão > {highest_sut_tap_kv}kV SUT Max",
-                    "taps_info": [],
-                }
-                continue
-
-            diffs = {tap: abs(tap - V_target_sut_hv) for tap in taps_adequados}
-            taps_ordenados = sorted(taps_adequados, key=lambda tap: diffs[tap])
-            # Select top 5 closest ADEQUATE taps
-            top_taps = taps_ordenados[:5]
-
-            taps_info_list = []
-            for V_sut_hv_tap in top_taps:
-                if tensao_sut_bt <= epsilon:
-                    continue  # Avoid division by zero
-                ratio_sut = V_sut_hv_tap / tensao_sut_bt
-                I_sut_lv = I_exc_dut_lv * ratio_sut  # Simple reflection for vazio
-                percent_limite = (
-                    (I_sut_lv / limite_corrente_eps) * 100
-                    if limite_corrente_eps > epsilon
-                    else float("inf")
-                )
-                taps_info_list.append(
-                    {
-                        "tap_sut_kv": V_sut_hv_tap / 1000,
-                        "corrente_eps_a": I_sut_lv,
-                        "percent_limite": percent_limite,
-                    }
-                )
-
-            # Sort final list by voltage
-            taps_info_list.sort(key=lambda x: x["tap_sut_kv"])
-            sut_analysis_data[pu_level] = {"status": "OK", "taps_info": taps_info_list}
+        resultados_aco_m4 = resultado_vazio.resultados_aco_m4
+        resultados_projeto = resultado_vazio.resultados_projeto
+        sut_analysis_data = resultado_vazio.sut_analysis
+        corrente_excitacao_percentual = inputs_vazio.corrente_excitacao_percent
+        corrente_nominal_bt = resultados_projeto["Corrente Nominal BT (A)"]
 
         # --- Layout Helper Functions (Vazio - Unchanged) ---
         def create_general_parameters_table(res_proj, res_m4):
@@ -1298,27 +1025,10 @@ def losses_handle_perdas_vazio(
 
         # --- Update MCP (Vazio) ---
         # Prepare the new data to be stored
-        new_data = {
-            "resultados_aco_m4": resultados_aco_m4,
-            "resultados_projeto": resultados_projeto,
-            "perdas_vazio_kw": perdas_vazio,
-            "peso_nucleo": peso_nucleo,
-            "corrente_excitacao": corrente_excitacao_percentual,
-            "inducao": inducao,
-            "corrente_exc_1_1": corrente_exc_1_1_input,
-            "corrente_exc_1_2": corrente_exc_1_2_input,
-            "sut_analysis_data": sut_analysis_data,
-        }
+        new_data = resultado_vazio.to_store()
 
         # Adicionar os inputs específicos para perdas em vazio conforme solicitado
-        inputs_perdas_vazio = {
-            "perdas_vazio_kw": perdas_vazio,
-            "peso_nucleo_ton": peso_nucleo,
-            "corrente_excitacao_percentual": corrente_excitacao_percentual,
-            "inducao_nucleo_t": inducao,
-            "corrente_excitacao_1_1pu_percentual": corrente_exc_1_1_input,
-            "corrente_excitacao_1_2pu_percentual": corrente_exc_1_2_input,
-        }
+        inputs_perdas_vazio = inputs_vazio.to_store()
 
         # Initialize the store data if it's None
         store_para_salvar = current_losses_store_data if isinstance(current_losses_store_data, dict) else {}
@@ -1424,410 +1134,72 @@ def save_losses_data_to_store(current_losses_store_data, app):
     """Saves losses data to the store using patch_mcp."""
     patch_mcp("losses-store", current_losses_store_data, app)
 
-# Adicionar proteção de execução
-if __name__ == "__main__":
-    app.run_server(debug=True)
-
-def generate_q_combinations(num_switches=5):
-    """Generates all non-empty combinations of Q switch indices (1-based)."""
-    q_indices = list(range(1, num_switches + 1))
-    combinations = []
-    for i in range(1, num_switches + 1):
-        combinations.extend(itertools.combinations(q_indices, i))
-    return [list(comb) for comb in combinations]
-
-
-def calculate_q_combination_power(q_combination, available_caps):
-    """Calculates the total MVAr for a given Q combination across available capacitors."""
-    total_power = 0
-    # Assuming Q_SWITCH_POWERS["generic_cp"] holds the power steps [Q1, Q2, Q3, Q4, Q5] in MVAr
-    power_steps = Q_SWITCH_POWERS.get("generic_cp")
-    if not power_steps or len(power_steps) != 5:
-        log.error("Generic Q switch power profile is missing or invalid.")
-        return 0
-
-    power_per_cap = sum(power_steps[q - 1] for q in q_combination)
-    total_power = power_per_cap * len(available_caps)  # Sum power across all available units
-    return total_power
-
-
-def select_target_bank_voltage(max_test_voltage_kv):
-    """Selects the target capacitor bank voltage level based on max test voltage."""
-    # Use voltages where caps exist
-    cap_bank_voltages_num = sorted([float(v) for v in CAPACITORS_BY_VOLTAGE.keys()])
-    target_v_cf = None
-    target_v_sf = None
-
-    # Selection COM FATOR (V_test > V_bank * 1.1)
-    for v_bank in cap_bank_voltages_num:
-        if max_test_voltage_kv <= (v_bank * 1.1) + epsilon:
-            target_v_cf = v_bank
-            break
-    # If no suitable voltage found, use the highest available
-    if target_v_cf is None and cap_bank_voltages_num:
-        target_v_cf = cap_bank_voltages_num[-1]
-        log.warning(
-            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds 110% of highest bank ({cap_bank_voltages_num[-1]}kV). Using highest bank."
-        )
-
-    # Selection SEM FATOR (V_test <= V_bank)
-    for v_bank in cap_bank_voltages_num:
-        if max_test_voltage_kv <= v_bank + epsilon:
-            target_v_sf = v_bank
-            break
-    if target_v_sf is None and cap_bank_voltages_num:
-        target_v_sf = cap_bank_voltages_num[-1]
-        log.warning(
-            f"Max test voltage {max_test_voltage_kv:.2f}kV exceeds highest bank ({cap_bank_voltages_num[-1]}kV). Using highest bank for S/F."
-        )
-
-    # Return as strings for dictionary keys
-    target_v_cf_str = str(target_v_cf) if target_v_cf is not None else None
-    target_v_sf_str = str(target_v_sf) if target_v_sf is not None else None
-
-    return target_v_cf_str, target_v_sf_str
-
-
-def get_cs_configuration(target_bank_voltage_key, use_group1_only, circuit_type):
-    """Determines the CS switch configuration string."""
-    if target_bank_voltage_key is None:
-        return "N/A (Tensão alvo inválida)"
-
-    cs_switch_dict = (
-        CS_SWITCHES_BY_VOLTAGE_TRI if circuit_type == "Trifásico" else CS_SWITCHES_BY_VOLTAGE_MONO
-    )
-    # Ensure lookup key exactly matches the dictionary keys
-    available_switches = cs_switch_dict.get(str(target_bank_voltage_key))  # Ensure string key
-
-    if not available_switches:
-        log.warning(
-            f"No CS switches found for key '{target_bank_voltage_key}' (Type: {circuit_type}). Available keys: {list(cs_switch_dict.keys())}"
-        )
-        return f"N/A (Sem chaves CS para {target_bank_voltage_key}kV)"
-
-    cs_config_list = []
-    for switch_name in available_switches:
-        # Logic from C# GetCsConfiguration: Skip group 2 switches if use_group1_only is True for Trifásico
-        # Assuming Group 1 switches end in '1' (CSxA1 etc.) and Group 2 switches end in '2' (CSxA2 etc.)
-        is_group_2_switch = len(switch_name) > 4 and switch_name.endswith("2")  # e.g., CS1A2, CS2B2
-
-        if use_group1_only and circuit_type == "Trifásico" and is_group_2_switch:
-            log.debug(
-                f"Skipping Group 2 CS switch {switch_name} because use_group1_only is True (Trifásico)."
-            )
-            continue
-
-        # Monophase CS selection is simpler here, include all listed switches.
-        cs_config_list.append(switch_name)
-
-    return ", ".join(sorted(cs_config_list)) if cs_config_list else "N/A"  # Sort for consistency
-
-
-def find_best_q_configuration(target_bank_voltage_key, required_power_mvar, use_group1_only):
-    """Finds the best Q switch combination."""
-    if (
-        target_bank_voltage_key is None
-        or required_power_mvar is None
-        or required_power_mvar <= epsilon
-    ):
-        return "N/A", 0.0
-
-    # Ensure lookup key exactly matches the dictionary keys
-    all_available_caps = CAPACITORS_BY_VOLTAGE.get(
-        str(target_bank_voltage_key), []
-    )  # Ensure string key
-    if not all_available_caps:
-        log.warning(
-            f"No capacitors found for key '{target_bank_voltage_key}'. Available keys: {list(CAPACITORS_BY_VOLTAGE.keys())}"
-        )
-        return f"N/A (Sem capacitores para {target_bank_voltage_key}kV)", 0.0
-
-    # Corrected Group Logic: Group 1 ends with '1', Group 2 ends with '2' based on CAPACITORS_BY_VOLTAGE
-    if use_group1_only:
-        available_caps = [cap for cap in all_available_caps if len(cap) > 4 and cap.endswith("1")]
-        log.debug(f"Using Group 1 capacitors only ({target_bank_voltage_key}kV): {available_caps}")
-        if not available_caps:
-            log.warning(
-                f"No Group 1 (ending in '1') capacitors found for {target_bank_voltage_key}kV, trying all."
-            )
-            available_caps = all_available_caps  # Fallback to all
-    else:
-        available_caps = all_available_caps
-        log.debug(f"Using Group 1+2 capacitors ({target_bank_voltage_key}kV): {available_caps}")
-
-    if not available_caps:
-        return f"N/A (Sem capacitores selecionados para {target_bank_voltage_key}kV)", 0.0
-
-    q_combinations = generate_q_combinations()
-    best_combination = None
-    min_power_above_req = float("inf")
-
-    for q_comb in q_combinations:
-        current_power = calculate_q_combination_power(q_comb, available_caps)
-        # Need power slightly above or equal to required
-        if current_power >= required_power_mvar - epsilon:  # Add tolerance
-            if current_power < min_power_above_req - epsilon:  # Found a better (lower) power
-                min_power_above_req = current_power
-                best_combination = q_comb
-            # If powers are equal (within tolerance), prefer the one with fewer switches (simpler combo)
-            elif (
-                abs(current_power - min_power_above_req) < epsilon
-                and best_combination
-                and len(q_comb) < len(best_combination)
-            ):
-                min_power_above_req = (
-                    current_power  # Update power in case it's slightly different but within epsilon
-                )
-                best_combination = q_comb
-
-    if best_combination:
-        q_config_str = ", ".join(
-            [f"Q{q}" for q in sorted(best_combination)]
-        )  # Sort for consistency
-        return (
-            q_config_str,
-            min_power_above_req,
-        )  # Return the actual power provided by this combination
-    else:
-        # Calculate max possible power with all Q switches on all available caps
-        max_possible_power = calculate_q_combination_power([1, 2, 3, 4, 5], available_caps)
-        required_str = f"{required_power_mvar:.1f}" if required_power_mvar else "?"
-        max_str = f"{max_possible_power:.1f}" if max_possible_power is not None else "?"
-        log.warning(
-            f"Could not find suitable Q config for {target_bank_voltage_key}kV, {required_power_mvar:.2f} MVAr. Max possible: {max_possible_power:.2f} MVAr"
-        )
-        return f"N/A (Req: {required_str} MVAr > Max: {max_str} MVAr)", max_possible_power
-
-
-def suggest_capacitor_bank_config(max_voltage_kv, max_power_mvar, circuit_type):
-    """Suggests CS and Q configuration based on max requirements."""
-    log.info(
-        f"Suggesting config for Max V: {max_voltage_kv:.2f} kV, Max Q Req: {max_power_mvar:.2f} MVAr, Type: {circuit_type}"
-    )
-
-    if (
-        max_voltage_kv is None
-        or max_voltage_kv <= epsilon
-        or max_power_mvar is None
-        or max_power_mvar <= epsilon
-    ):
-        return "N/A (Dados insuficientes)", "N/A", 0.0
-
-    # 1. Select Target Bank Voltage (use Com Fator for lookups)
-    target_v_cf_key, _ = select_target_bank_voltage(max_voltage_kv)
-    if target_v_cf_key is None:
-        log.error("Could not determine target bank voltage.")
-        return "N/A (Erro Tensão)", "N/A", 0.0
-
-    # 2. Determine if Group 1 is sufficient for Com Fator
-    # Corrected Group Logic: Group 1 ends with '1', Group 2 ends with '2'
-    group1_caps = [
-        cap
-        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_cf_key, [])
-        if len(cap) > 4 and cap.endswith("1")
-    ]
-    max_power_group1 = (
-        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps) if group1_caps else 0
-    )
-    # Use tolerance when comparing power requirements
-    use_group1_only = max_power_mvar <= max_power_group1 + epsilon
-    log.debug(
-        f"Target Voltage Key: {target_v_cf_key}, Max Power Group 1: {max_power_group1:.2f} MVAr, Required Power: {max_power_mvar:.2f} MVAr -> Use Group 1 Only: {use_group1_only}"
-    )
-
-    # 3. Get CS Configuration for Com Fator
-    cs_config_str = get_cs_configuration(target_v_cf_key, use_group1_only, circuit_type)
 
-    # 4. Get Q Configuration for Com Fator (using max_power_mvar directly)
-    q_config_str, q_power_mvar_provided = find_best_q_configuration(
-        target_v_cf_key, max_power_mvar, use_group1_only
-    )
-
-    return cs_config_str, q_config_str, q_power_mvar_provided
-
-
-# --- *** NEW: Helper Function for Compensated SUT/EPS Current Calculation *** ---
-def calculate_sut_eps_current_compensated(
-    tensao_ref_dut_kv,
-    corrente_ref_dut_a,
-    q_power_scenario_sf_mvar,
-    cap_bank_voltage_scenario_sf_kv,
-    q_power_scenario_cf_mvar,
-    cap_bank_voltage_scenario_cf_kv,
-    transformer_type,
-    V_sut_hv_tap_v,
-    tensao_sut_bt_v,
-    limite_corrente_eps_a,
-):
+def create_cap_bank_plan_card(plano_banco: Optional[dict]):
     """
-    Calculates the net EPS current demanded from the SUT LV side,
-    considering reactive compensation from a capacitor bank for both S/F and C/F cases.
-
-    Args:
-        tensao_ref_dut_kv: DUT test voltage (kV) for the scenario.
-        corrente_ref_dut_a: DUT test current (A) for the scenario.
-        q_power_scenario_sf_mvar: Reactive power PROVIDED by the S/F configured cap bank (MVAr).
-        cap_bank_voltage_scenario_sf_kv: NOMINAL voltage of the S/F configured cap bank (kV).
-        q_power_scenario_cf_mvar: Reactive power PROVIDED by the C/F configured cap bank (MVAr).
-        cap_bank_voltage_scenario_cf_kv: NOMINAL voltage of the C/F configured cap bank (kV).
-        transformer_type: 'Trifásico' or 'Monofásico'.
-        V_sut_hv_tap_v: SUT HV tap voltage being analyzed (Volts).
-        tensao_sut_bt_v: SUT nominal LV voltage (Volts).
-        limite_corrente_eps_a: EPS current limit (Amps).
-
-    Returns:
-        dict: {'corrente_eps_sf_a': sf_net_current, 'percent_limite_sf': sf_percentage,
-               'corrente_eps_cf_a': cf_net_current, 'percent_limite_cf': cf_percentage}
+    Card com o plano de arranjos do banco de capacitores (`CapBankPlan.to_store()`);
+    None quando o otimizador falhou.
     """
-
-    # Basic validation
-    if any(
-        v is None or v <= epsilon
-        for v in [tensao_ref_dut_kv, corrente_ref_dut_a, V_sut_hv_tap_v, tensao_sut_bt_v]
-    ):
-        log.warning(
-            "Compensated current calc: Invalid base inputs (Vref, Iref, Vsut_hv, Vsut_bt). Returning uncompensated."
-        )
-        # Calculate uncompensated as fallback
-        ratio_sut = V_sut_hv_tap_v / tensao_sut_bt_v if tensao_sut_bt_v > epsilon else 0
-        I_dut_reflected = corrente_ref_dut_a * ratio_sut
-        percent_limite = (
-            (I_dut_reflected / limite_corrente_eps_a) * 100
-            if limite_corrente_eps_a > epsilon
-            else float("inf")
+    if plano_banco is None:
+        body = html.Div(
+            "Plano do banco indisponível (falha no otimizador; ver log).", style=PLACEHOLDER_STYLE
         )
-        return {
-            "corrente_eps_sf_a": I_dut_reflected,
-            "percent_limite_sf": percent_limite,
-            "corrente_eps_cf_a": I_dut_reflected,
-            "percent_limite_cf": percent_limite,
-        }
-
-    # 1. Calculate SUT Ratio
-    ratio_sut = V_sut_hv_tap_v / tensao_sut_bt_v  # V/V
-
-    # 2. Calculate Initial Reflected Current (DUT demand on SUT LV side)
-    I_dut_reflected = corrente_ref_dut_a * ratio_sut  # Amps
-
-    # 3. Calculate Sqrt(3) Factor
-    sqrt_3_factor = math.sqrt(3) if transformer_type == "Trifásico" else 1.0
-
-    # 4. Initialize results with uncompensated values
-    I_eps_sf_net = I_dut_reflected
-    I_eps_cf_net = I_dut_reflected
-
-    # 5. Calculate S/F compensation
-    sf_compensation_valid = (
-        q_power_scenario_sf_mvar is not None
-        and q_power_scenario_sf_mvar > epsilon
-        and cap_bank_voltage_scenario_sf_kv is not None
-        and cap_bank_voltage_scenario_sf_kv > epsilon
-    )
-
-    if sf_compensation_valid:
-        try:
-            # Calculate Corrected Reactive Power for S/F
-            Cap_Correct_factor_sf = (
-                0.25
-                if cap_bank_voltage_scenario_sf_kv in [13.8, 23.9]
-                else 0.75
-                if cap_bank_voltage_scenario_sf_kv in [41.4, 71.7]
-                else 1.0
-            )
-            q_denominator_sf = (
-                tensao_ref_dut_kv / cap_bank_voltage_scenario_sf_kv
-            ) ** 2 * Cap_Correct_factor_sf
-            pteste_mvar_corrected_sf = (
-                q_power_scenario_sf_mvar * q_denominator_sf if q_denominator_sf > epsilon else 0
-            )
-
-            # Calculate Capacitive Current for S/F
-            I_cap_base_sf = (pteste_mvar_corrected_sf * 1000.0) / (
-                tensao_ref_dut_kv * sqrt_3_factor
-            )
-            I_cap_adjustment_sf = I_cap_base_sf * ratio_sut
-
-            # Calculate Net EPS Current for S/F
-            I_eps_sf_net = I_dut_reflected - I_cap_adjustment_sf
-
-            log.debug(
-                f"S/F Calc: Tap={V_sut_hv_tap_v/1000:.1f}kV, Q_prov={q_power_scenario_sf_mvar:.2f}MVAr @ {cap_bank_voltage_scenario_sf_kv:.1f}kV"
-            )
-            log.debug(
-                f"  S/F: Factor={Cap_Correct_factor_sf}, Q_corr={pteste_mvar_corrected_sf:.2f}MVAr, I_cap_adj={I_cap_adjustment_sf:.1f}A, I_net={I_eps_sf_net:.1f}A"
-            )
-        except Exception as e:
-            log.error(f"S/F current calc error: {e}")
-            # Keep default uncompensated value
-
-    # 6. Calculate C/F compensation
-    cf_compensation_valid = (
-        q_power_scenario_cf_mvar is not None
-        and q_power_scenario_cf_mvar > epsilon
-        and cap_bank_voltage_scenario_cf_kv is not None
-        and cap_bank_voltage_scenario_cf_kv > epsilon
-    )
-
-    if cf_compensation_valid:
-        try:
-            # Calculate Corrected Reactive Power for C/F
-            Cap_Correct_factor_cf = (
-                1.0
-                if cap_bank_voltage_scenario_cf_kv in [13.8, 23.9]
-                else 1.0
-                if cap_bank_voltage_scenario_cf_kv in [41.4, 71.7]
-                else 1.0
-            )
-            q_denominator_cf = (
-                tensao_ref_dut_kv / cap_bank_voltage_scenario_cf_kv
-            ) ** 2 * Cap_Correct_factor_cf
-            pteste_mvar_corrected_cf = (
-                q_power_scenario_cf_mvar * q_denominator_cf if q_denominator_cf > epsilon else 0
-            )
-
-            # Calculate Capacitive Current for C/F
-            I_cap_base_cf = (pteste_mvar_corrected_cf * 1000.0) / (
-                tensao_ref_dut_kv * sqrt_3_factor
-            )
-            I_cap_adjustment_cf = I_cap_base_cf * ratio_sut
-
-            # Calculate Net EPS Current for C/F
-            I_eps_cf_net = I_dut_reflected - I_cap_adjustment_cf
-
-            log.debug(
-                f"C/F Calc: Tap={V_sut_hv_tap_v/1000:.1f}kV, Q_prov={q_power_scenario_cf_mvar:.2f}MVAr @ {cap_bank_voltage_scenario_cf_kv:.1f}kV"
-            )
-            log.debug(
-                f"  C/F: Factor={Cap_Correct_factor_cf}, Q_corr={pteste_mvar_corrected_cf:.2f}MVAr, I_cap_adj={I_cap_adjustment_cf:.1f}A, I_net={I_eps_cf_net:.1f}A"
+    else:
+        rows = [
+            (
+                f"Arranjo {i}",
+                *(
+                    result_tables.ValueCell(((text, None),))
+                    for text in (
+                        setup["tensao_banco_kv"],
+                        setup["cs_config"],
+                        setup["q_config"],
+                        f"{setup['potencia_mvar']:.1f}",
+                        ", ".join(setup["condicoes"]),
+                    )
+                ),
             )
-        except Exception as e:
-            log.error(f"C/F current calc error: {e}")
-            # Keep default uncompensated value
-
-    # 7. Calculate % Limit for both S/F and C/F
-    percent_limite_sf = (
-        (abs(I_eps_sf_net) / limite_corrente_eps_a) * 100
-        if limite_corrente_eps_a > epsilon
-        else float("inf")
-    )
-    if I_eps_sf_net < 0:
-        percent_limite_sf = -percent_limite_sf
-
-    percent_limite_cf = (
-        (abs(I_eps_cf_net) / limite_corrente_eps_a) * 100
-        if limite_corrente_eps_a > epsilon
-        else float("inf")
+            for i, setup in enumerate(plano_banco["arranjos"], start=1)
+        ]
+        notes = [
+            f"Trocas de arranjo: {plano_banco['trocas_de_arranjo']} "
+            f"({plano_banco['manobras_de_chaves']} manobras de chaves)"
+        ]
+        if plano_banco["sem_arranjo"]:
+            notes.append(f"Sem arranjo: {', '.join(plano_banco['sem_arranjo'])}")
+        if not plano_banco["otimo"]:
+            notes.append("Busca interrompida no limite de nós (melhor plano encontrado).")
+        body = html.Div(
+            [
+                result_tables.results_table(
+                    ("Arranjo", "Banco (kV)", "CS", "Q", "MVAr", "Condições de ensaio"),
+                    ("10%", "10%", "20%", "15%", "8%", "37%"),
+                    rows,
+                )
+                if rows
+                else html.Div(plano_banco["resumo"], style=PLACEHOLDER_STYLE),
+                *(html.Div(note, style=TABLE_PARAM_STYLE_SM) for note in notes),
+            ],
+            style=TABLE_WRAPPER_STYLE,
+        )
+    return dbc.Card(
+        [
+            dbc.CardHeader(
+                html.H6(
+                    "PLANO DO BANCO DE CAPACITORES (todos os cenários, EPS no limite)",
+                    className="text-center m-0",
+                    style=CARD_HEADER_STYLE,
+                ),
+                style=COMPONENTS["card_header"],
+            ),
+            dbc.CardBody(body, style=COMPONENTS["card_body"]),
+        ],
+        style={**COMPONENTS["card"], "marginBottom": "1rem"},
     )
-    if I_eps_cf_net < 0:
-        percent_limite_cf = -percent_limite_cf
-
-    return {
-        "corrente_eps_sf_a": I_eps_sf_net,
-        "percent_limite_sf": percent_limite_sf,
-        "corrente_eps_cf_a": I_eps_cf_net,
-        "percent_limite_cf": percent_limite_cf,
-    }
 
+# Adicionar proteção de execução
+if __name__ == "__main__":
+    app.run_server(debug=True)
 
 # --- MODIFIED Callback Perdas em Carga ---
 @dash.callback(
@@ -1946,6 +1318,7 @@ def losses_handle_perdas_carga(
     if not isinstance(losses_data["resultados_perdas_vazio"], dict):
         log.error(f"[LOSSES CARGA] 'resultados_perdas_vazio' não é um dicionário. Tipo atual: {type(losses_data['resultados_perdas_vazio'])}")
         # Tentar inicializar como dicionário vazio
+        losses_data = store_snapshot.mutable(losses_data)
         losses_data["resultados_perdas_vazio"] = {}
         log.warning("[LOSSES CARGA] Inicializando 'resultados_perdas_vazio' como dicionário vazio.")
 
@@ -1968,6 +1341,7 @@ def losses_handle_perdas_carga(
         # Verificar se há dados no current_losses_store_data
         if current_losses_store_data and isinstance(current_losses_store_data, dict) and "resultados_perdas_vazio" in current_losses_store_data and isinstance(current_losses_store_data["resultados_perdas_vazio"], dict) and "perdas_vazio_kw" in current_losses_store_data["resultados_perdas_vazio"]:
             log.info("[LOSSES CARGA] Copiando valor de 'perdas_vazio_kw' do current_losses_store_data.")
+            losses_data = store_snapshot.mutable(losses_data, "resultados_perdas_vazio")
             losses_data["resultados_perdas_vazio"]["perdas_vazio_kw"] = current_losses_store_data["resultados_perdas_vazio"]["perdas_vazio_kw"]
         else:
             error_div = html.Div(
@@ -1982,6 +1356,7 @@ def losses_handle_perdas_carga(
         # Verificar se há dados no current_losses_store_data
         if current_losses_store_data and isinstance(current_losses_store_data, dict) and "resultados_perdas_vazio" in current_losses_store_data and isinstance(current_losses_store_data["resultados_perdas_vazio"], dict) and "perdas_vazio_kw" in current_losses_store_data["resultados_perdas_vazio"] and current_losses_store_data["resultados_perdas_vazio"]["perdas_vazio_kw"] is not None:
             log.info("[LOSSES CARGA] Usando valor de 'perdas_vazio_kw' do current_losses_store_data.")
+            losses_data = store_snapshot.mutable(losses_data, "resultados_perdas_vazio")
             losses_data["resultados_perdas_vazio"]["perdas_vazio_kw"] = current_losses_store_data["resultados_perdas_vazio"]["perdas_vazio_kw"]
         else:
             error_div = html.Div(
@@ -1995,12 +1370,6 @@ def losses_handle_perdas_carga(
 
     try:
         # --- Helpers & Constants ---
-        def safe_float(value, default=None):
-            try:
-                return float(value) if value is not None and value != "" else default
-            except (ValueError, TypeError):
-                return default
-
         def get_formatted(res_dict, key, precision=2):
             # Helper to safely format values from the results dictionary
             if res_dict and key in res_dict and res_dict[key] is not None:
@@ -2018,803 +1387,125 @@ def losses_handle_perdas_carga(
             return "-"  # Return hyphen if key missing or value is None
 
         temperatura_ref = int(temperatura_referencia_ui) if temperatura_referencia_ui is not None else 75
-        # Use voltage keys from CAPACITORS_BY_VOLTAGE for consistency
-        cap_bank_voltages = sorted([float(v) for v in CAPACITORS_BY_VOLTAGE.keys()])
-        sqrt_3 = math.sqrt(3)
-
-        # --- Input Processing ---
-        perdas_totais_nom_input = safe_float(perdas_carga_nom_ui)
-        perdas_totais_min_input = safe_float(perdas_carga_min_ui)
-        perdas_totais_max_input = safe_float(perdas_carga_max_ui)
-        perdas_vazio_nom = safe_float(losses_data["resultados_perdas_vazio"].get("perdas_vazio_kw"))
-
-        # Validate essential numeric inputs
-        if any(
-            v is None
-            for v in [
-                perdas_totais_nom_input,
-                perdas_totais_min_input,
-                perdas_totais_max_input,
-                perdas_vazio_nom,
-            ]
-        ):
-            error_div = html.Div(
-                "Valores de perdas (carga e vazio) devem ser numéricos.", style=ERROR_STYLE
-            )
-            return initial_detailed_content, error_div, no_update
-        if any(
-            v is not None and v <= 0
-            for v in [perdas_totais_nom_input, perdas_totais_min_input, perdas_totais_max_input]
-        ):
-            error_div = html.Div(
-                "Valores de perdas totais em carga devem ser maiores que zero.", style=ERROR_STYLE
-            )
-            return initial_detailed_content, error_div, no_update
-        if perdas_vazio_nom is not None and perdas_vazio_nom <= 0:
-            error_div = html.Div(
-                "Valor de perdas em vazio deve ser maior que zero.", style=ERROR_STYLE
-            )
-            return initial_detailed_content, error_div, no_update
 
-        tipo_transformador = transformer_data.get("tipo_transformador", "Trifásico")
-        potencia = safe_float(transformer_data.get("potencia_mva"))
-        tensao_nominal_at = safe_float(transformer_data.get("tensao_at"))
-        tensao_at_tap_maior = safe_float(transformer_data.get("tensao_at_tap_maior"))
-        tensao_at_tap_menor = safe_float(transformer_data.get("tensao_at_tap_menor"))
-        impedancia = safe_float(transformer_data.get("impedancia"))
-        impedancia_tap_maior = safe_float(transformer_data.get("impedancia_tap_maior"))
-        impedancia_tap_menor = safe_float(transformer_data.get("impedancia_tap_menor"))
-
-        # Validate essential transformer numerics
-        essential_transformer_nums = [
-            potencia,
-            tensao_nominal_at,
-            tensao_at_tap_maior,
-            tensao_at_tap_menor,
-            impedancia,
-            impedancia_tap_maior,
-            impedancia_tap_menor,
-        ]
-        if any(v is None for v in essential_transformer_nums):
-            missing_keys = [
-                k
-                for k, v in transformer_data.items()
-                if k
-                in [
-                    "potencia_mva",
-                    "tensao_at",
-                    "tensao_at_tap_maior",
-                    "tensao_at_tap_menor",
-                    "impedancia",
-                    "impedancia_tap_maior",
-                    "impedancia_tap_menor",
-                ]
-                and v is None
-            ]
-            error_div = html.Div(
-                f"Dados numéricos essenciais do transformador estão faltando: {', '.join(missing_keys)}.",
-                style=ERROR_STYLE,
-            )
-            return initial_detailed_content, error_div, no_update
-        if any(v is not None and v <= epsilon for v in essential_transformer_nums):
-            invalid_keys = [
-                k
-                for k, v in transformer_data.items()
-                if k
-                in [
-                    "potencia_mva",
-                    "tensao_at",
-                    "tensao_at_tap_maior",
-                    "tensao_at_tap_menor",
-                    "impedancia",
-                    "impedancia_tap_maior",
-                    "impedancia_tap_menor",
-                ]
-                and (v is not None and v <= epsilon)
-            ]
-            error_div = html.Div(
-                f"Dados essenciais do transformador devem ser maiores que zero: {', '.join(invalid_keys)}.",
-                style=ERROR_STYLE,
+        # --- Calculations (motor de perdas, sem dependência da interface) ---
+        inputs_carga = LoadLossInputs(
+            perdas_totais_nom_kw=safe_float(perdas_carga_nom_ui),
+            perdas_totais_min_kw=safe_float(perdas_carga_min_ui),
+            perdas_totais_max_kw=safe_float(perdas_carga_max_ui),
+            perdas_vazio_kw=safe_float(losses_data["resultados_perdas_vazio"].get("perdas_vazio_kw")),
+            temperatura_referencia_c=temperatura_ref,
+        )
+        try:
+            resultado_carga = load_loss_graph.load_losses(
+                TransformerRating.from_store(transformer_data), inputs_carga
             )
+        except LossesInputError as e:
+            log.error(str(e))
+            error_div = html.Div(str(e), style=ERROR_STYLE)
             return initial_detailed_content, error_div, no_update
+        log.info(
+            f"Perdas em carga: {len(load_loss_graph.last_recomputed)} nós recalculados "
+            f"de {len(load_loss_graph.graph.node_names)}"
+        )
+        # Plano de arranjos do banco: uma falha do otimizador não impede a exibição
+        # e o salvamento das perdas (o card informa a indisponibilidade)
+        try:
+            plano_banco = losses_engine.cap_bank_plan(
+                resultado_carga, transformer_data.get("tipo_transformador", "Trifásico")
+            ).to_store()
+            log.info(f"Plano do banco (todos os cenários, EPS no limite): {plano_banco['resumo']}")
+        except Exception as e:
+            log.exception(f"Falha ao calcular o plano do banco de capacitores: {e}")
+            plano_banco = None
+
+        perdas_totais_nom_input = inputs_carga.perdas_totais_nom_kw
+        perdas_totais_min_input = inputs_carga.perdas_totais_min_kw
+        perdas_totais_max_input = inputs_carga.perdas_totais_max_kw
+        perdas_vazio_nom = inputs_carga.perdas_vazio_kw
+        resultados = resultado_carga.resultados
+        overload_applicable = resultado_carga.overload_applicable
+        cs_config_str = resultado_carga.suggested_cs_config
+        q_config_str = resultado_carga.suggested_q_config
+        q_power_mvar_provided_overall = resultado_carga.suggested_q_power_mvar
+        max_test_voltage_kv_overall = resultado_carga.max_test_voltage_kv_overall
+        max_test_power_mvar_overall_required = resultado_carga.max_test_power_mvar_overall_required
 
-        sqrt_3_factor = sqrt_3 if tipo_transformador == "Trifásico" else 1.0
+        # --- Layout Generation Setup ---
+        class ParameterAnalyzer:
+            # (Unchanged from previous version)
+            def __init__(self):
+                self.type_keywords = {
+                    "tensao": ["Tensão", "Vcc (kV)", "Cap Bank Voltage"],
+                    "corrente": ["Corrente"],
+                    "perdas": ["Perdas", "Potencia Ativa EPS"],
+                    "pteste": [
+                        "Pteste",
+                        "Cap Bank Power",
+                        "Q Power Provided",
+                    ],  # Includes MVA and MVAr (required and provided)
+                }
+                cap_bank_voltages_num = cap_bank.CATALOG.voltages_kv.tolist()
+                high_voltage_threshold = (
+                    95.6
+                    if 95.6 in cap_bank_voltages_num
+                    else (cap_bank_voltages_num[-1] if cap_bank_voltages_num else 100.0)
+                )
 
-        # Verificar se as correntes já estão disponíveis no transformer_data
-        corrente_at_nom = safe_float(transformer_data.get("corrente_nominal_at"))
-        corrente_at_max = safe_float(transformer_data.get("corrente_nominal_at_tap_maior"))
-        corrente_at_min = safe_float(transformer_data.get("corrente_nominal_at_tap_menor"))
+                self.thresholds = {
+                    "tensao": 95.6,  # Highlight if test voltage exceeds 95.6 kV
+                    "corrente": 2000,  # Highlight if current exceeds 2000 A
+                    "perdas": 1300,  # Highlight if losses exceed 1300 kW
+                    "pteste_high": 93.6,  # Highlight if power exceeds 93.6 MVA/MVAr
+                    "pteste_medium": 46.8,  # Highlight if power exceeds 46.8 MVA/MVAr
+                    "default": float("inf"),
+                }
+                self.highlight_colors = {
+                    "tensao": {
+                        "backgroundColor": "#ffcdd2",
+                        "color": "black",
+                    },  # Soft red for voltage (kV)
+                    "corrente": {
+                        "backgroundColor": "#ffcc80",
+                        "color": "black",
+                    },  # Soft orange for current (A)
+                    "perdas": {
+                        "backgroundColor": "#d1c4e9",
+                        "color": "black",
+                    },  # Soft violet for losses (kW)
+                    "pteste_high": {
+                        "backgroundColor": "#ffb74d",
+                        "color": "black",
+                    },  # Deep orange for high power (MVA/MVAr)
+                    "pteste_medium": {
+                        "backgroundColor": "#fff59d",
+                        "color": "black",
+                    },  # Soft yellow for medium power (MVA/MVAr)
+                }
 
-        # Log das correntes obtidas do transformer_data
-        log.info(f"[losses] Correntes obtidas do transformer_data: AT Nominal={corrente_at_nom}A, AT Tap Maior={corrente_at_max}A, AT Tap Menor={corrente_at_min}A")
+            def get_param_type(self, param_name):
+                # Exclude Cap Bank Power Req fields from highlighting
+                if "Cap Bank Power" in param_name and "Req" in param_name:
+                    return "default"
 
-        # Se alguma corrente não estiver disponível, calcular manualmente
-        if corrente_at_nom is None or corrente_at_nom <= epsilon:
-            corrente_at_nom = (
-                (potencia * 1000 / (tensao_nominal_at * sqrt_3_factor))
-                if tensao_nominal_at > epsilon
-                else 0
-            )
-            log.info(f"[losses] Corrente AT Nominal calculada manualmente: {corrente_at_nom}A (Fórmula: {potencia}*1000/({tensao_nominal_at}*{sqrt_3_factor}))")
+                # 1. Campos de Tensão (Destacados em vermelho Suave)
+                if any(keyword in param_name for keyword in ["Tensão", "Cap Bank V Disp."]):
+                    return "tensao"
 
-        if corrente_at_max is None or corrente_at_max <= epsilon:
-            corrente_at_max = (
-                (potencia * 1000 / (tensao_at_tap_maior * sqrt_3_factor))
-                if tensao_at_tap_maior > epsilon
-                else 0
-            )
-            log.info(f"[losses] Corrente AT Tap Maior calculada manualmente: {corrente_at_max}A (Fórmula: {potencia}*1000/({tensao_at_tap_maior}*{sqrt_3_factor}))")
+                # 2. Campos de Corrente (Destacados em laranja Suave)
+                if "Corrente" in param_name:
+                    return "corrente"
 
-        if corrente_at_min is None or corrente_at_min <= epsilon:
-            corrente_at_min = (
-                (potencia * 1000 / (tensao_at_tap_menor * sqrt_3_factor))
-                if tensao_at_tap_menor > epsilon
-                else 0
-            )
-            log.info(f"[losses] Corrente AT Tap Menor calculada manualmente: {corrente_at_min}A (Fórmula: {potencia}*1000/({tensao_at_tap_menor}*{sqrt_3_factor}))")
+                # 3. Campos de Perdas (Destacados em violeta Suave)
+                if any(keyword in param_name for keyword in ["Perdas", "Potencia Ativa"]):
+                    return "perdas"
 
-        # Log das correntes finais que serão utilizadas
-        log.info(f"[losses] Correntes finais utilizadas: AT Nominal={corrente_at_nom}A, AT Tap Maior={corrente_at_max}A, AT Tap Menor={corrente_at_min}A")
-
-        if any(v <= epsilon for v in [corrente_at_nom, corrente_at_max, corrente_at_min]):
-            error_div = html.Div(
-                "Falha ao calcular correntes nominais AT (resultado zero ou negativo). Verifique tensões e potência.",
-                style=ERROR_STYLE,
-            )
-            return initial_detailed_content, error_div, no_update
-
-        # --- Capacitor Bank Calculation Function (For individual scenarios) ---
-        def calculate_cap_bank(voltage, power):
-            """Calculates capacitor bank voltage and power requirements.
-            Returns tuple: (V_bank_cf, Q_bank_cf, V_bank_sf, Q_bank_sf)
-            cf = Com Fator (selected based on V_test > V_bank * 1.1)
-            sf = Sem Fator (selected based on V_test <= V_bank)
-            """
-            if voltage is None or power is None or voltage <= epsilon or power <= epsilon:
-                return None, None, None, None
-            try:
-                voltage_f = float(voltage)
-                power_f = float(power)  # Power is expected in MVA for this calc
-
-                local_cap_bank_voltages = cap_bank_voltages  # Use globally defined sorted list
-
-                if not local_cap_bank_voltages:  # Check if list is empty
-                    log.error("Lista de tensões de banco de capacitores está vazia.")
-                    return None, None, None, None
-
-                # Selection COM FATOR (Find smallest bank V where V_test > V_bank * 1.1)
-                cap_bank_voltage_com_fator = next(
-                    (v for v in local_cap_bank_voltages if voltage_f <= (v * 1.1) + 1e-6),
-                    local_cap_bank_voltages[-1],
-                )
-
-                # Selection SEM FATOR (Find smallest bank V where V_test <= V_bank)
-                cap_bank_voltage_sem_fator = next(
-                    (v for v in local_cap_bank_voltages if voltage_f <= v + 1e-6),
-                    local_cap_bank_voltages[-1],
-                )
-
-                # Definir o fator de correção com base na tensão do banco
-                def get_cap_correct_factor(bank_voltage):
-                    # Alterado para sempre retornar 1.0, independentemente da tensão do banco
-                    return 1.0
-
-                pot_cap_bank_com_fator = None
-                if cap_bank_voltage_com_fator is not None and cap_bank_voltage_com_fator > epsilon:
-                    # Aplicar o mesmo fator de correção para C/F
-                    Cap_Correct_factor_cf = get_cap_correct_factor(cap_bank_voltage_com_fator)
-                    q_denominator_cf = (
-                        voltage_f / cap_bank_voltage_com_fator
-                    ) ** 2 * Cap_Correct_factor_cf
-                    pot_cap_bank_com_fator = (
-                        power_f / q_denominator_cf if q_denominator_cf > epsilon else float("inf")
-                    )
-
-                pot_cap_bank_sem_fator = None
-                if cap_bank_voltage_sem_fator is not None and cap_bank_voltage_sem_fator > epsilon:
-                    Cap_Correct_factor_sf = get_cap_correct_factor(cap_bank_voltage_sem_fator)
-                    q_denominator_sf = (
-                        voltage_f / cap_bank_voltage_sem_fator
-                    ) ** 2 * Cap_Correct_factor_sf
-                    pot_cap_bank_sem_fator = (
-                        power_f / q_denominator_sf if q_denominator_sf > epsilon else float("inf")
-                    )
-
-                return (
-                    cap_bank_voltage_com_fator,
-                    pot_cap_bank_com_fator,
-                    cap_bank_voltage_sem_fator,
-                    pot_cap_bank_sem_fator,
-                )
-            except (ValueError, TypeError, ZeroDivisionError) as e:
-                log.error(f"Error in calculate_cap_bank(V={voltage}, P={power}): {e}")
-                return None, None, None, None
-
-        # --- Main Calculation Loop ---
-        cenarios = [
-            (tensao_nominal_at, corrente_at_nom, impedancia, perdas_totais_nom_input, "Nominal"),
-            (
-                tensao_at_tap_menor,
-                corrente_at_min,
-                impedancia_tap_menor,
-                perdas_totais_min_input,
-                "Menor",
-            ),
-            (
-                tensao_at_tap_maior,
-                corrente_at_max,
-                impedancia_tap_maior,
-                perdas_totais_max_input,
-                "Maior",
-            ),
-        ]
-        resultados = []
-        calculation_error = False
-
-        # Variables to track maximums for overall config suggestion
-        max_test_voltage_kv_overall = 0.0
-        max_test_power_mva_overall = 0.0
-        max_test_power_mvar_overall_required = 0.0  # Track max *required* reactive power
-
-        for i, (tensao, corrente, imp, perdas_totais, tap_label) in enumerate(cenarios):
-            res_dict = {"Tap": tap_label, "Tensão": tensao, "Corrente": corrente, "Vcc (%)": imp}
-
-            vcc_percent = imp
-            # Calculate Vcc in kV
-            vcc = (tensao / 100.0) * vcc_percent if tensao > 0 else 0.0
-            res_dict["Vcc (kV)"] = vcc
-
-            pnominal = tensao * corrente * sqrt_3_factor  # kVA
-            res_dict["Pnominal (kVA)"] = pnominal
-
-            res_dict["Perdas totais (kW)"] = perdas_totais
-            perdas_carga_sem_vazio = perdas_totais - perdas_vazio_nom
-            if perdas_carga_sem_vazio <= epsilon:
-                error_msg = f"Perdas em carga ({perdas_carga_sem_vazio:.2f} kW) no Tap {tap_label} são inválidas (não positivas). Verifique as perdas totais ({perdas_totais:.2f}) e em vazio ({perdas_vazio_nom:.2f})."
-                log.error(error_msg)
-                error_div = html.Div(error_msg, style=ERROR_STYLE)
-                calculation_error = True
-                break  # Stop calculation loop
-
-            res_dict["Perdas Carga Sem Vazio (kW)"] = perdas_carga_sem_vazio
-
-            # Calculate cold losses (at 25°C) from reference temperature
-            temp_factor = (
-                (235.0 + 25.0) / (235.0 + float(temperatura_ref))
-                if (235.0 + float(temperatura_ref)) > epsilon
-                else 1.0
-            )
-            perdas_cc_a_frio = perdas_carga_sem_vazio * temp_factor
-            if perdas_cc_a_frio <= epsilon:
-                error_msg = f"Cálculo de Perdas CC a frio ({perdas_cc_a_frio:.2f} kW) no Tap {tap_label} resultou em valor inválido."
-                log.error(error_msg)
-                error_div = html.Div(error_msg, style=ERROR_STYLE)
-                calculation_error = True
-                break
-            res_dict["Perdas a Frio (25°C) (kW)"] = perdas_cc_a_frio
-
-            # Calculate "Frio" (Cold Energization - Total Losses) test parameters
-            frio_ratio_sqrt = (
-                np.sqrt(perdas_totais / perdas_cc_a_frio) if perdas_cc_a_frio > epsilon else 0
-            )
-            tensao_frio = frio_ratio_sqrt * vcc
-            corrente_frio = frio_ratio_sqrt * corrente
-            pteste_frio_kva = tensao_frio * corrente_frio * sqrt_3_factor  # kVA
-            pteste_frio_mva = pteste_frio_kva / 1000.0  # MVA
-            potencia_ativa_eps_frio_kw = perdas_totais  # Total losses for cold energization
-            # Calculate reactive power Q = sqrt(S^2 - P^2)
-            pteste_frio_mvar = (
-                math.sqrt(max(0, pteste_frio_kva**2 - potencia_ativa_eps_frio_kw**2)) / 1000.0
-                if pteste_frio_kva >= potencia_ativa_eps_frio_kw
-                else 0
-            )
-
-            res_dict.update(
-                {
-                    "Tensão frio (kV)": tensao_frio,
-                    "Corrente frio (A)": corrente_frio,
-                    "Pteste frio (MVA)": pteste_frio_mva,
-                    "Potencia Ativa EPS Frio (kW)": potencia_ativa_eps_frio_kw,
-                    "Pteste frio (MVAr)": pteste_frio_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_frio = calculate_cap_bank(tensao_frio, pteste_frio_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage Frio Com Fator (kV)": cap_bank_frio[0],
-                    "Cap Bank Power Frio Com Fator (MVAr)": cap_bank_frio[1],  # Required C/F
-                    "Cap Bank Voltage Frio Sem Fator (kV)": cap_bank_frio[2],
-                    "Cap Bank Power Frio Sem Fator (MVAr)": cap_bank_frio[3],  # Required S/F
-                }
-            )
-            # Update overall maximums based on test conditions and required bank power
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_frio or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_frio_mva or 0)
-            if cap_bank_frio[1] is not None and not math.isinf(cap_bank_frio[1]):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_frio[1]
-                )
-            if cap_bank_frio[3] is not None and not math.isinf(cap_bank_frio[3]):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_frio[3]
-                )
-
-            # Calculate "Quente" (Hot Condition - Load Losses at Tref) test parameters
-            quente_ratio_sqrt = (
-                np.sqrt(perdas_carga_sem_vazio / perdas_cc_a_frio)
-                if perdas_cc_a_frio > epsilon
-                else 0
-            )
-            tensao_quente = quente_ratio_sqrt * vcc
-            corrente_quente = quente_ratio_sqrt * corrente
-            pteste_quente_kva = tensao_quente * corrente_quente * sqrt_3_factor  # kVA
-            pteste_quente_mva = pteste_quente_kva / 1000.0  # MVA
-            potencia_ativa_eps_quente_kw = (
-                perdas_carga_sem_vazio  # Just the load losses at Tref for this test's active power
-            )
-            pteste_quente_mvar = (
-                math.sqrt(max(0, pteste_quente_kva**2 - potencia_ativa_eps_quente_kw**2))
-                / 1000.0
-                if pteste_quente_kva >= potencia_ativa_eps_quente_kw
-                else 0
-            )
-
-            res_dict.update(
-                {
-                    "Tensão quente (kV)": tensao_quente,
-                    "Corrente quente (A)": corrente_quente,
-                    "Pteste quente (MVA)": pteste_quente_mva,
-                    "Potencia Ativa Quente (kW)": potencia_ativa_eps_quente_kw,  # Corrected active power
-                    "Pteste quente (MVAr)": pteste_quente_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_quente = calculate_cap_bank(tensao_quente, pteste_quente_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage Quente Com Fator (kV)": cap_bank_quente[0],
-                    "Cap Bank Power Quente Com Fator (MVAr)": cap_bank_quente[1],  # Required C/F
-                    "Cap Bank Voltage Quente Sem Fator (kV)": cap_bank_quente[2],
-                    "Cap Bank Power Quente Sem Fator (MVAr)": cap_bank_quente[3],  # Required S/F
-                }
-            )
-            # Update overall maximums
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_quente or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_quente_mva or 0)
-            if cap_bank_quente[1] is not None and not math.isinf(
-                cap_bank_quente[1]
-            ):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_quente[1]
-                )
-            if cap_bank_quente[3] is not None and not math.isinf(
-                cap_bank_quente[3]
-            ):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_quente[3]
-                )
-
-            # Calculate 25°C condition test parameters (using Vcc and I nominal for this tap)
-            tensao_25c = vcc  # Vcc is the test voltage
-            corrente_25c = corrente  # Nominal current for this tap
-            pteste_25c_kva = tensao_25c * corrente_25c * sqrt_3_factor  # kVA
-            pteste_25c_mva = pteste_25c_kva / 1000.0  # MVA
-            potencia_ativa_eps_25c_kw = perdas_cc_a_frio  # Just the cold losses
-            pteste_25c_mvar = (
-                math.sqrt(max(0, pteste_25c_kva**2 - potencia_ativa_eps_25c_kw**2)) / 1000.0
-                if pteste_25c_kva >= potencia_ativa_eps_25c_kw
-                else 0
-            )
-
-            res_dict.update(
-                {
-                    "Tensão 25°C (kV)": tensao_25c,
-                    "Corrente 25°C (A)": corrente_25c,
-                    "Pteste 25°C (MVA)": pteste_25c_mva,
-                    "Potencia Ativa 25°C (kW)": potencia_ativa_eps_25c_kw,
-                    "Pteste 25°C (MVAr)": pteste_25c_mvar,  # Store reactive power test requirement
-                }
-            )
-            cap_bank_25c = calculate_cap_bank(tensao_25c, pteste_25c_mva)
-            res_dict.update(
-                {
-                    "Cap Bank Voltage 25°C Com Fator (kV)": cap_bank_25c[0],
-                    "Cap Bank Power 25°C Com Fator (MVAr)": cap_bank_25c[1],  # Required C/F
-                    "Cap Bank Voltage 25°C Sem Fator (kV)": cap_bank_25c[2],
-                    "Cap Bank Power 25°C Sem Fator (MVAr)": cap_bank_25c[3],  # Required S/F
-                }
-            )
-            # Update overall maximums
-            max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_25c or 0)
-            max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_25c_mva or 0)
-            if cap_bank_25c[1] is not None and not math.isinf(cap_bank_25c[1]):  # Required C/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_25c[1]
-                )
-            if cap_bank_25c[3] is not None and not math.isinf(cap_bank_25c[3]):  # Required S/F
-                max_test_power_mvar_overall_required = max(
-                    max_test_power_mvar_overall_required, cap_bank_25c[3]
-                )
-
-            resultados.append(res_dict)
-        # End of main calculation loop
-
-        if calculation_error:
-            # If an error occurred inside the loop, return the error message
-            return initial_detailed_content, error_div, no_update
-
-        # --- Overload Calculations (if applicable) ---
-        overload_applicable = tensao_nominal_at >= 230
-        if overload_applicable:
-            # Iterate through results again to add overload calcs
-            for resultado in resultados:
-                vcc = resultado.get("Vcc (kV)")
-                corrente = resultado.get("Corrente")
-                perdas_carga = resultado.get("Perdas Carga Sem Vazio (kW)")  # Base losses at Tref
-
-                if vcc is None or corrente is None or perdas_carga is None:
-                    log.warning(
-                        f"Skipping overload calculation for Tap {resultado.get('Tap')} due to missing base data."
-                    )
-                    continue
-
-                # --- 1.2 PU ---
-                corrente_1_2 = corrente * 1.2
-                tensao_1_2 = vcc * 1.2  # Simple scaling
-                pteste_1_2_kva = tensao_1_2 * corrente_1_2 * sqrt_3_factor  # kVA
-                pteste_1_2_mva = pteste_1_2_kva / 1000.0  # MVA
-                perdas_1_2_kw = perdas_carga * (1.2**2)  # Scale base load losses (I^2R)
-                potencia_ativa_eps_1_2_kw = (
-                    perdas_1_2_kw  # Active power for overload is the scaled losses
-                )
-                pteste_1_2_mvar = (
-                    math.sqrt(max(0, pteste_1_2_kva**2 - potencia_ativa_eps_1_2_kw**2)) / 1000.0
-                    if pteste_1_2_kva >= potencia_ativa_eps_1_2_kw
-                    else 0
-                )
-
-                resultado.update(
-                    {
-                        "Tensão 1.2 pu (kV)": tensao_1_2,
-                        "Corrente 1.2 pu (A)": corrente_1_2,
-                        "Pteste 1.2 pu (MVA)": pteste_1_2_mva,
-                        "Perdas 1.2 pu (kW)": perdas_1_2_kw,
-                        "Potencia Ativa 1.2 pu (kW)": potencia_ativa_eps_1_2_kw,
-                        "Pteste 1.2 pu (MVAr)": pteste_1_2_mvar,  # Store reactive power test requirement
-                    }
-                )
-                cap_bank_1_2 = calculate_cap_bank(tensao_1_2, pteste_1_2_mva)
-                resultado.update(
-                    {
-                        "Cap Bank Voltage 1.2 pu Com Fator (kV)": cap_bank_1_2[0],
-                        "Cap Bank Power 1.2 pu Com Fator (MVAr)": cap_bank_1_2[1],  # Required C/F
-                        "Cap Bank Voltage 1.2 pu Sem Fator (kV)": cap_bank_1_2[2],
-                        "Cap Bank Power 1.2 pu Sem Fator (MVAr)": cap_bank_1_2[3],  # Required S/F
-                    }
-                )
-                # Update overall maximums
-                max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_1_2 or 0)
-                max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_1_2_mva or 0)
-                if cap_bank_1_2[1] is not None and not math.isinf(cap_bank_1_2[1]):  # Required C/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_2[1]
-                    )
-                if cap_bank_1_2[3] is not None and not math.isinf(cap_bank_1_2[3]):  # Required S/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_2[3]
-                    )
-
-                # --- 1.4 PU ---
-                corrente_1_4 = corrente * 1.4
-                tensao_1_4 = vcc * 1.4  # Simple scaling
-                pteste_1_4_kva = tensao_1_4 * corrente_1_4 * sqrt_3_factor  # kVA
-                pteste_1_4_mva = pteste_1_4_kva / 1000.0  # MVA
-                perdas_1_4_kw = perdas_carga * (1.4**2)  # Scale base load losses (I^2R)
-                potencia_ativa_eps_1_4_kw = (
-                    perdas_1_4_kw  # Active power for overload is the scaled losses
-                )
-                pteste_1_4_mvar = (
-                    math.sqrt(max(0, pteste_1_4_kva**2 - potencia_ativa_eps_1_4_kw**2)) / 1000.0
-                    if pteste_1_4_kva >= potencia_ativa_eps_1_4_kw
-                    else 0
-                )
-
-                resultado.update(
-                    {
-                        "Tensão 1.4 pu (kV)": tensao_1_4,
-                        "Corrente 1.4 pu (A)": corrente_1_4,
-                        "Pteste 1.4 pu (MVA)": pteste_1_4_mva,
-                        "Perdas 1.4 pu (kW)": perdas_1_4_kw,
-                        "Potencia Ativa 1.4 pu (kW)": potencia_ativa_eps_1_4_kw,
-                        "Pteste 1.4 pu (MVAr)": pteste_1_4_mvar,  # Store reactive power test requirement
-                    }
-                )
-                cap_bank_1_4 = calculate_cap_bank(tensao_1_4, pteste_1_4_mva)
-                resultado.update(
-                    {
-                        "Cap Bank Voltage 1.4 pu Com Fator (kV)": cap_bank_1_4[0],
-                        "Cap Bank Power 1.4 pu Com Fator (MVAr)": cap_bank_1_4[1],  # Required C/F
-                        "Cap Bank Voltage 1.4 pu Sem Fator (kV)": cap_bank_1_4[2],
-                        "Cap Bank Power 1.4 pu Sem Fator (MVAr)": cap_bank_1_4[3],  # Required S/F
-                    }
-                )
-                # Update overall maximums
-                max_test_voltage_kv_overall = max(max_test_voltage_kv_overall, tensao_1_4 or 0)
-                max_test_power_mva_overall = max(max_test_power_mva_overall, pteste_1_4_mva or 0)
-                if cap_bank_1_4[1] is not None and not math.isinf(cap_bank_1_4[1]):  # Required C/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_4[1]
-                    )
-                if cap_bank_1_4[3] is not None and not math.isinf(cap_bank_1_4[3]):  # Required S/F
-                    max_test_power_mvar_overall_required = max(
-                        max_test_power_mvar_overall_required, cap_bank_1_4[3]
-                    )
-        # End of overload calculations
-
-        # --- *** Calculate Capacitor Bank Configuration for Each Scenario *** ---
-        # Helper function to calculate and store capacitor bank configuration for each scenario
-        def calculate_and_store_cap_bank_config(res_dict, scenario_suffix):
-            """Calculate and store CS/Q config and PROVIDED power in the results dictionary."""
-            # Get the S/F and C/F *required* bank voltage and power values
-            cap_bank_voltage_cf_key = f"Cap Bank Voltage {scenario_suffix} Com Fator (kV)"
-            cap_bank_power_cf_key = f"Cap Bank Power {scenario_suffix} Com Fator (MVAr)"
-            cap_bank_voltage_sf_key = f"Cap Bank Voltage {scenario_suffix} Sem Fator (kV)"
-            cap_bank_power_sf_key = f"Cap Bank Power {scenario_suffix} Sem Fator (MVAr)"
-
-            cap_bank_voltage_cf = res_dict.get(cap_bank_voltage_cf_key)
-            cap_bank_power_cf_required = res_dict.get(cap_bank_power_cf_key)  # Required power C/F
-            cap_bank_voltage_sf = res_dict.get(cap_bank_voltage_sf_key)
-            cap_bank_power_sf_required = res_dict.get(cap_bank_power_sf_key)  # Required power S/F
-
-            # Initialize outputs
-            config_results = {
-                f"CS Config {scenario_suffix}": "N/A",
-                f"CS Config {scenario_suffix} S/F": "N/A",
-                f"Q Config {scenario_suffix}": "N/A",
-                f"Q Config {scenario_suffix} S/F": "N/A",
-                f"Q Power Provided {scenario_suffix} (MVAr)": 0.0,  # Store the PROVIDED power (C/F)
-                f"Q Power Provided {scenario_suffix} S/F (MVAr)": 0.0,  # Store the PROVIDED power (S/F)
-            }
-
-            # Get available voltage keys for lookup
-            available_voltages_str = list(CAPACITORS_BY_VOLTAGE.keys())
-            available_voltages_flt = [float(v) for v in available_voltages_str]
-
-            # --- Calculate C/F configuration ---
-            if (
-                cap_bank_voltage_cf is not None
-                and cap_bank_power_cf_required is not None
-                and not math.isinf(cap_bank_power_cf_required)
-                and cap_bank_power_cf_required > 0
-            ):
-                target_v_cf_key = None
-                try:
-                    # Find the index of the closest float voltage
-                    closest_voltage_idx_cf = min(
-                        range(len(available_voltages_flt)),
-                        key=lambda i: abs(available_voltages_flt[i] - cap_bank_voltage_cf),
-                    )
-                    target_v_cf_key = available_voltages_str[
-                        closest_voltage_idx_cf
-                    ]  # Get the corresponding string key
-                    log.debug(
-                        f"Tap {res_dict.get('Tap')}, Scen {scenario_suffix} C/F: Target V float = {cap_bank_voltage_cf:.2f}, Closest Key = {target_v_cf_key}"
-                    )
-                except ValueError:
-                    log.error(f"Could not find closest voltage key for C/F {cap_bank_voltage_cf}")
-
-                if target_v_cf_key:
-                    # Determine if Group 1 is sufficient for C/F
-                    group1_caps_cf = [
-                        cap
-                        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_cf_key, [])
-                        if len(cap) > 4 and cap.endswith("1")
-                    ]
-                    max_power_group1_cf = (
-                        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps_cf)
-                        if group1_caps_cf
-                        else 0
-                    )
-                    use_group1_only_cf = (
-                        cap_bank_power_cf_required <= max_power_group1_cf + 1e-6
-                    )  # Add tolerance
-
-                    # Get CS Configuration for C/F
-                    config_results[f"CS Config {scenario_suffix}"] = get_cs_configuration(
-                        target_v_cf_key, use_group1_only_cf, tipo_transformador
-                    )
-
-                    # Get Q Configuration and PROVIDED power for C/F (using the required power)
-                    q_config_cf, q_power_cf_provided = find_best_q_configuration(
-                        target_v_cf_key, cap_bank_power_cf_required, use_group1_only_cf
-                    )
-                    config_results[f"Q Config {scenario_suffix}"] = q_config_cf
-                    config_results[
-                        f"Q Power Provided {scenario_suffix} (MVAr)"
-                    ] = q_power_cf_provided
-                else:
-                    config_results[f"CS Config {scenario_suffix}"] = "N/A (Erro Chave V C/F)"
-                    config_results[f"Q Config {scenario_suffix}"] = "N/A"
-                    config_results[f"Q Power Provided {scenario_suffix} (MVAr)"] = 0.0
-            else:
-                log.warning(
-                    f"Dados C/F insuficientes ou inválidos para config {scenario_suffix} no Tap {res_dict.get('Tap')}. V: {cap_bank_voltage_cf}, Req P: {cap_bank_power_cf_required}"
-                )
-                config_results[f"CS Config {scenario_suffix}"] = "N/A (Dados C/F Insuf.)"
-                config_results[f"Q Config {scenario_suffix}"] = "N/A"
-                config_results[f"Q Power Provided {scenario_suffix} (MVAr)"] = 0.0
-
-            # --- Calculate S/F configuration ---
-            if (
-                cap_bank_voltage_sf is not None
-                and cap_bank_power_sf_required is not None
-                and not math.isinf(cap_bank_power_sf_required)
-                and cap_bank_power_sf_required > 0
-            ):
-                target_v_sf_key = None
-                try:
-                    # Find the index of the closest float voltage
-                    closest_voltage_idx_sf = min(
-                        range(len(available_voltages_flt)),
-                        key=lambda i: abs(available_voltages_flt[i] - cap_bank_voltage_sf),
-                    )
-                    target_v_sf_key = available_voltages_str[
-                        closest_voltage_idx_sf
-                    ]  # Get the corresponding string key
-                    log.debug(
-                        f"Tap {res_dict.get('Tap')}, Scen {scenario_suffix} S/F: Target V float = {cap_bank_voltage_sf:.2f}, Closest Key = {target_v_sf_key}"
-                    )
-                except ValueError:
-                    log.error(f"Could not find closest voltage key for S/F {cap_bank_voltage_sf}")
-
-                if target_v_sf_key:
-                    # Determine if Group 1 is sufficient for S/F
-                    group1_caps_sf = [
-                        cap
-                        for cap in CAPACITORS_BY_VOLTAGE.get(target_v_sf_key, [])
-                        if len(cap) > 4 and cap.endswith("1")
-                    ]
-                    max_power_group1_sf = (
-                        calculate_q_combination_power([1, 2, 3, 4, 5], group1_caps_sf)
-                        if group1_caps_sf
-                        else 0
-                    )
-                    use_group1_only_sf = (
-                        cap_bank_power_sf_required <= max_power_group1_sf + 1e-6
-                    )  # Add tolerance
-
-                    # Get CS Configuration for S/F
-                    config_results[f"CS Config {scenario_suffix} S/F"] = get_cs_configuration(
-                        target_v_sf_key, use_group1_only_sf, tipo_transformador
-                    )
-
-                    # Get Q Configuration and PROVIDED power for S/F (using the required power)
-                    q_config_sf, q_power_sf_provided = find_best_q_configuration(
-                        target_v_sf_key, cap_bank_power_sf_required, use_group1_only_sf
-                    )
-                    config_results[f"Q Config {scenario_suffix} S/F"] = q_config_sf
-                    config_results[
-                        f"Q Power Provided {scenario_suffix} S/F (MVAr)"
-                    ] = q_power_sf_provided
-                else:
-                    config_results[f"CS Config {scenario_suffix} S/F"] = "N/A (Erro Chave V S/F)"
-                    config_results[f"Q Config {scenario_suffix} S/F"] = "N/A"
-                    config_results[f"Q Power Provided {scenario_suffix} S/F (MVAr)"] = 0.0
-            else:
-                log.warning(
-                    f"Dados S/F insuficientes ou inválidos para config {scenario_suffix} no Tap {res_dict.get('Tap')}. V: {cap_bank_voltage_sf}, Req P: {cap_bank_power_sf_required}"
-                )
-                config_results[f"CS Config {scenario_suffix} S/F"] = "N/A (Dados S/F Insuf.)"
-                config_results[f"Q Config {scenario_suffix} S/F"] = "N/A"
-                config_results[f"Q Power Provided {scenario_suffix} S/F (MVAr)"] = 0.0
-
-            res_dict.update(config_results)
-
-        # Calculate configurations for each scenario and add to results
-        for res in resultados:
-            calculate_and_store_cap_bank_config(res, "25°C")
-            calculate_and_store_cap_bank_config(res, "Frio")
-            calculate_and_store_cap_bank_config(res, "Quente")
-            if overload_applicable:
-                calculate_and_store_cap_bank_config(res, "1.2 pu")
-                calculate_and_store_cap_bank_config(res, "1.4 pu")
-
-        # --- *** Suggest Overall Capacitor Bank Configuration *** ---
-        cs_config_str, q_config_str, q_power_mvar_provided_overall = suggest_capacitor_bank_config(
-            max_test_voltage_kv_overall,
-            max_test_power_mvar_overall_required,  # Use max *REQUIRED* power found
-            tipo_transformador,
-        )
-
-        # Format the output for the overall suggestion card (Unchanged)
-        if "N/A" not in cs_config_str and "N/A" not in q_config_str:
-            # Configuração do banco de capacitores calculada e armazenada no store
-            target_v_cf_key, _ = select_target_bank_voltage(max_test_voltage_kv_overall)
-            log.info(
-                f"Configuração do banco de capacitores: Tensão={max_test_voltage_kv_overall:.1f}kV (Banco {target_v_cf_key}kV), Potência={q_power_mvar_provided_overall:.1f}MVAr"
-            )
-        else:
-            fail_reason = (
-                cs_config_str if "N/A" in cs_config_str else q_config_str
-            )  # Get the reason
-            log.warning(
-                f"Não foi possível sugerir a configuração do banco de capacitores: {fail_reason}"
-            )
-
-        # --- Layout Generation Setup ---
-        class ParameterAnalyzer:
-            # (Unchanged from previous version)
-            def __init__(self):
-                self.type_keywords = {
-                    "tensao": ["Tensão", "Vcc (kV)", "Cap Bank Voltage"],
-                    "corrente": ["Corrente"],
-                    "perdas": ["Perdas", "Potencia Ativa EPS"],
-                    "pteste": [
-                        "Pteste",
-                        "Cap Bank Power",
-                        "Q Power Provided",
-                    ],  # Includes MVA and MVAr (required and provided)
-                }
-                cap_bank_voltages_num = sorted([float(v) for v in CAPACITORS_BY_VOLTAGE.keys()])
-                high_voltage_threshold = (
-                    95.6
-                    if 95.6 in cap_bank_voltages_num
-                    else (cap_bank_voltages_num[-1] if cap_bank_voltages_num else 100.0)
-                )
-
-                self.thresholds = {
-                    "tensao": 95.6,  # Highlight if test voltage exceeds 95.6 kV
-                    "corrente": 2000,  # Highlight if current exceeds 2000 A
-                    "perdas": 1300,  # Highlight if losses exceed 1300 kW
-                    "pteste_high": 93.6,  # Highlight if power exceeds 93.6 MVA/MVAr
-                    "pteste_medium": 46.8,  # Highlight if power exceeds 46.8 MVA/MVAr
-                    "default": float("inf"),
-                }
-                self.highlight_colors = {
-                    "tensao": {
-                        "backgroundColor": "#ffcdd2",
-                        "color": "black",
-                    },  # Soft red for voltage (kV)
-                    "corrente": {
-                        "backgroundColor": "#ffcc80",
-                        "color": "black",
-                    },  # Soft orange for current (A)
-                    "perdas": {
-                        "backgroundColor": "#d1c4e9",
-                        "color": "black",
-                    },  # Soft violet for losses (kW)
-                    "pteste_high": {
-                        "backgroundColor": "#ffb74d",
-                        "color": "black",
-                    },  # Deep orange for high power (MVA/MVAr)
-                    "pteste_medium": {
-                        "backgroundColor": "#fff59d",
-                        "color": "black",
-                    },  # Soft yellow for medium power (MVA/MVAr)
-                }
-
-            def get_param_type(self, param_name):
-                # Exclude Cap Bank Power Req fields from highlighting
-                if "Cap Bank Power" in param_name and "Req" in param_name:
-                    return "default"
-
-                # 1. Campos de Tensão (Destacados em vermelho Suave)
-                if any(keyword in param_name for keyword in ["Tensão", "Cap Bank V Disp."]):
-                    return "tensao"
-
-                # 2. Campos de Corrente (Destacados em laranja Suave)
-                if "Corrente" in param_name:
-                    return "corrente"
-
-                # 3. Campos de Perdas (Destacados em violeta Suave)
-                if any(keyword in param_name for keyword in ["Perdas", "Potencia Ativa"]):
-                    return "perdas"
-
-                # 4. Campos de Potência de Teste (Destacados em SandyBrown ou SandyBrown+DeepPink)
-                if any(
-                    keyword in param_name
-                    for keyword in ["Pteste", "Cap Bank Q Disp.", "Q Power Provided"]
-                ):
-                    return "pteste"
+                # 4. Campos de Potência de Teste (Destacados em SandyBrown ou SandyBrown+DeepPink)
+                if any(
+                    keyword in param_name
+                    for keyword in ["Pteste", "Cap Bank Q Disp.", "Q Power Provided"]
+                ):
+                    return "pteste"
 
                 # Configuration fields get the same formatting as their parent field
                 if "Configuração CS" in param_name:
@@ -2828,43 +1519,42 @@ def losses_handle_perdas_carga(
 
                 return "default"
 
-            def get_highlight_style(self, value, param_type):
+            def get_highlight_level(self, value, param_type):
+                """Nível de destaque (chave de highlight_colors) ou None"""
                 if value is None or param_type == "default":
-                    return {}
+                    return None
                 try:
                     v = float(value)
                     if math.isnan(v) or math.isinf(v):
-                        return {}
+                        return None
                 except (ValueError, TypeError):
-                    return {}
+                    return None
 
-                style = {}
+                level = None
                 if param_type == "pteste":
                     # Two levels of highlighting for power fields
                     if v > self.thresholds["pteste_high"]:
-                        style = self.highlight_colors["pteste_high"]
+                        level = "pteste_high"
                     elif v > self.thresholds["pteste_medium"]:
-                        style = self.highlight_colors["pteste_medium"]
-                elif param_type == "tensao":
-                    # Highlight voltage fields if > 95.6 kV
-                    if v > self.thresholds["tensao"]:
-                        style = self.highlight_colors["tensao"]
-                elif param_type == "corrente":
-                    # Highlight current fields if > 2000 A
-                    if v > self.thresholds["corrente"]:
-                        style = self.highlight_colors["corrente"]
-                elif param_type == "perdas":
-                    # Highlight loss fields if > 1300 kW
-                    if v > self.thresholds["perdas"]:
-                        style = self.highlight_colors["perdas"]
-                return style
+                        level = "pteste_medium"
+                elif param_type in ("tensao", "corrente", "perdas"):
+                    # Tensão > 95.6 kV, corrente > 2000 A, perdas > 1300 kW
+                    if v > self.thresholds[param_type]:
+                        level = param_type
+                return level
+
+            def get_highlight_style(self, value, param_type):
+                level = self.get_highlight_level(value, param_type)
+                return self.highlight_colors[level] if level else {}
 
         parameter_analyzer = ParameterAnalyzer()
 
-        def highlight_cell(value, param_type=None):
+        def highlight_class(value, param_type=None):
+            """Classe CSS de destaque (components/result_tables.py) ou string vazia"""
             if param_type is None:
-                return {}
-            return parameter_analyzer.get_highlight_style(value, param_type)
+                return ""
+            level = parameter_analyzer.get_highlight_level(value, param_type)
+            return f"hl-{level.replace('_', '-')}" if level else ""
 
         class CapBankStatusAnalyzer:
             # (Unchanged from previous version)
@@ -3065,530 +1755,143 @@ def losses_handle_perdas_carga(
                 potencia_ativa,
             )
 
-        # --- TableCellFormatter Class (IMPROVED for Config Split Cells) ---
-        class TableCellFormatter:
-            def __init__(self, column_widths, results_meta):
-                self.column_widths = column_widths
-                self.results_meta = results_meta  # Store tap/scenario info for unique IDs
-                self.font_size = "0.75rem"  # Standardized font size
-                self.padding = "0.3rem"
-                self._unique_counter = 0  # Add a counter for absolutely unique IDs
-
-            def _get_unique_id(self, base_id):
-                """Helper to generate unique ID index part"""
-                self._unique_counter += 1
-                return f"{base_id}-{self._unique_counter}"
-
-            def format_value(self, value, precision=2):
-                """Formats a single numeric value or returns '-'"""
-                if value is None:
+        # --- Células das tabelas de resultados (renderizadas em components/result_tables) ---
+        def format_value(value, precision=2):
+            """Formats a single numeric value or returns '-'"""
+            if value is None:
+                return "-"
+            if isinstance(value, (int, float)):
+                if math.isinf(value):
+                    return "Inf"
+                if math.isnan(value):
                     return "-"
-                if isinstance(value, (int, float)):
-                    if math.isinf(value):
-                        return "Inf"
-                    if math.isnan(value):
-                        return "-"
-                    try:
-                        # Format with specified precision
-                        return f"{float(value):.{precision}f}"
-                    except ValueError:
-                        return str(value)  # Fallback
-                return str(value)  # Return as string if not int/float
-
-            def format_config_string(self, config_str, max_len=25):
-                """Formats and shortens configuration strings for display IN TOOLTIPS."""
-                # Tooltips can handle longer strings, just ensure it's a string
-                if not config_str or not isinstance(config_str, str) or "N/A" in config_str:
-                    return "N/A"
-                return config_str  # Return full string for tooltip
-
-            def get_base_style(self, table_col_index):
-                """Gets base style with width for a given column index (1-based)"""
-                width = self.column_widths.get(table_col_index, "auto")
-                return {
-                    "fontSize": self.font_size,
-                    "padding": self.padding,
-                    "textAlign": "center",
-                    "width": width,
-                    "maxWidth": width,
-                    "minWidth": width,
-                    "verticalAlign": "middle",
-                    "color": "black",
-                }
-
-            def create_cell(
-                self,
-                value,
-                row_idx,
-                col_idx,
-                apply_highlighting=False,
-                param_type=None,
-                param_name=None,
-                precision=2,
-            ):
-                """Creates a table cell (Td), handling single, dual, or config (dict) values"""
-                table_col_idx = col_idx + 1  # Actual table column index (1-based)
-                base_style = self.get_base_style(table_col_idx)
-                highlight_style = {}
-
-                # Check if it's a split cell configuration (passed as a dict)
-                is_split_cell = isinstance(value, dict) and value.get("split_cell") == True
-
-                if is_split_cell:
-                    # Get S/F and C/F values (dict: {'numeric': val, 'config': str})
-                    sf_data = value.get("sf", {"numeric": None, "config": "N/A"})
-                    cf_data = value.get("cf", {"numeric": None, "config": "N/A"})
-
-                    sf_numeric_val = sf_data.get("numeric")
-                    sf_config_str = sf_data.get("config", "N/A")
-                    cf_numeric_val = cf_data.get("numeric")
-                    cf_config_str = cf_data.get("config", "N/A")
-
-                    # Ensure config strings are actually strings
-                    sf_config_str_safe = self.format_config_string(
-                        sf_config_str
-                    )  # Format for tooltip
-                    cf_config_str_safe = self.format_config_string(
-                        cf_config_str
-                    )  # Format for tooltip
-
-                    # Format numeric values for display in cell
-                    sf_numeric_text = self.format_value(sf_numeric_val, precision)
-                    cf_numeric_text = self.format_value(cf_numeric_val, precision)
-
-                    # Check if values exist for display
-                    has_sf_display = sf_numeric_val is not None and sf_numeric_text != "-"
-                    has_cf_display = cf_numeric_val is not None and cf_numeric_text != "-"
-                    has_sf_tooltip = "N/A" not in sf_config_str_safe
-                    has_cf_tooltip = "N/A" not in cf_config_str_safe
-
-                    # Generate unique IDs for tooltips
-                    # Incorporate row and col index for better uniqueness
-                    base_unique_id = f"split-cell-{row_idx}-{col_idx}"
-                    sf_id_str = self._get_unique_id(base_unique_id + "-sf")
-                    cf_id_str = self._get_unique_id(base_unique_id + "-cf")
-
-                    # Determine param_type for highlighting based on numeric value
-                    highlight_param_type = param_type  # Use the passed param_type
-
-                    sf_highlight_style = (
-                        highlight_cell(sf_numeric_val, highlight_param_type)
-                        if apply_highlighting and has_sf_display
-                        else {}
-                    )
-                    cf_highlight_style = (
-                        highlight_cell(cf_numeric_val, highlight_param_type)
-                        if apply_highlighting and has_cf_display
-                        else {}
-                    )
-
-                    # Create the split cell content
-                    cell_content_components = []  # Store components (divs and tooltips)
-
-                    # Check if S/F and C/F values are equal (within a small tolerance)
-                    values_are_equal = False
-                    configs_are_equal = False
-
-                    # Check if this is a Cap Bank V Disp. (kV) field
-                    is_cap_bank_voltage = (
-                        "Cap Bank V Disp. (kV)" in param_name if param_name else False
-                    )
-
-                    # Check if this is a Cap Bank Q Disp. (MVAr) field
-                    is_cap_bank_q = "Cap Bank Q Disp. (MVAr)" in param_name if param_name else False
-
-                    # Check if numeric values are equal
-                    if (
-                        has_sf_display
-                        and has_cf_display
-                        and sf_numeric_val is not None
-                        and cf_numeric_val is not None
-                    ):
-                        # Use a small tolerance for floating point comparison
-                        tolerance = 0.001
-                        values_are_equal = abs(sf_numeric_val - cf_numeric_val) < tolerance
-
-                    # Check if config strings are equal
-                    if has_sf_tooltip and has_cf_tooltip:
-                        configs_are_equal = sf_config_str_safe == cf_config_str_safe
-
-                    # Only show as a single value if:
-                    # 1. Both values AND configs are equal, or
-                    # 2. This is a Cap Bank V Disp. (kV) field and the values are equal, or
-                    # 3. This is a Cap Bank Q Disp. (MVAr) field (always show as single value)
-                    values_are_equal = (
-                        (
-                            values_are_equal
-                            and (configs_are_equal or (not has_sf_tooltip and not has_cf_tooltip))
-                        )
-                        or (is_cap_bank_voltage and values_are_equal)
-                        or is_cap_bank_q
-                    )
-
-                    # If values are equal, show only one value
-                    if values_are_equal:
-                        # Create a single cell with the value
-                        single_id = self._get_unique_id(base_unique_id + "-single")
-
-                        # Determine what to display based on the field type
-                        if (
-                            is_cap_bank_q
-                            and has_sf_display
-                            and has_cf_display
-                            and sf_numeric_val is not None
-                            and cf_numeric_val is not None
-                        ):
-                            # For Cap Bank Q Disp. (MVAr), if values are different, show both
-                            if abs(sf_numeric_val - cf_numeric_val) >= 0.001:
-                                single_content = [
-                                    html.Span(
-                                        sf_numeric_text,
-                                        style={
-                                            "fontSize": "0.9em",
-                                            "fontWeight": "bold",
-                                            "color": "black",
-                                        },
-                                    ),
-                                    html.Sup(
-                                        " S/F",
-                                        style={
-                                            "fontSize": "0.65em",
-                                            "color": COLORS["text_muted"],
-                                            "marginLeft": "2px",
-                                        },
-                                    ),
-                                    html.Span(" / ", style={"fontSize": "0.9em", "color": "black"}),
-                                    html.Span(
-                                        cf_numeric_text,
-                                        style={
-                                            "fontSize": "0.9em",
-                                            "fontWeight": "bold",
-                                            "color": "black",
-                                        },
-                                    ),
-                                    html.Sup(
-                                        " C/F",
-                                        style={
-                                            "fontSize": "0.65em",
-                                            "color": COLORS["text_muted"],
-                                            "marginLeft": "2px",
-                                        },
-                                    ),
-                                ]
-                            else:
-                                # Values are the same, show as S/F=C/F
-                                single_content = [
-                                    html.Span(
-                                        sf_numeric_text,
-                                        style={
-                                            "fontSize": "0.9em",
-                                            "fontWeight": "bold",
-                                            "color": "black",
-                                        },
-                                    ),
-                                    html.Sup(
-                                        " S/F=C/F",
-                                        style={
-                                            "fontSize": "0.65em",
-                                            "color": COLORS["text_muted"],
-                                            "marginLeft": "2px",
-                                        },
-                                    ),
-                                ]
-                        else:
-                            # For other fields, use the S/F value (they're the same)
-                            single_content = [
-                                html.Span(
-                                    sf_numeric_text,
-                                    style={
-                                        "fontSize": "0.9em",
-                                        "fontWeight": "bold",
-                                        "color": "black",
-                                    },
-                                ),
-                                html.Sup(
-                                    " S/F=C/F",
-                                    style={
-                                        "fontSize": "0.65em",
-                                        "color": COLORS["text_muted"],
-                                        "marginLeft": "2px",
-                                    },
-                                ),
-                            ]
-
-                        # Use the S/F highlight style (they should be the same)
-                        single_div = html.Div(
-                            single_content,
-                            id=single_id,
-                            style={
-                                "width": "100%",
-                                "textAlign": "center",
-                                "padding": "0.15rem",
-                                "backgroundColor": sf_highlight_style.get(
-                                    "backgroundColor", "transparent"
-                                ),
-                                "cursor": "help"
-                                if (has_sf_tooltip or has_cf_tooltip)
-                                else "default",
-                            },
-                        )
-                        cell_content_components.append(single_div)
-
-                        # Create a combined popover if either tooltip has content
-                        if has_sf_tooltip or has_cf_tooltip:
-                            combined_title = "S/F = C/F"
-                            combined_content = ""
-
-                            if has_sf_tooltip and has_cf_tooltip:
-                                if sf_config_str_safe == cf_config_str_safe:
-                                    combined_content = f"S/F e C/F usam a mesma configuração:\n\n{sf_config_str_safe}"
-                                else:
-                                    combined_content = f"Configuração S/F:\n{sf_config_str_safe}\n\nConfiguração C/F:\n{cf_config_str_safe}"
-                            elif has_sf_tooltip:
-                                combined_content = f"Configuração S/F:\n\n{sf_config_str_safe}"
-                            elif has_cf_tooltip:
-                                combined_content = f"Configuração C/F:\n\n{cf_config_str_safe}"
-
-                            combined_popover = dbc.Popover(
-                                [
-                                    dbc.PopoverHeader(combined_title),
-                                    dbc.PopoverBody([html.Code(combined_content)]),
-                                ],
-                                target=single_id,
-                                trigger="hover",
-                                placement="top",
-                            )
-                            cell_content_components.append(combined_popover)
+                try:
+                    return f"{float(value):.{precision}f}"
+                except ValueError:
+                    return str(value)  # Fallback
+            return str(value)  # Return as string if not int/float
+
+        def format_config_string(config_str):
+            """Configuração completa para o title da célula, ou 'N/A'."""
+            if not config_str or not isinstance(config_str, str) or "N/A" in config_str:
+                return "N/A"
+            return config_str
+
+        def create_split_cell(value, apply_highlighting, param_type, param_name, precision):
+            """Célula S/F | C/F com a configuração do banco (CS/Q) no title de cada lado"""
+            sf_data = value.get("sf", {"numeric": None, "config": "N/A"})
+            cf_data = value.get("cf", {"numeric": None, "config": "N/A"})
+            sf_numeric_val = sf_data.get("numeric")
+            cf_numeric_val = cf_data.get("numeric")
+            sf_config = format_config_string(sf_data.get("config", "N/A"))
+            cf_config = format_config_string(cf_data.get("config", "N/A"))
+            sf_text = format_value(sf_numeric_val, precision)
+            cf_text = format_value(cf_numeric_val, precision)
+
+            has_sf_display = sf_numeric_val is not None and sf_text != "-"
+            has_cf_display = cf_numeric_val is not None and cf_text != "-"
+            has_sf_tooltip = "N/A" not in sf_config
+            has_cf_tooltip = "N/A" not in cf_config
+            sf_css = cf_css = ""
+            if apply_highlighting and has_sf_display:
+                sf_css = highlight_class(sf_numeric_val, param_type)
+            if apply_highlighting and has_cf_display:
+                cf_css = highlight_class(cf_numeric_val, param_type)
+
+            is_cap_bank_voltage = "Cap Bank V Disp. (kV)" in param_name if param_name else False
+            is_cap_bank_q = "Cap Bank Q Disp. (MVAr)" in param_name if param_name else False
+            values_are_equal = (
+                has_sf_display and has_cf_display and abs(sf_numeric_val - cf_numeric_val) < 0.001
+            )
+            configs_are_equal = has_sf_tooltip and has_cf_tooltip and sf_config == cf_config
+
+            # Valor único se valores e configurações coincidem, se for tensão do banco com
+            # valores iguais, ou sempre para a potência Q disponível
+            no_tooltips = not has_sf_tooltip and not has_cf_tooltip
+            show_single = (
+                (values_are_equal and (configs_are_equal or no_tooltips))
+                or (is_cap_bank_voltage and values_are_equal)
+                or is_cap_bank_q
+            )
+            if show_single:
+                if is_cap_bank_q and has_sf_display and has_cf_display and not values_are_equal:
+                    parts = ((sf_text, "S/F"), (cf_text, "C/F"))
+                else:
+                    parts = ((sf_text, "S/F=C/F"),)
+                title = None
+                if has_sf_tooltip and has_cf_tooltip:
+                    if configs_are_equal:
+                        title = f"S/F = C/F\nS/F e C/F usam a mesma configuração:\n\n{sf_config}"
                     else:
-                        # --- Left side (S/F) ---
-                        sf_content_inner = []
-                        if has_sf_display:
-                            sf_content_inner.append(
-                                html.Span(
-                                    sf_numeric_text,
-                                    style={
-                                        "fontSize": "0.9em",
-                                        "fontWeight": "bold",
-                                        "color": "black",
-                                    },
-                                )
-                            )
-                            sf_content_inner.append(
-                                html.Sup(
-                                    " S/F",
-                                    style={
-                                        "fontSize": "0.7em",
-                                        "color": COLORS["text_muted"],
-                                        "marginLeft": "2px",
-                                    },
-                                )
-                            )
-                        else:
-                            sf_content_inner.append("-")  # Display hyphen if no numeric value
-
-                        sf_div = html.Div(
-                            sf_content_inner,
-                            id=sf_id_str if has_sf_tooltip else f"sf-no-tooltip-{base_unique_id}",
-                            style={
-                                "width": "50%",
-                                "float": "left",
-                                "borderRight": f'1px solid {COLORS["border"]}',
-                                "padding": "0.15rem",
-                                "textAlign": "center",  # Center align the content
-                                "backgroundColor": sf_highlight_style.get(
-                                    "backgroundColor", "transparent"
-                                ),
-                                "cursor": "help" if has_sf_tooltip else "default",
-                            },
-                        )
-                        cell_content_components.append(sf_div)
-
-                        # Create popover for S/F only if there's a config string to show
-                        if has_sf_tooltip:
-                            tooltip_title = "S/F: V_teste ≤ V_banco"
-                            # Usar Popover em vez de Tooltip para melhor visualização
-                            sf_popover = dbc.Popover(
-                                [
-                                    dbc.PopoverHeader(tooltip_title),
-                                    dbc.PopoverBody([html.Code(sf_config_str_safe)]),
-                                ],
-                                target=sf_id_str,
-                                trigger="hover",
-                                placement="top",
-                            )
-                            cell_content_components.append(sf_popover)
-
-                        # --- Right side (C/F) ---
-                        cf_content_inner = []
-                        if has_cf_display:
-                            cf_content_inner.append(
-                                html.Span(
-                                    cf_numeric_text,
-                                    style={
-                                        "fontSize": "0.9em",
-                                        "fontWeight": "bold",
-                                        "color": "black",
-                                    },
-                                )
-                            )
-                            cf_content_inner.append(
-                                html.Sup(
-                                    " C/F",
-                                    style={
-                                        "fontSize": "0.7em",
-                                        "color": COLORS["text_muted"],
-                                        "marginLeft": "2px",
-                                    },
-                                )
-                            )
-                        else:
-                            cf_content_inner.append("-")  # Display hyphen if no numeric value
-
-                        cf_div = html.Div(
-                            cf_content_inner,
-                            id=cf_id_str if has_cf_tooltip else f"cf-no-tooltip-{base_unique_id}",
-                            style={
-                                "width": "50%",
-                                "float": "right",
-                                "padding": "0.15rem",
-                                "textAlign": "center",  # Center align the content
-                                "backgroundColor": cf_highlight_style.get(
-                                    "backgroundColor", "transparent"
-                                ),
-                                "cursor": "help" if has_cf_tooltip else "default",
-                            },
-                        )
-                        cell_content_components.append(cf_div)
-
-                    # Create popover for C/F only if there's a config string to show
-                    if has_cf_tooltip:
-                        tooltip_title = "C/F: V_teste > V_banco × 1.1"
-                        # Usar Popover em vez de Tooltip para melhor visualização
-                        cf_popover = dbc.Popover(
-                            [
-                                dbc.PopoverHeader(tooltip_title),
-                                dbc.PopoverBody([html.Code(cf_config_str_safe)]),
-                            ],
-                            target=cf_id_str,
-                            trigger="hover",
-                            placement="top",
+                        title = (
+                            f"S/F = C/F\nConfiguração S/F:\n{sf_config}"
+                            f"\n\nConfiguração C/F:\n{cf_config}"
                         )
-                        cell_content_components.append(cf_popover)
-
-                    # Return the split cell
-                    # Ensure overall cell padding is 0 to make inner divs fill it
-                    cell_style = {
-                        **base_style,
-                        "padding": "0",  # Remove padding from TD
-                        "height": "100%",
-                        "overflow": "hidden",  # Ensure content doesn't overflow TD
-                    }
-
-                    # Use an inner div to clear floats and contain the components
-                    # This prevents layout issues with subsequent cells/rows
-                    container_div = html.Div(
-                        cell_content_components, style={"overflow": "hidden", "height": "100%"}
-                    )
-
-                    return html.Td(
-                        container_div, style=cell_style, className="table-value-cell split-cell"
-                    )
-
-                # Handle regular dual value [sem_fator, com_fator] (e.g., Cap Bank Voltage/Power)
-                elif isinstance(value, list) and len(value) == 2:
-                    sem_fator, com_fator = value
-                    sem_fator_text = self.format_value(sem_fator, precision)
-                    com_fator_text = self.format_value(com_fator, precision)
+                elif has_sf_tooltip:
+                    title = f"S/F = C/F\nConfiguração S/F:\n\n{sf_config}"
+                elif has_cf_tooltip:
+                    title = f"S/F = C/F\nConfiguração C/F:\n\n{cf_config}"
+                return result_tables.ValueCell(parts, f"strong {sf_css}".rstrip(), title)
+
+            return result_tables.SplitCell(
+                result_tables.ValueCell(
+                    ((sf_text, "S/F"),) if has_sf_display else (("-", None),),
+                    sf_css,
+                    f"S/F: V_teste ≤ V_banco\n{sf_config}" if has_sf_tooltip else None,
+                ),
+                result_tables.ValueCell(
+                    ((cf_text, "C/F"),) if has_cf_display else (("-", None),),
+                    cf_css,
+                    f"C/F: V_teste > V_banco × 1.1\n{cf_config}" if has_cf_tooltip else None,
+                ),
+            )
 
-                    has_sf = sem_fator is not None and sem_fator_text != "-"
-                    has_cf = com_fator is not None and com_fator_text != "-"
+        def create_table_cell(
+            value, apply_highlighting, param_type=None, param_name=None, precision=2
+        ):
+            """Especificação da célula: simples, dupla [S/F, C/F] ou dividida (split_cell)"""
+            if isinstance(value, dict) and value.get("split_cell") == True:
+                return create_split_cell(
+                    value, apply_highlighting, param_type, param_name, precision
+                )
 
-                    # Determine which value to use for highlighting (Prioritize C/F)
-                    highlight_val = com_fator if has_cf else sem_fator if has_sf else None
-                    if apply_highlighting and param_type is not None and highlight_val is not None:
-                        highlight_style = highlight_cell(highlight_val, param_type)
+            if isinstance(value, list) and len(value) == 2:
+                sem_fator, com_fator = value
+                sem_fator_text = format_value(sem_fator, precision)
+                com_fator_text = format_value(com_fator, precision)
+                has_sf = sem_fator is not None and sem_fator_text != "-"
+                has_cf = com_fator is not None and com_fator_text != "-"
 
-                    cell_style = {**base_style, **highlight_style}
-                    if "color" not in cell_style:
-                        cell_style["color"] = "black"
+                # Determine which value to use for highlighting (Prioritize C/F)
+                highlight_val = com_fator if has_cf else sem_fator if has_sf else None
+                css = ""
+                if apply_highlighting and param_type is not None and highlight_val is not None:
+                    css = highlight_class(highlight_val, param_type)
 
-                    # Display Logic
-                    if (
-                        has_sf
-                        and has_cf
-                        and abs(float(sem_fator or 0) - float(com_fator or 0)) > epsilon
-                    ):  # Show both if different
-                        return html.Td(
-                            [
-                                html.Span(sem_fator_text, style={"fontSize": "0.9em"}),
-                                html.Sup(
-                                    " S/F",
-                                    style={"fontSize": "0.7em", "color": COLORS["text_muted"]},
-                                ),
-                                " / ",
-                                html.Span(com_fator_text, style={"fontSize": "0.9em"}),
-                                html.Sup(
-                                    " C/F",
-                                    style={"fontSize": "0.7em", "color": COLORS["text_muted"]},
-                                ),
-                            ],
-                            style=cell_style,
-                            className="table-value-cell",
-                        )
-                    elif has_sf:  # Show only S/F if C/F missing or same
-                        return html.Td(
-                            [
-                                html.Span(sem_fator_text, style={"fontSize": "0.9em"}),
-                                html.Sup(
-                                    " S/F",
-                                    style={"fontSize": "0.7em", "color": COLORS["text_muted"]},
-                                ),
-                            ],
-                            style=cell_style,
-                            className="table-value-cell",
-                        )
-                    elif has_cf:  # Show only C/F if S/F missing
-                        return html.Td(
-                            [
-                                html.Span(com_fator_text, style={"fontSize": "0.9em"}),
-                                html.Sup(
-                                    " C/F",
-                                    style={"fontSize": "0.7em", "color": COLORS["text_muted"]},
-                                ),
-                            ],
-                            style=cell_style,
-                            className="table-value-cell",
-                        )
-                    else:  # Display N/A if neither value exists
-                        return html.Td("-", style=cell_style, className="table-value-cell")
+                if (
+                    has_sf
+                    and has_cf
+                    and abs(float(sem_fator or 0) - float(com_fator or 0)) > epsilon
+                ):  # Show both if different
+                    parts = ((sem_fator_text, "S/F"), (com_fator_text, "C/F"))
+                elif has_sf:  # Show only S/F if C/F missing or same
+                    parts = ((sem_fator_text, "S/F"),)
+                elif has_cf:  # Show only C/F if S/F missing
+                    parts = ((com_fator_text, "C/F"),)
                 else:
-                    # Handle single value
-                    text = self.format_value(value, precision)
-                    highlight_style = {}
-                    if apply_highlighting and param_type is not None and param_type != "default":
-                        try:
-                            highlight_style = highlight_cell(
-                                safe_float(value), param_type # Usar safe_float para garantir tipo numérico
-                            )
-                        except (ValueError, TypeError):
-                            pass  # Ignore highlighting if not numeric
-
-                    cell_style = {**base_style, **highlight_style}
-                    if "color" not in cell_style:
-                        cell_style["color"] = "black"
+                    parts = (("-", None),)
+                return result_tables.ValueCell(parts, css)
 
-                    return html.Td(text, style=cell_style, className="table-value-cell")
+            css = ""
+            if apply_highlighting and param_type is not None and param_type != "default":
+                css = highlight_class(safe_float(value), param_type)
+            return result_tables.ValueCell(((format_value(value, precision), None),), css)
 
-        # --- StatusStyler Class (Improved Styling) ---
+        # --- StatusStyler: classe CSS do status (estilos inline usados na legenda) ---
         class StatusStyler:
-            def __init__(self, column_widths):
-                self.column_widths = column_widths
-                self.base_style = {
-                    **TABLE_STATUS_STYLE,
-                    "verticalAlign": "middle",
-                    "fontSize": "0.7rem",
-                    "padding": "0.2rem",
-                }  # Adjust padding
+            def __init__(self):
+                pot_crit_key = f"{cap_bank_analyzer.potencia_critica_threshold:.1f}+"
+                pot_alert_key = f"{cap_bank_analyzer.potencia_alerta_threshold:.1f}+"
                 # Define styles based on keywords in the status string
                 self.status_styles = {
                     "(V)": {
@@ -3606,12 +1909,12 @@ def losses_handle_perdas_carga(
                         "backgroundColor": "transparent",
                         "fontWeight": "bold",
                     },  # Sem fundo para active power
-                    f"{cap_bank_analyzer.potencia_critica_threshold:.1f}+": {
+                    pot_crit_key: {
                         "color": CONFIG_COLORS["danger_text"],
                         "backgroundColor": "transparent",
                         "fontWeight": "bold",
                     },  # Sem fundo para critical power
-                    f"{cap_bank_analyzer.potencia_alerta_threshold:.1f}+": {
+                    pot_alert_key: {
                         "color": CONFIG_COLORS["warning_text"],
                         "backgroundColor": "transparent",
                         "fontWeight": "bold",
@@ -3630,46 +1933,27 @@ def losses_handle_perdas_carga(
                         "backgroundColor": "transparent",
                     },  # Gray text, no background
                 }
-                self.default_style = self.status_styles["N/A"]
-
-            def get_style(self, status_text, col_idx):
-                """Determines the style based on keywords"""
-                table_col_idx = col_idx + 1  # Actual table column index
-                width = self.column_widths.get(table_col_idx, "auto")
-                style = {
-                    **self.base_style,
-                    "width": width,
-                    "maxWidth": width,
-                    "minWidth": width,
-                    "textAlign": "center",
-                }  # Center align status
-                if not isinstance(status_text, str):
-                    status_text = "N/A"
-
-                applied_style = self.default_style  # Default
-
-                # Check keywords in order of precedence
-                pot_crit_key = f"{cap_bank_analyzer.potencia_critica_threshold:.1f}+"
-                pot_alert_key = f"{cap_bank_analyzer.potencia_alerta_threshold:.1f}+"
+                # Palavras-chave em ordem de precedência -> classe CSS (N/A é o padrão)
+                self.status_classes = (
+                    ("(V)", "danger"),
+                    ("(A)", "danger"),
+                    ("(P)", "danger"),
+                    (pot_crit_key, "danger"),
+                    (pot_alert_key, "warning"),
+                )
 
-                if "(V)" in status_text:
-                    applied_style = self.status_styles["(V)"]
-                elif "(A)" in status_text:
-                    applied_style = self.status_styles["(A)"]
-                elif "(P)" in status_text:
-                    applied_style = self.status_styles["(P)"]
-                elif pot_crit_key in status_text:
-                    applied_style = self.status_styles[pot_crit_key]
-                elif pot_alert_key in status_text:
-                    applied_style = self.status_styles[pot_alert_key]
-                elif "(" in status_text and ")" in status_text and "Inv" not in status_text:
-                    applied_style = self.status_styles["eventos"]
-                elif status_text == "OK":
-                    applied_style = self.status_styles["OK"]
-                # N/A is the default
-
-                style.update(applied_style)
-                return style
+            def get_class(self, status_text):
+                """Determines the CSS class based on keywords"""
+                if not isinstance(status_text, str):
+                    return ""
+                for keyword, css_class in self.status_classes:
+                    if keyword in status_text:
+                        return css_class
+                if "(" in status_text and ")" in status_text and "Inv" not in status_text:
+                    return "event"
+                if status_text == "OK":
+                    return "ok"
+                return ""
 
         # --- Table Generation Setup ---
         headers = ["Parâmetro"] + [f"Tap {r['Tap']}" for r in resultados]
@@ -3677,136 +1961,34 @@ def losses_handle_perdas_carga(
         param_col_width = 36  # Percentage
         tap_width_total = 100 - param_col_width
         tap_width = f"{math.floor(tap_width_total / num_taps)}%" if num_taps > 0 else "21%"
-        column_widths = {0: f"{param_col_width}%"}
-        for i in range(num_taps):
-            column_widths[i + 1] = tap_width
-
-        results_meta = [{"Tap": r["Tap"]} for r in resultados]
-        cell_formatter = TableCellFormatter(column_widths, results_meta)
-        status_styler = StatusStyler(column_widths)
-
-        def create_table_cell(
-            value,
-            row_idx,
-            col_idx,
-            apply_highlighting,
-            param_type=None,
-            param_name=None,
-            precision=2,
-        ):
-            return cell_formatter.create_cell(
-                value,
-                row_idx,
-                col_idx,
-                apply_highlighting,
-                param_type,
-                param_name,
-                precision=precision,
-            )
+        column_widths = [f"{param_col_width}%"] + [tap_width] * num_taps
+        status_styler = StatusStyler()
 
-        def create_status_cell(value_tuple, col_idx):
+        def create_status_cell(value_tuple):
             """Creates the status cell using the analyzer and styler"""
             if not isinstance(value_tuple, tuple) or len(value_tuple) < 7:
                 status_text = "N/A (Dados Status Inv.)"
-                status_style = status_styler.get_style(status_text, col_idx)
-                return html.Td(status_text, style=status_style)
-
-            # Unpack the tuple for the status analyzer (uses REQUIRED power)
-            (
-                test_voltage,
-                cap_bank_voltage_cf,
-                power_cf_required,
-                cap_bank_voltage_sf,
-                power_sf_required,
-                corrente,
-                potencia_ativa,
-            ) = value_tuple
-
-            status_text = get_cap_bank_status(
-                test_voltage,
-                cap_bank_voltage_cf,
-                power_cf_required,
-                cap_bank_voltage_sf,
-                power_sf_required,
-                corrente,
-                potencia_ativa,
-            )
-            status_style = status_styler.get_style(status_text, col_idx)
-
-            # Wrap text for better readability in narrow columns
-            wrapped_status = html.Div(
-                status_text,
-                style={"whiteSpace": "normal", "wordWrap": "break-word", "lineHeight": "1.2"},
-            )
-            return html.Td(wrapped_status, style=status_style)
-
-        def create_table_body(rows_data, apply_highlighting=False):
-            """Creates the Tbody element, handling parameter, value, and status rows"""
-            tbody_rows = []
-            param_style = {
-                **TABLE_PARAM_STYLE_MD,
-                "width": column_widths[0],
-                "verticalAlign": "middle",
-                "color": "black",
-                "textAlign": "left",
-                "paddingLeft": "5px",
-            }
-            for row_idx, row_data in enumerate(rows_data):
+            else:
+                # Tensão de ensaio, bancos C/F e S/F (potência REQUERIDA), corrente, P ativa
+                status_text = get_cap_bank_status(*value_tuple)
+            return result_tables.StatusCell(status_text, status_styler.get_class(status_text))
+
+        def create_table_rows(rows_data, apply_highlighting=False):
+            """Linhas (parâmetro, células) com parâmetros, valores e status"""
+            table_rows = []
+            for row_data in rows_data:
                 param_name = row_data[0]
                 param_type = parameter_analyzer.get_param_type(param_name)
-                cells = [html.Td(param_name, style=param_style)]
-
-                for i, value in enumerate(row_data[1:]):
-                    col_index = i  # 0-based index for the tap column
-                    if param_name == "Status":
-                        status_cell = create_status_cell(value, col_index)
-                        cells.append(status_cell)
-                    else:
-                        precision = 2  # Default precision é 2 casas decimais para padronização
-                        if "(kV)" in param_name or "(MVA)" in param_name or "(MVAr)" in param_name:
-                            precision = 2  # Alterado de 1 para 2 casas decimais
-                        elif "(A)" in param_name:
-                            precision = 2  # Mantido em 2 casas decimais
-                        elif "(kW)" in param_name:
-                            precision = 2  # Mantido em 2 casas decimais
-                        elif "Vcc (%)" in param_name:
-                            precision = 2  # Alterado de 3 para 2 casas decimais
-                        elif "Pnominal (kVA)" in param_name:
-                            precision = 2  # Alterado de 0 para 2 casas decimais
-                        elif "Q Power Provided" in param_name:
-                            precision = 2  # Alterado de 1 para 2 casas decimais
-
-                        cell = create_table_cell(
-                            value,
-                            row_idx,
-                            col_index,
-                            apply_highlighting,
-                            param_type,
-                            param_name,
-                            precision=precision,
-                        )
-                        cells.append(cell)
-                tbody_rows.append(html.Tr(cells))
-            return html.Tbody(tbody_rows)
-
-        # Define Table Headers and Styles
-        header_cells = []
-        for i, h in enumerate(headers):
-            width = column_widths.get(i, "auto")
-            text_align = "left" if i == 0 else "center"
-            header_style = {
-                **TABLE_HEADER_STYLE_MD,
-                "width": width,
-                "maxWidth": width,
-                "minWidth": width,
-                "verticalAlign": "middle",
-                "textAlign": text_align,
-            }
-            if i == 0:
-                header_style["paddingLeft"] = "5px"
-            header_cells.append(html.Th(h, style=header_style))
-        header_row = html.Thead(html.Tr(header_cells))
-        table_style = {"tableLayout": "fixed", "width": "100%"}
+                if param_name == "Status":
+                    cells = [create_status_cell(value) for value in row_data[1:]]
+                else:
+                    # Todas as grandezas são exibidas com 2 casas decimais
+                    cells = [
+                        create_table_cell(value, apply_highlighting, param_type, param_name)
+                        for value in row_data[1:]
+                    ]
+                table_rows.append((param_name, *cells))
+            return table_rows
 
         # --- Define Row Keys for Each Table Section (UPDATED for split cells) ---
         # Format for config cells: {'split_cell': True, 'sf': {'numeric': num_key, 'config': cfg_key}, 'cf': {'numeric': num_key, 'config': cfg_key}}
@@ -4125,84 +2307,16 @@ def losses_handle_perdas_carga(
             return data
 
         # Create Tables for Each Section
-        table_frio = dbc.Table(
-            [
-                header_row,
-                create_table_body(
-                    extract_row_data(rows_frio_keys, resultados), apply_highlighting=True
-                ),
-            ],
-            bordered=True,
-            hover=True,
-            striped=True,
-            size="sm",
-            className="mb-3",
-            style=table_style,
-        )
-        table_quente = dbc.Table(
-            [
-                header_row,
-                create_table_body(
-                    extract_row_data(rows_quente_keys, resultados), apply_highlighting=True
-                ),
-            ],
-            bordered=True,
-            hover=True,
-            striped=True,
-            size="sm",
-            className="mb-3",
-            style=table_style,
-        )
-        table_25c = dbc.Table(
-            [
-                header_row,
-                create_table_body(
-                    extract_row_data(rows_25c_keys, resultados), apply_highlighting=True
-                ),
-            ],
-            bordered=True,
-            hover=True,
-            striped=True,
-            size="sm",
-            className="mb-3",
-            style=table_style,
-        )
-        table_1_2 = (
-            dbc.Table(
-                [
-                    header_row,
-                    create_table_body(
-                        extract_row_data(rows_1_2_keys, resultados), apply_highlighting=True
-                    ),
-                ],
-                bordered=True,
-                hover=True,
-                striped=True,
-                size="sm",
-                className="mb-3",
-                style=table_style,
-            )
-            if overload_applicable
-            else None
-        )
-        table_1_4 = (
-            dbc.Table(
-                [
-                    header_row,
-                    create_table_body(
-                        extract_row_data(rows_1_4_keys, resultados), apply_highlighting=True
-                    ),
-                ],
-                bordered=True,
-                hover=True,
-                striped=True,
-                size="sm",
-                className="mb-3",
-                style=table_style,
-            )
-            if overload_applicable
-            else None
-        )
+        def create_results_table(keys_list):
+            rows_data = extract_row_data(keys_list, resultados)
+            rows = create_table_rows(rows_data, apply_highlighting=True)
+            return result_tables.results_table(headers, column_widths, rows)
+
+        table_frio = create_results_table(rows_frio_keys)
+        table_quente = create_results_table(rows_quente_keys)
+        table_25c = create_results_table(rows_25c_keys)
+        table_1_2 = create_results_table(rows_1_2_keys) if overload_applicable else None
+        table_1_4 = create_results_table(rows_1_4_keys) if overload_applicable else None
 
         # --- Legend ---
 
@@ -4625,12 +2739,6 @@ def losses_handle_perdas_carga(
         )
 
         # --- SUT/EPS Analysis (Load Losses - WITH COMPENSATION) ---
-        tensao_sut_bt_v = SUT_BT_VOLTAGE  # Voltage (e.g., 600V)
-        tensao_sut_at_min_v = SUT_AT_MIN_VOLTAGE
-        tensao_sut_at_max_v = SUT_AT_MAX_VOLTAGE
-        step_sut_at_v = SUT_AT_STEP_VOLTAGE
-        limite_corrente_eps_a = EPS_CURRENT_LIMIT  # Amps
-
         # Function to create the small SUT/EPS table (used below)
         def create_sut_eps_analysis_table_component_compensated(analysis_results):
             """Creates the dbc.Table component for COMPENSATED SUT/EPS analysis."""
@@ -4663,194 +2771,7 @@ def losses_handle_perdas_carga(
                     },
                 )
 
-            header_style = {
-                **TABLE_HEADER_STYLE_SM,
-                "backgroundColor": COLORS["background_header"],
-                "color": COLORS["text_header"],
-                "padding": "0.2rem",
-            }
-            cell_style = {**TABLE_VALUE_STYLE_SM, "padding": "0.15rem 0.2rem", "fontSize": "0.7rem"}
-            # Cores de fundo claras para status, consistentes com outras tabelas
-            current_styles = {
-                "negative": {
-                    **cell_style,
-                    "backgroundColor": CONFIG_COLORS["info_bg_faint"],
-                    "color": "blue",
-                    "fontStyle": "italic",
-                },  # Azul claro para correntes negativas
-                "low": {
-                    **cell_style,
-                    "backgroundColor": CONFIG_COLORS["ok_bg_faint"],
-                    "color": "black",
-                },  # Verde claro para < 50%
-                "medium": {
-                    **cell_style,
-                    "backgroundColor": CONFIG_COLORS["warning_bg_faint"],
-                    "color": "black",
-                },  # Amarelo claro para 50-85%
-                "high": {
-                    **cell_style,
-                    "backgroundColor": CONFIG_COLORS["warning_high_bg_faint"],
-                    "color": "black",
-                },  # Laranja claro para 85-100%
-                "critical": {
-                    **cell_style,
-                    "backgroundColor": CONFIG_COLORS["danger_bg"],
-                    "color": "black",
-                },  # Vermelho claro para > 100%, texto preto para melhor legibilidade
-            }
-
-            def get_style(percent):
-                if percent is None or math.isnan(percent):
-                    return cell_style
-                # Verificar se é negativo (excesso de compensação)
-                if percent < 0:
-                    return current_styles["negative"]
-                # Valores positivos seguem a lógica original
-                if percent < 50:
-                    return current_styles["low"]
-                elif percent < 85:
-                    return current_styles["medium"]
-                elif percent <= 100:
-                    return current_styles["high"]
-                else:
-                    return current_styles["critical"]
-
-            # Ajustar larguras: Tap SUT (kV) = 1/3, I EPS (A) = 2/3
-            tap_header_style = {**header_style, "width": "33%"}
-            current_header_style = {**header_style, "width": "67%", "padding": "0.1rem 0"}
-
-            # Criar cabeçalho de duas linhas para a tabela
-            header = html.Thead(
-                [
-                    # Primeira linha: Tap SUT (kV) e I EPS (A)
-                    html.Tr(
-                        [
-                            html.Th(
-                                "Tap SUT (kV)",
-                                style={**tap_header_style, "borderBottom": "none"},
-                                rowSpan=2,
-                            ),
-                            html.Th(
-                                "I EPS (A)",
-                                style={**current_header_style, "borderBottom": "none"},
-                                colSpan=2,
-                            ),
-                        ]
-                    ),
-                    # Segunda linha: (S/F) e (C/F)
-                    html.Tr(
-                        [
-                            html.Th(
-                                "(S/F)",
-                                style={
-                                    **header_style,
-                                    "width": "33.5%",
-                                    "borderTop": "none",
-                                    "fontSize": "0.65rem",
-                                    "borderRight": f"1px solid {COLORS['border']}",
-                                    "textAlign": "center",
-                                },
-                            ),
-                            html.Th(
-                                "(C/F)",
-                                style={
-                                    **header_style,
-                                    "width": "33.5%",
-                                    "borderTop": "none",
-                                    "fontSize": "0.65rem",
-                                    "textAlign": "center",
-                                },
-                            ),
-                        ]
-                    ),
-                ]
-            )
-            rows = []
-            for info in taps_info:  # Already sorted by voltage and limited
-                tap_kv_disp = (
-                    f"{info['tap_sut_kv']:.2f}" if info.get("tap_sut_kv") is not None else "-"
-                )
-
-                # Função para formatar corrente (converter para kA se > 999.99 A)
-                def format_current(current_value):
-                    if current_value is None:
-                        return "-"
-
-                    current_abs = abs(current_value)
-                    if current_abs > 999.99:
-                        # Converter para kA com 2 casas decimais
-                        formatted = f"{current_value/1000:.2f} kA"
-                    else:
-                        # Manter em A com 2 casas decimais
-                        formatted = f"{current_value:.2f}"
-
-                    return formatted
-
-                # Formatar corrente I EPS (A) para S/F
-                if info.get("corrente_eps_sf_a") is not None:
-                    corrente_eps_sf = float(info["corrente_eps_sf_a"])
-                    eps_sf_a_disp = format_current(corrente_eps_sf)
-                else:
-                    eps_sf_a_disp = "-"
-
-                # Formatar corrente I EPS (A) para C/F
-                if info.get("corrente_eps_cf_a") is not None:
-                    corrente_eps_cf = float(info["corrente_eps_cf_a"])
-                    eps_cf_a_disp = format_current(corrente_eps_cf)
-                else:
-                    eps_cf_a_disp = "-"
-
-                # Ajustar estilos das células para manter a proporção 1/3 e 2/3
-                tap_cell_style = {**cell_style, "width": "33%", "textAlign": "center"}
-                current_cell_style = {**cell_style, "width": "67%", "padding": "0"}
-
-                # Obter estilos baseados nas porcentagens de limite para S/F e C/F
-                sf_style = get_style(info.get("percent_limite_sf"))
-                cf_style = get_style(info.get("percent_limite_cf"))
-
-                # Criar células separadas para S/F e C/F em vez de uma célula dividida
-                # Isso garante melhor alinhamento com os cabeçalhos
-
-                # Célula para o valor Tap SUT (kV)
-                tap_cell = html.Td(tap_kv_disp, style=tap_cell_style)
-
-                # Célula para o valor S/F
-                sf_cell = html.Td(
-                    eps_sf_a_disp,
-                    style={
-                        **cell_style,
-                        "textAlign": "center",
-                        "fontWeight": "bold",
-                        "backgroundColor": sf_style.get("backgroundColor", "transparent"),
-                        "borderRight": f'1px solid {COLORS["border"]}',
-                        "width": "33.5%",
-                    },
-                )
-
-                # Célula para o valor C/F
-                cf_cell = html.Td(
-                    eps_cf_a_disp,
-                    style={
-                        **cell_style,
-                        "textAlign": "center",
-                        "fontWeight": "bold",
-                        "backgroundColor": cf_style.get("backgroundColor", "transparent"),
-                        "width": "33.5%",
-                    },
-                )
-
-                # Adicionar a linha com as três células separadas
-                rows.append(html.Tr([tap_cell, sf_cell, cf_cell]))
-            body = html.Tbody(rows)
-            return dbc.Table(
-                [header, body],
-                bordered=True,
-                hover=True,
-                striped=True,
-                size="sm",
-                style={"width": "100%", "tableLayout": "fixed", "marginBottom": "0"},
-            )
+            return result_tables.sut_eps_table(taps_info)
 
         # --- Build SUT/EPS Analysis Cards Manually (WITH COMPENSATION) ---
         sut_scenarios_info = {
@@ -4892,6 +2813,9 @@ def losses_handle_perdas_carga(
                 "title": "ANÁLISE SUT/EPS: SOBRECARGA 1.4 PU",
             }
 
+        # Análise SUT/EPS compensada calculada pelo motor, indexada por (cenário, tap)
+        sut_results = resultado_carga.sut_analysis
+
         sut_analysis_cards = {}
         for scen_key, scen_info in sut_scenarios_info.items():
             sut_cols = []
@@ -4901,81 +2825,12 @@ def losses_handle_perdas_carga(
                 if tap_label not in ["Nominal", "Menor", "Maior"]:
                     continue
 
-                tensao_ref_dut_kv = res.get(scen_info["tensao_key"])
-                corrente_ref_dut_a = res.get(scen_info["corrente_key"])
-                # --- Scenario-specific compensation parameters are now obtained directly in the calculation loop ---
-
-                analysis_result = {
-                    "status": "Erro nos dados de entrada SUT",
-                    "taps_info": [],
-                }  # Default
-                if tensao_ref_dut_kv is not None and corrente_ref_dut_a is not None:
-                    V_target_sut_hv_v = tensao_ref_dut_kv * 1000  # Target in Volts
-                    taps_sut_hv_v = np.arange(
-                        tensao_sut_at_min_v, tensao_sut_at_max_v + step_sut_at_v, step_sut_at_v
-                    )
-                    taps_sut_hv_v = taps_sut_hv_v[taps_sut_hv_v > epsilon]
-
-                    if len(taps_sut_hv_v) == 0:
-                        analysis_result = {"status": "Faixa SUT AT inválida", "taps_info": []}
-                    else:
-                        # Find top 5 taps closest to the target voltage
-                        diffs = {tap: abs(tap - V_target_sut_hv_v) for tap in taps_sut_hv_v}
-                        taps_ordenados = sorted(taps_sut_hv_v, key=lambda tap: diffs[tap])
-                        top_5_taps_v = taps_ordenados[:5]
-
-                        taps_info_list_compensated = []
-                        for V_sut_hv_tap_v in top_5_taps_v:
-                            # Get S/F and C/F values for compensation
-                            q_power_scenario_sf_mvar = res.get(
-                                f"Q Power Provided {scen_key} S/F (MVAr)"
-                            )
-                            cap_bank_voltage_scenario_sf_kv = res.get(
-                                f"Cap Bank Voltage {scen_key} Sem Fator (kV)"
-                            )
-                            q_power_scenario_cf_mvar = res.get(
-                                f"Q Power Provided {scen_key} (MVAr)"
-                            )  # C/F
-                            cap_bank_voltage_scenario_cf_kv = res.get(
-                                f"Cap Bank Voltage {scen_key} Com Fator (kV)"
-                            )
-
-                            # Call the updated compensated calculation function with separate S/F and C/F values
-                            comp_result = calculate_sut_eps_current_compensated(
-                                tensao_ref_dut_kv=tensao_ref_dut_kv,
-                                corrente_ref_dut_a=corrente_ref_dut_a,
-                                q_power_scenario_sf_mvar=q_power_scenario_sf_mvar,
-                                cap_bank_voltage_scenario_sf_kv=cap_bank_voltage_scenario_sf_kv,
-                                q_power_scenario_cf_mvar=q_power_scenario_cf_mvar,
-                                cap_bank_voltage_scenario_cf_kv=cap_bank_voltage_scenario_cf_kv,
-                                transformer_type=tipo_transformador,
-                                V_sut_hv_tap_v=V_sut_hv_tap_v,
-                                tensao_sut_bt_v=tensao_sut_bt_v,
-                                limite_corrente_eps_a=limite_corrente_eps_a,
-                            )
-                            taps_info_list_compensated.append(
-                                {
-                                    "tap_sut_kv": V_sut_hv_tap_v / 1000.0,
-                                    "corrente_eps_sf_a": comp_result[
-                                        "corrente_eps_sf_a"
-                                    ],  # S/F current
-                                    "percent_limite_sf": comp_result[
-                                        "percent_limite_sf"
-                                    ],  # S/F percentage
-                                    "corrente_eps_cf_a": comp_result[
-                                        "corrente_eps_cf_a"
-                                    ],  # C/F current
-                                    "percent_limite_cf": comp_result[
-                                        "percent_limite_cf"
-                                    ],  # C/F percentage
-                                }
-                            )
-
-                        # Sort the final list by voltage ascending
-                        taps_info_list_compensated.sort(key=lambda x: x["tap_sut_kv"])
-                        analysis_result = {"status": "OK", "taps_info": taps_info_list_compensated}
-                        if taps_info_list_compensated:
-                            has_valid_sut_data = True
+                analysis_result = sut_results.get(
+                    (scen_key, tap_label),
+                    {"status": "Erro nos dados de entrada SUT", "taps_info": []},
+                )
+                if analysis_result["taps_info"]:
+                    has_valid_sut_data = True
 
                 # Create the column for this DUT tap (Nominal, Menor, Maior)
                 num_display_taps = len(
@@ -4986,19 +2841,7 @@ def losses_handle_perdas_carga(
                 sut_cols.append(
                     dbc.Col(
                         [
-                            html.Div(
-                                f"Tap {tap_label}",
-                                className="text-center py-1",
-                                style={
-                                    "fontSize": "0.7rem",
-                                    "fontWeight": "bold",
-                                    "color": COLORS["text_header"],
-                                    "backgroundColor": COLORS["background_header"],
-                                    "padding": "0.1rem 0",
-                                    "marginBottom": "2px",
-                                    "borderRadius": "2px 2px 0 0",
-                                },
-                            ),
+                            result_tables.sut_tap_header(tap_label),
                             create_sut_eps_analysis_table_component_compensated(
                                 analysis_result
                             ),  # Use the correct render func
@@ -5214,6 +3057,8 @@ def losses_handle_perdas_carga(
                 )
             )
 
+        detailed_results_children.append(create_cap_bank_plan_card(plano_banco))
+
         # Add Legend
         detailed_results_children.append(legend)
 
@@ -5383,6 +3228,7 @@ def losses_handle_perdas_carga(
             "suggested_q_power_mvar": q_power_mvar_provided_overall,  # Store the OVERALL provided power
             "max_test_voltage_kv_overall": max_test_voltage_kv_overall,
             "max_test_power_mvar_overall_required": max_test_power_mvar_overall_required,  # Store the required max power
+            "plano_banco": plano_banco,  # None se o otimizador falhou
             # No need to store scenario_configs separately, they are now part of 'resultados'
         }
 
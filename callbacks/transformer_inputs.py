@@ -201,13 +201,17 @@ def register_transformer_inputs_callbacks(app_instance):
                         log.warning("[UpdateTransformerCalc] Dados insuficientes para propagação. Abortando.")
                     else:
                         from utils.mcp_persistence import ensure_mcp_data_propagation
+                        from utils.mcp_subscriptions import get_changes
                         target_stores = [
                             "losses-store", "impulse-store", "dieletric-analysis-store",
                             "applied-voltage-store", "induced-voltage-store", "short-circuit-store",
                             "temperature-rise-store", "comprehensive-analysis-store",
                         ]
-                        for target_store in target_stores:
-                            ensure_mcp_data_propagation(app_instance, "transformer-inputs-store", [target_store])
+                        # Propaga só as chaves alteradas aos stores que as assinam
+                        changes = get_changes(mcp_snapshot_before_update, latest_data_for_propagation)
+                        ensure_mcp_data_propagation(
+                            app_instance, "transformer-inputs-store", target_stores, changes
+                        )
                         log.debug("[UpdateTransformerCalc] Dados propagados para todos os stores alvo.")
                 except Exception as e_prop:
                     log.error(f"[UpdateTransformerCalc] Erro ao propagar dados: {e_prop}", exc_info=True)
@@ -0,0 +1,216 @@
+# components/result_tables.py
+"""
+Renderização compacta das tabelas de resultados das perdas em carga.
+
+As tabelas detalhadas por cenário e as tabelas SUT/EPS eram montadas célula a célula
+como componentes Dash (html.Td/Span/Sup com dicionários de estilo inline e um Popover
+por célula dividida), gerando milhares de componentes e centenas de KB por cálculo.
+
+Aqui as células são descritas por especificações imutáveis (`ValueCell`, `SplitCell`,
+`StatusCell`) e cada tabela é compilada em um único fragmento HTML: o estilo vem de
+classes CSS compartilhadas (assets/result_tables.css), as larguras são definidas uma
+vez por coluna (`colgroup`) e as configurações CS/Q aparecem no atributo `title` da
+célula. O fragmento é entregue em um `dcc.Markdown` com HTML habilitado (um único
+componente por tabela).
+
+A especificação completa da tabela é a chave de um cache LRU de fragmentos: tabelas com
+os mesmos valores exibidos reutilizam o HTML já gerado.
+"""
+import functools
+import logging
+import math
+from html import escape
+from typing import NamedTuple, Optional, Sequence
+
+from dash import dcc, html
+
+log = logging.getLogger(__name__)
+
+RENDER_CACHE_SIZE = 256
+TABLE_CLASSES = "table table-bordered table-hover table-striped table-sm lt-table"
+
+
+class ValueCell(NamedTuple):
+    """Célula de valores: `parts` = ((texto, rótulo "S/F"/"C/F"/... ou None), ...)."""
+
+    parts: tuple
+    css: str = ""
+    title: Optional[str] = None
+
+
+class SplitCell(NamedTuple):
+    """Célula dividida em duas metades (S/F à esquerda, C/F à direita)."""
+
+    sf: ValueCell
+    cf: ValueCell
+
+
+class StatusCell(NamedTuple):
+    text: str
+    css: str = ""
+
+
+def _attrs(css: str, title: Optional[str] = None) -> str:
+    """Atributos class/title; quebras de linha do title como entidades (sem linhas em
+    branco, que encerrariam o bloco HTML no Markdown)."""
+    attrs = f' class="{css.strip()}"' if css.strip() else ""
+    if title:
+        attrs += f' title="{escape(title).replace(chr(10), "&#10;")}"'
+    return attrs
+
+
+def _parts_html(parts: tuple) -> str:
+    if len(parts) == 1 and parts[0][1] is None:
+        return escape(str(parts[0][0]))
+    return " / ".join(
+        f"<span>{escape(str(text))}</span>" + (f"<sup> {escape(label)}</sup>" if label else "")
+        for text, label in parts
+    )
+
+
+def _cell_html(cell) -> str:
+    if isinstance(cell, StatusCell):
+        return f"<td{_attrs('status ' + cell.css)}>{escape(cell.text)}</td>"
+    if isinstance(cell, SplitCell):
+        halves = "".join(
+            f"<div{_attrs(f'{side} {half.css}', half.title)}>"
+            f"{_parts_html(half.parts)}</div>"
+            for side, half in (("sf", cell.sf), ("cf", cell.cf))
+        )
+        return f'<td class="split">{halves}</td>'
+    return f"<td{_attrs(cell.css, cell.title)}>{_parts_html(cell.parts)}</td>"
+
+
+def _colgroup_html(widths: Sequence[str]) -> str:
+    cols = "".join(f'<col style="width:{escape(width)}">' for width in widths)
+    return f"<colgroup>{cols}</colgroup>"
+
+
+def _fragment(html_text: str) -> dcc.Markdown:
+    return dcc.Markdown(html_text, dangerously_allow_html=True, className="lt-fragment")
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _results_table_html(headers: tuple, widths: tuple, rows: tuple) -> str:
+    header = "".join(f"<th>{escape(h)}</th>" for h in headers)
+    body = "".join(
+        f"<tr><th>{escape(param_name)}</th>"
+        f"{''.join(map(_cell_html, cells))}</tr>"
+        for param_name, *cells in rows
+    )
+    return (
+        f'<table class="{TABLE_CLASSES} lt-results mb-3">{_colgroup_html(widths)}'
+        f"<thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+    )
+
+
+def results_table(
+    headers: Sequence[str], widths: Sequence[str], rows: Sequence
+) -> dcc.Markdown:
+    """
+    Tabela de resultados de um cenário.
+
+    Args:
+        headers: Cabeçalhos ("Parâmetro", "Tap Nominal", ...)
+        widths: Largura CSS de cada coluna
+        rows: Linhas (nome do parâmetro, célula por tap); células ValueCell, SplitCell
+            ou StatusCell
+
+    Returns:
+        Componente único com o fragmento HTML da tabela.
+    """
+    key = (tuple(headers), tuple(widths), tuple(tuple(row) for row in rows))
+    return _fragment(_results_table_html(*key))
+
+
+# --- Tabela SUT/EPS compensada ---
+
+
+def eps_current_level(percent) -> Optional[str]:
+    """Faixa do percentual do limite de corrente do EPS (classe CSS da célula)."""
+    if percent is None or math.isnan(percent):
+        return None
+    if percent < 0:
+        return "negative"  # Excesso de compensação
+    if percent < 50:
+        return "low"
+    if percent < 85:
+        return "medium"
+    if percent <= 100:
+        return "high"
+    return "critical"
+
+
+def format_eps_current(value) -> str:
+    """Corrente do EPS com 2 casas; em kA acima de 999.99 A."""
+    if value is None:
+        return "-"
+    value = float(value)
+    if abs(value) > 999.99:
+        return f"{value / 1000:.2f} kA"
+    return f"{value:.2f}"
+
+
+SUT_EPS_HEADER = (
+    "<thead>"
+    '<tr><th rowspan="2">Tap SUT (kV)</th><th colspan="2">I EPS (A)</th></tr>'
+    '<tr class="sub"><th>(S/F)</th><th>(C/F)</th></tr>'
+    "</thead>"
+)
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _sut_eps_table_html(rows: tuple) -> str:
+    body = "".join(
+        f"<tr><td>{escape(tap_text)}</td>"
+        f"<td{_attrs(sf_level or '')}>{escape(sf_text)}</td>"
+        f"<td{_attrs(cf_level or '')}>{escape(cf_text)}</td></tr>"
+        for tap_text, sf_text, sf_level, cf_text, cf_level in rows
+    )
+    return (
+        f'<table class="{TABLE_CLASSES} lt-sut-eps">'
+        f'{_colgroup_html(("33%", "33.5%", "33.5%"))}{SUT_EPS_HEADER}'
+        f"<tbody>{body}</tbody></table>"
+    )
+
+
+def sut_eps_table(taps_info: Sequence[dict]) -> dcc.Markdown:
+    """
+    Tabela SUT/EPS compensada de um tap do DUT.
+
+    Args:
+        taps_info: Lista de {'tap_sut_kv', 'corrente_eps_sf_a', 'percent_limite_sf',
+            'corrente_eps_cf_a', 'percent_limite_cf'} (ordem crescente de tensão)
+    """
+    rows = tuple(
+        (
+            f"{info['tap_sut_kv']:.2f}" if info.get("tap_sut_kv") is not None else "-",
+            format_eps_current(info.get("corrente_eps_sf_a")),
+            eps_current_level(info.get("percent_limite_sf")),
+            format_eps_current(info.get("corrente_eps_cf_a")),
+            eps_current_level(info.get("percent_limite_cf")),
+        )
+        for info in taps_info
+    )
+    return _fragment(_sut_eps_table_html(rows))
+
+
+def sut_tap_header(tap_label: str) -> html.Div:
+    """Rótulo da coluna de um tap do DUT acima da tabela SUT/EPS."""
+    return html.Div(f"Tap {tap_label}", className="lt-sut-tap text-center py-1")
+
+
+def render_cache_info() -> dict:
+    """Estatísticas dos caches de fragmentos (acertos/faltas por tipo de tabela)."""
+    return {
+        "results": _results_table_html.cache_info()._asdict(),
+        "sut_eps": _sut_eps_table_html.cache_info()._asdict(),
+    }
+
+
+def clear_render_cache() -> None:
+    _results_table_html.cache_clear()
+    _sut_eps_table_html.cache_clear()
+
+
+# --- END OF FILE components/result_tables.py ---
@@ -47,6 +47,13 @@ DEFAULT_THEME_URL = getattr(dbc.themes, DEFAULT_THEME_NAME, dbc.themes.DARKLY)
 PDF_AUTHOR = "Simulador de Testes"
 PDF_CREATOR = "Transformer Test Simulation Tool"
 
+# Sessões do MCP (app_core/mcp_sessions.py): um MCP por navegador
+MCP_MAX_SESSIONS = 32  # Sessões em memória por processo (despejo LRU)
+MCP_SESSION_IDLE_TIMEOUT_S = 4 * 3600  # Sessão ociosa é despejada da memória
+# Arquivo SQLite compartilhado entre workers (ex.: gunicorn -w 4); vazio = só em memória
+MCP_SESSION_DB = os.environ.get("MCP_SESSION_DB", "")
+MCP_SESSION_RETENTION_S = 7 * 24 * 3600  # Sessões sem gravação removidas do backend
+
 # -----------------------------------------------------------------------------
 # Configurações de Logging
 # -----------------------------------------------------------------------------
@@ -4,9 +4,16 @@ Centraliza todos os cálculos relacionados a impulsos atmosféricos, de manobra
 """
 
 import logging
-import math
 
-import numpy as np
+from app_core.impulse_kernel import (  # noqa: F401 - reexportados para compatibilidade
+    analyze_chopped_impulse,
+    analyze_lightning_impulse,
+    analyze_switching_impulse,
+    calculate_k_factor_transform,
+    double_exp_func,
+    rlc_solution,
+    simulate_hybrid_impulse,
+)
 
 # Configuração de logging
 log = logging.getLogger(__name__)
@@ -44,384 +51,8 @@ TEST_OBJECT_MIN_PF = 1600.0  # Capacitância mínima típica em pF
 TEST_OBJECT_MAX_PF = 3500.0  # Capacitância máxima típica em pF
 
 
-def double_exp_func(t_sec: np.ndarray, V0_norm: float, alpha: float, beta: float) -> np.ndarray:
-    """
-    Função de dupla exponencial normalizada V(t) = K * [exp(-alpha*t) - exp(-beta*t)],
-    onde K é ajustado para que o pico da função seja V0_norm.
-    Requer beta > alpha.
-
-    Args:
-        t_sec: Array de tempo em segundos
-        V0_norm: Valor de pico normalizado
-        alpha: Constante de tempo de cauda (s⁻¹)
-        beta: Constante de tempo de frente (s⁻¹)
-
-    Returns:
-        Array de tensão normalizada
-    """
-    v_out = np.zeros_like(t_sec)
-    if alpha <= 0 or beta <= 0:
-        log.warning(
-            f"Alpha ({alpha}) ou Beta ({beta}) inválido (não positivo) para dupla exponencial."
-        )
-        return v_out
-    if beta <= alpha + 1e-9 * alpha:  # Adiciona tolerância relativa
-        log.warning(
-            f"Beta ({beta:.3e}) deve ser maior que Alpha ({alpha:.3e}) para dupla exponencial."
-        )
-        return v_out
-
-    try:
-        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
-            # Tempo de pico teórico
-            t_peak = math.log(beta / alpha) / (beta - alpha) if beta > alpha else 0
-
-            # Valor no pico para normalização
-            norm_factor = (
-                (math.exp(-alpha * t_peak) - math.exp(-beta * t_peak)) if t_peak >= 0 else 0
-            )
-            if abs(norm_factor) < 1e-12:
-                log.warning("Fator de normalização da dupla exponencial próximo de zero.")
-                return v_out
-
-            # Fator K para normalização
-            k_norm = V0_norm / norm_factor
-
-            # Garante que t seja não-negativo para evitar problemas numéricos
-            t_safe = np.maximum(t_sec, 0)
-
-            # Calcula a forma de onda
-            v_out = k_norm * (np.exp(-alpha * t_safe) - np.exp(-beta * t_safe))
-
-            return v_out
-    except (ValueError, OverflowError, ZeroDivisionError) as e:
-        log.error(f"Erro no cálculo da dupla exponencial: {e}")
-        return np.zeros_like(t_sec)
-
-
-def rlc_solution(
-    t_sec: np.ndarray, v0: float, r_total: float, l_total: float, c_eq: float
-) -> np.ndarray:
-    """
-    Solução analítica do circuito RLC série para descarga de capacitor.
-
-    Args:
-        t_sec: Array de tempo em segundos
-        v0: Tensão inicial de carga em Volts
-        r_total: Resistência total em Ohms
-        l_total: Indutância total em Henries
-        c_eq: Capacitância equivalente em Farads
-
-    Returns:
-        Array de tensão em Volts
-    """
-    v_out = np.zeros_like(t_sec)
-
-    # Validação de parâmetros
-    if l_total <= 0 or c_eq <= 0:
-        log.warning(
-            f"Parâmetros L ({l_total}) ou C ({c_eq}) inválidos (não positivos) para solução RLC."
-        )
-        return v_out
-
-    try:
-        # Frequência natural ao quadrado
-        omega0_sq = 1.0 / (l_total * c_eq)
-
-        # Fator de amortecimento
-        alpha_damp = r_total / (2.0 * l_total) if l_total > 1e-12 else float("inf")
-
-        if alpha_damp < 0:  # Amortecimento não pode ser negativo
-            log.warning(f"Fator de amortecimento alpha_damp ({alpha_damp}) negativo inválido.")
-            return v_out
-
-        # Discriminante para determinar o tipo de resposta
-        delta = alpha_damp**2 - omega0_sq
-
-        # Considera apenas tempos não-negativos
-        t_valid = t_sec[t_sec >= 0]
-
-        # Casos de resposta do circuito RLC
-        if abs(delta / omega0_sq) < 1e-6:  # Criticamente Amortecido (delta ≈ 0)
-            if alpha_damp < 1e-9:  # Praticamente não amortecido
-                omega_n = math.sqrt(omega0_sq)
-                v_out[t_sec >= 0] = v0 * np.cos(omega_n * t_valid)
-            else:
-                a = alpha_damp
-                v_out[t_sec >= 0] = v0 * (1 + a * t_valid) * np.exp(-a * t_valid)
-            log.debug("RLC: Caso Criticamente Amortecido")
-
-        elif delta > 0:  # Sobreamortecido
-            s1 = -alpha_damp + math.sqrt(delta)
-            s2 = -alpha_damp - math.sqrt(delta)
-            k1 = v0 * s2 / (s2 - s1)
-            k2 = v0 * s1 / (s1 - s2)
-            v_out[t_sec >= 0] = k1 * np.exp(s1 * t_valid) + k2 * np.exp(s2 * t_valid)
-            log.debug("RLC: Caso Sobreamortecido")
-
-        else:  # Subamortecido (oscilante)
-            omega_d = math.sqrt(-delta)
-            A = v0
-            phi = 0  # Fase inicial
-            v_out[t_sec >= 0] = A * np.exp(-alpha_damp * t_valid) * np.cos(omega_d * t_valid + phi)
-            log.debug("RLC: Caso Subamortecido (oscilante)")
-
-        return v_out
-
-    except Exception as e:
-        log.exception(f"Erro na solução RLC: {e}")
-        return np.zeros_like(t_sec)
-
-
-def calculate_k_factor_transform(
-    v_rlc_kv: np.ndarray, t_us: np.ndarray, return_params: bool = False
-) -> tuple:
-    """
-    Aplica a transformação K-factor para ajustar a forma de onda RLC para uma dupla exponencial.
-
-    Args:
-        v_rlc_kv: Array de tensão RLC em kV
-        t_us: Array de tempo em μs
-        return_params: Se True, retorna também os parâmetros alpha e beta ajustados
-
-    Returns:
-        Tupla com (v_test, v_base, k_factor, overshoot, (alpha, beta))
-    """
-    # Implementação do algoritmo K-factor
-    # ...
-
-    # Valores de retorno temporários
-    v_test = v_rlc_kv.copy()
-    v_base = v_rlc_kv.copy()
-    k_factor = 1.0
-    overshoot = 0.0
-    alpha = 1e4
-    beta = 1e6
-
-    if return_params:
-        return v_test, v_base, k_factor, overshoot, (alpha, beta)
-    else:
-        return v_test, v_base, k_factor, overshoot
-
-
-def analyze_lightning_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
-    """
-    Analisa parâmetros de Impulso Atmosférico (LI) usando K-Factor.
-
-    Args:
-        t_us: Array de tempo em μs
-        v_kv: Array de tensão em kV
-
-    Returns:
-        Dicionário com parâmetros da forma de onda
-    """
-    log.info("Analisando Impulso Atmosférico (LI)...")
-    results = {
-        "waveform_type": "LI",
-        "peak_value_measured": None,
-        "peak_value_base": None,
-        "peak_value_test": None,
-        "peak_time_test_us": None,
-        "t_30_us": None,
-        "t_90_us": None,
-        "t_0_virtual_us": None,
-        "t_front_us": None,
-        "t_50_us": None,
-        "t_tail_us": None,
-        "overshoot_percent": 0.0,
-        "params_base_alpha": None,
-        "params_base_beta": None,
-        "conforme_frente": False,
-        "conforme_cauda": False,
-        "conforme_overshoot": True,
-        "conforme_pico": False,
-        "status_geral": "Indeterminado",
-        "error": None,
-    }
-
-    # Implementação da análise
-    # ...
-
-    return results
-
-
-def analyze_switching_impulse(t_us: np.ndarray, v_kv: np.ndarray) -> dict:
-    """
-    Analisa parâmetros de Impulso de Manobra (SI) conforme IEC 60060-1.
-
-    Args:
-        t_us: Array de tempo em μs
-        v_kv: Array de tensão em kV
-
-    Returns:
-        Dicionário com parâmetros da forma de onda
-    """
-    log.info("Analisando Impulso de Manobra (SI)...")
-    results = {
-        "waveform_type": "SI",
-        "peak_value_measured": None,
-        "peak_time_us": None,
-        "t_p_us": None,
-        "t_d_us": None,
-        "t_half_us": None,
-        "t_2_us": None,
-        "t_z_us": None,
-        "t_zero_us": None,
-        "t_ab_us": None,
-        "t_30_us": None,
-        "t_90_us": None,
-        "conforme_tp": False,
-        "conforme_t2": False,
-        "conforme_td": False,
-        "conforme_tzero": False,
-        "status_geral": "Indeterminado",
-        "error": None,
-    }
-
-    # Implementação da análise
-    # ...
-
-    return results
-
-
-def simulate_hybrid_impulse(
-    t_sec: np.ndarray,
-    v0_charge: float,
-    rf: float,
-    rt: float,
-    l_total: float,
-    c_gen: float,
-    c_load: float,
-    impulse_type: str,
-    gap_distance_cm: float = None,
-) -> tuple:
-    """
-    Simula o circuito de impulso usando a abordagem híbrida RLC + K-Factor + Dupla Exponencial.
-
-    Args:
-        t_sec: Array de tempo em segundos
-        v0_charge: Tensão de carga inicial em Volts
-        rf: Resistência de frente em Ohms
-        rt: Resistência de cauda em Ohms
-        l_total: Indutância total em Henries
-        c_gen: Capacitância do gerador em Farads
-        c_load: Capacitância da carga em Farads
-        impulse_type: Tipo de impulso ("lightning", "chopped", "switching")
-        gap_distance_cm: Distância do gap em cm (apenas para impulso cortado)
-
-    Returns:
-        Tupla com (v_rlc, v_final, i_load, alpha, beta, chop_time_sec)
-    """
-    log.info(f"Simulando Híbrido: Tipo={impulse_type}, V0_carga={v0_charge/1000:.1f}kV")
-
-    try:
-        # Cálculo da capacitância equivalente
-        c_eq = (c_gen * c_load) / (c_gen + c_load) if (c_gen + c_load) > 1e-15 else 0
-        r_rlc = rf + R_PARASITIC_OHM  # Adiciona resistência parasita
-
-        log.debug(f"Simulando RLC: R={r_rlc:.1f}, L={l_total:.2e}, Ceq={c_eq:.2e}")
-
-        # Solução RLC
-        v_rlc = rlc_solution(t_sec, v0_charge, r_rlc, l_total, c_eq)
-        v_rlc_kv = v_rlc / 1000  # Converte para kV para K-factor
-        t_us = t_sec * 1e6  # Converte para µs para K-factor
-
-        # Transformação K-factor
-        v_test, v_base, _, overshoot, (alpha_fit, beta_fit) = calculate_k_factor_transform(
-            v_rlc_kv, t_us, return_params=True
-        )
-
-        # Usa parâmetros ajustados ou estimativas
-        if alpha_fit is None or beta_fit is None:
-            log.warning("Ajuste K-factor falhou. Usando estimativas.")
-            alpha = 1 / (rt * (c_gen + c_load)) if rt > 1e-9 and (c_gen + c_load) > 1e-15 else 0
-            beta = 1 / (rf * c_eq) if rf > 1e-9 and c_eq > 1e-15 else 0
-
-            # Garante que beta > alpha
-            if beta <= alpha + 1e-9:
-                adjust_factor = 1.05
-                add_factor = 1e3 if impulse_type in ["lightning", "chopped"] else 1e2
-                beta = alpha * adjust_factor + add_factor
-        else:
-            alpha = alpha_fit
-            beta = beta_fit
-
-        log.info(f"Parâmetros K-factor: alpha={alpha:.2e}, beta={beta:.2e}")
-
-        # Gera forma de onda final com dupla exponencial
-        v_final = double_exp_func(t_sec, v0_charge, alpha, beta)
-
-        # Processa impulso cortado se necessário
-        chop_time_sec = None
-        if impulse_type == "chopped" and gap_distance_cm is not None and gap_distance_cm > 0:
-            # Tensão de breakdown estimada (30 kV/cm para polaridade positiva)
-            breakdown_voltage = 30.0 * gap_distance_cm * 1000  # Converte para V
-
-            # Encontra o primeiro ponto onde a tensão excede a tensão de breakdown
-            times_above_threshold = np.where(v_final >= breakdown_voltage)[0]
-
-            if len(times_above_threshold) > 0:
-                chop_idx = times_above_threshold[0]
-                if chop_idx < len(t_sec):
-                    chop_time_sec = t_sec[chop_idx]
-                    log.info(
-                        f"Corte detectado: t={chop_time_sec*1e6:.2f} µs, V={v_final[chop_idx]/1000:.1f} kV"
-                    )
-
-                    # Processa a forma de onda após o corte
-                    collapse_time = 0.1e-6  # 0.1 µs para colapso da tensão
-                    collapse_idx = np.where(t_sec >= chop_time_sec)[0]
-
-                    if len(collapse_idx) > 0:
-                        chop_voltage_final = v_final[chop_idx]
-                        dt_after_chop = t_sec[collapse_idx] - chop_time_sec
-
-                        # Índices para colapso e oscilação
-                        mask_collapse = dt_after_chop <= collapse_time
-                        mask_osc = dt_after_chop > collapse_time
-                        idx_collapse = collapse_idx[mask_collapse]
-                        idx_osc = collapse_idx[mask_osc]
-
-                        # Colapso linear da tensão
-                        if len(idx_collapse) > 0:
-                            v_final[idx_collapse] = chop_voltage_final * (
-                                1 - (t_sec[idx_collapse] - chop_time_sec) / collapse_time
-                            )
-
-                        # Oscilação amortecida após o colapso
-                        if len(idx_osc) > 0:
-                            freq_osc = 5e6  # 5 MHz - frequência típica de oscilação
-                            damp_factor = 1.5  # Fator de amortecimento
-                            undershoot_ratio = 0.25  # 25% de undershoot
-
-                            time_after_collapse = t_sec[idx_osc] - chop_time_sec - collapse_time
-                            amp = (
-                                -chop_voltage_final
-                                * undershoot_ratio
-                                * np.exp(-damp_factor * time_after_collapse * 1e6)
-                            )
-                            osc = amp * np.cos(2 * np.pi * freq_osc * time_after_collapse)
-
-                            v_final[idx_osc] = osc
-
-                            # Limita o undershoot e zera após algumas oscilações
-                            v_final[idx_osc] = np.clip(
-                                v_final[idx_osc], -0.3 * abs(chop_voltage_final), float("inf")
-                            )
-                            v_final[idx_osc[time_after_collapse > 3 / freq_osc]] = 0
-            else:
-                log.warning(
-                    f"Tensão não atingiu breakdown ({breakdown_voltage/1000:.1f} kV) para gap={gap_distance_cm} cm"
-                )
-
-        # Calcula corrente na carga (derivada da tensão)
-        i_load = c_load * np.gradient(v_final, t_sec)
-
-        return v_rlc, v_final, i_load, alpha, beta, chop_time_sec
-
-    except Exception as e:
-        log.exception(f"Erro na simulação de impulso híbrido: {e}")
-        return np.zeros_like(t_sec), np.zeros_like(t_sec), np.zeros_like(t_sec), 0, 0, None
+# --- Simulação e análise de formas de onda ---
+# Implementadas uma única vez em app_core.impulse_kernel (sem cache) e reexportadas aqui.
 
 
 def get_resistors_and_inductor(
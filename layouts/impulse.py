@@ -322,6 +322,7 @@ def create_impulse_layout(app=None):
                                     options=[
                                         {"label": "RLC+K", "value": "hybrid"},
                                         {"label": "RLC", "value": "rlc"},
+                                        {"label": "Marx (multiestágio)", "value": "marx"},
                                     ],
                                     value="hybrid",
                                     clearable=False,
@@ -0,0 +1,28 @@
+# tests/conftest.py
+"""Fixtures compartilhadas pelos testes."""
+import pytest
+
+from utils import mcp_disk_persistence
+
+
+@pytest.fixture
+def mcp_state_dir(tmp_path, monkeypatch):
+    """Redireciona a persistência do MCP em disco para um diretório temporário."""
+    data_file = tmp_path / "mcp_state.json"
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_DATA_DIR", tmp_path)
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_DATA_FILE", data_file)
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_BACKUP_DIR", tmp_path / "backups")
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_SESSIONS_DIR", tmp_path / "sessions")
+    monkeypatch.setattr(
+        mcp_disk_persistence,
+        "_STATE_VARIANTS",
+        {
+            "none": data_file,
+            "gzip": data_file.with_name(data_file.name + ".gz"),
+            "zstd": data_file.with_name(data_file.name + ".zst"),
+        },
+    )
+    monkeypatch.setattr(mcp_disk_persistence, "MCP_STATE_COMPRESSION", "none")
+    monkeypatch.setattr(mcp_disk_persistence, "_backups", mcp_disk_persistence._BackupChains())
+    yield tmp_path
+    mcp_disk_persistence.flush_pending_saves()
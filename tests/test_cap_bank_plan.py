@@ -0,0 +1,113 @@
+# tests/test_cap_bank_plan.py
+"""
+`optimize_cap_bank_plan` contra uma busca exaustiva em entradas pequenas.
+
+A referência usa as mesmas janelas de potência (`power_windows`), mas testa cada
+configuração de cada índice do catálogo e todas as combinações de coberturas, sem a
+redução de candidatos, a poda por dominância e o branch-and-bound do otimizador.
+"""
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from app_core import cap_bank
+from app_core.cap_bank_plan import PlanDemand, optimize_cap_bank_plan, power_windows
+from app_core.losses_engine import LossesEngine, LoadLossInputs, TransformerRating
+from app_core.losses_engine import cap_bank_plan_demands
+from benchmarks.losses_callbacks import CASES, transformer_store
+
+
+def _case_demands(name: str) -> tuple[list, str]:
+    case = CASES[name]
+    store = transformer_store(case)
+    nominal, menor, maior, temperatura = case["carga"]
+    inputs = LoadLossInputs(
+        nominal, menor, maior, case["vazio"][0], temperatura_referencia_c=temperatura
+    )
+    result = LossesEngine().load_losses(TransformerRating.from_store(store), inputs)
+    circuit_type = store.get("tipo_transformador", "Trifásico")
+    return cap_bank_plan_demands(result.resultados, result.scenarios), circuit_type
+
+
+def _brute_force(demands: list, circuit_type: str, check_eps: bool) -> tuple:
+    """(menor número de arranjos, total de chaves, rótulos sem arranjo)."""
+    lo, hi = power_windows(demands, circuit_type, check_eps)
+    tolerance = cap_bank.POWER_TOLERANCE_MVAR
+    best_switches = {}  # cobertura -> menor número de chaves
+    for pos, key in enumerate(cap_bank.CATALOG.keys):
+        index = cap_bank._get_index(key, circuit_type)
+        if index is None:
+            continue
+        for power, n_switches in zip(index.power.tolist(), index.n_switches.tolist()):
+            mask = sum(
+                1 << d
+                for d in range(len(demands))
+                if lo[d, pos] - tolerance <= power <= hi[d, pos] + tolerance
+            )
+            if mask and n_switches < best_switches.get(mask, np.inf):
+                best_switches[mask] = n_switches
+    coverable = 0
+    for mask in best_switches:
+        coverable |= mask
+    uncovered = [d.label for bit, d in enumerate(demands) if not coverable >> bit & 1]
+    if not coverable:
+        return 0, 0, uncovered
+    for size in range(1, len(demands) + 1):
+        costs = [
+            sum(best_switches[mask] for mask in combo)
+            for combo in itertools.combinations(best_switches, size)
+            if np.bitwise_or.reduce(combo) == coverable
+        ]
+        if costs:
+            return size, min(costs), uncovered
+    raise AssertionError("cobertura inatingível")
+
+
+def _subsets(name: str, size: int, count: int, seed: int):
+    demands, circuit_type = _case_demands(name)
+    rng = random.Random(seed)
+    return [(rng.sample(demands, min(size, len(demands))), circuit_type) for _ in range(count)]
+
+
+CASES_UNDER_TEST = [
+    subset
+    for name, seed in (
+        ("distribuicao_5MVA_34kV", 1),
+        ("forca_100MVA_230kV", 2),
+        ("auto_500MVA_500kV", 3),
+    )
+    for subset in _subsets(name, size=5, count=4, seed=seed)
+]
+
+
+@pytest.mark.parametrize("check_eps", [True, False])
+@pytest.mark.parametrize("demands,circuit_type", CASES_UNDER_TEST)
+def test_plan_matches_brute_force(demands, circuit_type, check_eps):
+    plan = optimize_cap_bank_plan(demands, circuit_type, check_eps=check_eps)
+    size, switches, uncovered = _brute_force(demands, circuit_type, check_eps)
+
+    assert plan.optimal
+    assert len(plan.setups) == size
+    assert sum(setup.config["n_switches"] for setup in plan.setups) == switches
+    assert [d.label for d in plan.uncovered] == uncovered
+    # Toda demanda atendível fica em exatamente um arranjo que de fato a atende
+    lo, hi = power_windows(demands, circuit_type, check_eps)
+    assigned = [d for setup in plan.setups for d in setup.demands]
+    assert sorted(d.label for d in assigned) == sorted(
+        d.label for d in demands if d.label not in uncovered
+    )
+    for setup in plan.setups:
+        pos = cap_bank.CATALOG.keys.index(setup.bank_voltage_kv)
+        for demand in setup.demands:
+            d = demands.index(demand)
+            power = setup.config["power_mvar"]
+            assert lo[d, pos] - 1e-6 <= power <= hi[d, pos] + 1e-6
+
+
+def test_empty_and_impossible_demands():
+    assert optimize_cap_bank_plan([]).setups == []
+    impossible = PlanDemand("Nominal", "25°C", "C/F", 5000.0, 10.0, 1.0)
+    plan = optimize_cap_bank_plan([impossible])
+    assert plan.setups == [] and plan.uncovered == [impossible]
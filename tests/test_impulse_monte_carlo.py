@@ -0,0 +1,43 @@
+# tests/test_impulse_monte_carlo.py
+"""
+Monte Carlo de impulso sobre o projeto da otimização: a carga inclui o divisor e o gap
+de corte como em `build_impulse_parameter_grid`, então o ponto nominal reproduz T1/T2.
+"""
+import pytest
+
+from app_core.calculations import (
+    calculate_effective_gen_params,
+    get_generator_params,
+    monte_carlo_impulse_tolerance,
+    optimize_impulse_circuit,
+)
+
+
+@pytest.mark.parametrize("impulse_type", ["lightning", "chopped"])
+def test_optimizer_design_passes_at_nominal(impulse_type):
+    best = optimize_impulse_circuit(3000.0, 1000.0, impulse_type)[0]
+    n_s, n_p, _, _ = get_generator_params(best["config_value"])
+    c_gen, l_gen = calculate_effective_gen_params(n_s, n_p)
+
+    result = monte_carlo_impulse_tolerance(
+        best["rf_per_column"] * n_s / n_p,
+        best["rt_per_column"] * n_s / n_p,
+        l_gen + best["inductor_h"],
+        c_gen,
+        3000.0,
+        impulse_type=impulse_type,
+        config_value=best["config_value"],
+        n_samples=400,
+        seed=1,
+    )
+
+    nominal = result["nominal"]
+    assert nominal["passes"]
+    assert nominal["t_front_us"] == pytest.approx(best["t_front_us"], rel=0.02)
+    assert nominal["t_tail_us"] == pytest.approx(best["t_tail_us"], rel=0.02)
+    assert result["pass_probability"] > 0.5
+
+
+def test_divider_is_required():
+    result = monte_carlo_impulse_tolerance(100.0, 500.0, 20e-6, 0.1e-6, 3000.0)
+    assert "error" in result
@@ -0,0 +1,72 @@
+# tests/test_impulse_simulation.py
+"""
+`simulate_impulse_test` (usado pelo botão "Simular Forma de Onda"): o circuito de cada
+modelo é montado como na otimização, com divisor, gap de corte e indutâncias externas.
+"""
+import pytest
+
+from app_core.calculations import (
+    calculate_effective_gen_params,
+    get_divider_capacitance,
+    get_generator_params,
+    optimize_impulse_circuit,
+    simulate_impulse_test,
+)
+from utils import constants
+
+CONFIG = "6S-2P"
+
+
+def _simulate(impulse_type="lightning", **kwargs):
+    kwargs.setdefault("model", "marx")
+    return simulate_impulse_test(CONFIG, 1000.0, 3000.0, 35.0, 50.0, impulse_type, **kwargs)
+
+
+@pytest.mark.parametrize("impulse_type", ["lightning", "chopped"])
+def test_marx_circuit_uses_full_load_and_generator(impulse_type):
+    result = _simulate(impulse_type, c_stray_pf=400.0, l_extra_h=10e-6, l_transformer_h=1e-3)
+    n_s, n_p, vmax_kv, _ = get_generator_params(CONFIG)
+    c_gen, l_gen = calculate_effective_gen_params(n_s, n_p)
+    c_gap = constants.C_CHOPPING_GAP_F if impulse_type == "chopped" else 0.0
+
+    assert result["c_gen_effective_f"] == pytest.approx(c_gen)
+    assert result["c_load_total_f"] == pytest.approx(
+        3400e-12 + get_divider_capacitance(vmax_kv) + c_gap
+    )
+    assert result["l_total_h"] == pytest.approx(l_gen + 10e-6 + 1e-3)
+
+
+def test_external_inductance_reaches_marx_model():
+    short = _simulate()["analysis"]["t_front_us"]
+    long = _simulate(l_extra_h=200e-6)["analysis"]["t_front_us"]
+    assert long > short * 1.2
+
+
+def test_marx_chopped_impulse_chops_at_gap():
+    result = _simulate("chopped", gap_distance_cm=33.0)
+    assert result["chop_time_us"] is not None
+    assert result["analysis"]["waveform_type"] == "LIC"
+    # Gap que não rompe: onda plena analisada como LI na janela completa
+    full = _simulate("chopped", gap_distance_cm=60.0)
+    assert full["chop_time_us"] is None
+    assert full["analysis"]["t_tail_us"] == pytest.approx(54.0, rel=0.1)
+
+
+def test_marx_matches_optimizer_design():
+    best = optimize_impulse_circuit(3000.0, 1000.0, "lightning")[0]
+    result = simulate_impulse_test(
+        best["config_value"],
+        1000.0,
+        3000.0,
+        best["rf_per_column"],
+        best["rt_per_column"],
+        l_inductor_h=best["inductor_h"],
+        model="marx",
+    )
+    analysis = result["analysis"]
+    assert 1.2 * 0.7 <= analysis["t_front_us"] <= 1.2 * 1.3
+    assert 50.0 * 0.8 <= analysis["t_tail_us"] <= 50.0 * 1.2
+
+
+def test_invalid_model_is_reported():
+    assert "error" in _simulate(model="spice")
@@ -0,0 +1,72 @@
+# tests/test_losses_graph.py
+"""
+`LoadLossGraph` (perdas em carga incrementais) deve reproduzir `LossesEngine.load_losses`
+em qualquer sequência de entradas, recalculando apenas o necessário.
+"""
+import dataclasses
+
+import pytest
+
+from app_core.losses_engine import LoadLossInputs, LossesEngine, TransformerRating
+from app_core.losses_graph import LoadLossGraph
+from benchmarks.losses_callbacks import CASES, transformer_store
+
+
+def _case_inputs(case: dict) -> tuple[TransformerRating, LoadLossInputs]:
+    rating = TransformerRating.from_store(transformer_store(case))
+    nominal, menor, maior, temperatura = case["carga"]
+    inputs = LoadLossInputs(
+        nominal, menor, maior, case["vazio"][0], temperatura_referencia_c=temperatura
+    )
+    return rating, inputs
+
+
+@pytest.fixture(scope="module")
+def engine() -> LossesEngine:
+    return LossesEngine()
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_graph_matches_engine(engine, name):
+    rating, inputs = _case_inputs(CASES[name])
+    graph = LoadLossGraph(engine)
+    sequence = [
+        inputs,
+        dataclasses.replace(inputs, temperatura_referencia_c=85),
+        dataclasses.replace(inputs, perdas_totais_max_kw=inputs.perdas_totais_max_kw * 1.05),
+        dataclasses.replace(inputs, perdas_vazio_kw=inputs.perdas_vazio_kw * 0.9),
+        inputs,
+    ]
+    for step in sequence:
+        assert graph.load_losses(rating, step).to_store() == (
+            engine.load_losses(rating, step).to_store()
+        )
+
+
+def test_unchanged_inputs_recompute_nothing(engine):
+    rating, inputs = _case_inputs(CASES["forca_100MVA_230kV"])
+    graph = LoadLossGraph(engine)
+    graph.load_losses(rating, inputs)
+    graph.load_losses(rating, inputs)
+    assert graph.last_recomputed == ()
+
+
+def test_temperature_change_reuses_cold_sut_rows(engine, monkeypatch):
+    rating, inputs = _case_inputs(CASES["forca_100MVA_230kV"])
+    graph = LoadLossGraph(engine)
+    full = graph.load_losses(rating, inputs)
+
+    batches = []
+    original = LossesEngine.load_sut_analysis
+
+    def recording(self, rows, circuit_type):
+        batches.append([(scenario, row["Tap"]) for scenario, row in rows])
+        return original(self, rows, circuit_type)
+
+    monkeypatch.setattr(LossesEngine, "load_sut_analysis", recording)
+    graph.load_losses(rating, dataclasses.replace(inputs, temperatura_referencia_c=85))
+
+    # Uma única chamada do kernel, apenas com as linhas que mudaram
+    assert len(batches) == 1
+    assert 0 < len(batches[0]) < len(full.sut_analysis)
+    assert "sut" in graph.last_recomputed
@@ -0,0 +1,78 @@
+# tests/test_mcp_disk_persistence.py
+"""
+Escrita em disco do MCP com debounce: salvamentos agrupados, gravação imediata com
+`flush_pending_saves` e gravação do pendente na saída do interpretador (atexit).
+"""
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from utils import mcp_disk_persistence
+from utils.mcp_disk_persistence import (
+    flush_pending_saves,
+    get_save_stats,
+    load_mcp_state_from_disk,
+    save_mcp_state_to_disk,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def long_debounce(monkeypatch):
+    """Janela de debounce longa: nada é gravado sem um flush explícito."""
+    monkeypatch.setattr(mcp_disk_persistence, "SAVE_DEBOUNCE_S", 60.0)
+    monkeypatch.setattr(mcp_disk_persistence, "SAVE_MAX_DELAY_S", 60.0)
+
+
+def test_saves_are_coalesced_until_flush(mcp_state_dir, long_debounce):
+    before = get_save_stats()
+    for value in (1.0, 2.0, 3.0):
+        assert save_mcp_state_to_disk({"losses-store": {"perdas_vazio_kw": value}})
+    assert not (mcp_state_dir / "mcp_state.json").exists()
+
+    assert flush_pending_saves()
+    stores, ok = load_mcp_state_from_disk()
+    assert ok and stores["losses-store"]["perdas_vazio_kw"] == 3.0
+    after = get_save_stats()
+    assert after["writes"] - before["writes"] == 1
+    assert after["coalesced"] - before["coalesced"] == 2
+
+
+def test_flush_writes_main_and_session_states(mcp_state_dir, long_debounce):
+    save_mcp_state_to_disk({"losses-store": {"perdas_vazio_kw": 1.0}})
+    save_mcp_state_to_disk({"losses-store": {"perdas_vazio_kw": 2.0}}, session_id="sessao_a")
+    assert flush_pending_saves()
+
+    assert load_mcp_state_from_disk()[0]["losses-store"]["perdas_vazio_kw"] == 1.0
+    stores, ok = load_mcp_state_from_disk("sessao_a")
+    assert ok and stores["losses-store"]["perdas_vazio_kw"] == 2.0
+    # Estados de sessão não entram nas cadeias de backup
+    assert len(list((mcp_state_dir / "backups").glob("*.base.json.gz"))) == 1
+
+
+def test_pending_save_is_written_at_exit(tmp_path):
+    script = textwrap.dedent(
+        f"""
+        from pathlib import Path
+        from utils import mcp_disk_persistence as p
+
+        data_dir = Path({str(tmp_path)!r})
+        p.MCP_DATA_DIR = data_dir
+        p.MCP_BACKUP_DIR = data_dir / "backups"
+        p.MCP_DATA_FILE = data_dir / "mcp_state.json"
+        p._STATE_VARIANTS = {{"none": p.MCP_DATA_FILE}}
+        p.MCP_STATE_COMPRESSION = "none"
+        p.SAVE_DEBOUNCE_S = p.SAVE_MAX_DELAY_S = 60.0
+        p.save_mcp_state_to_disk({{"losses-store": {{"perdas_vazio_kw": 42.0}}}})
+        assert not p.MCP_DATA_FILE.exists()
+        """
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True, timeout=60)
+
+    state = json.loads((tmp_path / "mcp_state.json").read_text(encoding="utf-8"))
+    assert state["stores"]["losses-store"]["perdas_vazio_kw"] == 42.0
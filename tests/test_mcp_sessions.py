@@ -0,0 +1,114 @@
+# tests/test_mcp_sessions.py
+"""
+MCP por sessão: isolamento entre navegadores, estado em disco por sessão e gravação na
+saída (o MCP padrão, com o estado da inicialização, nunca sobrescreve o das sessões).
+"""
+from types import SimpleNamespace
+
+import flask
+import pytest
+
+from app_core.mcp_sessions import SESSION_COOKIE, install_session_registry
+from app_core.transformer_mcp import TransformerMCP
+from utils.mcp_disk_persistence import flush_pending_saves, load_mcp_state_from_disk
+
+STORE = "losses-store"
+
+
+def _make_app():
+    """Aplicação mínima com `app.mcp` por sessão e rotas que usam o MCP como os callbacks."""
+    app = SimpleNamespace(server=flask.Flask(__name__), mcp=TransformerMCP())
+    registry = install_session_registry(app)
+
+    @app.server.route("/set/<value>")
+    def set_value(value):
+        app.mcp.set_data(STORE, {"perdas_vazio_kw": float(value)})
+        app.mcp.save_to_disk(force=True)
+        return "ok"
+
+    @app.server.route("/get")
+    def get_value():
+        return flask.jsonify(app.mcp.get_data(STORE).get("perdas_vazio_kw"))
+
+    return app, registry
+
+
+def _client(app, session_id=None):
+    client = app.server.test_client()
+    if session_id is not None:
+        client.set_cookie(SESSION_COOKIE, session_id)
+    return client
+
+
+def _session_id(client) -> str:
+    return client.get_cookie(SESSION_COOKIE).value
+
+
+@pytest.fixture
+def session_app(mcp_state_dir):
+    return _make_app()
+
+
+def test_sessions_are_isolated(session_app):
+    app, registry = session_app
+    a, b = _client(app), _client(app)
+    a.get("/set/111.0")
+    b.get("/set/222.0")
+
+    assert a.get("/get").json == 111.0
+    assert b.get("/get").json == 222.0
+    assert len(registry) == 2
+    assert registry.default.get_data(STORE).get("perdas_vazio_kw") is None
+
+
+def test_session_saves_go_to_the_session_file(session_app):
+    app, _ = session_app
+    a, b = _client(app), _client(app)
+    a.get("/set/111.0")
+    b.get("/set/222.0")
+    flush_pending_saves()
+
+    for client, expected in ((a, 111.0), (b, 222.0)):
+        stores, ok = load_mcp_state_from_disk(_session_id(client))
+        assert ok and stores[STORE]["perdas_vazio_kw"] == expected
+    # O estado principal só é gravado na saída
+    assert load_mcp_state_from_disk() == ({}, False)
+
+
+def test_exit_save_keeps_latest_session_state(session_app):
+    app, registry = session_app
+    a = _client(app)
+    a.get("/set/777.0")
+    _client(app).get("/get")  # Sessão aberta por último, sem alterações
+
+    # Fora de requisições `app.mcp` é o MCP padrão, com o estado da inicialização
+    assert app.mcp.get_data(STORE).get("perdas_vazio_kw") is None
+    assert registry.save_to_disk() == 1
+
+    stores, ok = load_mcp_state_from_disk()
+    assert ok and stores[STORE]["perdas_vazio_kw"] == 777.0
+    stores, ok = load_mcp_state_from_disk(_session_id(a))
+    assert ok and stores[STORE]["perdas_vazio_kw"] == 777.0
+
+
+def test_exit_save_without_changes_keeps_disk_state(session_app):
+    app, registry = session_app
+    _client(app).get("/get")
+    assert registry.save_to_disk() == 0
+    assert load_mcp_state_from_disk() == ({}, False)
+
+
+def test_session_restored_after_restart(session_app):
+    app, _ = session_app
+    a = _client(app)
+    a.get("/set/333.0")
+    flush_pending_saves()
+
+    restarted, _ = _make_app()
+    assert _client(restarted, _session_id(a)).get("/get").json == 333.0
+    assert _client(restarted).get("/get").json is None
+
+
+def test_invalid_session_id_is_rejected():
+    with pytest.raises(ValueError):
+        load_mcp_state_from_disk("../mcp_state")
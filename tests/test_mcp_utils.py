@@ -0,0 +1,44 @@
+# tests/test_mcp_utils.py
+"""`patch_mcp` com valores NumPy: sem ValueError e com tipos Python no MCP."""
+from types import SimpleNamespace
+
+import numpy as np
+
+from app_core.transformer_mcp import TransformerMCP
+from utils.mcp_utils import patch_mcp
+
+STORE = "losses-store"
+
+
+def _app():
+    return SimpleNamespace(mcp=TransformerMCP())
+
+
+def test_patch_mcp_accepts_numpy_values(mcp_state_dir):
+    app = _app()
+    patch = {
+        "perdas_vazio_kw": np.float64(12.5),
+        "n_fases": np.int64(3),
+        "correntes": np.array([1.0, 2.0]),
+        "sem_valores": np.array([]),
+        "nao_numero": np.float64("nan"),
+        "detalhes": {"tensao_kv": np.float32(13.8), "vazio": np.array([])},
+    }
+    assert patch_mcp(STORE, patch, app=app)
+
+    data = app.mcp.get_data(STORE)
+    assert data["perdas_vazio_kw"] == 12.5 and type(data["perdas_vazio_kw"]) is float
+    assert data["n_fases"] == 3 and type(data["n_fases"]) is int
+    assert list(data["correntes"]) == [1.0, 2.0]
+    assert all(type(x) is float for x in data["correntes"])
+    assert "sem_valores" not in data and "nao_numero" not in data
+    assert type(data["detalhes"]["tensao_kv"]) is float
+    assert "vazio" not in data["detalhes"]
+
+
+def test_patch_mcp_skips_empty_numpy_patch(mcp_state_dir):
+    app = _app()
+    assert not patch_mcp(STORE, {"vazio": np.array([]), "nada": None, "texto": ""}, app=app)
+    assert patch_mcp(STORE, {"perdas_vazio_kw": np.float64(1.0)}, app=app)
+    # Mesmo valor, agora como float do Python: nenhuma mudança efetiva
+    assert not patch_mcp(STORE, {"perdas_vazio_kw": 1.0}, app=app)
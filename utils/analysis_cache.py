@@ -0,0 +1,193 @@
+"""
+Cache LRU limitado para resultados de simulação e análise de formas de onda.
+As chaves são quantizadas (parâmetros escalares com dígitos significativos fixos e
+arrays por digest do conteúdo quantizado), de modo que re-renderizações com os mesmos
+parâmetros de circuito retornam o resultado armazenado sem recalcular.
+"""
+import copy
+import functools
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAXSIZE = 128
+DEFAULT_SIGNIFICANT_DIGITS = 9
+
+
+def _quantize_float(value: float, significant_digits: int) -> float:
+    """Arredonda um float para o número de dígitos significativos indicado."""
+    if not np.isfinite(value) or value == 0:
+        return float(value)
+    return float(f"{value:.{significant_digits - 1}e}")
+
+
+def _quantize_array(array: np.ndarray, significant_digits: int) -> tuple:
+    """
+    Representa um array pela forma, escala e digest dos valores quantizados
+    em relação ao maior valor absoluto.
+    """
+    array = np.asarray(array)
+    if array.dtype.kind not in "fiub":
+        digest = hashlib.blake2b(array.tobytes(), digest_size=16).hexdigest()
+        return ("array", array.shape, str(array.dtype), digest)
+    values = np.asarray(array, dtype=float)
+    finite = np.isfinite(values)
+    scale = float(np.max(np.abs(values[finite]))) if finite.any() else 0.0
+    if scale > 0:
+        quantized = np.round(np.where(finite, values / scale, 0.0) * 10**significant_digits)
+    else:
+        quantized = np.zeros_like(values)
+    digest = hashlib.blake2b(quantized.astype(np.int64).tobytes(), digest_size=16)
+    digest.update(finite.tobytes())
+    scale_key = _quantize_float(scale, significant_digits)
+    return ("array", values.shape, scale_key, digest.hexdigest())
+
+
+def quantize_key(value: Any, significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS) -> Any:
+    """
+    Converte argumentos em uma chave hashable e estável.
+
+    Floats são arredondados para `significant_digits` dígitos significativos, arrays
+    NumPy viram (forma, escala, digest) e contêineres são convertidos recursivamente.
+    """
+    if value is None or isinstance(value, (bool, str, int)):
+        return value
+    if isinstance(value, (float, np.floating)):
+        return _quantize_float(float(value), significant_digits)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.ndarray):
+        return _quantize_array(value, significant_digits)
+    if isinstance(value, (list, tuple)):
+        return tuple(quantize_key(v, significant_digits) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, quantize_key(v, significant_digits)) for k, v in value.items()))
+    return repr(value)
+
+
+def _copy_result(value: Any) -> Any:
+    """Copia o resultado para que o chamador não altere a entrada armazenada."""
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+class QuantizedLRUCache:
+    """
+    Cache LRU thread-safe com contadores de acertos, faltas e descartes.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Inicializa o cache.
+
+        Args:
+            maxsize: Número máximo de entradas mantidas (0 desativa o cache)
+        """
+        self.maxsize = max(0, int(maxsize))
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Retorna a entrada para `key` (marcando-a como recente) ou `default`."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Any, value: Any) -> None:
+        """Armazena `value`, descartando a entrada menos recente se necessário."""
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove todas as entradas e zera os contadores."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, key: Any) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def info(self) -> dict:
+        """Retorna estatísticas do cache (acertos, faltas, descartes, ocupação)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def memoize_quantized(
+    cache: QuantizedLRUCache,
+    significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS,
+) -> Callable:
+    """
+    Decorador que memoiza uma função pura em `cache` usando chaves quantizadas.
+
+    Args:
+        cache: Instância de QuantizedLRUCache compartilhada
+        significant_digits: Dígitos significativos usados na quantização dos argumentos
+
+    A função decorada expõe `cache_info()`, `cache_clear()` e `__wrapped__`.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                key = (
+                    func.__qualname__,
+                    quantize_key(args, significant_digits),
+                    quantize_key(kwargs, significant_digits),
+                )
+            except Exception as e:
+                log.debug(f"Argumentos de {func.__qualname__} não quantizáveis: {e}")
+                return func(*args, **kwargs)
+
+            missing = object()
+            cached = cache.get(key, missing)
+            if cached is not missing:
+                return _copy_result(cached)
+
+            result = func(*args, **kwargs)
+            cache.put(key, _copy_result(result))
+            return result
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
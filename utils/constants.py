@@ -40,12 +40,29 @@ CHOPPED_UNDERSHOOT_MAX = 0.20  # ≤ 20% para Undershoot após colapso
 
 # --- Parâmetros Físicos (Exemplo Gerador Haefely & Componentes) ---
 # (Estes valores são exemplos e DEVEM ser ajustados para o equipamento real)
-L_PER_STAGE_H = 5  # Indutância por estágio (Henry)
+L_PER_STAGE_H = 5e-6  # Indutância por estágio (Henry)
 C_PER_STAGE_F = 1.5e-6  # Capacitância por estágio (Farad)
 C_DIVIDER_HIGH_VOLTAGE_F = 600e-12  # Divisor para Vmax >= 1200kV (Farad)
 C_DIVIDER_LOW_VOLTAGE_F = 1200e-12  # Divisor para Vmax < 1200kV (Farad)
 C_CHOPPING_GAP_F = 600e-12  # Capacitância parasita do gap de corte (Farad)
 R_PARASITIC_OHM = 5.0  # Resistência parasita estimada do circuito (Ohm)
+MARX_STAGE_STRAY_C_F = 50e-12  # Capacitância parasita de cada nó entre estágios à terra (Farad)
+CHOPPING_GAP_R_OHM = 2.0  # Resistência do arco no gap de corte (Ohm)
+CHOPPING_GAP_L_H = 2e-6  # Indutância do laço de corte (Henry)
+GAP_BREAKDOWN_KV_PER_CM = 30.0  # Rigidez estimada do gap de corte (kV/cm)
+IMPULSE_ANALYSIS_CACHE_SIZE = 64  # Entradas do cache LRU de simulação/análise de impulso
+IMPULSE_CACHE_SIGNIFICANT_DIGITS = 9  # Quantização das chaves do cache (dígitos significativos)
+PLOT_MAX_POINTS_PER_TRACE = 2000  # Pontos máximos por trace enviados ao navegador
+
+# --- Tolerâncias de Componentes para Análise de Monte Carlo (meia-largura relativa) ---
+IMPULSE_COMPONENT_TOLERANCES = {
+    "rf": 0.05,  # Resistores de frente (±5%)
+    "rt": 0.05,  # Resistores de cauda (±5%)
+    "l_total": 0.10,  # Indutância do circuito (±10%)
+    "c_gen": 0.02,  # Capacitância do gerador (±2%)
+    "c_dut": 0.10,  # Capacitância do objeto sob ensaio (±10%)
+    "c_stray": 0.30,  # Capacitância parasita (±30%)
+}
 
 # --- Componentes Disponíveis (Para Dropdowns na UI) ---
 RESISTORS_LI_FRONT_AVAILABLE = [
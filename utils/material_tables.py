@@ -0,0 +1,229 @@
+"""
+Tabelas de material do núcleo (perdas W/kg e potência magnetizante VA/kg) compiladas em
+grades NumPy densas indução × frequência.
+As tabelas de `utils.constants` são convertidas uma única vez na importação; as consultas
+avaliam varreduras inteiras de (B, f) de uma só vez, por interpolação bilinear ou por
+Hermite cúbica (C1 ou monotônica) sobre a mesma grade.
+"""
+import logging
+from typing import Optional
+
+import numpy as np
+
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+INTERP_METHODS = ("linear", "cubic", "monotone")
+
+
+def _axis_slopes(values: np.ndarray, nodes: np.ndarray, axis: int, monotone: bool) -> np.ndarray:
+    """
+    Derivadas nodais de `values` ao longo de `axis` para a Hermite cúbica.
+
+    Nos nós internos usa a média ponderada das secantes vizinhas (cúbica C1) ou, se
+    `monotone`, a média harmônica ponderada de Fritsch-Carlson, que zera a derivada em
+    extremos locais e não cria oscilações. Nas bordas usa a secante do intervalo.
+    """
+    values = np.moveaxis(values, axis, 0)
+    slopes = np.zeros_like(values)
+    if nodes.size < 2:
+        return np.moveaxis(slopes, 0, axis)
+    h = np.diff(nodes).reshape((-1,) + (1,) * (values.ndim - 1))
+    delta = np.diff(values, axis=0) / h
+    slopes[0], slopes[-1] = delta[0], delta[-1]
+    if nodes.size > 2:
+        h0, h1 = h[:-1], h[1:]
+        d0, d1 = delta[:-1], delta[1:]
+        if monotone:
+            w0, w1 = 2 * h1 + h0, h1 + 2 * h0
+            with np.errstate(divide="ignore", invalid="ignore"):
+                harmonic = (w0 + w1) / (w0 / d0 + w1 / d1)
+            slopes[1:-1] = np.where(d0 * d1 > 0, harmonic, 0.0)
+        else:
+            slopes[1:-1] = (h1 * d0 + h0 * d1) / (h0 + h1)
+    return np.moveaxis(slopes, 0, axis)
+
+
+def _hermite_basis(t: np.ndarray) -> tuple:
+    """Bases de Hermite (h00, h10, h01, h11) no intervalo unitário."""
+    t2, t3 = t * t, t * t * t
+    return 2 * t3 - 3 * t2 + 1, t3 - 2 * t2 + t, -2 * t3 + 3 * t2, t3 - t2
+
+
+class GridTable2D:
+    """
+    Tabela (indução, frequência) -> valor compilada em uma grade densa.
+
+    Pontos ausentes na tabela original ficam como NaN na grade; consultas que dependem
+    deles retornam NaN (ou None em `lookup`).
+    """
+
+    def __init__(self, data: dict, name: str = "valor"):
+        """
+        Compila a tabela.
+
+        Args:
+            data: Dicionário {(inducao_T, frequencia_Hz): valor}
+            name: Nome usado em logs (ex.: "perdas_nucleo")
+        """
+        self.name = name
+        keys = np.asarray(list(data.keys()), dtype=float).reshape(-1, 2)
+        self.inducoes = np.unique(keys[:, 0])
+        self.frequencias = np.unique(keys[:, 1])
+        self.values = np.full((self.inducoes.size, self.frequencias.size), np.nan)
+        rows = np.searchsorted(self.inducoes, keys[:, 0])
+        cols = np.searchsorted(self.frequencias, keys[:, 1])
+        self.values[rows, cols] = np.fromiter(data.values(), dtype=float, count=len(data))
+        self._slopes: dict[str, tuple] = {}
+        missing = int(np.isnan(self.values).sum())
+        if missing:
+            log.debug(f"Tabela '{name}': {missing} pontos ausentes na grade")
+
+    @classmethod
+    def from_dataframe(cls, df, name: Optional[str] = None) -> "GridTable2D":
+        """Compila um DataFrame indexado por (inducao_nominal, frequencia_nominal)."""
+        column = df.columns[0]
+        index = zip(
+            df.index.get_level_values("inducao_nominal"),
+            df.index.get_level_values("frequencia_nominal"),
+        )
+        return cls(dict(zip(index, df[column].to_numpy())), name or str(column))
+
+    @property
+    def b_range(self) -> tuple[float, float]:
+        return float(self.inducoes[0]), float(self.inducoes[-1])
+
+    @property
+    def f_range(self) -> tuple[float, float]:
+        return float(self.frequencias[0]), float(self.frequencias[-1])
+
+    def _hermite_slopes(self, method: str) -> tuple:
+        """Derivadas nodais (dV/dB, dV/df, d²V/dBdf) do método, calculadas uma vez."""
+        if method not in self._slopes:
+            monotone = method == "monotone"
+            d_b = _axis_slopes(self.values, self.inducoes, 0, monotone)
+            d_f = _axis_slopes(self.values, self.frequencias, 1, monotone)
+            d_bf = (
+                np.zeros_like(self.values)
+                if monotone
+                else _axis_slopes(d_f, self.inducoes, 0, monotone=False)
+            )
+            self._slopes[method] = (d_b, d_f, d_bf)
+        return self._slopes[method]
+
+    def interp(self, b, f, method: str = "linear") -> np.ndarray:
+        """
+        Interpola a tabela em todos os pares (b, f) de uma vez.
+
+        As entradas são limitadas (clamp) ao domínio da tabela, como na busca original.
+
+        Args:
+            b: Indução(ões) em Tesla (escalar ou array)
+            f: Frequência(s) em Hz (escalar ou array, broadcast com `b`)
+            method: "linear" (bilinear), "cubic" (Hermite C1) ou "monotone"
+                (Hermite com derivadas de Fritsch-Carlson, sem overshoot)
+
+        Returns:
+            Array com a forma do broadcast de `b` e `f` (NaN para entradas inválidas).
+        """
+        if method not in INTERP_METHODS:
+            raise ValueError(f"Método de interpolação inválido: {method}")
+        b, f = np.broadcast_arrays(np.asarray(b, dtype=float), np.asarray(f, dtype=float))
+        b = np.clip(b, self.inducoes[0], self.inducoes[-1])
+        f = np.clip(f, self.frequencias[0], self.frequencias[-1])
+
+        # Índices da célula; eixos com um único nó usam a célula degenerada (0, 0)
+        n_b, n_f = self.inducoes.size, self.frequencias.size
+        i1 = np.clip(np.searchsorted(self.inducoes, b), 1, max(n_b - 1, 1)) if n_b > 1 else 0
+        j1 = np.clip(np.searchsorted(self.frequencias, f), 1, max(n_f - 1, 1)) if n_f > 1 else 0
+        i0, j0 = np.maximum(i1 - 1, 0), np.maximum(j1 - 1, 0)
+        hb = self.inducoes[i1] - self.inducoes[i0]
+        hf = self.frequencias[j1] - self.frequencias[j0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = np.where(hb > 0, (b - self.inducoes[i0]) / hb, 0.0)
+            v = np.where(hf > 0, (f - self.frequencias[j0]) / hf, 0.0)
+
+        q = self.values
+        q00, q01, q10, q11 = q[i0, j0], q[i0, j1], q[i1, j0], q[i1, j1]
+        if method == "linear":
+            return (
+                (1 - u) * (1 - v) * q00 + u * (1 - v) * q10 + (1 - u) * v * q01 + u * v * q11
+            )
+
+        d_b, d_f, d_bf = self._hermite_slopes(method)
+        hu0, hu1, hu2, hu3 = _hermite_basis(u)
+        hv0, hv1, hv2, hv3 = _hermite_basis(v)
+        value = hu0 * hv0 * q00 + hu2 * hv0 * q10 + hu0 * hv2 * q01 + hu2 * hv2 * q11
+        value += hb * (
+            hu1 * hv0 * d_b[i0, j0]
+            + hu3 * hv0 * d_b[i1, j0]
+            + hu1 * hv2 * d_b[i0, j1]
+            + hu3 * hv2 * d_b[i1, j1]
+        )
+        value += hf * (
+            hu0 * hv1 * d_f[i0, j0]
+            + hu2 * hv1 * d_f[i1, j0]
+            + hu0 * hv3 * d_f[i0, j1]
+            + hu2 * hv3 * d_f[i1, j1]
+        )
+        value += hb * hf * (
+            hu1 * hv1 * d_bf[i0, j0]
+            + hu3 * hv1 * d_bf[i1, j0]
+            + hu1 * hv3 * d_bf[i0, j1]
+            + hu3 * hv3 * d_bf[i1, j1]
+        )
+        return value
+
+    def lookup(self, b, f, method: str = "linear") -> Optional[float]:
+        """
+        Consulta escalar com validação; registra aviso quando (b, f) é limitado ao domínio.
+
+        Returns:
+            Valor interpolado ou None se as entradas forem inválidas ou o ponto não
+            puder ser interpolado (dados ausentes na tabela).
+        """
+        try:
+            b, f = float(b), float(f)
+        except (TypeError, ValueError):
+            log.warning(f"Entradas inválidas para a tabela '{self.name}': B={b}, f={f}")
+            return None
+        if np.isnan(b) or np.isnan(f):
+            log.warning(f"Valores NaN recebidos para a tabela '{self.name}'.")
+            return None
+        (b_min, b_max), (f_min, f_max) = self.b_range, self.f_range
+        if not b_min <= b <= b_max:
+            log.warning(
+                f"Indução de teste {b:.3f}T fora do range da tabela [{b_min}, {b_max}], "
+                f"usando {min(max(b, b_min), b_max):.3f}T."
+            )
+        if not f_min <= f <= f_max:
+            log.warning(
+                f"Frequência de teste {f:.1f}Hz fora do range da tabela [{f_min}, {f_max}], "
+                f"usando {min(max(f, f_min), f_max):.1f}Hz."
+            )
+        value = float(self.interp(b, f, method))
+        if np.isnan(value):
+            log.warning(f"Ponto B={b:.3f}T, f={f:.1f}Hz sem dados na tabela '{self.name}'.")
+            return None
+        return value
+
+    def node_value(self, b: float, f: float) -> Optional[float]:
+        """Valor tabelado exatamente no nó (b, f), ou None se o nó não existir."""
+        i = np.flatnonzero(np.abs(self.inducoes - b) <= 1e-9)
+        j = np.flatnonzero(np.abs(self.frequencias - f) <= 1e-9)
+        if not i.size or not j.size or np.isnan(self.values[i[0], j[0]]):
+            return None
+        return float(self.values[i[0], j[0]])
+
+
+# === Tabelas compiladas na importação ===
+
+TABELA_POTENCIA_MAGNET = GridTable2D(constants.potencia_magnet_data, "potencia_magnet")
+TABELA_PERDAS_NUCLEO = GridTable2D(constants.perdas_nucleo_data, "perdas_nucleo")
+TABELA_POTENCIA_MAGNET_H110_27 = GridTable2D(
+    constants.potencia_magnet_data_H110_27, "potencia_magnet_H110_27"
+)
+TABELA_PERDAS_NUCLEO_H110_27 = GridTable2D(
+    constants.perdas_nucleo_data_H110_27, "perdas_nucleo_H110_27"
+)
@@ -1,15 +1,40 @@
 """
 Utilitários para persistência de dados do MCP em disco.
 Permite salvar e carregar o estado do MCP entre sessões da aplicação.
+
+Os salvamentos são assíncronos: `save_mcp_state_to_disk` apenas agenda o estado e uma
+thread de escrita grava o mais recente após uma janela de debounce (salvamentos
+seguidos são agrupados). A gravação é atômica (arquivo temporário + `os.replace`), em
+JSON compacto, opcionalmente comprimido (gzip ou zstd, ver MCP_STATE_COMPRESSION).
+
+Os backups são incrementais: cada cadeia começa com um backup base (todos os stores) e
+segue com deltas contendo apenas os stores alterados; cada arquivo é um ponto de
+restauração.
+
+Com o MCP por sessão (app_core/mcp_sessions.py), cada sessão grava o próprio arquivo em
+`sessions/<id da sessão>.json` (sem backups); o arquivo principal só recebe o MCP global
+ou, na saída, a sessão usada por último.
 """
 
+import atexit
+import gzip
+import hashlib
 import json
 import logging
 import os
+import re
+import tempfile
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from utils.paths import get_data_dir
 
 log = logging.getLogger(__name__)
@@ -20,8 +45,34 @@ MCP_DATA_DIR = get_data_dir() / "mcp_state"
 MCP_DATA_FILE = MCP_DATA_DIR / "mcp_state.json"
 # Arquivo de backup para armazenar os dados do MCP
 MCP_BACKUP_DIR = MCP_DATA_DIR / "backups"
-# Número máximo de backups a manter
+# Estados das sessões de usuário (um arquivo por ID de sessão)
+MCP_SESSIONS_DIR = MCP_DATA_DIR / "sessions"
+# Número máximo de estados de sessão mantidos (os mais antigos são removidos)
+MAX_SESSION_STATES = 64
+# Número máximo de backups completos (formato antigo) a manter
 MAX_BACKUPS = 5
+# Número máximo de cadeias de backup incremental (base + deltas) a manter
+MAX_BACKUP_CHAINS = 3
+# Deltas por cadeia antes de iniciar um novo backup base
+BACKUP_DELTAS_PER_BASE = 20
+
+# Janela de debounce: grava após este intervalo sem novos salvamentos...
+SAVE_DEBOUNCE_S = 0.5
+# ...mas nunca adia um salvamento pendente por mais que isto
+SAVE_MAX_DELAY_S = 5.0
+
+# Compressão do arquivo principal: "none" (JSON compacto), "gzip" ou "zstd"
+MCP_STATE_COMPRESSION = os.environ.get("MCP_STATE_COMPRESSION", "none").lower()
+
+_STATE_VARIANTS = {
+    "none": MCP_DATA_FILE,
+    "gzip": MCP_DATA_FILE.with_name(MCP_DATA_FILE.name + ".gz"),
+    "zstd": MCP_DATA_FILE.with_name(MCP_DATA_FILE.name + ".zst"),
+}
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_BACKUP_NAME_RE = re.compile(r"^mcp_state_(\d{8}_\d{6}_\d{6})\.(base|d(\d{3}))\.json\.gz$")
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
 
 
 def ensure_mcp_dirs() -> None:
@@ -30,74 +81,349 @@ def ensure_mcp_dirs() -> None:
     """
     MCP_DATA_DIR.mkdir(exist_ok=True, parents=True)
     MCP_BACKUP_DIR.mkdir(exist_ok=True, parents=True)
-    log.info(f"Diretórios para persistência do MCP criados: {MCP_DATA_DIR}, {MCP_BACKUP_DIR}")
+    log.debug(f"Diretórios de persistência do MCP verificados: {MCP_DATA_DIR}")
+
+
+# --- Codificação ---
+
+
+def _encode_store(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _compose_state(timestamp: str, pieces: Dict[str, str]) -> str:
+    """Monta o JSON do estado a partir dos stores já codificados (sem recodificar)."""
+    stores = ",".join(f"{json.dumps(store_id)}:{piece}" for store_id, piece in pieces.items())
+    return f'{{"timestamp":{json.dumps(timestamp)},"version":"1.1","stores":{{{stores}}}}}'
+
+
+def _compression_mode() -> str:
+    mode = MCP_STATE_COMPRESSION
+    if mode not in _STATE_VARIANTS:
+        log.warning(f"MCP_STATE_COMPRESSION inválido ({mode!r}); usando 'none'")
+        return "none"
+    if mode == "zstd" and zstandard is None:
+        log.warning("Pacote zstandard não instalado; usando gzip para o estado do MCP")
+        return "gzip"
+    return mode
+
+
+def _compress(raw: bytes, mode: str) -> bytes:
+    if mode == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    if mode == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    return raw
+
+
+def _read_json_file(path: Path) -> Any:
+    """Lê um arquivo JSON, detectando gzip/zstd pelo cabeçalho."""
+    raw = path.read_bytes()
+    if raw.startswith(_GZIP_MAGIC):
+        raw = gzip.decompress(raw)
+    elif raw.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError(f"{path} usa zstd, mas o pacote zstandard não está instalado")
+        raw = zstandard.ZstdDecompressor().decompressobj().decompress(raw)
+    return json.loads(raw)
+
+
+def _atomic_write(path: Path, raw: bytes) -> None:
+    """Grava em um arquivo temporário no mesmo diretório e o renomeia sobre `path`."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _state_variants(session_id: Optional[str] = None) -> Dict[str, Path]:
+    """Arquivos de estado por modo de compressão: principal ou da sessão `session_id`."""
+    if session_id is None:
+        return _STATE_VARIANTS
+    if not _SESSION_ID_RE.match(session_id):
+        raise ValueError(f"ID de sessão inválido para o estado do MCP: {session_id!r}")
+    path = MCP_SESSIONS_DIR / f"{session_id}.json"
+    return {
+        "none": path,
+        "gzip": path.with_name(path.name + ".gz"),
+        "zstd": path.with_name(path.name + ".zst"),
+    }
+
+
+def _current_state_file(session_id: Optional[str] = None) -> Optional[Path]:
+    """Arquivo de estado mais recente entre as variantes (json, .gz, .zst)."""
+    existing = [path for path in _state_variants(session_id).values() if path.exists()]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+
+def cleanup_old_session_states() -> None:
+    """Mantém apenas os MAX_SESSION_STATES estados de sessão gravados mais recentemente."""
+    try:
+        # Arquivos temporários de gravação (".<nome>.*.tmp") não entram na contagem
+        states = sorted(
+            (path for path in MCP_SESSIONS_DIR.glob("*.json*") if not path.name.startswith(".")),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for old_file in states[MAX_SESSION_STATES:]:
+            old_file.unlink()
+            log.info(f"Estado de sessão antigo removido: {old_file.name}")
+    except Exception as e:
+        log.error(f"Erro ao limpar estados de sessão antigos: {e}", exc_info=True)
+
 
+# --- Gravação ---
 
-def save_mcp_state_to_disk(mcp_data: Dict[str, Any], create_backup: bool = True) -> bool:
+_write_lock = threading.Lock()
+
+
+def _write_state(
+    mcp_data: Dict[str, Any], create_backup: bool, session_id: Optional[str] = None
+) -> bool:
+    """
+    Grava o estado de forma atômica (síncrono). O estado principal registra o ponto de
+    restauração; o de uma sessão não tem backups.
+    """
+    try:
+        ensure_mcp_dirs()
+        variants = _state_variants(session_id)
+        if session_id is not None:
+            MCP_SESSIONS_DIR.mkdir(exist_ok=True, parents=True)
+        with _write_lock:
+            timestamp = datetime.now().isoformat()
+            pieces = {store_id: _encode_store(data) for store_id, data in mcp_data.items()}
+            mode = _compression_mode()
+            target = variants[mode]
+            document = _compose_state(timestamp, pieces).encode("utf-8")
+            _atomic_write(target, _compress(document, mode))
+            # Remove variantes antigas para que o carregamento não encontre estado obsoleto
+            for other in variants.values():
+                if other != target and other.exists():
+                    other.unlink()
+            if create_backup and session_id is None:
+                _backups.record(pieces, timestamp)
+        log.info(f"Estado do MCP salvo em disco: {target}")
+        if session_id is not None:
+            cleanup_old_session_states()
+        return True
+    except Exception as e:
+        log.error(f"Erro ao salvar estado do MCP em disco: {e}", exc_info=True)
+        return False
+
+
+class _DiskWriter:
     """
-    Salva o estado atual do MCP em disco.
+    Thread de escrita que agrupa salvamentos dentro da janela de debounce.
+
+    Há no máximo um salvamento pendente por arquivo de estado (principal ou de cada
+    sessão); um novo salvamento do mesmo arquivo substitui o pendente.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # ID da sessão (None: estado principal) -> (dados, criar backup)
+        self._pending: Dict[Optional[str], Tuple[Dict[str, Any], bool]] = {}
+        self._first_submit = 0.0
+        self._last_submit = 0.0
+        self._busy = False
+        self._flush_requested = False
+        self.last_ok = True
+        self.writes = 0
+        self.coalesced = 0
+
+    def submit(
+        self, mcp_data: Dict[str, Any], create_backup: bool, session_id: Optional[str] = None
+    ) -> None:
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_submit = now
+            if session_id in self._pending:
+                self.coalesced += 1
+                create_backup = create_backup or self._pending[session_id][1]
+            self._pending[session_id] = (mcp_data, create_backup)
+            self._last_submit = now
+            if self._thread is None or not self._thread.is_alive():
+                # Também recria a thread após um fork (ex.: workers do gunicorn)
+                self._thread = threading.Thread(
+                    target=self._run, name="mcp-disk-writer", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                while not self._flush_requested:
+                    deadline = min(
+                        self._last_submit + SAVE_DEBOUNCE_S, self._first_submit + SAVE_MAX_DELAY_S
+                    )
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                pending, self._pending = self._pending, {}
+                self._busy = True
+            results = [
+                _write_state(mcp_data, create_backup, session_id)
+                for session_id, (mcp_data, create_backup) in pending.items()
+            ]
+            ok = all(results)
+            with self._cond:
+                self._busy = False
+                self.last_ok = ok
+                self.writes += len(results)
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Grava imediatamente o salvamento pendente e aguarda a conclusão."""
+        with self._cond:
+            if not self._pending and not self._busy:
+                return self.last_ok
+            self._flush_requested = True
+            self._cond.notify_all()
+            try:
+                done = self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+            finally:
+                self._flush_requested = False
+            return done and self.last_ok
+
+
+_writer = _DiskWriter()
+
+
+def save_mcp_state_to_disk(
+    mcp_data: Dict[str, Any],
+    create_backup: bool = True,
+    wait: bool = False,
+    session_id: Optional[str] = None,
+) -> bool:
+    """
+    Agenda o salvamento do estado atual do MCP em disco.
+
+    A gravação ocorre na thread de escrita após a janela de debounce; salvamentos
+    agendados antes disso são substituídos pelo mais recente. `mcp_data` não deve ser
+    alterado depois da chamada (os snapshots do MCP são imutáveis).
 
     Args:
         mcp_data: Dicionário com os dados do MCP
-        create_backup: Se True, cria um backup antes de salvar
+        create_backup: Se True, registra um ponto de restauração (backup incremental;
+            apenas no estado principal)
+        wait: Se True, grava imediatamente e aguarda a conclusão
+        session_id: Grava o estado da sessão (`sessions/<id>.json`) em vez do principal
 
     Returns:
-        bool: True se o salvamento foi bem-sucedido, False caso contrário
+        bool: True se o salvamento foi agendado (ou, com wait=True, gravado com sucesso)
     """
-    ensure_mcp_dirs()
+    _state_variants(session_id)  # Valida o ID antes de agendar
+    _writer.submit(dict(mcp_data), create_backup, session_id)
+    if wait:
+        return _writer.flush()
+    log.debug("Salvamento do estado do MCP agendado")
+    return True
 
-    try:
-        # Criar backup se solicitado e se o arquivo existir
-        if create_backup and MCP_DATA_FILE.exists():
-            create_mcp_backup()
-
-        # Adicionar metadados
-        data_with_metadata = {
-            "timestamp": datetime.now().isoformat(),
-            "version": "1.0",
-            "stores": mcp_data,
+
+def flush_pending_saves(timeout: Optional[float] = 30.0) -> bool:
+    """
+    Grava imediatamente o salvamento pendente, se houver (também chamado na saída).
+
+    Returns:
+        bool: True se não havia pendência ou se a última gravação foi bem-sucedida
+    """
+    return _writer.flush(timeout)
+
+
+def get_save_stats() -> Dict[str, int]:
+    """Gravações realizadas e salvamentos agrupados (descartados pelo debounce)."""
+    return {"writes": _writer.writes, "coalesced": _writer.coalesced}
+
+
+atexit.register(flush_pending_saves)
+
+
+# --- Backups incrementais ---
+
+
+class _BackupChains:
+    """Cadeias de backup: um base com todos os stores seguido de deltas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chain_id: Optional[str] = None
+        self._seq = 0
+        self._hashes: Dict[str, str] = {}
+
+    def record(self, pieces: Dict[str, str], timestamp: str) -> Optional[Path]:
+        """Registra um ponto de restauração para os stores codificados em `pieces`."""
+        hashes = {
+            store_id: hashlib.blake2b(piece.encode("utf-8"), digest_size=16).hexdigest()
+            for store_id, piece in pieces.items()
         }
+        with self._lock:
+            if self._chain_id is None or self._seq >= BACKUP_DELTAS_PER_BASE:
+                self._chain_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+                self._seq = 0
+                changed, removed = pieces, []
+                path = MCP_BACKUP_DIR / f"mcp_state_{self._chain_id}.base.json.gz"
+            else:
+                changed = {
+                    store_id: piece
+                    for store_id, piece in pieces.items()
+                    if self._hashes.get(store_id) != hashes[store_id]
+                }
+                removed = [store_id for store_id in self._hashes if store_id not in pieces]
+                if not changed and not removed:
+                    return None  # Nada mudou desde o último ponto de restauração
+                self._seq += 1
+                path = MCP_BACKUP_DIR / f"mcp_state_{self._chain_id}.d{self._seq:03d}.json.gz"
+            document = _compose_state(timestamp, changed)
+            if removed:
+                document = document[:-1] + f',"removed":{json.dumps(removed)}}}'
+            _atomic_write(path, gzip.compress(document.encode("utf-8"), compresslevel=6))
+            self._hashes = hashes
+        log.info(f"Backup incremental do estado do MCP criado: {path.name}")
+        cleanup_old_backups()
+        return path
 
-        # Salvar dados em formato JSON
-        with open(MCP_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data_with_metadata, f, ensure_ascii=False, indent=2, default=str)
 
-        log.info(f"Estado do MCP salvo em disco: {MCP_DATA_FILE}")
-        return True
-    except Exception as e:
-        log.error(f"Erro ao salvar estado do MCP em disco: {e}", exc_info=True)
-        return False
+_backups = _BackupChains()
 
 
 def create_mcp_backup() -> Optional[Path]:
     """
-    Cria um backup do arquivo de estado do MCP.
+    Cria um ponto de restauração com o estado do MCP atualmente em disco.
 
     Returns:
-        Optional[Path]: Caminho para o arquivo de backup criado, ou None se falhou
+        Optional[Path]: Caminho para o arquivo de backup criado, ou None se falhou ou se
+        não houve alteração desde o último backup
     """
-    if not MCP_DATA_FILE.exists():
+    state_file = _current_state_file()
+    if state_file is None:
         log.warning(
             f"Arquivo de estado do MCP não existe, não é possível criar backup: {MCP_DATA_FILE}"
         )
         return None
 
     try:
-        # Criar nome de arquivo com timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_file = MCP_BACKUP_DIR / f"mcp_state_{timestamp}.json"
-
-        # Copiar arquivo
-        with open(MCP_DATA_FILE, "r", encoding="utf-8") as src:
-            with open(backup_file, "w", encoding="utf-8") as dst:
-                dst.write(src.read())
-
-        log.info(f"Backup do estado do MCP criado: {backup_file}")
-
-        # Limpar backups antigos
-        cleanup_old_backups()
-
-        return backup_file
+        ensure_mcp_dirs()
+        data = _read_json_file(state_file)
+        pieces = {
+            store_id: _encode_store(store_data)
+            for store_id, store_data in data.get("stores", {}).items()
+        }
+        return _backups.record(pieces, data.get("timestamp", datetime.now().isoformat()))
     except Exception as e:
         log.error(f"Erro ao criar backup do estado do MCP: {e}", exc_info=True)
         return None
@@ -105,52 +431,79 @@ def create_mcp_backup() -> Optional[Path]:
 
 def cleanup_old_backups() -> None:
     """
-    Remove backups antigos, mantendo apenas os MAX_BACKUPS mais recentes.
+    Remove backups antigos: mantém as MAX_BACKUP_CHAINS cadeias incrementais mais
+    recentes e os MAX_BACKUPS backups completos (formato antigo) mais recentes.
     """
     try:
-        # Listar todos os arquivos de backup
-        backup_files = list(MCP_BACKUP_DIR.glob("mcp_state_*.json"))
-
-        # Ordenar por data de modificação (mais recente primeiro)
-        backup_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-
-        # Remover arquivos excedentes
-        if len(backup_files) > MAX_BACKUPS:
-            for old_file in backup_files[MAX_BACKUPS:]:
+        chains: Dict[str, List[Path]] = {}
+        for file in MCP_BACKUP_DIR.glob("mcp_state_*.json.gz"):
+            match = _BACKUP_NAME_RE.match(file.name)
+            if match:
+                chains.setdefault(match.group(1), []).append(file)
+        for chain_id in sorted(chains, reverse=True)[MAX_BACKUP_CHAINS:]:
+            for old_file in chains[chain_id]:
                 old_file.unlink()
-                log.info(f"Backup antigo removido: {old_file}")
+            log.info(f"Cadeia de backup antiga removida: {chain_id}")
+
+        legacy_files = sorted(
+            MCP_BACKUP_DIR.glob("mcp_state_*.json"), key=os.path.getmtime, reverse=True
+        )
+        for old_file in legacy_files[MAX_BACKUPS:]:
+            old_file.unlink()
+            log.info(f"Backup antigo removido: {old_file}")
     except Exception as e:
         log.error(f"Erro ao limpar backups antigos: {e}", exc_info=True)
 
 
-def load_mcp_state_from_disk() -> Tuple[Dict[str, Any], bool]:
+def _restore_chain(backup_path: Path) -> Dict[str, Any]:
+    """Reconstrói os stores de um ponto de restauração: base + deltas até ele."""
+    match = _BACKUP_NAME_RE.match(backup_path.name)
+    chain_id = match.group(1)
+    upto = int(match.group(3) or 0)
+    base = _read_json_file(backup_path.with_name(f"mcp_state_{chain_id}.base.json.gz"))
+    stores = dict(base["stores"])
+    for seq in range(1, upto + 1):
+        delta = _read_json_file(backup_path.with_name(f"mcp_state_{chain_id}.d{seq:03d}.json.gz"))
+        stores.update(delta.get("stores", {}))
+        for store_id in delta.get("removed", []):
+            stores.pop(store_id, None)
+    return stores
+
+
+def load_mcp_state_from_disk(session_id: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
     """
     Carrega o estado do MCP a partir do disco.
 
+    Args:
+        session_id: Carrega o estado da sessão (`sessions/<id>.json`) em vez do principal
+
     Returns:
         Tuple[Dict[str, Any], bool]: (Dados carregados, Flag indicando sucesso)
     """
     ensure_mcp_dirs()
 
-    if not MCP_DATA_FILE.exists():
-        log.warning(f"Arquivo de estado do MCP não encontrado: {MCP_DATA_FILE}")
+    state_file = _current_state_file(session_id)
+    if state_file is None:
+        if session_id is None:
+            log.warning(f"Arquivo de estado do MCP não encontrado: {MCP_DATA_FILE}")
+        else:
+            log.debug(f"Sem estado gravado para a sessão {session_id[:8]}...")
         return {}, False
 
     try:
-        # Carregar dados do arquivo JSON
-        with open(MCP_DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Carregar dados do arquivo JSON (comprimido ou não)
+        data = _read_json_file(state_file)
 
         # Verificar se os dados têm o formato esperado
         if not isinstance(data, dict) or "stores" not in data:
-            log.error(f"Formato inválido no arquivo de estado do MCP: {MCP_DATA_FILE}")
+            log.error(f"Formato inválido no arquivo de estado do MCP: {state_file}")
             return {}, False
 
         # Extrair dados dos stores
         stores_data = data.get("stores", {})
 
         # Log de diagnóstico
-        log.info(f"Estado do MCP carregado do disco: {MCP_DATA_FILE}")
+        log.info(f"Estado do MCP carregado do disco: {state_file}")
         log.info(f"Timestamp dos dados: {data.get('timestamp', 'desconhecido')}")
         log.info(f"Stores carregados: {list(stores_data.keys())}")
 
@@ -165,16 +518,18 @@ def load_mcp_state_from_disk() -> Tuple[Dict[str, Any], bool]:
 
 def get_available_backups() -> List[Dict[str, Any]]:
     """
-    Obtém a lista de backups disponíveis.
+    Obtém a lista de backups disponíveis (pontos de restauração).
 
     Returns:
-        List[Dict[str, Any]]: Lista de backups com metadados
+        List[Dict[str, Any]]: Lista de backups com metadados; "kind" é "base" ou "delta"
+        (backups incrementais) ou "full" (backups completos do formato antigo)
     """
     ensure_mcp_dirs()
 
     try:
         # Listar todos os arquivos de backup
         backup_files = list(MCP_BACKUP_DIR.glob("mcp_state_*.json"))
+        backup_files += list(MCP_BACKUP_DIR.glob("mcp_state_*.json.gz"))
 
         # Criar lista de backups com metadados
         backups = []
@@ -186,15 +541,22 @@ def get_available_backups() -> List[Dict[str, Any]]:
                 # Obter tamanho do arquivo
                 size_bytes = os.path.getsize(file)
 
-                # Tentar extrair timestamp do nome do arquivo
+                # Tentar extrair timestamp e tipo do nome do arquivo
                 filename = file.name
-                timestamp_str = filename.replace("mcp_state_", "").replace(".json", "")
+                match = _BACKUP_NAME_RE.match(filename)
+                if match:
+                    timestamp_str = match.group(1)
+                    kind = "delta" if match.group(3) else "base"
+                else:
+                    timestamp_str = filename.replace("mcp_state_", "").replace(".json", "")
+                    kind = "full"
 
                 backups.append(
                     {
                         "file_path": str(file),
                         "filename": filename,
                         "timestamp": timestamp_str,
+                        "kind": kind,
                         "modified": mod_time.isoformat(),
                         "size_bytes": size_bytes,
                         "size_kb": round(size_bytes / 1024, 1),
@@ -217,7 +579,7 @@ def restore_from_backup(backup_file: str) -> Tuple[Dict[str, Any], bool]:
     Restaura o estado do MCP a partir de um arquivo de backup.
 
     Args:
-        backup_file: Caminho para o arquivo de backup
+        backup_file: Caminho para o arquivo de backup (base, delta ou completo)
 
     Returns:
         Tuple[Dict[str, Any], bool]: (Dados restaurados, Flag indicando sucesso)
@@ -228,26 +590,24 @@ def restore_from_backup(backup_file: str) -> Tuple[Dict[str, Any], bool]:
         return {}, False
 
     try:
-        # Criar backup do estado atual antes de restaurar
-        if MCP_DATA_FILE.exists():
-            create_mcp_backup()
-
-        # Carregar dados do arquivo de backup
-        with open(backup_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # Verificar se os dados têm o formato esperado
-        if not isinstance(data, dict) or "stores" not in data:
-            log.error(f"Formato inválido no arquivo de backup: {backup_file}")
+        if _BACKUP_NAME_RE.match(backup_path.name):
+            stores_data = _restore_chain(backup_path)
+        else:
+            # Backup completo (formato antigo)
+            data = _read_json_file(backup_path)
+            if not isinstance(data, dict) or "stores" not in data:
+                log.error(f"Formato inválido no arquivo de backup: {backup_file}")
+                return {}, False
+            stores_data = data.get("stores", {})
+
+        # Gravar salvamentos pendentes e criar backup do estado atual antes de restaurar
+        flush_pending_saves()
+        create_mcp_backup()
+
+        # Gravar o estado restaurado como estado principal
+        if not _write_state(stores_data, create_backup=False):
             return {}, False
 
-        # Extrair dados dos stores
-        stores_data = data.get("stores", {})
-
-        # Copiar arquivo de backup para o arquivo principal
-        with open(MCP_DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
-
         log.info(f"Estado do MCP restaurado a partir do backup: {backup_file}")
         return stores_data, True
     except json.JSONDecodeError as e:
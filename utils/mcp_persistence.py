@@ -3,7 +3,11 @@ Utilitários para garantir a persistência de dados no MCP durante a navegação
 """
 
 import logging
-from typing import Dict
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from utils import store_snapshot
+from utils.mcp_subscriptions import affected_stores, record_propagation
 
 log = logging.getLogger(__name__)
 
@@ -94,7 +98,12 @@ ISOLATION_KEYS = [
     "teste_tensao_aplicada_terciario", "nbi_neutro_terciario", "sil_neutro_terciario"
 ]
 
-def ensure_mcp_data_propagation(app, source_store: str, target_stores: list) -> Dict[str, bool]:
+def ensure_mcp_data_propagation(
+    app,
+    source_store: str,
+    target_stores: list,
+    changes: Optional[Dict[str, Tuple[Any, Any]]] = None,
+) -> Dict[str, bool]:
     """
     Propaga dados entre stores seguindo o padrão de "fonte única da verdade".
 
@@ -107,13 +116,19 @@ def ensure_mcp_data_propagation(app, source_store: str, target_stores: list) ->
     - Dados básicos não são propagados (devem ser referenciados do AUTHORITATIVE_STORE)
     - EXCEÇÃO: Valores de isolamento (NBI, SIL, etc.) são sincronizados com o AUTHORITATIVE_STORE
 
+    Com `changes` (diff por chave, ver utils.mcp_subscriptions.get_changes), apenas os
+    stores cujas assinaturas (STORE_SUBSCRIPTIONS) cruzam as chaves alteradas recebem essas
+    chaves. Em qualquer modo, stores que já estão em dia não são regravados.
+
     Args:
         app: Instância da aplicação Dash
         source_store: Nome do store de origem
         target_stores: Lista de nomes dos stores de destino
+        changes: Alterações da escrita no store de origem; None propaga todas as chaves
 
     Returns:
-        Dict[str, bool]: Dicionário com o status de atualização de cada store
+        Dict[str, bool]: Para cada store de destino, True se ele está em dia com a origem
+        (atualizado agora, já atualizado ou não afetado pelas alterações)
     """
     if not app.mcp:
         return {store: False for store in target_stores}
@@ -124,6 +139,8 @@ def ensure_mcp_data_propagation(app, source_store: str, target_stores: list) ->
         log.warning(f"[ensure_mcp_data_propagation] Store de origem {source_store} está vazio")
         return {store: False for store in target_stores}
 
+    started = time.perf_counter()
+
     # Verificar se a origem é a fonte-de-verdade
     is_authoritative = source_store == AUTHORITATIVE_STORE
 
@@ -132,17 +149,30 @@ def ensure_mcp_data_propagation(app, source_store: str, target_stores: list) ->
         f"[ensure_mcp_data_propagation] Store de origem {source_store} {'É' if is_authoritative else 'NÃO é'} a fonte-de-verdade para campos básicos"
     )
 
-    # Preparar os dados para propagação
-    results = {}
+    # Chaves a propagar por store de destino (None = todas as chaves da origem)
+    if changes is None:
+        keys_by_store = dict.fromkeys(target_stores)
+    else:
+        keys_by_store = affected_stores(
+            source_store, changes, AUTHORITATIVE_STORE, BASIC_FIELDS, target_stores
+        )
+        if is_authoritative:
+            # Stores ainda sem espelho da fonte-de-verdade recebem todas as chaves
+            for store in target_stores:
+                current_data = app.mcp.get_data(store) or {}
+                if not isinstance(current_data.get("transformer_data"), dict):
+                    keys_by_store[store] = None
 
-    # Usar a constante ISOLATION_KEYS definida no módulo
+    # Stores não afetados pelas alterações já estão em dia
+    results = {store: True for store in target_stores}
+    written, skipped = [], [store for store in target_stores if store not in keys_by_store]
 
     # Se a origem não é a fonte-de-verdade, verificar se há valores de isolamento para sincronizar
-    if not is_authoritative and source_store != AUTHORITATIVE_STORE:
+    if not is_authoritative and (changes is None or "transformer_data" in changes):
         # Verificar se há valores de isolamento no store de origem
         if "transformer_data" in source_data and isinstance(source_data["transformer_data"], dict):
             # Obter dados da fonte-de-verdade
-            auth_data = app.mcp.get_data(AUTHORITATIVE_STORE) or {}
+            auth_data = store_snapshot.mutable(app.mcp.get_data(AUTHORITATIVE_STORE))
 
             # Verificar se há valores de isolamento no store de origem que não estão na fonte-de-verdade
             updated_auth = False
@@ -163,76 +193,65 @@ def ensure_mcp_data_propagation(app, source_store: str, target_stores: list) ->
                 app.mcp.set_data(AUTHORITATIVE_STORE, auth_data)
                 log.info(f"[ensure_mcp_data_propagation] Fonte-de-verdade atualizada com valores de isolamento de {source_store}")
 
-    # Processar cada store de destino
-    for store in target_stores:
-        # Verificar se o store já tem dados
-        target_data = app.mcp.get_data(store)
+    auth_data = app.mcp.get_data(AUTHORITATIVE_STORE) or {}
 
-        # Inicializar ou obter transformer_data
-        if not target_data:
-            target_data = {}
+    # Processar cada store de destino afetado
+    for store, keys in keys_by_store.items():
+        current_data = app.mcp.get_data(store) or {}
+        source_items = (
+            source_data.items() if keys is None else [(key, source_data.get(key)) for key in keys]
+        )
 
-        if "transformer_data" not in target_data:
-            target_data["transformer_data"] = {}
-
-        # Determinar quais dados propagar com base na fonte
+        # Separar o que vai para transformer_data e o que vai para a raiz do store
+        nested_updates, root_updates = {}, {}
         if is_authoritative:
-            # Se a origem é a fonte-de-verdade, propagar todos os campos básicos
-            updated = False
-
-            # Propagar campos básicos para transformer_data
-            for key, value in source_data.items():
-                if key in BASIC_FIELDS and value is not None:
-                    target_data["transformer_data"][key] = value
-                    updated = True
-
-            # Propagar campos específicos (inputs_*)
-            for key, value in source_data.items():
-                if key.startswith('inputs_') and value is not None:
-                    target_data[key] = value
-                    updated = True
-
-            if updated:
-                app.mcp.set_data(store, target_data)
-                results[store] = True
-                log.info(f"[ensure_mcp_data_propagation] Dados básicos propagados para {store}")
-            else:
-                results[store] = False
-                log.debug(f"[ensure_mcp_data_propagation] Nenhuma atualização necessária para {store}")
-
+            # Campos básicos em transformer_data; campos específicos (inputs_*) na raiz
+            for key, value in source_items:
+                if value is None:
+                    continue
+                if key in BASIC_FIELDS:
+                    nested_updates[key] = value
+                elif key.startswith('inputs_'):
+                    root_updates[key] = value
         else:
-            # Se a origem NÃO é a fonte-de-verdade, propagar apenas dados específicos do módulo
-            # (não propagar campos básicos, que devem vir apenas da fonte-de-verdade)
-            updated = False
-
-            # Propagar apenas campos não-básicos para transformer_data
-            for key, value in source_data.items():
-                if key not in BASIC_FIELDS and not key.startswith('inputs_') and value is not None:
-                    target_data["transformer_data"][key] = value
-                    updated = True
-
-            # Propagar campos específicos (inputs_*)
-            for key, value in source_data.items():
-                if key.startswith('inputs_') and value is not None:
-                    target_data[key] = value
-                    updated = True
+            # Apenas dados específicos do módulo (campos básicos vêm só da fonte-de-verdade)
+            for key, value in source_items:
+                if value is None:
+                    continue
+                if key.startswith('inputs_'):
+                    root_updates[key] = value
+                elif key not in BASIC_FIELDS:
+                    nested_updates[key] = value
 
             # Sincronizar valores de isolamento com a fonte-de-verdade
-            auth_data = app.mcp.get_data(AUTHORITATIVE_STORE) or {}
             for key in ISOLATION_KEYS:
-                if key in auth_data and auth_data[key] is not None:
-                    target_data["transformer_data"][key] = auth_data[key]
+                if auth_data.get(key) is not None:
+                    nested_updates[key] = auth_data[key]
+
+        # Aplicar apenas o que difere do store atual
+        target_data = store_snapshot.mutable(current_data, "transformer_data")
+        if not isinstance(target_data.get("transformer_data"), dict):
+            target_data["transformer_data"] = {}
+        nested = target_data["transformer_data"]
+        updated = False
+        for container, updates in ((nested, nested_updates), (target_data, root_updates)):
+            for key, value in updates.items():
+                if key not in container or container[key] != value:
+                    container[key] = value
                     updated = True
-                    log.info(f"[ensure_mcp_data_propagation] Sincronizando valor de isolamento para {key}: {auth_data[key]}")
 
-            if updated:
-                app.mcp.set_data(store, target_data)
-                results[store] = True
-                log.info(f"[ensure_mcp_data_propagation] Dados específicos propagados para {store}")
-            else:
-                results[store] = False
-                log.debug(f"[ensure_mcp_data_propagation] Nenhuma atualização necessária para {store}")
+        results[store] = bool(nested_updates or root_updates)
+        if updated:
+            app.mcp.set_data(store, target_data)
+            written.append(store)
+            log.info(f"[ensure_mcp_data_propagation] Dados de {source_store} propagados para {store}")
+        else:
+            skipped.append(store)
+            log.debug(f"[ensure_mcp_data_propagation] Nenhuma atualização necessária para {store}")
 
+    record_propagation(
+        source_store, changes.keys() if changes is not None else None, written, skipped, started
+    )
     return results
 
 
@@ -277,7 +296,7 @@ def sync_isolation_values(app):
         return False
 
     # Obter dados da fonte-de-verdade
-    auth_data = app.mcp.get_data(AUTHORITATIVE_STORE) or {}
+    auth_data = store_snapshot.mutable(app.mcp.get_data(AUTHORITATIVE_STORE))
 
     # Verificar se há valores de isolamento em outros stores que não estão na fonte-de-verdade
     updated_auth = False
@@ -310,16 +329,19 @@ def sync_isolation_values(app):
             continue
 
         # Obter dados do store
-        target_data = app.mcp.get_data(store) or {}
+        target_data = store_snapshot.mutable(app.mcp.get_data(store), "transformer_data")
 
         # Inicializar transformer_data se não existir
         if "transformer_data" not in target_data:
             target_data["transformer_data"] = {}
 
-        # Sincronizar valores de isolamento com a fonte-de-verdade
+        # Sincronizar valores de isolamento com a fonte-de-verdade (só os que diferem)
         updated = False
         for key in ISOLATION_KEYS:
-            if key in auth_data and auth_data[key] is not None:
+            if (
+                auth_data.get(key) is not None
+                and target_data["transformer_data"].get(key) != auth_data[key]
+            ):
                 target_data["transformer_data"][key] = auth_data[key]
                 updated = True
                 log.debug(f"[sync_isolation_values] Sincronizando valor de isolamento para {key}: {auth_data[key]}")
@@ -0,0 +1,154 @@
+# utils/mcp_session_store.py
+"""
+Backend compartilhado (SQLite) dos stores do MCP por sessão.
+
+Permite que vários processos (ex.: workers do gunicorn) atendam a mesma sessão: cada
+worker mantém as sessões em memória (app_core/mcp_sessions.py), grava no backend os
+stores alterados ao fim de cada requisição e recarrega a sessão quando a versão no
+backend é mais nova que a sua.
+
+Interface usada pelo registro de sessões (um backend Redis precisa apenas dela):
+`session_version`, `load_session`, `save_stores` e `purge_idle`.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Tuple
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mcp_sessions (
+    session_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mcp_session_stores (
+    session_id TEXT NOT NULL,
+    store_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, store_id)
+);
+"""
+
+
+class SQLiteSessionStore:
+    """Stores do MCP por sessão em um arquivo SQLite (modo WAL, seguro entre processos)."""
+
+    def __init__(self, db_path: str, timeout: float = 10.0):
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+        log.info(f"[MCP SESSION STORE] Backend SQLite de sessões: {self.db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por operação: simples e segura entre threads e processos
+        return sqlite3.connect(self.db_path, timeout=self.timeout)
+
+    def session_version(self, session_id: str) -> int:
+        """Versão atual da sessão no backend (0 se não existir)."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version FROM mcp_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            return row[0] if row else 0
+        finally:
+            conn.close()
+
+    def load_session(self, session_id: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Carrega todos os stores da sessão.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: ({store_id: dados}, versão); ({}, 0) se não existir
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT version FROM mcp_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if not row:
+                return {}, 0
+            stores = {}
+            for store_id, data in conn.execute(
+                "SELECT store_id, data FROM mcp_session_stores WHERE session_id = ?",
+                (session_id,),
+            ):
+                try:
+                    stores[store_id] = json.loads(data)
+                except json.JSONDecodeError as e:
+                    log.error(f"[MCP SESSION STORE] JSON inválido em {session_id}/{store_id}: {e}")
+            return stores, row[0]
+        finally:
+            conn.close()
+
+    def save_stores(
+        self, session_id: str, stores: Dict[str, Any], expected_version: int
+    ) -> Tuple[int, bool]:
+        """
+        Grava os stores informados e incrementa a versão da sessão.
+
+        Args:
+            session_id: ID da sessão
+            stores: {store_id: dados} alterados
+            expected_version: Versão que o chamador tinha ao ler a sessão
+
+        Returns:
+            Tuple[int, bool]: (nova versão, True se outro processo gravou a sessão desde
+            `expected_version` e o chamador deve recarregá-la)
+        """
+        payload = [
+            (session_id, store_id, json.dumps(data, ensure_ascii=False, default=str))
+            for store_id, data in stores.items()
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT version FROM mcp_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                current = row[0] if row else 0
+                conn.executemany(
+                    "INSERT OR REPLACE INTO mcp_session_stores (session_id, store_id, data) "
+                    "VALUES (?, ?, ?)",
+                    payload,
+                )
+                new_version = current + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO mcp_sessions (session_id, version, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (session_id, new_version, time.time()),
+                )
+            return new_version, current != expected_version
+        finally:
+            conn.close()
+
+    def purge_idle(self, max_idle_s: float) -> int:
+        """Remove sessões sem gravação há mais de `max_idle_s` segundos; retorna quantas."""
+        cutoff = time.time() - max_idle_s
+        conn = self._connect()
+        try:
+            with conn:
+                stale = [
+                    (row[0],)
+                    for row in conn.execute(
+                        "SELECT session_id FROM mcp_sessions WHERE updated_at < ?", (cutoff,)
+                    )
+                ]
+                conn.executemany("DELETE FROM mcp_session_stores WHERE session_id = ?", stale)
+                conn.executemany("DELETE FROM mcp_sessions WHERE session_id = ?", stale)
+            if stale:
+                log.info(f"[MCP SESSION STORE] {len(stale)} sessões ociosas removidas do backend")
+            return len(stale)
+        finally:
+            conn.close()
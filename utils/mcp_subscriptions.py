@@ -0,0 +1,219 @@
+# utils/mcp_subscriptions.py
+"""
+Assinaturas de propagação entre os stores do MCP e rastreio do fan-out.
+
+Cada store declara de que depende: quais chaves da fonte-de-verdade
+(transformer-inputs-store) ele espelha em `transformer_data` e de quais stores de
+módulo recebe dados específicos. A propagação (utils/mcp_persistence*.py) calcula o
+diff por chave da escrita (`get_changes`) e atualiza apenas os stores cujas assinaturas
+cruzam as chaves alteradas; o rastreio registra o fan-out de cada escrita.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+log = logging.getLogger(__name__)
+
+TRACE_SIZE = 200
+
+
+@dataclass(frozen=True)
+class StoreSubscription:
+    """
+    Dependências de um store.
+
+    Attributes:
+        auth_keys: Campos básicos da fonte-de-verdade espelhados em `transformer_data`
+            (None = todos os campos básicos, como exige utils/data_integrity.py)
+        auth_prefixes: Prefixos de chaves da fonte-de-verdade copiadas na raiz do store
+        module_sources: Stores de módulo cujos dados específicos o store recebe
+    """
+
+    auth_keys: Optional[FrozenSet[str]] = None
+    auth_prefixes: Tuple[str, ...] = ("inputs_",)
+    module_sources: FrozenSet[str] = frozenset()
+
+    def auth_keys_affected(self, changed_keys: Iterable[str], basic_fields) -> Set[str]:
+        """Chaves alteradas na fonte-de-verdade que este store assina."""
+        return {
+            key
+            for key in changed_keys
+            if (key in basic_fields and (self.auth_keys is None or key in self.auth_keys))
+            or key.startswith(self.auth_prefixes)
+        }
+
+
+_MODULE_STORES = frozenset({
+    "losses-store",
+    "impulse-store",
+    "dieletric-analysis-store",
+    "applied-voltage-store",
+    "induced-voltage-store",
+    "short-circuit-store",
+    "temperature-rise-store",
+})
+
+# Dependências entre módulos (antes fixas em auto_update_on_change)
+STORE_SUBSCRIPTIONS: Dict[str, StoreSubscription] = {
+    "losses-store": StoreSubscription(),
+    "impulse-store": StoreSubscription(),
+    "dieletric-analysis-store": StoreSubscription(module_sources=frozenset({"impulse-store"})),
+    "applied-voltage-store": StoreSubscription(
+        module_sources=frozenset({"dieletric-analysis-store", "induced-voltage-store"})
+    ),
+    "induced-voltage-store": StoreSubscription(
+        module_sources=frozenset({"dieletric-analysis-store", "applied-voltage-store"})
+    ),
+    "short-circuit-store": StoreSubscription(
+        module_sources=frozenset({"losses-store", "temperature-rise-store"})
+    ),
+    "temperature-rise-store": StoreSubscription(
+        module_sources=frozenset({"losses-store", "short-circuit-store"})
+    ),
+    "comprehensive-analysis-store": StoreSubscription(module_sources=_MODULE_STORES),
+}
+
+
+def get_changes(old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Identifica as alterações entre dois conjuntos de dados.
+
+    Valores idênticos (mesmo objeto, caso comum com os snapshots imutáveis do MCP) são
+    descartados sem comparação profunda.
+
+    Args:
+        old_data: Dados antigos
+        new_data: Dados novos
+
+    Returns:
+        Dicionário com as alterações (chave: (valor_antigo, valor_novo))
+    """
+    old_data = old_data or {}
+    new_data = new_data or {}
+    changes = {}
+
+    # Identificar valores alterados ou adicionados
+    for key, new_value in new_data.items():
+        if key not in old_data:
+            changes[key] = (None, new_value)
+        else:
+            old_value = old_data[key]
+            if old_value is not new_value and old_value != new_value:
+                changes[key] = (old_value, new_value)
+
+    # Identificar valores removidos
+    for key in old_data:
+        if key not in new_data:
+            changes[key] = (old_data[key], None)
+
+    return changes
+
+
+def affected_stores(
+    source_store: str,
+    changed_keys: Iterable[str],
+    auth_store: str,
+    basic_fields,
+    target_stores: Optional[Iterable[str]] = None,
+) -> Dict[str, Set[str]]:
+    """
+    Stores afetados por uma escrita e as chaves que cada um deve receber.
+
+    Args:
+        source_store: Store alterado
+        changed_keys: Chaves alteradas (ver get_changes)
+        auth_store: ID da fonte-de-verdade
+        basic_fields: Campos básicos da fonte-de-verdade
+        target_stores: Restringe o resultado a estes stores (None = todos os assinantes)
+
+    Returns:
+        Dict[str, Set[str]]: {store afetado: chaves a propagar}
+    """
+    changed_keys = set(changed_keys)
+    candidates = STORE_SUBSCRIPTIONS if target_stores is None else target_stores
+    affected = {}
+    for store in candidates:
+        subscription = STORE_SUBSCRIPTIONS.get(store)
+        if store == source_store or subscription is None:
+            continue
+        if source_store == auth_store:
+            keys = subscription.auth_keys_affected(changed_keys, basic_fields)
+        elif source_store in subscription.module_sources:
+            keys = changed_keys
+        else:
+            keys = set()
+        if keys:
+            affected[store] = keys
+    return affected
+
+
+# --- Rastreio ---
+
+_trace: deque = deque(maxlen=TRACE_SIZE)
+_trace_lock = threading.Lock()
+_totals = {"propagations": 0, "stores_written": 0, "stores_skipped": 0}
+
+
+def record_propagation(
+    source_store: str,
+    changed_keys: Optional[Iterable[str]],
+    written: List[str],
+    skipped: List[str],
+    started: float,
+) -> None:
+    """
+    Registra uma propagação: fan-out (stores gravados) e stores dispensados.
+
+    Args:
+        source_store: Store de origem
+        changed_keys: Chaves alteradas (None = propagação completa, sem diff)
+        written: Stores efetivamente gravados
+        skipped: Stores avaliados e não gravados (não assinam as chaves ou já estavam em dia)
+        started: time.perf_counter() no início da propagação
+    """
+    entry = {
+        "timestamp": time.time(),
+        "source": source_store,
+        "changed_keys": sorted(changed_keys) if changed_keys is not None else None,
+        "fan_out": len(written),
+        "written": list(written),
+        "skipped": list(skipped),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    with _trace_lock:
+        _trace.append(entry)
+        _totals["propagations"] += 1
+        _totals["stores_written"] += len(written)
+        _totals["stores_skipped"] += len(skipped)
+    log.debug(
+        f"[MCP PROPAGATION] {source_store}: fan-out {len(written)} "
+        f"({', '.join(written) or '-'}), {len(skipped)} dispensados, "
+        f"chaves={entry['changed_keys'] if changed_keys is not None else 'todas'}, "
+        f"{entry['elapsed_ms']} ms"
+    )
+
+
+def get_propagation_trace(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Últimas propagações registradas (mais recentes por último)."""
+    with _trace_lock:
+        entries = list(_trace)
+    return entries[-limit:] if limit else entries
+
+
+def propagation_stats() -> Dict[str, float]:
+    """Totais de propagações e fan-out médio por escrita."""
+    with _trace_lock:
+        stats = dict(_totals)
+    stats["mean_fan_out"] = (
+        stats["stores_written"] / stats["propagations"] if stats["propagations"] else 0.0
+    )
+    return stats
+
+
+def reset_propagation_trace() -> None:
+    with _trace_lock:
+        _trace.clear()
+        _totals.update(dict.fromkeys(_totals, 0))
@@ -3,16 +3,45 @@
 Utilitários para manipulação do MCP (Master Control Program).
 Fornece funções para manipular dados do MCP de forma segura.
 """
-import copy
 import logging
-from typing import Any, Dict
-
+from typing import Any, Dict, List
 
+import numpy as np
 
+from utils import store_snapshot
 from utils.mcp_persistence import _dados_ok, ESSENTIAL
+from utils.store_diagnostics import convert_numpy_types
 
 log = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+def _merge_patch(current, patch: Dict[str, Any], prefix: str, changed: List[str]):
+    """
+    Mescla `patch` em `current` recursivamente, sem alterar nenhum dos dois.
+
+    Retorna o próprio `current` se nenhum valor mudou; caso contrário, um dicionário
+    novo que copia apenas os níveis dos caminhos alterados e compartilha o restante.
+    Os caminhos alterados ("chave.subchave") são acrescentados a `changed`.
+    """
+    base = current if isinstance(current, dict) else {}
+    merged = None
+    for key, value in patch.items():
+        old = base.get(key, _MISSING)
+        if isinstance(value, dict) and isinstance(old, dict):
+            new = _merge_patch(old, value, f"{prefix}{key}.", changed)
+        elif old is not _MISSING and store_snapshot.same_content(value, old):
+            new = old
+        else:
+            new = value
+            changed.append(f"{prefix}{key}")
+        if new is not old:
+            if merged is None:
+                merged = store_snapshot.mutable(base)
+            merged[key] = new
+    return base if merged is None else merged
+
 
 def patch_mcp(store_id: str, data: Dict[str, Any], app=None) -> bool:
     """
@@ -27,10 +56,12 @@ def patch_mcp(store_id: str, data: Dict[str, Any], app=None) -> bool:
     Returns:
         bool: True se algum campo foi atualizado, False caso contrário
     """
-    from app import app as global_app
-
     # Usar a instância global se não fornecida
-    app_instance = app or global_app
+    if app is None:
+        from app import app as global_app
+
+        app = global_app
+    app_instance = app
 
     # Verificar se o MCP está disponível
     if not hasattr(app_instance, "mcp") or app_instance.mcp is None:
@@ -47,15 +78,27 @@ def patch_mcp(store_id: str, data: Dict[str, Any], app=None) -> bool:
 
         result = {}
         for k, v in data_dict.items():
+            # Escalares e arrays NumPy viram tipos Python antes dos testes de vazio
+            # (`array in (None, "", [])` levanta ValueError)
+            if isinstance(v, np.generic):
+                v = v.item()
+            elif isinstance(v, np.ndarray):
+                v = v.tolist()
             if isinstance(v, dict):
                 # Recursivamente filtrar dicionários aninhados
                 filtered = filter_non_empty(v)
                 if filtered:  # Adicionar apenas se o dicionário filtrado não estiver vazio
                     result[k] = filtered
-            elif v not in (None, "", []):
+            elif not (v is None or (isinstance(v, (str, list)) and not v)):
                 result[k] = v
         return result
 
+    # Converter apenas o patch para tipos serializáveis (o store atual já é um snapshot)
+    try:
+        data = convert_numpy_types(data, debug_path=f"patch_mcp.{store_id}")
+    except Exception as e:
+        log.error(f"[patch_mcp] Erro ao converter dados para tipos serializáveis: {e}")
+
     # Filtrar apenas os campos não vazios do novo data, incluindo estruturas aninhadas
     valid_data = filter_non_empty(data)
 
@@ -63,86 +106,12 @@ def patch_mcp(store_id: str, data: Dict[str, Any], app=None) -> bool:
         log.debug(f"[patch_mcp] Nenhum dado válido para atualizar em {store_id}")
         return False
 
-    # Função recursiva para mesclar dicionários aninhados
-    def deep_merge(source, destination):
-        for key, value in source.items():
-            if isinstance(value, dict):
-                # Se o valor é um dicionário, mesclar recursivamente
-                node = destination.setdefault(key, {})
-                if isinstance(node, dict):
-                    deep_merge(value, node)
-                else:
-                    # Se o destino não é um dicionário, substituir
-                    destination[key] = value
-            else:
-                # Para valores não-dicionário, simplesmente substituir
-                destination[key] = value
-        return destination
-
-    # Verificar se há mudanças efetivas
-    changes = False
+    # Mesclar percorrendo apenas os caminhos do patch: subárvores são comparadas pelo
+    # hash de conteúdo (guardado nos snapshots) e nada é copiado se nada mudou
     changed_fields = []
+    updated_data = _merge_patch(current_data, valid_data, "", changed_fields)
 
-    # Criar uma cópia dos dados atuais
-    updated_data = copy.deepcopy(current_data)
-
-    # Mesclar os dados válidos com os dados atuais
-    deep_merge(valid_data, updated_data)
-
-    # Verificar se houve mudanças comparando os dicionários chave por chave
-    # Isso evita problemas com casting (int → float, str → int)
-    if updated_data.keys() != current_data.keys():
-        changes = True
-        changed_fields.append("keys_different")
-    else:
-        for key in updated_data:
-            # Se o valor é um dicionário, verificar recursivamente
-            if isinstance(updated_data[key], dict) and isinstance(current_data.get(key), dict):
-                # Verificação simplificada: se os dicionários têm chaves diferentes, há mudanças
-                if set(updated_data[key].keys()) != set(current_data[key].keys()):
-                    changes = True
-                    changed_fields.append(f"{key}.keys")
-                    break
-                # Verificar valores dentro do dicionário
-                for subkey in updated_data[key]:
-                    # Se um dos valores é None e o outro não, são diferentes
-                    if (updated_data[key][subkey] is None and current_data[key].get(subkey) is not None) or \
-                       (updated_data[key][subkey] is not None and current_data[key].get(subkey) is None):
-                        changes = True
-                        changed_fields.append(f"{key}.{subkey}")
-                        break
-
-                    # Se ambos não são None, converter para string para comparação mais segura
-                    if updated_data[key][subkey] is not None and current_data[key].get(subkey) is not None:
-                        updated_val = str(updated_data[key][subkey])
-                        current_val = str(current_data[key].get(subkey))
-
-                        if updated_val != current_val:
-                            changes = True
-                            changed_fields.append(f"{key}.{subkey}")
-                            break
-                if changes:
-                    break
-            # Para valores simples, comparar como strings para evitar problemas de tipo
-            else:
-                # Se um dos valores é None e o outro não, são diferentes
-                if (updated_data[key] is None and current_data.get(key) is not None) or \
-                   (updated_data[key] is not None and current_data.get(key) is None):
-                    changes = True
-                    changed_fields.append(key)
-                    break
-
-                # Se ambos não são None, converter para string para comparação mais segura
-                if updated_data[key] is not None and current_data.get(key) is not None:
-                    updated_val = str(updated_data[key])
-                    current_val = str(current_data.get(key))
-
-                    if updated_val != current_val:
-                        changes = True
-                        changed_fields.append(key)
-                        break
-
-    if not changes:
+    if not changed_fields:
         log.debug(f"[patch_mcp] Nenhuma mudança efetiva em {store_id}")
         return False
     else:
@@ -154,19 +123,8 @@ def patch_mcp(store_id: str, data: Dict[str, Any], app=None) -> bool:
         missing_fields = [k for k in ESSENTIAL if updated_data.get(k) in (None, "", 0)]
         log.warning(f"[patch_mcp] Dados essenciais faltando: {missing_fields}, mas continuando com a gravação")
 
-    # Importar a função de conversão de tipos numpy
-    from utils.store_diagnostics import convert_numpy_types
-
-    # Converter os dados para tipos serializáveis antes de salvar no MCP
-    try:
-        serializable_data = convert_numpy_types(updated_data, debug_path=f"patch_mcp.{store_id}")
-        log.info(f"[patch_mcp] Dados convertidos para tipos serializáveis antes de salvar no MCP")
-    except Exception as e:
-        log.error(f"[patch_mcp] Erro ao converter dados para tipos serializáveis: {e}")
-        serializable_data = updated_data  # Usar os dados originais se a conversão falhar
-
     # Salvar os dados atualizados no MCP
-    app_instance.mcp.set_data(store_id, serializable_data)
+    app_instance.mcp.set_data(store_id, updated_data)
 
     log.info(f"[patch_mcp] Atualizado {store_id} com dados válidos")
     return True
@@ -0,0 +1,111 @@
+"""
+Decimação de séries para gráficos Plotly, preservando mínimos e máximos.
+Reduz o número de pontos enviados ao navegador sem esconder picos, instantes de
+corte ou cruzamentos por zero. Independente do Dash: opera sobre arrays NumPy ou
+sobre os traces de um go.Figure já montado.
+"""
+import logging
+from typing import Iterable, Optional
+
+import numpy as np
+
+from utils import constants
+
+log = logging.getLogger(__name__)
+
+
+def decimate_minmax_indices(
+    y: np.ndarray, max_points: int, keep_indices: Optional[Iterable[int]] = None
+) -> np.ndarray:
+    """
+    Seleciona índices de `y` pelo método de envelope mín/máx.
+
+    A série é dividida em max_points // 2 blocos contíguos e, de cada bloco, mantêm-se
+    as amostras de mínimo e de máximo. Sempre são incluídos o primeiro e o último ponto,
+    o pico absoluto, os cruzamentos por zero (se couberem em 1/4 do orçamento) e os
+    índices em `keep_indices`.
+
+    Returns:
+        Índices crescentes e únicos das amostras mantidas.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if n <= max_points or max_points < 4:
+        return np.arange(n)
+
+    n_buckets = max(1, max_points // 2)
+    bucket_len = int(np.ceil(n / n_buckets))
+    n_rows = int(np.ceil(n / bucket_len))
+    padded_max = np.full(n_rows * bucket_len, -np.inf)
+    padded_min = np.full(n_rows * bucket_len, np.inf)
+    finite = np.isfinite(y)
+    padded_max[:n] = np.where(finite, y, -np.inf)
+    padded_min[:n] = np.where(finite, y, np.inf)
+    row_start = np.arange(n_rows) * bucket_len
+    idx_max = row_start + np.argmax(padded_max.reshape(n_rows, bucket_len), axis=1)
+    idx_min = row_start + np.argmin(padded_min.reshape(n_rows, bucket_len), axis=1)
+
+    extra = [0, n - 1]
+    if finite.any():
+        extra.append(int(np.argmax(np.where(finite, np.abs(y), -np.inf))))
+    signs = np.sign(np.where(finite, y, 0.0))
+    zero_cross = np.nonzero(signs[:-1] * signs[1:] < 0)[0]
+    if 2 * zero_cross.size <= max_points // 4:
+        extra.extend(zero_cross)
+        extra.extend(zero_cross + 1)
+    if keep_indices is not None:
+        extra.extend(int(i) for i in keep_indices if 0 <= int(i) < n)
+
+    return np.unique(np.concatenate([idx_min, idx_max, np.asarray(extra, dtype=int)]))
+
+
+def decimate_trace(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int = constants.PLOT_MAX_POINTS_PER_TRACE,
+    keep_x: Optional[Iterable[float]] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decima o par (x, y) para no máximo ~max_points amostras (mais os pontos obrigatórios).
+
+    Args:
+        x: Abscissas crescentes (tempo, frequência...)
+        y: Ordenadas
+        max_points: Orçamento de pontos por trace
+        keep_x: Abscissas que devem permanecer no trace (ex.: instante de corte);
+            usa-se a amostra mais próxima de cada uma
+
+    Returns:
+        Tupla (x_decimado, y_decimado).
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if y.size <= max_points or x.size != y.size:
+        return x, y
+    keep_indices = None
+    if keep_x is not None:
+        keep = np.asarray([k for k in keep_x if k is not None], dtype=float)
+        if keep.size:
+            keep_indices = np.clip(np.searchsorted(x, keep), 0, x.size - 1)
+    idx = decimate_minmax_indices(y, max_points, keep_indices)
+    return x[idx], y[idx]
+
+
+def decimate_figure(fig, max_points: int = constants.PLOT_MAX_POINTS_PER_TRACE, keep_x=None):
+    """
+    Aplica `decimate_trace` a todos os traces com x e y de um go.Figure (in place).
+
+    Returns:
+        O próprio figure, para encadeamento.
+    """
+    for trace in fig.data:
+        x = getattr(trace, "x", None)
+        y = getattr(trace, "y", None)
+        if x is None or y is None or len(y) <= max_points:
+            continue
+        try:
+            x_dec, y_dec = decimate_trace(np.asarray(x), np.asarray(y), max_points, keep_x)
+            trace.x, trace.y = x_dec, y_dec
+        except (TypeError, ValueError) as e:
+            log.debug(f"Trace '{getattr(trace, 'name', '')}' não decimado: {e}")
+    return fig
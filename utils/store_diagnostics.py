@@ -106,8 +106,11 @@ def convert_numpy_types(obj: Any, debug_path: str = "") -> Any:
         # Trata NaN e Infinito para np.floating
         if isinstance(obj, np.floating) and (np.isnan(obj) or np.isinf(obj)):
             return None  # Converte NaN/Inf para None (serializável)
+        # np.float64 é subclasse de float: converte para o float do Python
+        if isinstance(obj, np.floating):
+            return float(obj)
         # Para float e int normais, retorna diretamente sem conversão
-        return obj if isinstance(obj, (float, int)) else float(obj)
+        return obj
     elif isinstance(obj, np.ndarray):
         # Converte array para lista, aplicando recursivamente a conversão
         try:
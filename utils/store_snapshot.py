@@ -0,0 +1,330 @@
+# utils/store_snapshot.py
+"""
+Snapshots imutáveis dos stores do MCP com compartilhamento estrutural.
+
+Os stores são mantidos como árvores de `FrozenDict`/`FrozenList` (subclasses de dict e
+list, serializáveis em JSON como antes, que rejeitam alterações). Como nada pode
+alterar um snapshot, `get_data` devolve o próprio snapshot, sem cópia.
+
+Na escrita, `freeze(novo, anterior)` reaproveita todo nó igual ao do snapshot anterior
+(ou que já seja um nó congelado), de modo que apenas o caminho alterado é copiado. Para
+editar, `mutable(snapshot, "a", ("b", "c"))` devolve uma cópia rasa editável do nível
+superior e dos caminhos indicados; o restante continua compartilhado.
+
+Cada nó congelado guarda (sob demanda) o hash do conteúdo da sua subárvore; como os nós
+inalterados são reaproveitados, após uma escrita só os nós do caminho alterado precisam
+recalcular o hash, e comparar subárvores (`same_content`) custa O(1) quando já calculado.
+
+Contadores de bytes copiados (totais e por requisição) comparam o custo atual com o da
+implementação anterior, que fazia `copy.deepcopy` em toda leitura e reconstruía o store
+inteiro em toda escrita.
+"""
+import hashlib
+import logging
+import math
+import numbers
+import sys
+import threading
+from typing import Any
+
+from utils.store_diagnostics import convert_numpy_types
+
+log = logging.getLogger(__name__)
+
+_MISSING = object()
+_PLAIN_LEAVES = (str, int, float, bool, type(None))
+COUNTER_FIELDS = ("reads", "writes", "nodes_copied", "bytes_copied", "bytes_copied_legacy")
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(
+        f"{type(self).__name__} é um snapshot imutável do MCP; "
+        "use store_snapshot.mutable() para obter uma cópia editável."
+    )
+
+
+class FrozenDict(dict):
+    """Dicionário imutável de um snapshot; `nbytes` é o tamanho da subárvore."""
+
+    __slots__ = ("nbytes", "chash")
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self) -> dict:
+        """Cópia rasa editável (os valores continuam compartilhados)."""
+        return dict(self)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo) -> dict:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+class FrozenList(list):
+    """Lista imutável de um snapshot; `nbytes` é o tamanho da subárvore."""
+
+    __slots__ = ("nbytes", "chash")
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = reverse = sort = clear = _readonly
+
+    def copy(self) -> list:
+        return list(self)
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo) -> list:
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+
+# --- Contadores ---
+
+
+class _Counters(threading.local):
+    """Contadores da requisição em andamento na thread (None fora de requisições)."""
+
+    active = None
+
+
+_totals = dict.fromkeys(COUNTER_FIELDS, 0)
+_totals_lock = threading.Lock()
+_request = _Counters()
+
+
+def _count(**increments) -> None:
+    with _totals_lock:
+        for name, value in increments.items():
+            _totals[name] += value
+    if _request.active is not None:
+        for name, value in increments.items():
+            _request.active[name] += value
+
+
+def begin_request() -> None:
+    """Inicia a contagem da requisição atual (thread atual)."""
+    _request.active = dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def end_request() -> dict:
+    """Encerra a contagem da requisição atual e retorna seus contadores."""
+    counters, _request.active = _request.active, None
+    return counters or dict.fromkeys(COUNTER_FIELDS, 0)
+
+
+def copy_stats() -> dict:
+    """Totais desde o início do processo (ou de `reset_copy_stats`)."""
+    with _totals_lock:
+        return dict(_totals)
+
+
+def reset_copy_stats() -> None:
+    with _totals_lock:
+        _totals.update(dict.fromkeys(COUNTER_FIELDS, 0))
+
+
+def record_read(snapshot) -> None:
+    """Leitura sem cópia; o custo anterior era um deepcopy do snapshot inteiro."""
+    _count(reads=1, bytes_copied_legacy=nbytes(snapshot))
+
+
+# --- Congelamento ---
+
+
+def nbytes(value) -> int:
+    """Tamanho aproximado (sys.getsizeof) da árvore de `value`."""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value.nbytes
+    if isinstance(value, (dict, list, tuple)):
+        children = value.values() if isinstance(value, dict) else value
+        return sys.getsizeof(value) + sum(nbytes(child) for child in children)
+    return sys.getsizeof(value)
+
+
+def _new_node(cls, items, children) -> Any:
+    node = cls(items)
+    shallow = sys.getsizeof(node)
+    node.nbytes = shallow + sum(nbytes(child) for child in children)
+    _count(nodes_copied=1, bytes_copied=shallow)
+    return node
+
+
+def _freeze(value, previous, debug_path: str):
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        prev = previous if isinstance(previous, FrozenDict) else None
+        same = prev is not None and len(prev) == len(value)
+        items = {}
+        for key, child in value.items():
+            prev_child = prev.get(key, _MISSING) if prev is not None else _MISSING
+            frozen = _freeze(child, prev_child, debug_path)
+            items[key] = frozen
+            same = same and frozen is prev_child
+        return prev if same else _new_node(FrozenDict, items, items.values())
+    if isinstance(value, list):
+        prev = previous if isinstance(previous, FrozenList) else None
+        same = prev is not None and len(prev) == len(value)
+        items = []
+        for i, child in enumerate(value):
+            prev_child = prev[i] if prev is not None and i < len(prev) else _MISSING
+            frozen = _freeze(child, prev_child, debug_path)
+            items.append(frozen)
+            same = same and frozen is prev_child
+        return prev if same else _new_node(FrozenList, items, items)
+    if isinstance(value, tuple):
+        return tuple(_freeze(child, _MISSING, debug_path) for child in value)
+    if type(value) not in _PLAIN_LEAVES:
+        # numpy, datetime, set, pandas...: mesma conversão de convert_numpy_types
+        value = convert_numpy_types(value, debug_path)
+        if isinstance(value, (dict, list, tuple)):
+            return _freeze(value, previous, debug_path)
+    if previous is not _MISSING and type(previous) is type(value) and previous == value:
+        return previous
+    return value
+
+
+def freeze(value, previous=None, debug_path: str = "") -> Any:
+    """
+    Converte `value` em snapshot imutável (tipos numpy etc. convertidos como em
+    `convert_numpy_types`), reaproveitando os nós iguais de `previous`.
+
+    Nós já congelados são reaproveitados sem cópia; quando nada mudou em relação a
+    `previous`, o próprio `previous` é retornado.
+    """
+    frozen = _freeze(value, _MISSING if previous is None else previous, debug_path)
+    _count(writes=1, bytes_copied_legacy=nbytes(frozen))
+    return frozen
+
+
+def thaw(value) -> Any:
+    """Cópia profunda editável (dict/list comuns) de um snapshot."""
+    if isinstance(value, dict):
+        result = {key: thaw(child) for key, child in value.items()}
+    elif isinstance(value, list):
+        result = [thaw(child) for child in value]
+    elif isinstance(value, tuple):
+        return tuple(thaw(child) for child in value)
+    else:
+        return value
+    _count(nodes_copied=1, bytes_copied=sys.getsizeof(result))
+    return result
+
+
+def _shallow(value):
+    result = dict(value) if isinstance(value, dict) else list(value)
+    _count(nodes_copied=1, bytes_copied=sys.getsizeof(result))
+    return result
+
+
+def mutable(value, *paths) -> Any:
+    """
+    Cópia rasa editável de um snapshot (dict ou list).
+
+    Args:
+        value: Snapshot (ou None, tratado como dicionário vazio)
+        paths: Caminhos que também serão copiados para edição, como chave ("a") ou
+            tupla de chaves (("a", "b")); caminhos inexistentes são ignorados
+
+    Example:
+        data = mutable(mcp.get_data("losses-store"), "transformer_data")
+        data["transformer_data"]["tensao_at"] = 138.0
+        mcp.set_data("losses-store", data)
+    """
+    if value is None:
+        return {}
+    root = _shallow(value)
+    for path in paths:
+        node = root
+        for key in (path,) if not isinstance(path, tuple) else path:
+            if not isinstance(node, dict) or not isinstance(node.get(key), (dict, list)):
+                break
+            child = node[key]
+            if isinstance(child, (FrozenDict, FrozenList)):
+                child = node[key] = _shallow(child)
+            node = child
+    return root
+
+
+# --- Hash de conteúdo ---
+
+
+def _leaf_token(value) -> bytes:
+    """Forma canônica de uma folha: números iguais (1 == 1.0) têm o mesmo token."""
+    if value is None:
+        return b"n"
+    if isinstance(value, bool):
+        return b"t" if value else b"f"
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8", "surrogatepass")
+    if isinstance(value, numbers.Integral):
+        value = int(value)
+        try:
+            as_float = float(value)
+        except OverflowError:
+            as_float = math.inf
+        if as_float != value:
+            return b"i" + str(value).encode()
+        value = as_float
+    if isinstance(value, numbers.Real):
+        value = float(value)
+        if math.isnan(value):
+            return b"x:nan"
+        return b"x" + (value or 0.0).hex().encode()  # -0.0 == 0.0
+    return b"r" + repr(value).encode("utf-8", "backslashreplace")
+
+
+def _first(item):
+    return item[0]
+
+
+def _update_framed(digest, data: bytes) -> None:
+    # Prefixo de tamanho: concatenações diferentes não podem gerar o mesmo fluxo
+    digest.update(len(data).to_bytes(4, "little"))
+    digest.update(data)
+
+
+def content_hash(value) -> bytes:
+    """
+    Hash estrutural do conteúdo de `value` (snapshot ou dados comuns).
+
+    Dicionários são comparados sem considerar a ordem das chaves e números pelo valor
+    (1 == 1.0; NaN é igual a NaN). Nós congelados guardam o hash calculado, de modo que
+    subárvores reaproveitadas entre escritas não são percorridas de novo.
+    """
+    if isinstance(value, (FrozenDict, FrozenList)):
+        cached = getattr(value, "chash", None)
+        if cached is not None:
+            return cached
+    if isinstance(value, dict):
+        digest = hashlib.blake2b(b"d", digest_size=16)
+        items = sorted(((_leaf_token(k), v) for k, v in value.items()), key=_first)
+        for key_token, child in items:
+            _update_framed(digest, key_token)
+            _update_framed(digest, content_hash(child))
+        result = digest.digest()
+    elif isinstance(value, (list, tuple)):
+        digest = hashlib.blake2b(b"l", digest_size=16)
+        for child in value:
+            _update_framed(digest, content_hash(child))
+        result = digest.digest()
+    elif type(value) in _PLAIN_LEAVES or isinstance(value, numbers.Number):
+        # Folhas curtas usam o próprio token; o prefixo as distingue dos digests de nós
+        token = _leaf_token(value)
+        return b"v" + (token if len(token) <= 16 else hashlib.blake2b(token).digest()[:16])
+    else:
+        # numpy, datetime, set...: mesma conversão de freeze
+        converted = convert_numpy_types(value, "content_hash")
+        return content_hash(converted) if converted is not value else b"v" + _leaf_token(value)
+    if isinstance(value, (FrozenDict, FrozenList)):
+        value.chash = result
+    return result
+
+
+def same_content(a, b) -> bool:
+    """Igualdade estrutural via content_hash (O(1) para subárvores já congeladas e iguais)."""
+    return a is b or content_hash(a) == content_hash(b)